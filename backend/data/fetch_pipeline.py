@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+并发采集流水线
+
+将按股票采集拆分为两段，分别在独立的线程池上执行：
+- 请求段：只调用远程接口（由调用方传入的 RateLimiter 令牌桶统一限速），网络 I/O 可以多路并发
+- 写入段：解析、标准化并写入本地 Parquet，不占用请求线程
+
+任务会乱序完成，断点（checkpoint）按输入顺序推进：只有某只股票之前的所有股票都已处理完毕，
+才会把它记为「最后成功处理的股票」，因此中断后按 resume-after 续跑不会漏掉任何股票。
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+class OrderedCheckpoint:
+    """按输入顺序推进的断点记录"""
+
+    def __init__(self, items: List[str], on_advance: Optional[Callable[[str], None]] = None):
+        """
+        初始化断点记录
+
+        :param items: 按处理顺序排列的任务列表（股票代码）
+        :param on_advance: 断点推进时的回调，参数为最后一个成功处理、且之前任务均已结束的 item
+        """
+        self.items = list(items)
+        self.on_advance = on_advance
+        self.finished = [False] * len(self.items)
+        self.succeeded = [False] * len(self.items)
+        self.watermark = 0  # 前 watermark 个任务均已结束（成功或失败）
+        self.last_ok: Optional[str] = None
+        self.lock = threading.Lock()
+
+    def mark(self, index: int, ok: bool) -> Optional[str]:
+        """
+        标记第 index 个任务结束，并尝试推进断点
+
+        :param index: 任务在 items 中的位置
+        :param ok: 是否成功
+        :return: 当前断点（最后成功处理的 item），尚无则为 None
+        """
+        with self.lock:
+            self.finished[index] = True
+            self.succeeded[index] = ok
+
+            last_ok = self.last_ok
+            while self.watermark < len(self.items) and self.finished[self.watermark]:
+                if self.succeeded[self.watermark]:
+                    self.last_ok = self.items[self.watermark]
+                self.watermark += 1
+
+            # 在锁内回调，保证断点文件按推进顺序写入
+            if self.last_ok != last_ok and self.on_advance:
+                self.on_advance(self.last_ok)
+            return self.last_ok
+
+
+class FetchPipeline:
+    """请求与写入分离的并发采集流水线"""
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Any],
+        save: Callable[[str, Any], bool],
+        fetch_workers: int = 4,
+        save_workers: int = 2,
+        max_pending: Optional[int] = None,
+        checkpoint: Optional[Callable[[str], None]] = None,
+        rate_limiter=None,
+        sleep: float = 0.0,
+        log_every: int = 10,
+    ):
+        """
+        初始化采集流水线
+
+        :param fetch: 请求函数 fetch(item) -> payload，只做接口调用；返回 None 表示无需写入（已是最新或空数据）
+        :param save: 写入函数 save(item, payload) -> bool，负责解析与 Parquet 写入
+        :param fetch_workers: 请求线程数，通常与 RateLimiter 的 concurrency 一致
+        :param save_workers: 解析与写入线程数
+        :param max_pending: 已提交但尚未写入完成的任务上限，防止请求远快于写入时原始数据堆积在内存中；
+            默认为 fetch_workers + 2 * save_workers
+        :param checkpoint: 断点推进时的回调，参数为最后成功处理的 item
+        :param rate_limiter: 用于在进度日志中展示请求速率，需提供 get_status()
+        :param sleep: 每个请求线程处理完一只股票后的休眠秒数
+        :param log_every: 每完成多少只股票输出一次进度
+        """
+        self.fetch = fetch
+        self.save = save
+        self.fetch_workers = max(1, int(fetch_workers))
+        self.save_workers = max(1, int(save_workers))
+        self.max_pending = max_pending or self.fetch_workers + 2 * self.save_workers
+        self.checkpoint = checkpoint
+        self.rate_limiter = rate_limiter
+        self.sleep = sleep
+        self.log_every = log_every
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def run(self, items: List[str]) -> Tuple[int, List[Tuple[str, str]]]:
+        """
+        执行采集
+
+        :param items: 按顺序排列的股票代码列表
+        :return: (成功数, 失败列表 [(item, reason), ...])，失败列表按输入顺序排列
+        """
+        items = list(items)
+        self._ckpt = OrderedCheckpoint(items, self.checkpoint)
+        self._pending = threading.BoundedSemaphore(self.max_pending)
+        self._failed: Dict[int, str] = {}
+        self._ok_cnt = 0
+        self._done = 0
+        self._total = len(items)
+        self._start_time = time.time()
+        self._stop.clear()
+
+        logger.info(f"采集流水线启动: {len(items)} 只，请求线程 {self.fetch_workers}，"
+                    f"写入线程 {self.save_workers}，最大在途 {self.max_pending}")
+
+        # 写入线程池在外层：退出时先等待全部请求结束（请求会继续提交写入任务），再等待写入结束
+        with ThreadPoolExecutor(self.save_workers, thread_name_prefix="save") as save_pool, \
+                ThreadPoolExecutor(self.fetch_workers, thread_name_prefix="fetch") as fetch_pool:
+            try:
+                for i, item in enumerate(items):
+                    self._pending.acquire()
+                    fetch_pool.submit(self._fetch_task, i, item, save_pool)
+            except KeyboardInterrupt:
+                # 未开始的任务不再执行；它们不会被标记结束，断点不会越过它们
+                logger.warning("收到中断信号，等待在途任务结束后退出")
+                self._stop.set()
+                raise
+
+        total_time = time.time() - self._start_time
+        failed = [(items[i], self._failed[i]) for i in sorted(self._failed)]
+        logger.info(f"完成：成功 {self._ok_cnt}/{len(items)}，失败 {len(failed)}，总耗时 {total_time:.1f} 秒")
+        return self._ok_cnt, failed
+
+    def _fetch_task(self, index: int, item: str, save_pool: ThreadPoolExecutor) -> None:
+        """请求段：调用接口，有数据时提交到写入线程池"""
+        if self._stop.is_set():
+            self._pending.release()
+            return
+
+        try:
+            payload = self.fetch(item)
+        except Exception as e:
+            logger.error(f"请求失败: {item} - {e}")
+            self._finish(index, item, False, str(e)[:200])
+            return
+        finally:
+            if self.sleep and self.sleep > 0:
+                time.sleep(self.sleep)
+
+        if payload is None:
+            self._finish(index, item, True)
+        else:
+            save_pool.submit(self._save_task, index, item, payload)
+
+    def _save_task(self, index: int, item: str, payload: Any) -> None:
+        """写入段：解析并写入 Parquet"""
+        try:
+            ok = self.save(item, payload)
+            self._finish(index, item, ok, None if ok else "fetch_or_save_failed")
+        except Exception as e:
+            logger.error(f"处理失败: {item} - {e}")
+            self._finish(index, item, False, str(e)[:200])
+
+    def _finish(self, index: int, item: str, ok: bool, reason: Optional[str] = None) -> None:
+        """记录任务结果、推进断点、释放在途名额并输出进度"""
+        try:
+            with self._lock:
+                self._done += 1
+                if ok:
+                    self._ok_cnt += 1
+                else:
+                    self._failed[index] = reason or "fetch_or_save_failed"
+                done, ok_cnt = self._done, self._ok_cnt
+
+            self._ckpt.mark(index, ok)
+
+            if done % self.log_every == 0 or done == self._total:
+                elapsed = time.time() - self._start_time
+                rate_per_minute = done / elapsed * 60 if elapsed > 0 else 0
+                msg = (f"进度: {done}/{self._total} ({done / self._total * 100:.1f}%), "
+                       f"成功: {ok_cnt}, 速率: {rate_per_minute:.1f} 股票/分钟")
+                if self.rate_limiter is not None:
+                    status = self.rate_limiter.get_status()
+                    msg += f", 请求: {status['recent_requests_per_minute']:.1f} 请求/分钟"
+                logger.info(msg)
+        finally:
+            self._pending.release()
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+分区清单
+
+每个分区根目录（按股票/指数分区时为 stock_code=xxx / index_code=xxx 目录，按日期分区时为数据集目录）
+下维护一个 _manifest.json，记录目录内每个 parquet 文件的标的代码、所属分区、起止时间戳、行数、
+schema 哈希与文件大小。
+
+- 写入：StorageManager.write_partitioned_data 每次写文件后更新清单
+- 读取：按时间范围裁剪文件、查询本地最新时间时只读这一个小文件，不再 glob 目录、打开 parquet footer
+
+清单 complete=True 表示目录内所有 parquet 文件都已登记，读取方只在这种情况下用清单替代 glob；
+历史数据可通过 build() 或 StorageManager.build_manifests 一次性建立清单。
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+
+# 时间列、标的列的候选列名（按优先级）
+TS_COLS = ("timestamp", "date", "dt", "trade_date")
+SYMBOL_COLS = ("stock_code", "index_code", "symbol")
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def manifest_lock(root: Path) -> threading.Lock:
+    """同一清单的读改写需要串行，按目录返回进程内共享的锁"""
+    key = str(Path(root).resolve())
+    with _locks_guard:
+        if key not in _locks:
+            _locks[key] = threading.Lock()
+        return _locks[key]
+
+
+def manifest_root(file_path: Path) -> Path:
+    """
+    文件所属清单的根目录
+
+    - 路径中含 stock_code=xxx / index_code=xxx 目录时为该目录
+    - 否则为最外层 year=xxx 目录的上一级（按日期分区的数据集目录）
+    - 都没有时为文件所在目录
+    """
+    file_path = Path(file_path)
+    root = None
+    for parent in file_path.parents:
+        if parent.name.startswith(("stock_code=", "index_code=")):
+            return parent
+        if parent.name.startswith("year="):
+            root = parent.parent
+    return root if root is not None else file_path.parent
+
+
+def partition_key(file_path: Path) -> Optional[str]:
+    """从文件名解析分区标识：{code}_{year}-{month:02d}[_d{seq}].parquet -> 2024-01，{code}_{year}.parquet -> 2024"""
+    m = re.search(r"_(\d{4}(?:-\d{2})?)(?:_d\d+)?$", Path(file_path).stem)
+    return m.group(1) if m else None
+
+
+def schema_hash(schema) -> str:
+    """arrow schema 的列名与类型哈希，用于发现同一数据集内 schema 不一致的文件"""
+    s = ",".join(f"{f.name}:{f.type}" for f in schema)
+    return hashlib.md5(s.encode("utf-8")).hexdigest()[:16]
+
+
+def _pick(columns: Iterable[str], candidates: Tuple[str, ...]) -> Optional[str]:
+    columns = set(columns)
+    return next((c for c in candidates if c in columns), None)
+
+
+class PartitionManifest:
+    """单个分区根目录下的文件清单
+
+    同一进程内的读改写用 manifest_lock(root) 串行；同一目录不应被多个进程同时写入。
+    """
+
+    FILE_NAME = "_manifest.json"
+    VERSION = 1
+
+    def __init__(self, root: Path):
+        """
+        初始化分区清单
+
+        :param root: 分区根目录，清单中的文件路径均相对于该目录
+        """
+        self.root = Path(root)
+        self.path = self.root / self.FILE_NAME
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.complete = False
+        self.load()
+
+    def load(self) -> None:
+        """从磁盘加载清单；不存在或损坏时视为空清单"""
+        self.files = {}
+        self.complete = False
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") == self.VERSION:
+                self.files = data.get("files", {})
+                self.complete = bool(data.get("complete", False))
+        except Exception as e:
+            logger.warning(f"读取分区清单失败，将重建: {self.path} - {e}")
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def save(self) -> None:
+        """写入清单（先写临时文件再替换，避免中断时留下半个文件）"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        data = {"version": self.VERSION, "complete": self.complete, "files": self.files}
+        tmp = self.path.with_name(self.path.name + f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _key(self, file_path: Path) -> str:
+        return Path(file_path).relative_to(self.root).as_posix()
+
+    def _set(self, file_path: Path, partition: Optional[str], symbol: Optional[str],
+             min_ts, max_ts, rows: int, schema) -> None:
+        file_path = Path(file_path)
+        self.files[self._key(file_path)] = {
+            "partition": partition if partition is not None else partition_key(file_path),
+            "symbol": symbol,
+            "min_ts": pd.Timestamp(min_ts).isoformat() if min_ts is not None and not pd.isna(min_ts) else None,
+            "max_ts": pd.Timestamp(max_ts).isoformat() if max_ts is not None and not pd.isna(max_ts) else None,
+            "rows": int(rows),
+            "schema_hash": schema_hash(schema) if schema is not None else None,
+            "size": file_path.stat().st_size if file_path.exists() else None,
+        }
+
+    def set_file(self, file_path: Path, df: pd.DataFrame, partition: Optional[str] = None) -> None:
+        """
+        用刚写入文件的 DataFrame 登记文件，无需再读取文件
+
+        :param file_path: parquet 文件路径
+        :param df: 写入该文件的数据
+        :param partition: 分区标识，默认从文件名解析（如 2024-01）
+        """
+        import pyarrow as pa
+
+        ts_col = _pick(df.columns, TS_COLS)
+        ts = pd.to_datetime(df[ts_col]) if ts_col else pd.Series([], dtype="datetime64[ns]")
+        sym_col = _pick(df.columns, SYMBOL_COLS)
+        symbols = df[sym_col].unique() if sym_col else []
+        try:
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+        except Exception:
+            schema = None
+        self._set(file_path, partition, str(symbols[0]) if len(symbols) == 1 else None,
+                  ts.min() if len(ts) else None, ts.max() if len(ts) else None, len(df), schema)
+
+    def index_file(self, file_path: Path, partition: Optional[str] = None) -> None:
+        """
+        登记清单之外写入的文件：优先用 parquet footer 中的统计信息，缺失时再读取时间列
+        """
+        import pyarrow.parquet as pq
+
+        file_path = Path(file_path)
+        try:
+            meta = pq.ParquetFile(file_path).metadata
+            schema = meta.schema.to_arrow_schema()
+            ts_col = _pick(schema.names, TS_COLS)
+            sym_col = _pick(schema.names, SYMBOL_COLS)
+
+            min_ts = max_ts = symbol = None
+            if self.root.name.startswith(("stock_code=", "index_code=")):
+                # 按标的分区时目录名即标的代码，无需读取数据
+                symbol, sym_col = self.root.name.split("=", 1)[1], None
+            stats_ok = ts_col is not None
+            if ts_col is not None:
+                i = schema.names.index(ts_col)
+                for rg in range(meta.num_row_groups):
+                    st = meta.row_group(rg).column(i).statistics
+                    if st is None or not st.has_min_max:
+                        stats_ok = False
+                        break
+                    lo, hi = pd.Timestamp(st.min), pd.Timestamp(st.max)
+                    min_ts = lo if min_ts is None else min(min_ts, lo)
+                    max_ts = hi if max_ts is None else max(max_ts, hi)
+
+            columns = [c for c in [ts_col if not stats_ok else None, sym_col] if c]
+            if columns:
+                df = pd.read_parquet(file_path, columns=columns)
+                if ts_col and not stats_ok and len(df):
+                    ts = pd.to_datetime(df[ts_col])
+                    min_ts, max_ts = ts.min(), ts.max()
+                if sym_col and df[sym_col].nunique() == 1:
+                    symbol = str(df[sym_col].iloc[0])
+            self._set(file_path, partition, symbol, min_ts, max_ts, meta.num_rows, schema)
+        except Exception as e:
+            logger.warning(f"登记文件失败: {file_path} - {e}")
+            self._set(file_path, partition, None, None, None, 0, None)
+
+    def remove_file(self, file_path: Path) -> None:
+        """移除文件记录"""
+        self.files.pop(self._key(file_path), None)
+
+    def build(self) -> None:
+        """扫描目录下全部 parquet 文件重建清单，完成后 complete=True"""
+        self.files = {}
+        for fp in sorted(self.root.rglob("*.parquet")):
+            self.index_file(fp)
+        self.complete = True
+
+    def partition_files(self, partition: str) -> List[str]:
+        """分区内已登记的文件（相对路径，按文件名排序）"""
+        return sorted(k for k, v in self.files.items() if v["partition"] == partition)
+
+    def partitions(self) -> List[str]:
+        """已登记的全部分区"""
+        return sorted({v["partition"] for v in self.files.values() if v["partition"]})
+
+    def sync_partition(self, partition: str, files: Iterable[Path]) -> bool:
+        """
+        将分区的登记信息与磁盘上的文件对齐：补登未登记的文件，移除已不存在的文件
+
+        :return: 清单是否有变化
+        """
+        on_disk = {self._key(fp): fp for fp in files}
+        known = set(self.partition_files(partition))
+        changed = False
+        for key in known - set(on_disk):
+            self.files.pop(key, None)
+            changed = True
+        for key in set(on_disk) - known:
+            self.index_file(on_disk[key], partition)
+            changed = True
+        return changed
+
+    def _max_ts(self, keys: Iterable[str]) -> Optional[pd.Timestamp]:
+        values = [self.files[k]["max_ts"] for k in keys if self.files[k]["max_ts"]]
+        return pd.Timestamp(max(values)) if values else None
+
+    def partition_max(self, partition: str) -> Optional[pd.Timestamp]:
+        """分区内最大时间戳"""
+        return self._max_ts(self.partition_files(partition))
+
+    def latest_timestamp(self) -> Optional[pd.Timestamp]:
+        """整个目录内最大时间戳"""
+        return self._max_ts(self.files)
+
+    def time_range(self) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        """整个目录内的最早、最晚时间戳"""
+        values = [v["min_ts"] for v in self.files.values() if v["min_ts"]]
+        return (pd.Timestamp(min(values)) if values else None), self.latest_timestamp()
+
+    def files_between(self, sdt=None, edt=None) -> List[Path]:
+        """
+        与 [sdt, edt] 有交集的文件（绝对路径，按相对路径排序）；没有时间信息的文件总是保留
+
+        :param sdt: 开始时间，None 表示不限
+        :param edt: 结束时间，None 表示不限
+        """
+        sdt = pd.Timestamp(sdt) if sdt is not None else None
+        edt = pd.Timestamp(edt) if edt is not None else None
+        out = []
+        for key in sorted(self.files):
+            v = self.files[key]
+            if v["min_ts"] and v["max_ts"]:
+                if edt is not None and pd.Timestamp(v["min_ts"]) > edt:
+                    continue
+                if sdt is not None and pd.Timestamp(v["max_ts"]) < sdt:
+                    continue
+            out.append(self.root / key)
+        return out
+
+
+def load_manifest(root: Path) -> Optional[PartitionManifest]:
+    """读取方使用：清单存在且完整时返回，否则返回 None（调用方回退到 glob）"""
+    if not (Path(root) / PartitionManifest.FILE_NAME).exists():
+        return None
+    manifest = PartitionManifest(root)
+    return manifest if manifest.complete else None
+
+
+def manifest_files(root: Path, sdt=None, edt=None) -> Optional[List[Path]]:
+    """
+    读取方使用：按清单列出与 [sdt, edt] 有交集的文件，无需 glob 目录
+
+    :return: 文件列表；清单不存在或不完整时返回 None，调用方回退到 glob
+    """
+    manifest = load_manifest(root)
+    return manifest.files_between(sdt, edt) if manifest is not None else None
+
+
+def latest_timestamp(root: Path) -> Optional[pd.Timestamp]:
+    """
+    写入方（采集脚本）使用：从清单读取目录内最新时间戳
+
+    清单不存在（历史数据）时用 parquet footer 统计信息建立一次清单，之后的查询只读清单。
+    """
+    root = Path(root)
+    manifest = PartitionManifest(root)
+    if not manifest.exists():
+        if not root.exists():
+            return None
+        with manifest_lock(root):
+            manifest.load()
+            if not manifest.exists():
+                manifest.build()
+                manifest.save()
+    return manifest.latest_timestamp()
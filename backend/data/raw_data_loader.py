@@ -11,6 +11,7 @@ import pandas as pd
 from loguru import logger
 
 from backend.data.raw_data_storage import RawDataStorage
+from backend.data.partition_manifest import manifest_files
 
 
 class RawDataLoader:
@@ -104,7 +105,10 @@ class RawDataLoader:
         """
         try:
             base_dir = self.storage.base_path / "raw" / "minute_by_stock" / f"stock_code={stock_code}"
-            files = sorted(base_dir.glob("year=*/**/*.parquet"))
+            # 优先按分区清单裁剪出与时间范围有交集的文件，清单缺失时回退到 glob
+            files = manifest_files(base_dir, start_dt, end_dt)
+            if files is None:
+                files = sorted(base_dir.glob("year=*/**/*.parquet"))
             if not files:
                 logger.warning(f"未找到分钟数据文件: {base_dir}")
                 return None
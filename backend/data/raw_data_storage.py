@@ -13,6 +13,7 @@ from loguru import logger
 from backend.data.storage_manager import StorageManager
 from backend.utils.compression_config import get_parquet_write_options
 from backend.data.schema_registry import SchemaRegistry
+from backend.data.partition_manifest import PartitionManifest, latest_timestamp, manifest_lock
 
 
 class RawDataStorage(StorageManager):
@@ -83,7 +84,7 @@ class RawDataStorage(StorageManager):
         minute_subdir: Optional[str] = None,
     ) -> bool:
         """
-        按股票分区保存分钟数据。
+        按股票分区保存分钟数据（重写整个月度文件，并合并掉该月的增量片段）。
 
         :param df: 分钟数据DataFrame
         :param stock_code: 股票代码
@@ -102,23 +103,220 @@ class RawDataStorage(StorageManager):
             if minute_subdir:
                 kwargs["minute_subdir"] = minute_subdir
 
-            # 如果增量更新，读取现有数据并合并
-            if incremental:
-                file_path = self.get_partition_path("minute", "by_stock", **kwargs)
-
-                if file_path.exists():
-                    existing_df = pd.read_parquet(file_path)
-                    if existing_df is not None and len(existing_df) > 0:
-                        df = self._merge_and_deduplicate(existing_df, df, ['timestamp', 'stock_code'])
+            # 如果增量更新，读取现有数据（月度文件 + 增量片段）并合并
+            files = self._minute_partition_files(stock_code, year, month, minute_subdir)
+            if incremental and files:
+                existing_df = pd.concat([pd.read_parquet(fp) for fp in files], ignore_index=True)
+                if existing_df is not None and len(existing_df) > 0:
+                    df = self._merge_and_deduplicate(existing_df, df, ['timestamp', 'stock_code'])
 
             # 写入分区数据
-            return self.write_partitioned_data(df, "minute", "by_stock", **kwargs)
+            if not self.write_partitioned_data(df, "minute", "by_stock", **kwargs):
+                return False
+
+            # 月度文件已包含全部数据，删除增量片段
+            file_path = self.get_partition_path("minute", "by_stock", **kwargs)
+            fragments = [fp for fp in files if fp != file_path]
+            for fp in fragments:
+                fp.unlink(missing_ok=True)
+            self.remove_from_manifest(fragments)
+            return True
         except Exception as e:
             logger.error(f"按股票分区保存分钟数据失败: {e}")
             import traceback
             traceback.print_exc()
             return False
-    
+
+    def append_minute_data_by_stock(
+        self,
+        df: pd.DataFrame,
+        stock_code: str,
+        year: int,
+        month: int,
+        minute_subdir: Optional[str] = None,
+        compact_threshold: int = 20,
+    ) -> bool:
+        """
+        按股票分区追加分钟数据：只写入晚于该月已有最大时间戳的数据，作为一个小的增量片段，
+        不再读取和重写整个月度文件。
+
+        已有时间戳及更早的数据视为已落库（分钟 K 线收盘后不再变化），会被忽略；需要修正历史数据时
+        使用 save_minute_data_by_stock。增量片段命名为 {stock_code}_{year}-{month:02d}_d{seq:04d}.parquet，
+        与月度文件位于同一目录，按目录 glob 读取的代码无需修改即可读到。
+
+        :param df: 分钟数据DataFrame
+        :param stock_code: 股票代码
+        :param year: 年份
+        :param month: 月份
+        :param minute_subdir: 分钟数据子目录，同 save_minute_data_by_stock
+        :param compact_threshold: 该月增量片段数达到该值时自动合并到月度文件；0 表示不自动合并
+        :return: 是否成功
+        """
+        try:
+            if not self._validate_minute_data(df):
+                return False
+
+            partition = f"{year}-{month:02d}"
+            files = self._minute_partition_files(stock_code, year, month, minute_subdir)
+            manifest = self.get_minute_manifest(stock_code, minute_subdir)
+            with manifest_lock(manifest.root):
+                manifest.load()
+                if manifest.sync_partition(partition, files):
+                    manifest.save()
+                max_ts = manifest.partition_max(partition)
+
+            df = df.copy()
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            if max_ts is not None:
+                stale = df['timestamp'] <= max_ts
+                if stale.any():
+                    logger.debug(f"忽略 {int(stale.sum())} 条不晚于已有最大时间 {max_ts} 的分钟数据: "
+                                 f"{stock_code} {partition}，修正历史数据请使用 save_minute_data_by_stock")
+                    df = df[~stale]
+            df = df.drop_duplicates(subset=['timestamp', 'stock_code'], keep='last')
+            df = df.sort_values('timestamp').reset_index(drop=True)
+
+            if len(df) == 0:
+                return True
+
+            kwargs = dict(stock_code=stock_code, year=year)
+            if minute_subdir:
+                kwargs["minute_subdir"] = minute_subdir
+            if files:
+                seqs = [int(fp.stem.rsplit("_d", 1)[1]) for fp in files if self._is_minute_fragment(fp)]
+                file_name = f"{stock_code}_{partition}_d{max(seqs, default=0) + 1:04d}.parquet"
+            else:
+                file_name = f"{stock_code}_{partition}.parquet"
+
+            if not self.write_partitioned_data(df, "minute", "by_stock", file_name=file_name, **kwargs):
+                return False
+
+            if compact_threshold and len(files) >= compact_threshold:
+                return self.compact_minute_partition(stock_code, year, month, minute_subdir)
+            return True
+        except Exception as e:
+            logger.error(f"按股票分区追加分钟数据失败: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+    def append_minute_data(
+        self,
+        df: pd.DataFrame,
+        minute_subdir: Optional[str] = None,
+        compact_threshold: int = 20,
+    ) -> bool:
+        """
+        批量追加多只股票、多个月份的分钟数据，按 (stock_code, 年, 月) 拆分后逐个分区追加
+
+        :param df: 分钟数据DataFrame（须含 stock_code、timestamp）
+        :param minute_subdir: 分钟数据子目录
+        :param compact_threshold: 同 append_minute_data_by_stock
+        :return: 是否全部成功
+        """
+        if df is None or len(df) == 0:
+            return True
+        ts = pd.to_datetime(df['timestamp'])
+        ok = True
+        for (stock_code, y, m), g in df.groupby([df['stock_code'], ts.dt.year, ts.dt.month], sort=True):
+            ok = self.append_minute_data_by_stock(
+                g, stock_code=stock_code, year=int(y), month=int(m),
+                minute_subdir=minute_subdir, compact_threshold=compact_threshold,
+            ) and ok
+        return ok
+
+    def compact_minute_partition(
+        self,
+        stock_code: str,
+        year: int,
+        month: int,
+        minute_subdir: Optional[str] = None,
+    ) -> bool:
+        """
+        将某月的增量片段合并进月度文件
+
+        :return: 是否成功（没有增量片段时直接返回 True）
+        """
+        files = self._minute_partition_files(stock_code, year, month, minute_subdir)
+        if not any(self._is_minute_fragment(fp) for fp in files):
+            return True
+        logger.debug(f"合并分钟增量片段: {stock_code} {year}-{month:02d}，共 {len(files)} 个文件")
+        df = pd.concat([pd.read_parquet(fp) for fp in files], ignore_index=True)
+        df = df.drop_duplicates(subset=['timestamp', 'stock_code'], keep='last')
+        df = df.sort_values('timestamp').reset_index(drop=True)
+        return self.save_minute_data_by_stock(
+            df, stock_code, year, month, incremental=False, minute_subdir=minute_subdir
+        )
+
+    def compact_minute_data(
+        self,
+        stock_codes: Optional[list] = None,
+        minute_subdir: Optional[str] = None,
+        min_fragments: int = 1,
+    ) -> int:
+        """
+        按需合并增量片段（可在收盘后或定时任务中调用）
+
+        :param stock_codes: 股票列表，默认为目录下全部股票
+        :param minute_subdir: 分钟数据子目录
+        :param min_fragments: 某月增量片段数达到该值才合并
+        :return: 合并的分区数
+        """
+        root = self.base_path / "raw" / (minute_subdir or "minute_by_stock")
+        if stock_codes is None:
+            stock_codes = sorted(p.name.split("=", 1)[1] for p in root.glob("stock_code=*"))
+
+        count = 0
+        for stock_code in stock_codes:
+            manifest = self.get_minute_manifest(stock_code, minute_subdir)
+            for partition in manifest.partitions():
+                n = sum(self._is_minute_fragment(Path(k)) for k in manifest.partition_files(partition))
+                if n < min_fragments:
+                    continue
+                y, m = partition.split("-")
+                if self.compact_minute_partition(stock_code, int(y), int(m), minute_subdir):
+                    count += 1
+        return count
+
+    def get_minute_manifest(self, stock_code: str, minute_subdir: Optional[str] = None) -> PartitionManifest:
+        """获取某股票分钟数据目录的分区清单"""
+        root = self.base_path / "raw" / (minute_subdir or "minute_by_stock") / f"stock_code={stock_code}"
+        return PartitionManifest(root)
+
+    def get_minute_latest_timestamp(
+        self,
+        stock_code: str,
+        minute_subdir: Optional[str] = None,
+    ) -> Optional[pd.Timestamp]:
+        """
+        获取某股票分钟数据的本地最新时间戳，读取分区清单
+
+        清单不存在（历史数据）时用 parquet footer 统计信息建立一次清单，之后的查询不再打开 parquet。
+
+        :return: 最新时间戳，无数据返回 None
+        """
+        root = self.base_path / "raw" / (minute_subdir or "minute_by_stock") / f"stock_code={stock_code}"
+        return latest_timestamp(root)
+
+    def _minute_partition_files(
+        self,
+        stock_code: str,
+        year: int,
+        month: int,
+        minute_subdir: Optional[str] = None,
+    ) -> list:
+        """某股票某月的月度文件与增量片段（月度文件在前，片段按序号排列）"""
+        kwargs = dict(stock_code=stock_code, year=year)
+        if minute_subdir:
+            kwargs["minute_subdir"] = minute_subdir
+        year_dir = self.get_partition_path("minute", "by_stock", **kwargs)
+        return sorted(year_dir.glob(f"{stock_code}_{year}-{month:02d}*.parquet"))
+
+    @staticmethod
+    def _is_minute_fragment(file_path: Path) -> bool:
+        """是否为增量片段文件（{stock_code}_{year}-{month:02d}_d{seq:04d}.parquet）"""
+        return "_d" in file_path.stem.rsplit("-", 1)[-1]
+
     def save_daily_data_by_date(
         self,
         df: pd.DataFrame,
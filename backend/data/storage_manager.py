@@ -2,13 +2,14 @@
 """
 存储管理器
 
-提供分区数据的读写功能
+提供分区数据的读写功能；每次写入后维护分区根目录下的 _manifest.json（见 partition_manifest）
 """
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable
 import pandas as pd
 from loguru import logger
 
+from backend.data.partition_manifest import PartitionManifest, manifest_lock, manifest_root
 from backend.utils.partition_utils import PartitionPathGenerator
 from backend.utils.compression_config import get_parquet_write_options, get_parquet_engine_options
 
@@ -109,6 +110,9 @@ class StorageManager:
             )
             
             logger.debug(f"写入分区数据成功: {file_path}，共 {len(df)} 条记录")
+
+            partition = str(kwargs["date"]) if partition_strategy == "by_date" and "date" in kwargs else None
+            self._update_manifest(file_path, df, partition)
             return True
         except Exception as e:
             logger.error(f"写入分区数据失败: {e}")
@@ -116,6 +120,53 @@ class StorageManager:
             traceback.print_exc()
             return False
     
+    def _update_manifest(self, file_path: Path, df: pd.DataFrame, partition: Optional[str] = None) -> None:
+        """写入文件后更新所属分区根目录的清单；清单出错只记录日志，不影响写入结果"""
+        root = manifest_root(file_path)
+        try:
+            with manifest_lock(root):
+                manifest = PartitionManifest(root)
+                if not manifest.exists() and root.name.startswith(("stock_code=", "index_code=")):
+                    # 首次写入该标的目录：先登记目录内已有文件，保证清单完整
+                    manifest.build()
+                manifest.set_file(file_path, df, partition)
+                manifest.save()
+        except Exception as e:
+            logger.warning(f"更新分区清单失败: {root} - {e}")
+
+    def remove_from_manifest(self, files: Iterable[Path]) -> None:
+        """从清单中移除已删除的文件"""
+        by_root: Dict[Path, list] = {}
+        for fp in files:
+            by_root.setdefault(manifest_root(fp), []).append(fp)
+        for root, fps in by_root.items():
+            with manifest_lock(root):
+                manifest = PartitionManifest(root)
+                if not manifest.exists():
+                    continue
+                for fp in fps:
+                    manifest.remove_file(fp)
+                manifest.save()
+
+    def build_manifests(self, dataset_dir: Path) -> int:
+        """
+        为数据集目录下的每个分区根目录建立清单（历史数据一次性迁移）
+
+        :param dataset_dir: 数据集目录，如 base_path/raw/minute_by_stock、base_path/raw/daily/by_stock
+        :return: 建立的清单数
+        """
+        dataset_dir = Path(dataset_dir)
+        roots = sorted(p for p in dataset_dir.iterdir() if p.is_dir() and p.name.startswith(("stock_code=", "index_code=")))
+        if not roots:
+            roots = [dataset_dir]
+        for root in roots:
+            with manifest_lock(root):
+                manifest = PartitionManifest(root)
+                manifest.build()
+                manifest.save()
+        logger.info(f"分区清单建立完成: {dataset_dir}，共 {len(roots)} 个")
+        return len(roots)
+
     def read_partitioned_data(
         self,
         data_type: str,
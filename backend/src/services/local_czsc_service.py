@@ -18,9 +18,10 @@ import numpy as np
 import pandas as pd
 from loguru import logger
 
+from backend.data.partition_manifest import manifest_files
 from czsc.analyze import CZSC
 from czsc.objects import Freq, RawBar
-from czsc.utils import BarGenerator
+from czsc.utils import BarGenerator, df_to_bars
 from czsc.utils.ta import MACD, SMA
 
 from ..models.serializers import serialize_raw_bars, serialize_fxs, serialize_bis
@@ -72,10 +73,10 @@ def _ym_range(sdt: pd.Timestamp, edt: pd.Timestamp) -> List[Tuple[int, int]]:
     return out
 
 
-def _minute_files(base_path: Path, symbol: str, y: int, m: int) -> Path:
-    """按约定生成月度 parquet 文件路径"""
+def _minute_files(base_path: Path, symbol: str, y: int, m: int) -> List[Path]:
+    """按约定列出某月的 parquet 文件：月度文件及其增量片段（{symbol}_{y}-{m:02d}_d{seq:04d}.parquet）"""
     p = base_path / "raw" / "minute_by_stock" / f"stock_code={symbol}" / f"year={y}"
-    return p / f"{symbol}_{y}-{m:02d}.parquet"
+    return sorted(p.glob(f"{symbol}_{y}-{m:02d}*.parquet"))
 
 
 def _daily_dir(base_path: Path, symbol: str) -> Path:
@@ -89,7 +90,10 @@ def _load_daily_df_by_stock(base_path: Path, symbol: str, sdt: pd.Timestamp, edt
     if not root.exists():
         return pd.DataFrame()
     dfs: List[pd.DataFrame] = []
-    for fp in sorted(root.glob("*.parquet")):
+    files = manifest_files(root, sdt, edt)
+    if files is None:
+        files = sorted(root.glob("*.parquet"))
+    for fp in files:
         try:
             df = pd.read_parquet(fp)
             if df is not None and len(df) > 0:
@@ -170,10 +174,11 @@ def _load_minute_df_with_meta(
     """加载分钟数据（按月 parquet 聚合），返回 (df, meta)"""
     dfs: List[pd.DataFrame] = []
     parquet_count = 0
-    for y, m in _ym_range(sdt, edt):
-        fp = _minute_files(base_path, symbol, y, m)
-        if not fp.exists():
-            continue
+    # 优先按分区清单裁剪文件，清单缺失时按年月约定的文件名查找
+    files = manifest_files(base_path / "raw" / "minute_by_stock" / f"stock_code={symbol}", sdt, edt)
+    if files is None:
+        files = [fp for y, m in _ym_range(sdt, edt) for fp in _minute_files(base_path, symbol, y, m)]
+    for fp in files:
         df = pd.read_parquet(fp)
         if df is not None and len(df) > 0:
             dfs.append(df)
@@ -282,24 +287,7 @@ def _df_to_raw_bars(df: pd.DataFrame, freq_value: str) -> List[RawBar]:
     """将标准化 DataFrame 转为 RawBar 列表"""
     if df is None or len(df) == 0:
         return []
-    freq = Freq(freq_value)
-    bars: List[RawBar] = []
-    for i, row in enumerate(df.itertuples(index=False), start=1):
-        bars.append(
-            RawBar(
-                symbol=getattr(row, "symbol"),
-                id=i,
-                dt=getattr(row, "dt").to_pydatetime(),
-                freq=freq,
-                open=float(getattr(row, "open")),
-                close=float(getattr(row, "close")),
-                high=float(getattr(row, "high")),
-                low=float(getattr(row, "low")),
-                vol=float(getattr(row, "vol")),
-                amount=float(getattr(row, "amount")),
-            )
-        )
-    return bars
+    return df_to_bars(df, freq_value, id_start=1, pydatetime=True)
 
 
 def _build_base_bars(
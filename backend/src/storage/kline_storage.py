@@ -3,14 +3,28 @@
 K线数据存储服务
 
 提供K线数据的存储、加载、更新功能，使用Parquet格式存储数据。
+
+存储布局（按 标的/周期/年月 分区，追加只写新增的分片文件）：
+
+    {base_path}/{symbol}/{freq}/_manifest.json          分片清单，记录每个分片的时间范围和行数
+    {base_path}/{symbol}/{freq}/ym=YYYYMM/part-*.parquet 分片文件
+
+旧版本的 {symbol}/{freq}/data.parquet 单文件仍然可以读取，首次追加或保存时自动迁移为分区布局。
+
+K线 id 为该K线在全部已存储数据中按时间排序的序号（从1开始），与加载的时间范围无关。
+补写历史数据或清理旧分片后，分片中保存的 id 不再连续，清单标记 ids_dirty，
+加载时按时间位置重新计算 id，直到 compact 重写分片。
 """
+import os
 import json
+import time
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import pandas as pd
 from loguru import logger
-from czsc.objects import RawBar, Freq
+from czsc.objects import RawBar
+from czsc.utils import df_to_bars, bars_to_df
 
 
 class KlineStorage:
@@ -33,27 +47,7 @@ class KlineStorage:
         :param bars: RawBar对象列表
         :return: DataFrame，包含所有K线数据
         """
-        if not bars:
-            return pd.DataFrame()
-
-        data = []
-        for bar in bars:
-            data.append({
-                'symbol': bar.symbol,
-                'id': bar.id,
-                'dt': bar.dt,
-                'freq': bar.freq.value,
-                'open': bar.open,
-                'close': bar.close,
-                'high': bar.high,
-                'low': bar.low,
-                'vol': bar.vol,
-                'amount': bar.amount,
-            })
-
-        df = pd.DataFrame(data)
-        df['dt'] = pd.to_datetime(df['dt'])
-        return df
+        return bars_to_df(bars)
 
     def _df_to_bars(self, df: pd.DataFrame, symbol: str, freq: str) -> List[RawBar]:
         """
@@ -66,28 +60,13 @@ class KlineStorage:
         """
         if df.empty:
             return []
-
-        bars = []
-        for _, row in df.iterrows():
-            bar = RawBar(
-                symbol=symbol,
-                id=int(row['id']) if 'id' in row else 0,
-                dt=pd.to_datetime(row['dt']).to_pydatetime(),
-                freq=Freq(freq),
-                open=float(row['open']),
-                close=float(row['close']),
-                high=float(row['high']),
-                low=float(row['low']),
-                vol=float(row['vol']),
-                amount=float(row['amount']),
-            )
-            bars.append(bar)
-
-        return bars
+        if 'id' not in df.columns:
+            df = df.assign(id=0)
+        return df_to_bars(df, freq, symbol=symbol, pydatetime=True)
 
     def _get_file_path(self, symbol: str, freq: str) -> Path:
         """
-        获取数据文件路径
+        获取旧版本单文件存储的数据文件路径
 
         :param symbol: 标的代码
         :param freq: K线周期
@@ -95,6 +74,16 @@ class KlineStorage:
         """
         return self.base_path / symbol / freq / "data.parquet"
 
+    def _get_freq_dir(self, symbol: str, freq: str) -> Path:
+        """
+        获取分区数据目录
+
+        :param symbol: 标的代码
+        :param freq: K线周期
+        :return: 分区数据目录
+        """
+        return self.base_path / symbol / freq
+
     def _get_metadata_path(self, symbol: str) -> Path:
         """
         获取元数据文件路径
@@ -104,9 +93,154 @@ class KlineStorage:
         """
         return self.base_path / symbol / "metadata.json"
 
+    def _load_manifest(self, symbol: str, freq: str) -> Optional[dict]:
+        """
+        读取分片清单
+
+        :param symbol: 标的代码
+        :param freq: K线周期
+        :return: 分片清单，不存在时返回None
+        """
+        manifest_path = self._get_freq_dir(symbol, freq) / "_manifest.json"
+        if not manifest_path.exists():
+            return None
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self, symbol: str, freq: str, manifest: dict) -> None:
+        """
+        保存分片清单，先写临时文件再替换，保证清单文件始终完整
+
+        :param symbol: 标的代码
+        :param freq: K线周期
+        :param manifest: 分片清单
+        """
+        fragments = manifest['fragments']
+        manifest['count'] = sum(x['count'] for x in fragments)
+        manifest['start_dt'] = min((x['start_dt'] for x in fragments), default=None)
+        manifest['end_dt'] = max((x['end_dt'] for x in fragments), default=None)
+        manifest['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        freq_dir = self._get_freq_dir(symbol, freq)
+        freq_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = freq_dir / f"._manifest.json.{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, freq_dir / "_manifest.json")
+
+    def _write_fragments(self, symbol: str, freq: str, df: pd.DataFrame, prefix: str = "part") -> List[dict]:
+        """
+        将K线数据按年月写入新的分片文件
+
+        :param symbol: 标的代码
+        :param freq: K线周期
+        :param df: K线数据，必须包含 dt 列，且已按 dt 排序
+        :param prefix: 分片文件名前缀
+        :return: 新写入分片的清单记录
+        """
+        freq_dir = self._get_freq_dir(symbol, freq)
+        stamp = time.time_ns()
+        fragments = []
+        for ym, dfg in df.groupby(df['dt'].dt.strftime('%Y%m'), sort=True):
+            rel_path = f"ym={ym}/{prefix}-{stamp}.parquet"
+            file_path = freq_dir / rel_path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            dfg.to_parquet(file_path, compression='snappy', index=False)
+            fragments.append({
+                'file': rel_path,
+                'ym': ym,
+                'count': len(dfg),
+                'start_dt': dfg['dt'].iloc[0].strftime('%Y-%m-%d %H:%M:%S'),
+                'end_dt': dfg['dt'].iloc[-1].strftime('%Y-%m-%d %H:%M:%S'),
+            })
+        return fragments
+
+    def _read_fragments(self, symbol: str, freq: str, fragments: List[dict]) -> pd.DataFrame:
+        """
+        读取分片文件并合并，重复的时间点保留先写入的数据
+
+        :param symbol: 标的代码
+        :param freq: K线周期
+        :param fragments: 分片清单记录
+        :return: 按 dt 排序的K线数据
+        """
+        freq_dir = self._get_freq_dir(symbol, freq)
+        dfs = [pd.read_parquet(freq_dir / x['file']) for x in fragments]
+        if not dfs:
+            return pd.DataFrame()
+
+        df = pd.concat(dfs, ignore_index=True) if len(dfs) > 1 else dfs[0]
+        df['dt'] = pd.to_datetime(df['dt'])
+        df = df.sort_values('dt', kind='stable').drop_duplicates('dt', keep='first')
+        return df.reset_index(drop=True)
+
+    @staticmethod
+    def _select_fragments(manifest: dict, sdt=None, edt=None) -> List[dict]:
+        """
+        根据时间范围筛选分片，只返回与 [sdt, edt] 有交集的分片
+
+        :param manifest: 分片清单
+        :param sdt: 开始时间（可选）
+        :param edt: 结束时间（可选）
+        :return: 分片清单记录
+        """
+        sdt = pd.to_datetime(sdt) if sdt else None
+        edt = pd.to_datetime(edt) if edt else None
+        selected = []
+        for x in manifest['fragments']:
+            if sdt is not None and pd.Timestamp(x['end_dt']) < sdt:
+                continue
+            if edt is not None and pd.Timestamp(x['start_dt']) > edt:
+                continue
+            selected.append(x)
+        return selected
+
+    def _count_before(self, symbol: str, freq: str, manifest: dict, dt) -> int:
+        """
+        统计已存储数据中时间早于 dt 的K线数量
+
+        :param symbol: 标的代码
+        :param freq: K线周期
+        :param manifest: 分片清单
+        :param dt: 时间点
+        :return: K线数量
+        """
+        dt = pd.Timestamp(dt)
+        freq_dir = self._get_freq_dir(symbol, freq)
+        count = 0
+        for x in manifest['fragments']:
+            if pd.Timestamp(x['end_dt']) < dt:
+                count += x['count']
+            elif pd.Timestamp(x['start_dt']) < dt:
+                dts = pd.to_datetime(pd.read_parquet(freq_dir / x['file'], columns=['dt'])['dt'])
+                count += int((dts < dt).sum())
+        return count
+
+    def _migrate_legacy(self, symbol: str, freq: str) -> Optional[dict]:
+        """
+        将旧版本的 data.parquet 单文件迁移为分区布局
+
+        :param symbol: 标的代码
+        :param freq: K线周期
+        :return: 迁移后的分片清单，没有旧版本数据时返回None
+        """
+        file_path = self._get_file_path(symbol, freq)
+        if not file_path.exists():
+            return None
+
+        df = pd.read_parquet(file_path)
+        df['dt'] = pd.to_datetime(df['dt'])
+        df = df.sort_values('dt', kind='stable').reset_index(drop=True)
+        df['id'] = range(1, len(df) + 1)
+        manifest = {'fragments': self._write_fragments(symbol, freq, df, prefix="base")}
+        self._save_manifest(symbol, freq, manifest)
+        file_path.unlink()
+        logger.info(f"迁移K线数据为分区存储：{symbol} {freq}，共{len(df)}条")
+        return manifest
+
     def save_bars(self, symbol: str, freq: str, bars: List[RawBar]) -> None:
         """
-        保存K线数据到Parquet文件
+        保存K线数据到Parquet文件，覆盖该标的该周期的已有数据
 
         :param symbol: 标的代码
         :param freq: K线周期
@@ -116,24 +250,47 @@ class KlineStorage:
             logger.warning(f"保存空数据：{symbol} {freq}")
             return
 
-        file_path = self._get_file_path(symbol, freq)
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-
         df = self._bars_to_df(bars)
-        df.to_parquet(file_path, compression='snappy', index=False)
+        df = df.sort_values('dt', kind='stable').reset_index(drop=True)
+        df['id'] = range(1, len(df) + 1)
+
+        old_manifest = self._load_manifest(symbol, freq)
+        manifest = {'fragments': self._write_fragments(symbol, freq, df, prefix="base")}
+        self._save_manifest(symbol, freq, manifest)
+        if old_manifest:
+            self._remove_fragments(symbol, freq, old_manifest['fragments'])
+        legacy_path = self._get_file_path(symbol, freq)
+        if legacy_path.exists():
+            legacy_path.unlink()
 
         # 更新元数据
-        self._update_metadata(symbol, freq, bars)
+        self._update_metadata(symbol, freq, manifest)
 
         # 更新索引
         self._update_index(symbol, freq)
 
         logger.info(f"保存K线数据：{symbol} {freq}，共{len(bars)}条")
 
+    def _remove_fragments(self, symbol: str, freq: str, fragments: List[dict]) -> None:
+        """
+        删除分片文件，以及删除后为空的年月分区目录
+
+        :param symbol: 标的代码
+        :param freq: K线周期
+        :param fragments: 分片清单记录
+        """
+        freq_dir = self._get_freq_dir(symbol, freq)
+        for x in fragments:
+            file_path = freq_dir / x['file']
+            if file_path.exists():
+                file_path.unlink()
+            if file_path.parent.exists() and not any(file_path.parent.iterdir()):
+                file_path.parent.rmdir()
+
     def load_bars(self, symbol: str, freq: str, sdt: Optional[str] = None,
                   edt: Optional[str] = None) -> List[RawBar]:
         """
-        从Parquet文件加载K线数据
+        从Parquet文件加载K线数据，指定时间范围时只读取有交集的分片
 
         :param symbol: 标的代码
         :param freq: K线周期
@@ -141,12 +298,18 @@ class KlineStorage:
         :param edt: 结束时间（可选），格式：YYYYMMDD或YYYY-MM-DD
         :return: RawBar对象列表
         """
-        file_path = self._get_file_path(symbol, freq)
-        if not file_path.exists():
-            logger.warning(f"数据文件不存在：{file_path}")
-            return []
+        manifest = self._load_manifest(symbol, freq)
+        if manifest is not None:
+            df = self._read_fragments(symbol, freq, self._select_fragments(manifest, sdt, edt))
+        else:
+            file_path = self._get_file_path(symbol, freq)
+            if not file_path.exists():
+                logger.warning(f"数据文件不存在：{file_path}")
+                return []
+            df = pd.read_parquet(file_path)
 
-        df = pd.read_parquet(file_path)
+        if df.empty:
+            return []
 
         # 时间范围过滤
         if sdt or edt:
@@ -161,6 +324,12 @@ class KlineStorage:
                 edt_dt = pd.to_datetime(edt)
                 df = df[df['dt'] <= edt_dt]
 
+        if manifest is not None and manifest.get('ids_dirty') and not df.empty:
+            # 分片中的 id 已失效，按时间位置计算，保证任意时间范围加载到的同一根K线 id 相同
+            offset = self._count_before(symbol, freq, manifest, df['dt'].iloc[0])
+            df = df.reset_index(drop=True)
+            df['id'] = range(offset + 1, offset + len(df) + 1)
+
         # 确保id连续
         if 'id' not in df.columns or df['id'].isna().any():
             df = df.sort_values('dt').reset_index(drop=True)
@@ -170,13 +339,13 @@ class KlineStorage:
         logger.info(f"加载K线数据：{symbol} {freq}，共{len(bars)}条")
         return bars
 
-    def _update_metadata(self, symbol: str, freq: str, bars: List[RawBar]) -> None:
+    def _update_metadata(self, symbol: str, freq: str, manifest: dict) -> None:
         """
         更新元数据
 
         :param symbol: 标的代码
         :param freq: K线周期
-        :param bars: RawBar对象列表
+        :param manifest: 分片清单
         """
         metadata_path = self._get_metadata_path(symbol)
 
@@ -188,14 +357,16 @@ class KlineStorage:
             metadata = {}
 
         # 更新该周期的元数据
-        if bars:
-            dts = [bar.dt for bar in bars]
+        if manifest['fragments']:
             metadata[freq] = {
-                'count': len(bars),
-                'start_dt': min(dts).strftime('%Y-%m-%d %H:%M:%S'),
-                'end_dt': max(dts).strftime('%Y-%m-%d %H:%M:%S'),
+                'count': manifest['count'],
+                'start_dt': manifest['start_dt'],
+                'end_dt': manifest['end_dt'],
+                'fragments': len(manifest['fragments']),
                 'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             }
+        else:
+            metadata.pop(freq, None)
 
         # 保存元数据
         metadata_path.parent.mkdir(parents=True, exist_ok=True)
@@ -231,7 +402,11 @@ class KlineStorage:
 
     def append_bars(self, symbol: str, freq: str, bars: List[RawBar]) -> None:
         """
-        追加K线数据到现有文件（增量更新）
+        追加K线数据（增量更新）
+
+        只把新增的K线写成新的分片文件并更新分片清单，不重写已有数据；与已有数据时间重复的K线被忽略。
+        新增K线全部晚于已有数据时（日常增量更新的情况），不需要读取任何已有分片；
+        补写历史数据时，只读取时间范围有交集的分片用于去重。分片文件的合并由 compact 单独执行。
 
         :param symbol: 标的代码
         :param freq: K线周期
@@ -240,29 +415,109 @@ class KlineStorage:
         if not bars:
             return
 
-        file_path = self._get_file_path(symbol, freq)
+        manifest = self._load_manifest(symbol, freq)
+        if manifest is None:
+            manifest = self._migrate_legacy(symbol, freq)
+        if manifest is None:
+            self.save_bars(symbol, freq, bars)
+            return
 
-        # 读取现有数据
-        existing_bars = []
-        if file_path.exists():
-            existing_bars = self.load_bars(symbol, freq)
-
-        # 合并数据（去重，保留最新的）
-        existing_dts = {bar.dt for bar in existing_bars}
-        new_bars = [bar for bar in bars if bar.dt not in existing_dts]
-
-        if new_bars:
-            all_bars = existing_bars + new_bars
-            # 按时间排序并重新分配id
-            all_bars.sort(key=lambda x: x.dt)
-            for i, bar in enumerate(all_bars, 1):
-                bar.id = i
-
-            # 保存合并后的数据
-            self.save_bars(symbol, freq, all_bars)
-            logger.info(f"增量更新K线数据：{symbol} {freq}，新增{len(new_bars)}条")
-        else:
+        df = self._bars_to_df(bars)
+        df = df.sort_values('dt', kind='stable').drop_duplicates('dt', keep='first').reset_index(drop=True)
+
+        end_dt = pd.Timestamp(manifest['end_dt']) if manifest['end_dt'] else None
+        if end_dt is not None and df['dt'].iloc[0] <= end_dt:
+            overlap = self._select_fragments(manifest, df['dt'].iloc[0], df['dt'].iloc[-1])
+            if overlap:
+                existing = self._read_fragments(symbol, freq, overlap)
+                df = df[~df['dt'].isin(existing['dt'])].reset_index(drop=True)
+
+        if df.empty:
             logger.info(f"无新数据需要更新：{symbol} {freq}")
+            return
+
+        # 新增K线接在已有数据之后编号；补写历史数据时已有K线的 id 随之失效，加载时重新计算，compact 时重写
+        df['id'] = range(manifest['count'] + 1, manifest['count'] + len(df) + 1)
+        if end_dt is not None and df['dt'].iloc[0] <= end_dt:
+            manifest['ids_dirty'] = True
+        manifest['fragments'].extend(self._write_fragments(symbol, freq, df))
+        self._save_manifest(symbol, freq, manifest)
+        self._update_metadata(symbol, freq, manifest)
+        self._update_index(symbol, freq)
+        logger.info(f"增量更新K线数据：{symbol} {freq}，新增{len(df)}条")
+
+    def compact(self, symbol: str, freq: str, min_fragments: int = 2) -> Dict[str, Any]:
+        """
+        压缩分片：把同一年月下的多个分片合并为一个，并按时间重新编号id
+
+        :param symbol: 标的代码
+        :param freq: K线周期
+        :param min_fragments: 年月分区内的分片数量达到该值时才合并
+        :return: 压缩结果统计
+        """
+        manifest = self._load_manifest(symbol, freq)
+        if manifest is None:
+            manifest = self._migrate_legacy(symbol, freq)
+        if manifest is None:
+            return {'symbol': symbol, 'freq': freq, 'fragments_before': 0, 'fragments_after': 0}
+
+        fragments_before = len(manifest['fragments'])
+        groups: Dict[str, List[dict]] = {}
+        for x in manifest['fragments']:
+            groups.setdefault(x['ym'], []).append(x)
+
+        # id 是全局序号，某个年月分区之前的行数变化后，该分区也需要重写；id 已失效时重写全部分区
+        new_fragments, offset, renumber = [], 0, bool(manifest.get('ids_dirty'))
+        for ym in sorted(groups):
+            frags = groups[ym]
+            merge = len(frags) >= min_fragments
+            if not merge and not renumber:
+                df_id = pd.read_parquet(self._get_freq_dir(symbol, freq) / frags[0]['file'], columns=['id'])
+                renumber = len(df_id) > 0 and int(df_id['id'].iloc[0]) != offset + 1
+
+            if merge or renumber:
+                df = self._read_fragments(symbol, freq, frags)
+                df['id'] = range(offset + 1, offset + len(df) + 1)
+                new_fragments.extend(self._write_fragments(symbol, freq, df, prefix="base"))
+                renumber = renumber or len(df) != sum(x['count'] for x in frags)
+                offset += len(df)
+            else:
+                new_fragments.extend(frags)
+                offset += sum(x['count'] for x in frags)
+
+        kept = {x['file'] for x in new_fragments}
+        removed = [x for x in manifest['fragments'] if x['file'] not in kept]
+        manifest['fragments'] = new_fragments
+        manifest.pop('ids_dirty', None)
+        self._save_manifest(symbol, freq, manifest)
+        self._remove_fragments(symbol, freq, removed)
+        self._update_metadata(symbol, freq, manifest)
+
+        logger.info(f"压缩K线数据：{symbol} {freq}，分片数 {fragments_before} -> {len(new_fragments)}")
+        return {'symbol': symbol, 'freq': freq, 'fragments_before': fragments_before,
+                'fragments_after': len(new_fragments)}
+
+    def compact_all(self, min_fragments: int = 2) -> List[Dict[str, Any]]:
+        """
+        压缩所有已存储标的、所有周期的分片
+
+        :param min_fragments: 年月分区内的分片数量达到该值时才合并
+        :return: 每个标的每个周期的压缩结果统计
+        """
+        if not self.index_file.exists():
+            return []
+
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+
+        results = []
+        for symbol, info in index.get('symbols', {}).items():
+            for freq in info.get('freqs', []):
+                try:
+                    results.append(self.compact(symbol, freq, min_fragments=min_fragments))
+                except Exception as e:
+                    logger.error(f"压缩K线数据失败：{symbol} {freq}，错误：{e}")
+        return results
 
     def get_metadata(self, symbol: str) -> dict:
         """
@@ -465,6 +720,24 @@ class KlineStorage:
                 if not freq_dir.is_dir():
                     continue
 
+                manifest = self._load_manifest(symbol_dir.name, freq_dir.name)
+                if manifest is not None:
+                    # 分区存储：按分片清单判断，不需要读取分片文件
+                    for x in manifest['fragments']:
+                        file_path = freq_dir / x['file']
+                        file_size = file_path.stat().st_size if file_path.exists() else 0
+                        results['total_files'] += 1
+                        results['total_size'] += file_size
+                        if pd.Timestamp(x['end_dt']) < before_dt:
+                            results['files_to_delete'] += 1
+                            results['size_to_free'] += file_size
+                            results['files'].append({
+                                'path': str(file_path.relative_to(self.base_path)),
+                                'size': file_size,
+                                'last_date': pd.Timestamp(x['end_dt']).isoformat(),
+                            })
+                    continue
+
                 file_path = freq_dir / "data.parquet"
                 if not file_path.exists():
                     continue
@@ -475,17 +748,16 @@ class KlineStorage:
 
                 # 检查文件中的数据是否都在清理日期之前
                 try:
-                    df = pd.read_parquet(file_path)
-                    if 'dt' in df.columns:
-                        df['dt'] = pd.to_datetime(df['dt'])
-                        if df['dt'].max() < before_dt:
-                            results['files_to_delete'] += 1
-                            results['size_to_free'] += file_size
-                            results['files'].append({
-                                'path': str(file_path.relative_to(self.base_path)),
-                                'size': file_size,
-                                'last_date': df['dt'].max().isoformat(),
-                            })
+                    df = pd.read_parquet(file_path, columns=['dt'])
+                    df['dt'] = pd.to_datetime(df['dt'])
+                    if df['dt'].max() < before_dt:
+                        results['files_to_delete'] += 1
+                        results['size_to_free'] += file_size
+                        results['files'].append({
+                            'path': str(file_path.relative_to(self.base_path)),
+                            'size': file_size,
+                            'last_date': df['dt'].max().isoformat(),
+                        })
                 except Exception as e:
                     logger.warning(f"检查文件失败：{file_path}，错误：{e}")
 
@@ -499,4 +771,22 @@ class KlineStorage:
                 except Exception as e:
                     logger.error(f"删除文件失败：{file_path}，错误：{e}")
 
+            # 从分片清单中移除已删除的分片，剩余数据的id加载时重新计算，compact 时重写
+            deleted = {file_info['path'] for file_info in results['files']}
+            for symbol_dir in self.base_path.iterdir():
+                if not symbol_dir.is_dir() or symbol_dir.name == 'exports':
+                    continue
+                for freq_dir in symbol_dir.iterdir():
+                    manifest = self._load_manifest(symbol_dir.name, freq_dir.name) if freq_dir.is_dir() else None
+                    if manifest is None:
+                        continue
+                    prefix = str(freq_dir.relative_to(self.base_path))
+                    removed = [x for x in manifest['fragments'] if str(Path(prefix) / x['file']) in deleted]
+                    if removed:
+                        manifest['fragments'] = [x for x in manifest['fragments'] if x not in removed]
+                        manifest['ids_dirty'] = True
+                        self._save_manifest(symbol_dir.name, freq_dir.name, manifest)
+                        self._remove_fragments(symbol_dir.name, freq_dir.name, removed)
+                        self._update_metadata(symbol_dir.name, freq_dir.name, manifest)
+
         return results
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/17 22:00
+describe: 并发采集流水线单元测试：断点按输入顺序推进，失败列表有序，在途任务数受限
+"""
+import random
+import threading
+import time
+
+import pytest
+
+from backend.data.fetch_pipeline import FetchPipeline, OrderedCheckpoint
+
+
+def _sequential_checkpoints(items, results):
+    """顺序执行时每处理完一只股票后的断点：最后一个成功的 item"""
+    out, last = [], None
+    for item in items:
+        if results[item]:
+            last = item
+            out.append(last)
+    return out
+
+
+def test_ordered_checkpoint():
+    """乱序完成时断点不越过尚未结束的任务"""
+    advanced = []
+    ckpt = OrderedCheckpoint(list("abcde"), advanced.append)
+    assert ckpt.mark(2, True) is None
+    assert ckpt.mark(0, True) == "a"
+    assert ckpt.mark(1, False) == "c"
+    assert ckpt.mark(4, True) == "c"
+    assert ckpt.mark(3, True) == "e"
+    assert advanced == ["a", "c", "e"]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_fetch_pipeline_random(seed):
+    """随机延迟与失败：断点单调且与顺序执行一致，失败列表按输入顺序，在途数据不超过 max_pending"""
+    rng = random.Random(seed)
+    items = [f"{i:06d}.SZ" for i in range(60)]
+    # fetch 异常、save 返回 False、save 异常、无需写入、成功
+    outcome = {x: rng.choice(["fetch_error", "save_false", "save_error", "none", "ok", "ok", "ok"]) for x in items}
+    delay = {x: (rng.random() * 0.01, rng.random() * 0.01) for x in items}
+
+    lock = threading.Lock()
+    state = {"pending": 0, "max_pending": 0}
+    returned = set()  # fetch / save 已返回的任务，断点推进时之前的任务必须都在其中
+
+    def fetch(item):
+        time.sleep(delay[item][0])
+        if outcome[item] in ("fetch_error", "none"):
+            with lock:
+                returned.add(item)
+        if outcome[item] == "fetch_error":
+            raise RuntimeError(f"fetch failed: {item}")
+        if outcome[item] == "none":
+            return None
+        with lock:
+            state["pending"] += 1
+            state["max_pending"] = max(state["max_pending"], state["pending"])
+        return item
+
+    def save(item, payload):
+        assert payload == item
+        time.sleep(delay[item][1])
+        with lock:
+            state["pending"] -= 1
+            returned.add(item)
+        if outcome[item] == "save_error":
+            raise ValueError(f"save failed: {item}")
+        return outcome[item] != "save_false"
+
+    checkpoints, violations = [], []
+
+    def checkpoint(item):
+        # 回调在工作线程中执行，异常不会传到测试线程，先记录下来
+        with lock:
+            if not all(x in returned for x in items[:items.index(item) + 1]):
+                violations.append(item)
+        checkpoints.append(item)
+
+    pipeline = FetchPipeline(fetch, save, fetch_workers=6, save_workers=2, max_pending=4, checkpoint=checkpoint)
+    ok_cnt, failed = pipeline.run(items)
+
+    succeeded = {x: outcome[x] in ("ok", "none") for x in items}
+    assert ok_cnt == sum(succeeded.values())
+    assert [x for x, _ in failed] == [x for x in items if not succeeded[x]]
+    assert all(reason for _, reason in failed)
+    assert dict(failed)[next(x for x in items if outcome[x] == "fetch_error")].startswith("fetch failed")
+
+    expected = _sequential_checkpoints(items, succeeded)
+    assert not violations
+    assert checkpoints == sorted(set(checkpoints), key=items.index)
+    assert set(checkpoints) <= set(expected) and checkpoints[-1] == expected[-1]
+    assert state["pending"] == 0 and 0 < state["max_pending"] <= 4
+
+
+def test_fetch_pipeline_max_pending():
+    """写入阻塞时请求线程停止提交新任务，在途数据数量不超过 max_pending"""
+    release = threading.Event()
+    fetched = []
+
+    def fetch(item):
+        fetched.append(item)
+        return item
+
+    def save(item, payload):
+        release.wait(5)
+        return True
+
+    pipeline = FetchPipeline(fetch, save, fetch_workers=4, save_workers=1, max_pending=3)
+    t = threading.Thread(target=pipeline.run, args=(list(range(20)),))
+    t.start()
+    time.sleep(0.2)
+    assert len(fetched) == 3
+    release.set()
+    t.join(5)
+    assert len(fetched) == 20
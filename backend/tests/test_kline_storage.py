@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/17 20:30
+describe: KlineStorage 年月分区存储单元测试
+"""
+import json
+import pandas as pd
+from czsc import mock
+from czsc.utils import format_standard_kline, bars_to_df
+from backend.src.storage.kline_storage import KlineStorage
+
+
+def _mock_bars():
+    df = mock.generate_symbol_kines("000001", "30分钟", sdt="20230101", edt="20230601", seed=1)
+    return format_standard_kline(df, freq="30分钟")
+
+
+def _files_on_disk(freq_dir):
+    return sorted(p.relative_to(freq_dir).as_posix() for p in freq_dir.rglob("*.parquet"))
+
+
+def _check_manifest(ks, symbol, freq):
+    """清单与磁盘上的分片文件一一对应，统计信息与分片内容一致"""
+    freq_dir = ks._get_freq_dir(symbol, freq)
+    manifest = ks._load_manifest(symbol, freq)
+    assert sorted(x["file"] for x in manifest["fragments"]) == _files_on_disk(freq_dir)
+    for x in manifest["fragments"]:
+        df = pd.read_parquet(freq_dir / x["file"])
+        assert len(df) == x["count"]
+        assert pd.Timestamp(x["start_dt"]) == df["dt"].min() and pd.Timestamp(x["end_dt"]) == df["dt"].max()
+    assert manifest["count"] == sum(x["count"] for x in manifest["fragments"])
+    return manifest
+
+
+def _ids(bars):
+    return {bar.dt: bar.id for bar in bars}
+
+
+def test_kline_storage_migrate_and_append(tmp_path):
+    """旧版本单文件迁移为分区布局，日常追加只写新分片"""
+    bars = _mock_bars()
+    ks = KlineStorage(tmp_path)
+    legacy = ks._get_file_path("000001", "30分钟")
+    legacy.parent.mkdir(parents=True)
+    df = bars_to_df(bars[:600])
+    df["id"] = range(1, 601)
+    df.to_parquet(legacy, index=False)
+
+    assert [x.dt for x in ks.load_bars("000001", "30分钟")] == [x.dt for x in bars[:600]]
+
+    ks.append_bars("000001", "30分钟", bars[580:700])
+    assert not legacy.exists()
+    manifest = _check_manifest(ks, "000001", "30分钟")
+    assert manifest["count"] == 700 and "ids_dirty" not in manifest
+
+    files = set(_files_on_disk(legacy.parent))
+    ks.append_bars("000001", "30分钟", bars[700:710])
+    new_files = set(_files_on_disk(legacy.parent)) - files
+    assert len(new_files) == 1 and files < set(_files_on_disk(legacy.parent))
+
+    loaded = ks.load_bars("000001", "30分钟")
+    assert [x.dt for x in loaded] == [x.dt for x in bars[:710]]
+    assert [x.id for x in loaded] == list(range(1, 711))
+    assert [x.close for x in loaded] == [x.close for x in bars[:710]]
+    assert ks.get_metadata("000001")["30分钟"]["count"] == 710
+
+
+def test_kline_storage_backfill_and_compact(tmp_path):
+    """补写历史数据去重，任意时间范围加载的 id 一致；压缩后分片合并、id 重写"""
+    bars = _mock_bars()
+    ks = KlineStorage(tmp_path)
+    ks.save_bars("000001", "30分钟", bars[:300] + bars[400:800])
+    ks.append_bars("000001", "30分钟", bars[800:900])
+
+    # 补写缺失的历史数据，与已有数据重复的K线被忽略
+    ks.append_bars("000001", "30分钟", bars[250:450])
+    manifest = _check_manifest(ks, "000001", "30分钟")
+    assert manifest["count"] == 900 and manifest["ids_dirty"]
+
+    full = ks.load_bars("000001", "30分钟")
+    assert [x.dt for x in full] == [x.dt for x in bars[:900]]
+    assert [x.id for x in full] == list(range(1, 901))
+
+    full_ids = _ids(full)
+    for sdt, edt in [(bars[350].dt, bars[500].dt), (bars[600].dt, None), (None, bars[100].dt)]:
+        part = ks.load_bars("000001", "30分钟", sdt=sdt, edt=edt)
+        assert part and all(full_ids[x.dt] == x.id for x in part)
+
+    res = ks.compact("000001", "30分钟")
+    manifest = _check_manifest(ks, "000001", "30分钟")
+    assert res["fragments_after"] < res["fragments_before"]
+    assert len({x["ym"] for x in manifest["fragments"]}) == len(manifest["fragments"])
+    assert "ids_dirty" not in manifest
+
+    # 压缩后分片中保存的 id 即为全局序号
+    freq_dir = ks._get_freq_dir("000001", "30分钟")
+    stored = pd.concat([pd.read_parquet(freq_dir / x["file"]) for x in manifest["fragments"]])
+    assert sorted(stored["id"]) == list(range(1, 901))
+    assert _ids(ks.load_bars("000001", "30分钟")) == full_ids
+    assert ks.compact("000001", "30分钟")["fragments_before"] == len(manifest["fragments"])
+
+
+def test_kline_storage_cleanup(tmp_path):
+    """清理旧分片后清单与磁盘保持一致，剩余数据的 id 从 1 开始"""
+    bars = _mock_bars()
+    ks = KlineStorage(tmp_path)
+    ks.save_bars("000001", "30分钟", bars)
+    before = pd.Timestamp("2023-03-01")
+
+    res = ks.cleanup_old_data("20230301", dry_run=True)
+    assert res["files_to_delete"] == 2 and len(_check_manifest(ks, "000001", "30分钟")["fragments"]) == 6
+
+    res = ks.cleanup_old_data("20230301", dry_run=False)
+    manifest = _check_manifest(ks, "000001", "30分钟")
+    assert len(manifest["fragments"]) == 4 and manifest["ids_dirty"]
+    assert pd.Timestamp(manifest["start_dt"]) >= before
+
+    kept = [x for x in bars if x.dt >= before]
+    full = ks.load_bars("000001", "30分钟")
+    assert [x.dt for x in full] == [x.dt for x in kept]
+    assert [x.id for x in full] == list(range(1, len(kept) + 1))
+    part = ks.load_bars("000001", "30分钟", sdt="20230415")
+    assert all(_ids(full)[x.dt] == x.id for x in part)
+
+    metadata = json.loads(ks._get_metadata_path("000001").read_text(encoding="utf-8"))
+    assert metadata["30分钟"]["count"] == len(kept) and metadata["30分钟"]["fragments"] == 4
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/17 21:30
+describe: 分区清单单元测试：读取方按清单裁剪与 glob 结果一致，清单缺失或不完整时回退到 glob
+"""
+import json
+import importlib.util
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from backend.data.raw_data_storage import RawDataStorage
+from backend.data.raw_data_loader import RawDataLoader
+from backend.data.partition_manifest import PartitionManifest, load_manifest, manifest_files
+
+project_root = Path(__file__).resolve().parents[2]
+RANGES = [(None, None), ("2024-02-10", "2024-03-05 10:00"), ("2024-01-01", "2024-01-31"), ("2025-01-01", None)]
+
+
+def _minute_df(stock_code, days, n=30):
+    ts = pd.DatetimeIndex(sorted(x for d in days for x in pd.date_range(f"{d} 09:31", periods=n, freq="1min")))
+    return pd.DataFrame({
+        "stock_code": stock_code, "timestamp": ts, "open": 1.0, "high": 1.0, "low": 1.0,
+        "close": range(len(ts)), "volume": 1.0, "amount": 1.0, "period": 1,
+    })
+
+
+def _load_script(name, rel_path):
+    spec = importlib.util.spec_from_file_location(name, project_root / rel_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """三个月的分钟数据，其中二月有一个增量片段"""
+    storage = RawDataStorage(base_path=tmp_path)
+    storage.append_minute_data(_minute_df("000001.SZ", ["2024-01-05", "2024-01-08", "2024-02-05"]))
+    storage.append_minute_data(_minute_df("000001.SZ", ["2024-02-20", "2024-03-04", "2024-03-05"]))
+    return storage
+
+
+def _stock_dir(storage):
+    return storage.base_path / "raw" / "minute_by_stock" / "stock_code=000001.SZ"
+
+
+def _set_complete(stock_dir, complete):
+    path = stock_dir / PartitionManifest.FILE_NAME
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["complete"] = complete
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def _read_with_all_readers(storage):
+    """各读取方在所有时间范围上读到的时间戳，没有数据时为空列表"""
+    read = _load_script("minute_read", "scripts/minute/read.py")
+    scan = _load_script("minute_scan", "scripts/minute/scan.py")
+    loader = RawDataLoader(base_path=storage.base_path)
+    res = {}
+    for sdt, edt in RANGES:
+        sdt_, edt_ = (pd.Timestamp(sdt) if sdt else None), (pd.Timestamp(edt) if edt else None)
+        df = loader.load_all_minute_data_by_stock("000001.SZ", sdt_, edt_)
+        res[("loader", sdt, edt)] = [] if df is None else sorted(df["timestamp"])
+        _, _, df = read.load_local_minute_df("000001.SZ", sdt, edt, period=1, base_path=storage.base_path)
+        res[("read", sdt, edt)] = [] if df is None else df["timestamp"].tolist()
+    res["scan"] = scan._get_dt_range_from_parquet("000001.SZ", storage.base_path / "raw" / "minute_by_stock")
+    return res
+
+
+def test_manifest_prunes_like_glob(storage):
+    """完整清单裁剪后的读取结果与 glob 全部文件一致，清单不完整或缺失时回退到 glob"""
+    stock_dir = _stock_dir(storage)
+    glob_files = sorted(stock_dir.glob("year=*/*.parquet"))
+    assert len(glob_files) == 4 and load_manifest(stock_dir) is not None
+
+    assert manifest_files(stock_dir) == glob_files
+    pruned = manifest_files(stock_dir, pd.Timestamp("2024-02-10"), pd.Timestamp("2024-03-05"))
+    assert [fp.name for fp in pruned] == ["000001.SZ_2024-02_d0001.parquet", "000001.SZ_2024-03.parquet"]
+    assert manifest_files(stock_dir, pd.Timestamp("2025-01-01")) == []
+
+    with_manifest = _read_with_all_readers(storage)
+    assert with_manifest[("loader", "2024-02-10", "2024-03-05 10:00")][0] == pd.Timestamp("2024-02-20 09:31")
+    assert with_manifest["scan"] == (pd.Timestamp("2024-01-05 09:31"), pd.Timestamp("2024-03-05 10:00"))
+
+    _set_complete(stock_dir, False)
+    assert load_manifest(stock_dir) is None and manifest_files(stock_dir) is None
+    assert _read_with_all_readers(storage) == with_manifest
+
+    (stock_dir / PartitionManifest.FILE_NAME).unlink()
+    assert manifest_files(stock_dir) is None
+    assert _read_with_all_readers(storage) == with_manifest
+
+    # 历史数据一次性建立清单后恢复按清单裁剪
+    assert storage.build_manifests(stock_dir.parent) == 1
+    assert manifest_files(stock_dir) == glob_files
+    assert _read_with_all_readers(storage) == with_manifest
+
+
+def test_research_manifest_files(storage, tmp_path, monkeypatch):
+    """research 直接读取清单 JSON，裁剪结果与 partition_manifest 一致"""
+    monkeypatch.setenv("czsc_research_cache", str(tmp_path))
+    from czsc.connectors import research
+
+    stock_dir = _stock_dir(storage)
+    for sdt, edt in [("2024-01-01", "2024-12-31"), ("2024-02-10", "2024-03-05"), ("2024-01-06", "2024-01-07")]:
+        sdt, edt = pd.Timestamp(sdt), pd.Timestamp(edt)
+        assert research._manifest_minute_files(stock_dir, sdt, edt) == manifest_files(stock_dir, sdt, edt)
+        assert sorted(research._prune_minute_files(stock_dir, sdt, edt)) == sorted(manifest_files(stock_dir, sdt, edt))
+
+    _set_complete(stock_dir, False)
+    assert research._manifest_minute_files(stock_dir, pd.Timestamp("2024-01-01"), pd.Timestamp("2024-12-31")) is None
+
+
+def test_local_service_manifest(storage, tmp_path, monkeypatch):
+    """local_czsc_service 按清单裁剪与按年月查找文件的结果一致"""
+    pytest.importorskip("pydantic")
+    monkeypatch.setenv("czsc_research_cache", str(tmp_path))
+    from backend.src.services.local_czsc_service import _load_minute_df_with_meta
+
+    stock_dir = _stock_dir(storage)
+    sdt, edt = pd.Timestamp("2024-02-10"), pd.Timestamp("2024-03-05 10:00")
+    df1, meta1 = _load_minute_df_with_meta(storage.base_path, "000001.SZ", sdt, edt)
+    (stock_dir / PartitionManifest.FILE_NAME).unlink()
+    df2, meta2 = _load_minute_df_with_meta(storage.base_path, "000001.SZ", sdt, edt)
+    pd.testing.assert_frame_equal(df1, df2)
+    assert meta1["parquet_count"] == 2 and meta1["rows_after_filter"] == meta2["rows_after_filter"]
+
+
+def test_manifest_no_stale_entries(storage):
+    """合并增量片段后清单中不残留已删除的文件"""
+    stock_dir = _stock_dir(storage)
+    storage.append_minute_data(_minute_df("000001.SZ", ["2024-03-06"]), compact_threshold=0)
+    assert len(PartitionManifest(stock_dir).partition_files("2024-03")) == 2
+
+    assert storage.compact_minute_data(["000001.SZ"]) == 2
+    manifest = PartitionManifest(stock_dir)
+    on_disk = sorted(fp.relative_to(stock_dir).as_posix() for fp in stock_dir.rglob("*.parquet"))
+    assert sorted(manifest.files) == on_disk and len(on_disk) == 3
+    assert sum(v["rows"] for v in manifest.files.values()) == 7 * 30
+
+    # 删除清单外的文件、没有清单的目录都不报错
+    storage.remove_from_manifest([stock_dir / "year=2024" / "missing.parquet", stock_dir.parent / "x" / "y.parquet"])
+    assert sorted(PartitionManifest(stock_dir).files) == on_disk
+
+
+def test_by_date_manifest(tmp_path):
+    """按日期分区的数据集：写入方只登记写入的文件，建立清单前读取方回退到 glob"""
+    storage = RawDataStorage(base_path=tmp_path)
+    for d in ["2024-01-05", "2024-01-08"]:
+        df = pd.concat([_minute_df(code, [d]) for code in ["000001.SZ", "000002.SZ"]], ignore_index=True)
+        assert storage.save_minute_data_by_date(df, date.fromisoformat(d))
+
+    files = sorted(tmp_path.rglob("*.parquet"))
+    manifests = list(tmp_path.rglob(PartitionManifest.FILE_NAME))
+    assert len(manifests) == 1 and len(files) == 2
+    root = manifests[0].parent
+    manifest = PartitionManifest(root)
+    assert not manifest.complete and len(manifest.files) == 2
+    assert {v["partition"] for v in manifest.files.values()} == {"2024-01-05", "2024-01-08"}
+    assert all(v["symbol"] is None and v["rows"] == 60 for v in manifest.files.values())
+    assert manifest_files(root) is None
+
+    assert storage.build_manifests(root) == 1
+    assert manifest_files(root, pd.Timestamp("2024-01-06")) == [files[1]]
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/17 20:30
+describe: RawDataStorage 分钟数据增量片段单元测试
+"""
+import pandas as pd
+from backend.data.raw_data_storage import RawDataStorage
+from backend.data.partition_manifest import PartitionManifest
+
+
+def _minute_df(stock_code, sdt, n):
+    ts = pd.date_range(sdt, periods=n, freq="1min")
+    return pd.DataFrame({
+        "stock_code": stock_code, "timestamp": ts, "open": 1.0, "high": 1.0, "low": 1.0,
+        "close": range(n), "volume": 1.0, "amount": 1.0, "period": 1,
+    })
+
+
+def _stock_dir(storage, stock_code):
+    return storage.base_path / "raw" / "minute_by_stock" / f"stock_code={stock_code}"
+
+
+def _read_all(storage, stock_code):
+    files = sorted(_stock_dir(storage, stock_code).glob("year=*/*.parquet"))
+    return pd.concat([pd.read_parquet(fp) for fp in files], ignore_index=True)
+
+
+def _file_names(storage, stock_code):
+    return sorted(fp.name for fp in _stock_dir(storage, stock_code).glob("year=*/*.parquet"))
+
+
+def test_append_minute_fragments(tmp_path):
+    """追加两次生成两个增量片段，全量读取无重复；月内补写的历史数据被忽略"""
+    storage = RawDataStorage(base_path=tmp_path)
+    df = _minute_df("000001.SZ", "2024-01-05 09:31", 100)
+    assert storage.append_minute_data(df.iloc[:60])
+    assert storage.append_minute_data(df.iloc[50:80])
+    assert storage.append_minute_data(df.iloc[70:])
+    assert _file_names(storage, "000001.SZ") == [
+        "000001.SZ_2024-01.parquet", "000001.SZ_2024-01_d0001.parquet", "000001.SZ_2024-01_d0002.parquet"]
+
+    dfa = _read_all(storage, "000001.SZ").sort_values("timestamp", ignore_index=True)
+    assert not dfa["timestamp"].duplicated().any()
+    assert dfa["timestamp"].tolist() == df["timestamp"].tolist()
+
+    # 不晚于已有最大时间的数据不写入，也不生成新片段
+    backfill = _minute_df("000001.SZ", "2024-01-02 09:31", 30)
+    assert storage.append_minute_data(pd.concat([backfill, df.iloc[90:]]))
+    assert len(_file_names(storage, "000001.SZ")) == 3
+    assert len(_read_all(storage, "000001.SZ")) == 100
+
+    manifest = storage.get_minute_manifest("000001.SZ")
+    assert manifest.complete and manifest.partition_max("2024-01") == df["timestamp"].max()
+    assert storage.get_minute_latest_timestamp("000001.SZ") == df["timestamp"].max()
+
+
+def test_compact_minute_fragments(tmp_path):
+    """片段数达到阈值时自动合并，按需合并与全量保存都会删除片段并更新清单"""
+    storage = RawDataStorage(base_path=tmp_path)
+    df = _minute_df("000001.SZ", "2024-01-05 09:31", 100)
+    for i in range(0, 40, 10):
+        assert storage.append_minute_data(df.iloc[i:i + 10], compact_threshold=3)
+    assert _file_names(storage, "000001.SZ") == ["000001.SZ_2024-01.parquet"]
+    assert _read_all(storage, "000001.SZ")["timestamp"].tolist() == df["timestamp"].iloc[:40].tolist()
+    manifest = storage.get_minute_manifest("000001.SZ")
+    assert manifest.partition_files("2024-01") == ["year=2024/000001.SZ_2024-01.parquet"]
+    assert manifest.files["year=2024/000001.SZ_2024-01.parquet"]["rows"] == 40
+
+    for i in range(40, 60, 10):
+        assert storage.append_minute_data(df.iloc[i:i + 10], compact_threshold=0)
+    assert len(_file_names(storage, "000001.SZ")) == 3
+    assert storage.compact_minute_data(min_fragments=3) == 0
+    assert storage.compact_minute_data(["000001.SZ"]) == 1
+    assert _file_names(storage, "000001.SZ") == ["000001.SZ_2024-01.parquet"]
+    assert len(storage.get_minute_manifest("000001.SZ").files) == 1
+
+    # 全量保存月度文件时合并已有片段
+    assert storage.append_minute_data(df.iloc[60:80], compact_threshold=0)
+    assert storage.save_minute_data_by_stock(df.iloc[80:], "000001.SZ", 2024, 1)
+    assert _file_names(storage, "000001.SZ") == ["000001.SZ_2024-01.parquet"]
+    assert _read_all(storage, "000001.SZ")["timestamp"].tolist() == df["timestamp"].tolist()
+    manifest = storage.get_minute_manifest("000001.SZ")
+    assert list(manifest.files) == ["year=2024/000001.SZ_2024-01.parquet"]
+    assert manifest.latest_timestamp() == df["timestamp"].max()
+
+
+def test_minute_latest_timestamp_legacy(tmp_path):
+    """没有分区清单的历史数据：首次查询时建立清单，之后追加只写增量片段"""
+    storage = RawDataStorage(base_path=tmp_path)
+    dfs = [_minute_df("000001.SZ", "2024-01-31 14:00", 61), _minute_df("000001.SZ", "2024-02-01 09:31", 139)]
+    df = pd.concat(dfs, ignore_index=True)
+    year_dir = _stock_dir(storage, "000001.SZ") / "year=2024"
+    year_dir.mkdir(parents=True)
+    df.iloc[:61].to_parquet(year_dir / "000001.SZ_2024-01.parquet", index=False)
+    df.iloc[61:100].to_parquet(year_dir / "000001.SZ_2024-02.parquet", index=False)
+
+    assert storage.get_minute_latest_timestamp("000001.SZ") == df["timestamp"].iloc[99]
+    manifest = PartitionManifest(_stock_dir(storage, "000001.SZ"))
+    assert manifest.complete and manifest.partitions() == ["2024-01", "2024-02"]
+    assert manifest.time_range() == (df["timestamp"].iloc[0], df["timestamp"].iloc[99])
+    assert storage.get_minute_latest_timestamp("000002.SZ") is None
+
+    assert storage.append_minute_data(df.iloc[90:])
+    assert "000001.SZ_2024-02_d0001.parquet" in _file_names(storage, "000001.SZ")
+    assert len(_read_all(storage, "000001.SZ")) == 200
+    assert storage.get_minute_latest_timestamp("000001.SZ") == df["timestamp"].iloc[-1]
@@ -31,38 +31,29 @@ except ImportError:
 
 from czsc import envs
 
-# 可选导入 fsa 模块（飞书相关功能，需要 tenacity 等依赖）
-try:
-    from czsc import fsa
-except ImportError as e:
-    import warnings
-    warnings.warn(f"无法导入 czsc.fsa 模块: {e}。飞书相关功能将不可用。如需使用，请安装依赖: pip install tenacity")
-    fsa = None
-
 from czsc import utils
 from czsc import traders
-from czsc import sensors
-from czsc import aphorism
-from czsc import svc
-from czsc import mock
-from czsc.traders import rwc
-from czsc.traders import cwc
 from czsc.analyze import CZSC
 from czsc.objects import Freq, Operate, Direction, Signal, Factor, Event, RawBar, NewBar, Position, ZS
 from czsc.strategies import CzscStrategyBase, CzscJsonStrategy
-from czsc.sensors import holds_concepts_effect, CTAResearch, EventMatchSensor
-from czsc.sensors.feature import FixedNumberSelector
 from czsc.utils import ta
 from czsc.traders import (
     CzscTrader,
     CzscSignals,
     generate_czsc_signals,
+    generate_symbols_signals,
+    EventMatcher,
+    simulate_positions,
+    simulate_position,
     check_signals_acc,
     get_unique_signals,
     PairsPerformance,
     combine_holds_and_pairs,
     combine_dates_and_pairs,
     DummyBacktest,
+    SignalsCache,
+    save_checkpoint,
+    load_checkpoint,
     SignalsParser,
     get_signals_config,
     get_signals_freqs,
@@ -72,25 +63,19 @@ from czsc.traders import (
     ExitsOptimize,
 )
 
-from czsc.traders.rwc import (
-    RedisWeightsClient,
-    get_strategy_mates,
-    get_strategy_names,
-    get_heartbeat_time,
-    clear_strategy,
-    get_strategy_weights,
-    get_strategy_latest,
-)
-
 from czsc.utils import (
     timeout_decorator,
     mac_address,
     overlap,
     to_arrow,
     format_standard_kline,
+    df_to_bars,
+    bars_to_df,
     KlineChart,
     BarGenerator,
+    ColumnarBars,
     freq_end_time,
+    freq_end_times,
     resample_bars,
     is_trading_time,
     get_intraday_times,
@@ -155,54 +140,6 @@ from czsc.utils.trade import (
     adjust_holding_weights,
 )
 
-# streamlit 量化分析组件
-from czsc.utils.st_components import (
-    show_daily_return,
-    show_yearly_stats,
-    show_splited_daily,
-    show_monthly_return,
-    show_correlation,
-    show_corr_graph,
-    show_sectional_ic,
-    show_factor_layering,
-    show_weight_backtest,
-    show_ts_rolling_corr,
-    show_ts_self_corr,
-    show_stoploss_by_direction,
-    show_cointegration,
-    show_out_in_compare,
-    show_optuna_study,
-    show_drawdowns,
-    show_rolling_daily_performance,
-    show_event_return,
-    show_psi,
-    show_holds_backtest,
-    show_symbols_corr,
-    show_feature_returns,
-    show_czsc_trader,
-    show_strategies_recent,
-    show_factor_value,
-    show_code_editor,
-    show_classify,
-    show_df_describe,
-    show_date_effect,
-    show_weight_distribution,
-    show_normality_check,
-    show_outsample_by_dailys,
-    show_returns_contribution,
-    show_symbols_bench,
-    show_quarterly_effect,
-    show_cumulative_returns,
-    show_cta_periods_classify,
-    show_volatility_classify,
-    show_portfolio,
-    show_turnover_rate,
-    show_describe,
-    show_event_features,
-    show_stats_compare,
-    show_symbol_penalty,
-)
-
 from czsc.utils.bi_info import (
     calculate_bi_info,
     symbols_bi_infos,
@@ -232,7 +169,6 @@ from czsc.features.utils import (
 
 
 from czsc.utils.kline_quality import check_kline_quality
-from czsc.traders import cwc
 
 from czsc.utils.portfolio import (
     max_sharp,
@@ -262,6 +198,108 @@ from czsc.eda import (
     make_price_features,
 )
 
+# 依赖较重的子模块（streamlit、plotly、redis、clickhouse、飞书等）在首次访问时才导入，
+# 如 czsc.svc、czsc.show_daily_return；导入后缓存在模块命名空间中，后续访问没有额外开销
+_lazy_modules = {
+    "svc": "czsc.svc",
+    "fsa": "czsc.fsa",
+    "rwc": "czsc.traders.rwc",
+    "cwc": "czsc.traders.cwc",
+    "sensors": "czsc.sensors",
+    "aphorism": "czsc.aphorism",
+    "mock": "czsc.mock",
+    "signals": "czsc.signals",
+}
+
+_lazy_attrs = {
+    # czsc.sensors
+    "holds_concepts_effect": "czsc.sensors",
+    "CTAResearch": "czsc.sensors",
+    "EventMatchSensor": "czsc.sensors",
+    "FixedNumberSelector": "czsc.sensors.feature",
+    # czsc.traders.rwc
+    "RedisWeightsClient": "czsc.traders.rwc",
+    "get_strategy_mates": "czsc.traders.rwc",
+    "get_strategy_names": "czsc.traders.rwc",
+    "get_heartbeat_time": "czsc.traders.rwc",
+    "clear_strategy": "czsc.traders.rwc",
+    "get_strategy_weights": "czsc.traders.rwc",
+    "get_strategy_latest": "czsc.traders.rwc",
+    # streamlit 量化分析组件
+    "show_daily_return": "czsc.utils.st_components",
+    "show_yearly_stats": "czsc.utils.st_components",
+    "show_splited_daily": "czsc.utils.st_components",
+    "show_monthly_return": "czsc.utils.st_components",
+    "show_correlation": "czsc.utils.st_components",
+    "show_corr_graph": "czsc.utils.st_components",
+    "show_sectional_ic": "czsc.utils.st_components",
+    "show_factor_layering": "czsc.utils.st_components",
+    "show_weight_backtest": "czsc.utils.st_components",
+    "show_ts_rolling_corr": "czsc.utils.st_components",
+    "show_ts_self_corr": "czsc.utils.st_components",
+    "show_stoploss_by_direction": "czsc.utils.st_components",
+    "show_cointegration": "czsc.utils.st_components",
+    "show_out_in_compare": "czsc.utils.st_components",
+    "show_optuna_study": "czsc.utils.st_components",
+    "show_drawdowns": "czsc.utils.st_components",
+    "show_rolling_daily_performance": "czsc.utils.st_components",
+    "show_event_return": "czsc.utils.st_components",
+    "show_psi": "czsc.utils.st_components",
+    "show_holds_backtest": "czsc.utils.st_components",
+    "show_symbols_corr": "czsc.utils.st_components",
+    "show_feature_returns": "czsc.utils.st_components",
+    "show_czsc_trader": "czsc.utils.st_components",
+    "show_strategies_recent": "czsc.utils.st_components",
+    "show_factor_value": "czsc.utils.st_components",
+    "show_code_editor": "czsc.utils.st_components",
+    "show_classify": "czsc.utils.st_components",
+    "show_df_describe": "czsc.utils.st_components",
+    "show_date_effect": "czsc.utils.st_components",
+    "show_weight_distribution": "czsc.utils.st_components",
+    "show_normality_check": "czsc.utils.st_components",
+    "show_outsample_by_dailys": "czsc.utils.st_components",
+    "show_returns_contribution": "czsc.utils.st_components",
+    "show_symbols_bench": "czsc.utils.st_components",
+    "show_quarterly_effect": "czsc.utils.st_components",
+    "show_cumulative_returns": "czsc.utils.st_components",
+    "show_cta_periods_classify": "czsc.utils.st_components",
+    "show_volatility_classify": "czsc.utils.st_components",
+    "show_portfolio": "czsc.utils.st_components",
+    "show_turnover_rate": "czsc.utils.st_components",
+    "show_describe": "czsc.utils.st_components",
+    "show_event_features": "czsc.utils.st_components",
+    "show_stats_compare": "czsc.utils.st_components",
+    "show_symbol_penalty": "czsc.utils.st_components",
+}
+
+
+def __getattr__(name):
+    """按需导入 _lazy_modules 和 _lazy_attrs 中的子模块和对象"""
+    import importlib
+
+    if name in _lazy_modules:
+        try:
+            value = importlib.import_module(_lazy_modules[name])
+        except ImportError as e:
+            if name != "fsa":
+                raise
+            # fsa 模块（飞书相关功能，需要 tenacity 等依赖）为可选模块
+            import warnings
+
+            warnings.warn(f"无法导入 czsc.fsa 模块: {e}。飞书相关功能将不可用。如需使用，请安装依赖: pip install tenacity")
+            value = None
+    elif name in _lazy_attrs:
+        value = getattr(importlib.import_module(_lazy_attrs[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_modules) | set(_lazy_attrs))
+
 
 __version__ = "0.9.69"
 __author__ = "zengbin93"
@@ -7,6 +7,7 @@ describe: 缠论分型、笔的识别
 """
 import os
 import webbrowser
+from bisect import bisect_left, bisect_right
 from loguru import logger
 from typing import List
 from collections import OrderedDict
@@ -14,6 +15,7 @@ from czsc.enum import Mark, Direction
 from czsc.objects import BI, FX, RawBar, NewBar
 from czsc.utils.echarts_plot import kline_pro
 from czsc.utils.sig import get_zs_seq
+from czsc.utils.ta import IndicatorEngine
 from czsc import envs
 
 logger.disable('czsc.analyze')
@@ -191,6 +193,156 @@ def check_bi(bars: List[NewBar], **kwargs):
         return None, bars
 
 
+class UbiFxs:
+    """未完成笔 bars_ubi 上分型的增量维护器
+
+    bars_ubi 只会在尾部发生变化（追加、替换或回退最后一根无包含K线），或者在成笔后从头部截断。
+    这里缓存每根无包含K线作为中间K线时的分型识别结果，每次同步只重算发生变化的尾部，
+    维护与 check_fxs 完全一致的分型序列，以及 check_bi 和第一笔查找所需的前缀极值，
+    从而让 CZSC.update 的单根K线成本不再随未完成笔的长度线性增长。
+    """
+
+    def __init__(self):
+        self.bars: List[NewBar] = []  # 上一次同步时的 bars_ubi 快照
+        self.cands: List = []  # cands[i] 为 check_fx(bars[i-1], bars[i], bars[i+1]) 的结果，cands[0] 恒为 None
+        self.fxs: List[FX] = []  # 与 check_fxs(bars) 结果完全一致的分型序列
+        self.pos: List[int] = []  # fxs 中每个分型的中间K线在 bars 中的位置
+        self.best: List[int] = []  # best[j] 为 fxs[1:j+1] 中 check_bi 选出的笔结束分型位置，-1 表示没有
+        self.anchor: List[int] = []  # anchor[j] 为 fxs[:j+1] 中第一笔查找选出的起点分型位置
+
+    def sync(self, bars: List[NewBar]):
+        """与最新的无包含K线序列对齐，只重算发生变化的部分
+
+        :param bars: 最新的 bars_ubi
+        """
+        old = self.bars
+        if not old or not bars:
+            self._truncate(0)
+        elif bars[0] is not old[0]:
+            # 头部被截断：找到新的起点在快照中的位置；找不到则全量重建
+            k = bisect_left(old, bars[0].dt, key=lambda x: x.dt)
+            if k < len(old) and old[k] is bars[0]:
+                self._drop(k)
+            else:
+                self._truncate(0)
+
+        # 尾部变化之前的K线对象保持不变，二分查找第一个发生变化的位置
+        old = self.bars
+        lo, hi = 0, min(len(old), len(bars))
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if old[mid] is bars[mid]:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo == len(old) == len(bars):
+            return
+        self._truncate(lo)
+        self._extend(bars)
+
+    def drop(self, k: int) -> "UbiFxs":
+        """返回丢弃前 k 根无包含K线之后的新维护器，自身状态保持不变"""
+        new = UbiFxs()
+        new.bars, new.cands = self.bars, self.cands
+        new._drop(k)
+        return new
+
+    def find_bi(self, min_bi_len: int):
+        """与 check_bi 等价的成笔判断
+
+        :param min_bi_len: 一笔的最小无包含K线数量
+        :return: (BI对象或None, 成笔后剩余K线在 bars 中的起始位置或None)
+        """
+        fxs = self.fxs
+        if len(fxs) < 2 or self.best[-1] < 0:
+            return None, None
+
+        fx_a = fxs[0]
+        fx_b = fxs[self.best[-1]]
+        direction = Direction.Up if fx_a.mark == Mark.D else Direction.Down
+        ia, ib = self.pos[0], self.pos[self.best[-1]]
+        bars_a = self.bars[ia - 1: ib + 2]
+
+        # 判断fx_a和fx_b价格区间是否存在包含关系
+        ab_include = (fx_a.high > fx_b.high and fx_a.low < fx_b.low) or (fx_a.high < fx_b.high and fx_a.low > fx_b.low)
+
+        # 成笔的条件：1）顶底分型之间没有包含关系；2）笔长度大于等于min_bi_len
+        if (not ab_include) and (len(bars_a) >= min_bi_len):
+            fxs_ = fxs[: bisect_right(self.pos, ib + 1)]
+            bi = BI(symbol=fx_a.symbol, fx_a=fx_a, fx_b=fx_b, fxs=fxs_, direction=direction, bars=bars_a)
+            return bi, ib - 1
+        return None, None
+
+    def _truncate(self, d: int):
+        """丢弃 bars[d:] 及所有依赖它们的分型"""
+        keep = max(d - 1, 0)
+        del self.bars[d:]
+        del self.cands[keep:]
+        pos = self.pos
+        while pos and pos[-1] >= keep:
+            pos.pop()
+        n = len(pos)
+        del self.fxs[n:]
+        del self.best[n:]
+        del self.anchor[n:]
+
+    def _drop(self, k: int):
+        """丢弃前 k 根无包含K线，并按新的序列重新过滤分型"""
+        bars, cands = self.bars[k:], self.cands[k:]
+        if cands:
+            cands[0] = None
+        self.bars, self.cands = bars, cands
+        self.fxs, self.pos, self.best, self.anchor = [], [], [], []
+        for i, fx in enumerate(cands):
+            if fx is not None:
+                self._accept(i, fx)
+
+    def _extend(self, bars: List[NewBar]):
+        """追加新的无包含K线，并识别新出现的分型"""
+        own = self.bars
+        own.extend(bars[len(own):])
+        cands = self.cands
+        for i in range(len(cands), len(own) - 1):
+            fx = check_fx(own[i - 1], own[i], own[i + 1]) if i > 0 else None
+            cands.append(fx)
+            if fx is not None:
+                self._accept(i, fx)
+
+    def _accept(self, i: int, fx: FX):
+        """按照 check_fxs 的规则将分型加入序列，并更新前缀极值"""
+        fxs = self.fxs
+        # 默认情况下，fxs本身是顶底交替的，但是对于一些特殊情况下不是这样; 临时强制要求fxs序列顶底交替
+        if len(fxs) >= 2 and fx.mark == fxs[-1].mark:
+            logger.error(f"check_fxs错误: {self.bars[i].dt}，{fx.mark}，{fxs[-1].mark}")
+            return
+
+        if not fxs:
+            best, anchor = -1, 0
+        else:
+            j = len(fxs)
+            fx_a = fxs[0]
+            best = self.best[-1]
+            if fx_a.mark == Mark.D:
+                if fx.mark == Mark.G and fx.dt > fx_a.dt and fx.fx > fx_a.fx \
+                        and (best < 0 or fx.high > fxs[best].high):
+                    best = j
+            elif fx_a.mark == Mark.G:
+                if fx.mark == Mark.D and fx.dt > fx_a.dt and fx.fx < fx_a.fx \
+                        and (best < 0 or fx.low < fxs[best].low):
+                    best = j
+
+            anchor = self.anchor[-1]
+            if fx.mark == fx_a.mark and ((fx_a.mark == Mark.D and fx.low <= fxs[anchor].low)
+                                         or (fx_a.mark == Mark.G and fx.high >= fxs[anchor].high)):
+                anchor = j
+
+        fxs.append(fx)
+        self.pos.append(i)
+        self.best.append(best)
+        self.anchor.append(anchor)
+
+
 class CZSC:
     def __init__(self,
                  bars: List[RawBar],
@@ -214,6 +366,13 @@ class CZSC:
         self.signals = None
         # cache 是信号计算过程的缓存容器，需要信号计算函数自行维护
         self.cache = OrderedDict()
+        # 增量指标引擎，相同参数的指标在所有信号函数之间共享，每根K线只推进一步
+        self.indicators = IndicatorEngine()
+        # bars_ubi 上分型的增量维护器，以及最后一笔成笔前的维护器状态
+        self.__ubi_fxs = UbiFxs()
+        self.__ubi_fxs_stash = None
+        # 上一次控制 bars_raw 数量时的第一笔
+        self.__first_bi = None
 
         for bar in bars:
             self.update(bar)
@@ -222,50 +381,69 @@ class CZSC:
         """返回对象的字符串表示"""
         return "<CZSC~{}~{}>".format(self.symbol, self.freq.value)
 
+    def __setstate__(self, state):
+        # 兼容旧版本序列化的对象（如 dill 保存的实盘 trader）：缺少增量状态时按当前序列重建
+        self.__dict__.update(state)
+        if "indicators" not in state:
+            self.indicators = IndicatorEngine()
+        if "_CZSC__ubi_fxs" not in state:
+            self.__ubi_fxs = UbiFxs()
+            self.__ubi_fxs.sync(self.bars_ubi)
+            self.__ubi_fxs_stash = None
+        if "_CZSC__first_bi" not in state:
+            self.__first_bi = self.bi_list[0] if self.bi_list else None
+
     def __update_bi(self):
         """更新笔的识别结果
 
         函数执行逻辑：
 
         1. 如果未完成笔的K线数量少于3根，无法识别分型，直接返回
-        2. 如果是第一笔，需要找到第一个有效的分型作为起点，然后查找成笔
-        3. 如果不是第一笔，直接查找成笔
-        4. 检查当前笔是否被破坏（向上笔被新高破坏，向下笔被新低破坏）
-        5. 如果笔被破坏，将当前笔的K线与未完成笔的K线合并，重新识别
-        6. 更新笔列表和未完成笔的K线列表
+        2. 增量同步 bars_ubi 上的分型，只重算发生变化的尾部K线
+        3. 如果是第一笔，需要找到第一个有效的分型作为起点，然后查找成笔
+        4. 如果不是第一笔，直接查找成笔
+        5. 检查当前笔是否被破坏（向上笔被新高破坏，向下笔被新低破坏）
+        6. 如果笔被破坏，将当前笔的K线与未完成笔的K线合并，并恢复成笔前的分型状态，重新识别
+        7. 更新笔列表和未完成笔的K线列表
         """
         bars_ubi = self.bars_ubi
         if len(bars_ubi) < 3:
             return
 
+        min_bi_len = envs.get_min_bi_len()
+        ubi_fxs = self.__ubi_fxs
+        ubi_fxs.sync(bars_ubi)
+
         # 查找笔
         if not self.bi_list:
             # 第一笔的查找
-            fxs = check_fxs(bars_ubi)
-            if not fxs:
+            if not ubi_fxs.fxs:
                 return
 
-            fx_a = fxs[0]
-            fxs_a = [x for x in fxs if x.mark == fx_a.mark]
-            for fx in fxs_a:
-                if (fx_a.mark == Mark.D and fx.low <= fx_a.low) \
-                        or (fx_a.mark == Mark.G and fx.high >= fx_a.high):
-                    fx_a = fx
-            bars_ubi = [x for x in bars_ubi if x.dt >= fx_a.elements[0].dt]
-
-            bi, bars_ubi_ = check_bi(bars_ubi)
+            s_index = ubi_fxs.pos[ubi_fxs.anchor[-1]] - 1
+            if s_index > 0:
+                bars_ubi = bars_ubi[s_index:]
+                ubi_fxs.sync(bars_ubi)
+
+            bi, b_index = ubi_fxs.find_bi(min_bi_len)
             if isinstance(bi, BI):
                 self.bi_list.append(bi)
-            self.bars_ubi = bars_ubi_
+                self.__ubi_fxs_stash = (bi, ubi_fxs)
+                self.__ubi_fxs = ubi_fxs.drop(b_index)
+                bars_ubi = bars_ubi[b_index:]
+            self.bars_ubi = bars_ubi
             return
 
         if self.verbose and len(bars_ubi) > 100:
             logger.info(f"{self.symbol} - {self.freq} - {bars_ubi[-1].dt} 未完成笔延伸数量: {len(bars_ubi)}")
 
-        bi, bars_ubi_ = check_bi(bars_ubi)
-        self.bars_ubi = bars_ubi_
+        bi, b_index = ubi_fxs.find_bi(min_bi_len)
         if isinstance(bi, BI):
             self.bi_list.append(bi)
+            # 保留成笔前的分型状态，笔被破坏时可以直接恢复，不需要全量重算
+            self.__ubi_fxs_stash = (bi, ubi_fxs)
+            self.__ubi_fxs = ubi_fxs.drop(b_index)
+            self.bars_ubi = bars_ubi[b_index:]
 
         # 后处理：如果当前笔被破坏，将当前笔的bars与bars_ubi进行合并，并丢弃
         last_bi = self.bi_list[-1]
@@ -276,6 +454,9 @@ class CZSC:
             # 必须是 -2，因为最后一根无包含K线有可能是未完成的
             self.bars_ubi = last_bi.bars[:-2] + [x for x in bars_ubi if x.dt >= last_bi.bars[-2].dt]
             self.bi_list.pop(-1)
+            if self.__ubi_fxs_stash and self.__ubi_fxs_stash[0] is last_bi:
+                self.__ubi_fxs = self.__ubi_fxs_stash[1]
+            self.__ubi_fxs_stash = None
 
     def update(self, bar: RawBar):
         """更新分析结果
@@ -312,16 +493,17 @@ class CZSC:
         # 更新笔
         self.__update_bi()
 
-        # 根据最大笔数量限制完成 bi_list, bars_raw 序列的数量控制
-        self.bi_list = self.bi_list[-self.max_bi_num:]
-        if self.bi_list:
-            sdt = self.bi_list[0].fx_a.elements[0].dt
-            s_index = 0
-            for i, bar in enumerate(self.bars_raw):
-                if bar.dt >= sdt:
-                    s_index = i
-                    break
-            self.bars_raw = self.bars_raw[s_index:]
+        # 根据最大笔数量限制完成 bi_list, bars_raw 序列的数量控制；
+        # 只有第一笔发生变化时才需要移动 bars_raw 的起点，原地删除，不再每根K线复制整个序列
+        if len(self.bi_list) > self.max_bi_num:
+            del self.bi_list[:-self.max_bi_num]
+        if self.bi_list and self.bi_list[0] is not self.__first_bi:
+            self.__first_bi = self.bi_list[0]
+            sdt = self.__first_bi.fx_a.elements[0].dt
+            s_index = bisect_left(self.bars_raw, sdt, key=lambda x: x.dt)
+            if s_index >= len(self.bars_raw):
+                s_index = 0
+            del self.bars_raw[:s_index]
 
         # 如果有信号计算函数，则进行信号计算
         self.signals = self.get_signals(c=self) if self.get_signals else OrderedDict()
@@ -426,8 +608,8 @@ class CZSC:
         """bars_ubi 中的分型"""
         if not self.bars_ubi:
             return []
-        else:
-            return check_fxs(self.bars_ubi)
+        self.__ubi_fxs.sync(self.bars_ubi)
+        return list(self.__ubi_fxs.fxs)
 
     @property
     def ubi(self):
@@ -10,8 +10,12 @@ import os
 import czsc
 import glob
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datetime import datetime
 from pathlib import Path
+from loguru import logger
+from concurrent.futures import ThreadPoolExecutor
 
 
 # 投研共享数据的本地缓存路径，需要根据实际情况修改
@@ -113,6 +117,82 @@ def get_raw_bars(symbol, freq, sdt, edt, fq="前复权", **kwargs):
         return get_raw_bars_minute(symbol, freq, sdt, edt, fq=fq, **kwargs)
     return get_raw_bars_daily(symbol, freq, sdt, edt, fq=fq, **kwargs)
 
+
+_MINUTE_COLUMNS = ["stock_code", "timestamp", "open", "close", "high", "low", "volume", "vol", "amount", "period"]
+
+
+def _manifest_minute_files(stock_dir: Path, sdt, edt):
+    """按 stock_dir/_manifest.json 中记录的每个文件的起止时间裁剪，不需要 glob 目录
+
+    清单由数据写入方维护，格式：{"version": 1, "complete": true, "files": {相对路径: {"min_ts", "max_ts", ...}}}；
+    清单不存在、版本不符或不完整时返回 None
+    """
+    import json
+
+    try:
+        data = json.loads((stock_dir / "_manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != 1 or not data.get("complete"):
+        return None
+
+    files = []
+    for key, v in sorted(data.get("files", {}).items()):
+        if v.get("min_ts") and v.get("max_ts"):
+            if pd.Timestamp(v["min_ts"]) > edt or pd.Timestamp(v["max_ts"]) < sdt:
+                continue
+        files.append(stock_dir / key)
+    return files
+
+
+def _prune_minute_files(stock_dir: Path, sdt, edt):
+    """按路径中的年份、文件名中的月份裁剪分区，只保留与 [sdt, edt] 有交集的文件
+
+    路径格式：stock_code={symbol}/year={year}/{symbol}_{year}-{month:02d}.parquet，增量片段为
+    {symbol}_{year}-{month:02d}_d{seq:04d}.parquet；无法解析月份的文件按年份裁剪。
+    目录下有完整的分区清单（_manifest.json）时直接按清单裁剪
+    """
+    files = _manifest_minute_files(stock_dir, sdt, edt)
+    if files is not None:
+        return files
+
+    files = []
+    for year_dir in sorted(stock_dir.glob("year=*")):
+        try:
+            year = int(year_dir.name.split("=", 1)[1])
+        except ValueError:
+            files.extend(sorted(year_dir.glob("**/*.parquet")))
+            continue
+        if not sdt.year <= year <= edt.year:
+            continue
+
+        for fp in sorted(year_dir.glob("**/*.parquet")):
+            try:
+                month = int(fp.stem.rsplit("-", 1)[1][:2])
+            except (IndexError, ValueError):
+                files.append(fp)
+                continue
+            if (sdt.year, sdt.month) <= (year, month) <= (edt.year, edt.month):
+                files.append(fp)
+    return files
+
+
+def _read_minute_file(fp, sdt, edt):
+    """读取单个分钟数据文件，只读取需要的列，时间过滤下推到 Parquet 读取中
+
+    timestamp 列类型不支持过滤下推时（如字符串），读取后再过滤；文件损坏或无法读取时记录日志并返回 None
+    """
+    try:
+        columns = [x for x in pq.read_schema(fp).names if x in _MINUTE_COLUMNS]
+        try:
+            return pq.read_table(fp, columns=columns, filters=[("timestamp", ">=", sdt), ("timestamp", "<=", edt)]).to_pandas()
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, TypeError):
+            return pq.read_table(fp, columns=columns).to_pandas()
+    except (OSError, pa.ArrowException) as e:
+        logger.warning(f"读取分钟数据文件失败，已跳过：{fp}，{e}")
+        return None
+
+
 def get_raw_bars_minute(symbol, freq, sdt, edt, fq="前复权", **kwargs):
     """从 cache_path 下 minute_by_stock 目录读取分钟数据，返回与 get_raw_bars 一致的 RawBar 列表。
 
@@ -125,6 +205,9 @@ def get_raw_bars_minute(symbol, freq, sdt, edt, fq="前复权", **kwargs):
     :param edt: 结束时间（字符串或 datetime）
     :param fq: 除权类型，保留入参一致，本地分钟数据一般不处理复权
     :param kwargs: 含 raw_bars 等，同 get_raw_bars
+
+        - max_workers: 并行读取文件的线程数，默认 min(8, 文件数量)
+
     :return: RawBar 列表，与 get_raw_bars 返回格式一致
     """
     raw_bars = kwargs.get("raw_bars", True)
@@ -137,17 +220,17 @@ def get_raw_bars_minute(symbol, freq, sdt, edt, fq="前复权", **kwargs):
     stock_dir = minute_root / f"stock_code={symbol}"
     if not stock_dir.exists():
         return []
-    files = sorted(stock_dir.glob("year=*/**/*.parquet"))
+    sdt, edt = pd.to_datetime(sdt), pd.to_datetime(edt)
+    files = _prune_minute_files(stock_dir, sdt, edt)
     if not files:
         return []
-    dfs = []
-    for fp in files:
-        try:
-            df = pd.read_parquet(fp)
-            if df is not None and len(df) > 0:
-                dfs.append(df)
-        except Exception:
-            continue
+    max_workers = kwargs.get("max_workers", min(8, len(files)))
+    if max_workers > 1 and len(files) > 1:
+        with ThreadPoolExecutor(max_workers) as pool:
+            dfs = list(pool.map(lambda fp: _read_minute_file(fp, sdt, edt), files))
+    else:
+        dfs = [_read_minute_file(fp, sdt, edt) for fp in files]
+    dfs = [df for df in dfs if df is not None and len(df) > 0]
     if not dfs:
         return []
     kline = pd.concat(dfs, ignore_index=True)
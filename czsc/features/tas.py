@@ -29,6 +29,7 @@ def CCF(df, **kwargs):
     from czsc.utils import format_standard_kline
     from czsc.traders.base import generate_czsc_signals
     from czsc.traders.sig_parse import get_signals_config
+    from czsc.traders.matcher import EventMatcher
 
     czsc_factor = kwargs.get('czsc_factor', None)
     freq = kwargs.get('freq', '日线')
@@ -44,7 +45,7 @@ def CCF(df, **kwargs):
 
     bars = format_standard_kline(df, freq=freq)
     dfs = generate_czsc_signals(bars, signals_config, init_n=300, sdt=bars[0].dt, df=True)
-    dfs[factor_col] = dfs.apply(czsc_factor.is_match, axis=1).astype(int)
+    dfs[factor_col] = EventMatcher([czsc_factor]).match(dfs)[czsc_factor.name].astype(int)
 
     df = pd.merge(df, dfs[['dt', factor_col]], on='dt', how='left')
     df[factor_col] = df[factor_col].fillna(0)
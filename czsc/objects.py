@@ -5,6 +5,7 @@ email: zeng_bin8888@163.com
 create_dt: 2021/3/10 12:21
 describe: 常用对象结构
 """
+import sys
 import math
 import hashlib
 import numpy as np
@@ -14,7 +15,8 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from loguru import logger
 from deprecated import deprecated
-from typing import List, Callable, Dict
+from typing import List, Callable, Dict, Tuple
+from collections import OrderedDict
 from czsc.enum import Mark, Direction, Freq, Operate
 from czsc.utils.corr import single_linear
 
@@ -475,6 +477,87 @@ class ZS:
         )
 
 
+# 信号值解析结果的全局缓存，信号取值的种类有限，同一个取值只需要解析一次
+_SIGNAL_VALUES: Dict[str, Tuple[str, str, str, int]] = {}
+
+
+def parse_signal_value(v: str) -> Tuple[str, str, str, int]:
+    """解析信号值，如 "向上_其他_其他_0" 解析为 ("向上", "其他", "其他", 0)，解析结果全局缓存
+
+    :param v: 信号值
+    :return: (v1, v2, v3, score)
+    """
+    pv = _SIGNAL_VALUES.get(v)
+    if pv is None:
+        v1, v2, v3, score = v.split("_")
+        pv = (v1, v2, v3, int(score))
+        if len(_SIGNAL_VALUES) >= 100000:
+            _SIGNAL_VALUES.clear()
+        _SIGNAL_VALUES[v] = pv
+    return pv
+
+
+class ParsedSignals(OrderedDict):
+    """单根K线的信号字典，信号值在首次匹配时解析为 (v1, v2, v3, score) 并缓存
+
+    CzscTrader 每根K线只创建一次，所有持仓（Position）、事件（Event）、因子（Factor）共用同一份解析结果，
+    避免对同一个信号值反复执行 split 和 int；同一个 Signal 的匹配结果也只计算一次。可以直接当作普通信号字典使用。
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._parsed = {}
+        self._matched = {}
+        super().__init__(*args, **kwargs)
+
+    def _invalidate(self, key):
+        """信号 key 的取值发生变化，清除它的解析结果和所有匹配结果"""
+        if self._parsed:
+            self._parsed.pop(key, None)
+            self._matched.clear()
+
+    def __setitem__(self, key, value):
+        self._invalidate(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._invalidate(key)
+        super().__delitem__(key)
+
+    # OrderedDict 的 pop / popitem / clear / setdefault 不经过 __setitem__ 和 __delitem__，需要单独处理
+    def pop(self, key, *args):
+        self._invalidate(key)
+        return super().pop(key, *args)
+
+    def popitem(self, last=True):
+        key, value = super().popitem(last=last)
+        self._invalidate(key)
+        return key, value
+
+    def clear(self):
+        self._parsed.clear()
+        self._matched.clear()
+        super().clear()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def parsed(self, key: str) -> Tuple[str, str, str, int]:
+        """获取信号 key 解析后的值 (v1, v2, v3, score)
+
+        :param key: 信号名称
+        :return: (v1, v2, v3, score)
+        """
+        pv = self._parsed.get(key)
+        if pv is None:
+            v = self.get(key, None)
+            if not v:
+                raise ValueError(f"{key} 不在信号列表中")
+            pv = self._parsed[key] = parse_signal_value(v)
+        return pv
+
+
 @dataclass
 class Signal:
     signal: str = ""
@@ -519,6 +602,18 @@ class Signal:
 
         if self.score > 100 or self.score < 0:
             raise ValueError("score 必须在0~100之间")
+        self._init_pattern()
+
+    def _init_pattern(self):
+        """预先计算匹配时用到的信号名称和取值模板，信号名称驻留（intern）以加快字典查找；None 表示 任意"""
+        self._key = sys.intern(self.key)
+        self._signal = sys.intern(self.signal)
+        self._pattern = tuple(None if x == "任意" else x for x in (self.v1, self.v2, self.v3))
+
+    def __setstate__(self, state):
+        # 反序列化不执行 __post_init__：旧版本序列化的对象没有匹配模板，驻留的字符串也不会保留，这里重新计算
+        self.__dict__.update(state)
+        self._init_pattern()
 
     def __repr__(self):
         """返回信号对象的字符串表示"""
@@ -551,21 +646,27 @@ class Signal:
         如果当前信号的第二个值 v2 等于目标信号的第二个值 self.v2 或者目标信号的第二个值为 "任意"，则继续执行，否则返回 False。
         如果当前信号的第三个值 v3 等于目标信号的第三个值 self.v3 或者目标信号的第三个值为 "任意"，则返回 True，否则返回 False。
 
-        :param s: 所有信号字典
+        :param s: 所有信号字典，传入 ParsedSignals 时复用已经解析的信号值
         :return: bool
         """
-        key = self.key
-        v = s.get(key, None)
+        if isinstance(s, ParsedSignals):
+            m = s._matched.get(self._signal)
+            if m is None:
+                m = s._matched[self._signal] = self._match(s.parsed(self._key))
+            return m
+
+        v = s.get(self._key, None)
         if not v:
-            raise ValueError(f"{key} 不在信号列表中")
+            raise ValueError(f"{self._key} 不在信号列表中")
+        return self._match(parse_signal_value(v))
 
-        v1, v2, v3, score = v.split("_")
-        if int(score) >= self.score:
-            if v1 == self.v1 or self.v1 == "任意":
-                if v2 == self.v2 or self.v2 == "任意":
-                    if v3 == self.v3 or self.v3 == "任意":
-                        return True
-        return False
+    def _match(self, pv: Tuple[str, str, str, int]) -> bool:
+        """判断解析后的信号值 (v1, v2, v3, score) 是否满足当前信号"""
+        v1, v2, v3, score = pv
+        if score < self.score:
+            return False
+        p1, p2, p3 = self._pattern
+        return (p1 is None or v1 == p1) and (p2 is None or v2 == p2) and (p3 is None or v3 == p3)
 
 
 @dataclass
@@ -1113,7 +1214,7 @@ class Position:
 
         - 将当前持仓状态和价格记录到持仓列表中。
 
-        :param s: 最新信号字典
+        :param s: 最新信号字典，推荐传入 ParsedSignals，多个持仓共用同一份信号值解析结果
         :return:
         """
         if self.end_dt and s["dt"] <= self.end_dt:
@@ -14,6 +14,7 @@ from czsc.objects import Event
 from typing import List, Dict, Callable, Any, Union
 from czsc.traders.sig_parse import get_signals_freqs
 from czsc.traders.base import generate_czsc_signals
+from czsc.traders.matcher import EventMatcher
 from czsc.utils.io import save_json
 from concurrent.futures import ProcessPoolExecutor, as_completed
 
@@ -121,12 +122,9 @@ class EventMatchSensor:
         2. 使用 generate_czsc_signals 函数生成 CZSC 信号。这里传入了 bars、复制后的
            signals_config（以防止修改原始配置）、开始时间（self.sdt）以及 df=False（表示返回一个字典列表而非 DataFrame 对象）。
         3. 将上一步生成的信号转换为 DataFrame 并保存到 sigs 变量中。
-        4. 创建一个新的 events 复制品（以防止修改原始事件列表），并创建一个空列表 new_cols，用于存储新添加的列名。
-        5. 遍历新的 events 列表，对于每个 event：
-            a. 获取 event 的名称 e_name。
-            b. 使用 apply 函数应用 is_match 方法来判断每行数据是否与该事件相匹配。
-                结果是一个布尔值和一个 float 值（表示匹配得分），它们分别被保存为 e_name 和 f'{e_name}_F' 列。
-            c. 将这两个新列名添加到 new_cols 列表中。
+        4. 使用 EventMatcher 对所有事件进行向量化匹配，每个事件得到两列：e_name 列表示是否匹配，
+            f'{e_name}_F' 列为第一个满足的因子名称；new_cols 记录这些新添加的列名。
+        5. 将匹配结果合并到 sigs 中。
         6. 在 sigs 数据框中添加一列 n1b，表示涨跌幅。
         7. 最后，重新组织 sigs 数据框的列顺序，使其包含以下列：symbol、dt、open、close、high、low、vol、amount、n1b 以及所有新添加的列。
 
@@ -135,12 +133,9 @@ class EventMatchSensor:
             bars = self.read_bars(symbol, freq=self.base_freq, sdt=self.bar_sdt, edt=self.edt, **self.kwargs)
             sigs = generate_czsc_signals(bars, deepcopy(self.signals_config), sdt=self.sdt, df=False)
             sigs = pd.DataFrame(sigs)
-            events = deepcopy(self.events)
-            new_cols = []
-            for event in events:
-                e_name = event.name
-                sigs[[e_name, f'{e_name}_F']] = sigs.apply(event.is_match, axis=1, result_type="expand")  # type: ignore
-                new_cols.extend([e_name, f'{e_name}_F'])
+            dfm = EventMatcher(self.events).match(sigs)
+            new_cols = dfm.columns.to_list()
+            sigs = pd.concat([sigs, dfm], axis=1)
             sigs['n1b'] = (sigs['close'].shift(-1) / sigs['close'] - 1) * 10000
             sigs = sigs[['symbol', 'dt', 'open', 'close', 'high', 'low', 'vol', 'amount', 'n1b'] + new_cols]  # type: ignore
             return sigs
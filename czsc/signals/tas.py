@@ -25,12 +25,72 @@ from czsc.analyze import CZSC
 from czsc.objects import Signal, Direction, BI, RawBar, FX, Mark, ZS
 from czsc.traders.base import CzscSignals
 from czsc.utils import get_sub_elements, fast_slow_cross, count_last_same, create_single_signal, single_linear
-from czsc.utils.sig import cross_zero_axis, cal_cross_num, down_cross_count
+from czsc.utils.sig import cross_zero_axis, cal_cross_num, down_cross_count, vectorized
+from czsc.utils.ta import StreamSMA, StreamEMA, StreamMACD, StreamBOLL
+
+# 使用增量指标引擎计算的均线类型
+STREAM_MA = {"SMA": StreamSMA, "EMA": StreamEMA}
+
+
+def update_stream_cache(c: CZSC, cache_key: str, factory, fmt=None):
+    """使用 CZSC 对象上的增量指标引擎更新缓存
+
+    指标状态保存在 c.indicators 中，每根新K线只推进一步；只有首次计算时，才会对 bars_raw 中的全部K线写入缓存。
+
+    :param c: CZSC对象
+    :param cache_key: 缓存的 key，同时也是增量指标的唯一标识
+    :param factory: 创建 czsc.utils.ta.StreamIndicator 对象的函数
+    :param fmt: 指标值写入缓存前的格式化函数
+    :return: cache_key
+    """
+    for bar, value in c.indicators.update(c.bars_raw, cache_key, factory):
+        _c = dict(bar.cache) if bar.cache else dict()
+        _c.update({cache_key: fmt(value) if fmt else value})
+        bar.cache = _c
+    return cache_key
+
+
+def replay_stream_cache(fr, cache_key: str, factory):
+    """还原逐K计算过程中，每根基础K线更新后 update_stream_cache 写入的缓存值，用于信号函数的批量实现
+
+    与 CZSC.indicators 一样，从回放开始时的 bars_raw 起，用同一种增量指标依次推进，结果与逐K计算完全一致。
+
+    :param fr: czsc.traders.base.FreqReplay 对象
+    :param cache_key: 缓存的 key
+    :param factory: 创建 czsc.utils.ta.StreamIndicator 对象的函数，指标值必须是单个数值
+    :return: 函数 get(q)，返回每根基础K线更新后 bars_raw 倒数第 q+1 根K线的缓存值
+    """
+    base = fr.base_id
+    if cache_key not in fr.memo:
+        indicator = factory()
+        final = np.full(len(fr.final_close), np.nan)
+        last = np.empty(len(fr))
+        k = fr.init_first_id
+        for i, last_id in enumerate(fr.last_id.tolist()):
+            while k < last_id:
+                final[k - base] = indicator.push(fr.final_close[k - base])
+                k += 1
+            last[i] = indicator.peek(fr.close[i])
+        fr.memo[cache_key] = (final, last)
+
+    final, last = fr.memo[cache_key]
+
+    def get(q: int) -> np.ndarray:
+        if q == 0:
+            return last
+        ids = fr.last_id - q - base
+        res = final[np.clip(ids, 0, None)]
+        res[ids < fr.init_first_id - base] = np.nan
+        return res
+
+    return get
 
 
 def update_ma_cache(c: CZSC, **kwargs):
     """更新均线缓存
 
+    SMA、EMA 使用增量指标引擎计算，其他均线类型每根K线用最近 timeperiod + 10 根K线重新计算
+
     :param c: CZSC对象
     :param kwargs:
         - ma_type: 均线类型，可选值：SMA, EMA, WMA, KAMA, TEMA, DEMA, MAMA, TRIMA
@@ -56,6 +116,9 @@ def update_ma_cache(c: CZSC, **kwargs):
         # 如果最后一根K线已经有对应的缓存，不执行更新
         return cache_key
 
+    if ma_type in STREAM_MA:
+        return update_stream_cache(c, cache_key, lambda: STREAM_MA[ma_type](timeperiod))
+
     last_cache = dict(c.bars_raw[-2].cache) if c.bars_raw[-2].cache else dict()
     if cache_key not in last_cache.keys() or len(c.bars_raw) < timeperiod + 15:
         # 初始化缓存
@@ -84,8 +147,6 @@ def update_macd_cache(c: CZSC, **kwargs):
     :param c: CZSC对象
     :return:
     """
-    from czsc.utils.ta import MACD
-
     fastperiod = int(kwargs.get("fastperiod", 12))
     slowperiod = int(kwargs.get("slowperiod", 26))
     signalperiod = int(kwargs.get("signalperiod", 9))
@@ -95,29 +156,12 @@ def update_macd_cache(c: CZSC, **kwargs):
         # 如果最后一根K线已经有对应的缓存，不执行更新
         return cache_key
 
-    min_count = signalperiod + slowperiod + 168
-    last_cache = dict(c.bars_raw[-2].cache) if c.bars_raw[-2].cache else dict()
-    if cache_key not in last_cache.keys() or len(c.bars_raw) < min_count + 15:
-        # 初始化缓存
-        close = np.array([x.close for x in c.bars_raw])
-        dif, dea, macd = MACD(close, fastperiod=fastperiod, slowperiod=slowperiod, signalperiod=signalperiod)
-        for i in range(len(close)):
-            _c = dict(c.bars_raw[i].cache) if c.bars_raw[i].cache else dict()
-            dif_i = dif[i] if dif[i] else 0
-            dea_i = dea[i] if dea[i] else 0
-            macd_i = macd[i] if macd[i] else 0
-            _c.update({cache_key: {"dif": dif_i, "dea": dea_i, "macd": macd_i}})
-            c.bars_raw[i].cache = _c
-
-    else:
-        # 增量更新最近5个K线缓存
-        close = np.array([x.close for x in c.bars_raw[-min_count - 10 :]])
-        dif, dea, macd = MACD(close, fastperiod=fastperiod, slowperiod=slowperiod, signalperiod=signalperiod)
-        for i in range(1, 6):
-            _c = dict(c.bars_raw[-i].cache) if c.bars_raw[-i].cache else dict()
-            _c.update({cache_key: {"dif": dif[-i], "dea": dea[-i], "macd": macd[-i]}})
-            c.bars_raw[-i].cache = _c
-    return cache_key
+    return update_stream_cache(
+        c,
+        cache_key,
+        lambda: StreamMACD(fastperiod, slowperiod, signalperiod),
+        lambda v: {"dif": v[0], "dea": v[1], "macd": v[2]},
+    )
 
 
 def update_boll_cache_V230228(c: CZSC, **kwargs):
@@ -135,32 +179,11 @@ def update_boll_cache_V230228(c: CZSC, **kwargs):
         # 如果最后一根K线已经有对应的缓存，不执行更新
         return cache_key
 
-    last_cache = dict(c.bars_raw[-2].cache) if c.bars_raw[-2].cache else dict()
-    if cache_key not in last_cache.keys() or len(c.bars_raw) < timeperiod + 15:
-        # 初始化缓存
-        close = np.array([x.close for x in c.bars_raw])
-        u1, m, l1 = ta.BBANDS(close, timeperiod=timeperiod, nbdevup=nbdev, nbdevdn=nbdev, matype=0)
+    def fmt(v):
+        m, std = v
+        return {"上轨": m + nbdev * std, "中线": m, "下轨": m - nbdev * std}
 
-        for i in range(len(close)):
-            _c = dict(c.bars_raw[i].cache) if c.bars_raw[i].cache else dict()
-            if not m[i]:
-                _data = {"上轨": close[i], "中线": close[i], "下轨": close[i]}
-            else:
-                _data = {"上轨": u1[i], "中线": m[i], "下轨": l1[i]}
-            _c.update({cache_key: _data})
-            c.bars_raw[i].cache = _c
-
-    else:
-        # 增量更新最近5个K线缓存
-        close = np.array([x.close for x in c.bars_raw[-timeperiod - 10 :]])
-        u1, m, l1 = ta.BBANDS(close, timeperiod=timeperiod, nbdevup=nbdev, nbdevdn=nbdev, matype=0)
-
-        for i in range(1, 6):
-            _c = dict(c.bars_raw[-i].cache) if c.bars_raw[-i].cache else dict()
-            _c.update({cache_key: {"上轨": u1[-i], "中线": m[-i], "下轨": l1[-i]}})
-            c.bars_raw[-i].cache = _c
-
-    return cache_key
+    return update_stream_cache(c, cache_key, lambda: StreamBOLL(timeperiod), fmt)
 
 
 def update_boll_cache(c: CZSC, **kwargs):
@@ -177,64 +200,20 @@ def update_boll_cache(c: CZSC, **kwargs):
         return cache_key
 
     dev_seq = (1.382, 2, 2.764)
-    last_cache = dict(c.bars_raw[-2].cache) if c.bars_raw[-2].cache else dict()
-    if cache_key not in last_cache.keys() or len(c.bars_raw) < timeperiod + 15:
-        # 初始化缓存
-        close = np.array([x.close for x in c.bars_raw])
-        u1, m, l1 = ta.BBANDS(close, timeperiod=timeperiod, nbdevup=dev_seq[0], nbdevdn=dev_seq[0], matype=0)
-        u2, m, l2 = ta.BBANDS(close, timeperiod=timeperiod, nbdevup=dev_seq[1], nbdevdn=dev_seq[1], matype=0)
-        u3, m, l3 = ta.BBANDS(close, timeperiod=timeperiod, nbdevup=dev_seq[2], nbdevdn=dev_seq[2], matype=0)
 
-        for i in range(len(close)):
-            _c = dict(c.bars_raw[i].cache) if c.bars_raw[i].cache else dict()
-            if not m[i]:
-                _data = {
-                    "上轨3": close[i],
-                    "上轨2": close[i],
-                    "上轨1": close[i],
-                    "中线": close[i],
-                    "下轨1": close[i],
-                    "下轨2": close[i],
-                    "下轨3": close[i],
-                }
-            else:
-                _data = {
-                    "上轨3": u3[i],
-                    "上轨2": u2[i],
-                    "上轨1": u1[i],
-                    "中线": m[i],
-                    "下轨1": l1[i],
-                    "下轨2": l2[i],
-                    "下轨3": l3[i],
-                }
-            _c.update({cache_key: _data})
-            c.bars_raw[i].cache = _c
+    def fmt(v):
+        m, std = v
+        return {
+            "上轨3": m + dev_seq[2] * std,
+            "上轨2": m + dev_seq[1] * std,
+            "上轨1": m + dev_seq[0] * std,
+            "中线": m,
+            "下轨1": m - dev_seq[0] * std,
+            "下轨2": m - dev_seq[1] * std,
+            "下轨3": m - dev_seq[2] * std,
+        }
 
-    else:
-        # 增量更新最近5个K线缓存
-        close = np.array([x.close for x in c.bars_raw[-timeperiod - 10 :]])
-        u1, m, l1 = ta.BBANDS(close, timeperiod=timeperiod, nbdevup=dev_seq[0], nbdevdn=dev_seq[0], matype=0)
-        u2, m, l2 = ta.BBANDS(close, timeperiod=timeperiod, nbdevup=dev_seq[1], nbdevdn=dev_seq[1], matype=0)
-        u3, m, l3 = ta.BBANDS(close, timeperiod=timeperiod, nbdevup=dev_seq[2], nbdevdn=dev_seq[2], matype=0)
-
-        for i in range(1, 6):
-            _c = dict(c.bars_raw[-i].cache) if c.bars_raw[-i].cache else dict()
-            _c.update(
-                {
-                    cache_key: {
-                        "上轨3": u3[-i],
-                        "上轨2": u2[-i],
-                        "上轨1": u1[-i],
-                        "中线": m[-i],
-                        "下轨1": l1[-i],
-                        "下轨2": l2[-i],
-                        "下轨3": l3[-i],
-                    }
-                }
-            )
-            c.bars_raw[-i].cache = _c
-
-    return cache_key
+    return update_stream_cache(c, cache_key, lambda: StreamBOLL(timeperiod), fmt)
 
 
 def tas_boll_vt_V230212(c: CZSC, **kwargs) -> OrderedDict:
@@ -812,6 +791,30 @@ def tas_ma_base_V221101(c: CZSC, **kwargs) -> OrderedDict:
     return create_single_signal(k1=k1, k2=k2, k3=k3, v1=v1, v2=v2)
 
 
+@vectorized(tas_ma_base_V221101)
+def _tas_ma_base_V221101_batch(freq, **kwargs):
+    """tas_ma_base_V221101 的批量实现，仅支持 SMA、EMA"""
+    di = int(kwargs.get("di", 1))
+    ma_type = kwargs.get("ma_type", "SMA").upper()
+    timeperiod = int(kwargs.get("timeperiod", 5))
+    if ma_type not in STREAM_MA or di < 1:
+        return None
+
+    k1, k2, k3 = f"{freq}_D{di}{ma_type}#{timeperiod}_分类V221101".split("_")
+    key = Signal(k1=k1, k2=k2, k3=k3).key
+    cache_key = f"{ma_type}#{timeperiod}"
+
+    def compute(fr):
+        ma = replay_stream_cache(fr, cache_key, lambda: STREAM_MA[ma_type](timeperiod))
+        fr.cache[cache_key] = ma(0)
+        close = fr.seen_closes(di)[:, 0]
+        v1 = np.where(close >= ma(di - 1), "多头", "空头")
+        v2 = np.where(ma(di - 1) >= ma(di), "向上", "向下")
+        return {key: [Signal(k1=k1, k2=k2, k3=k3, v1=a, v2=b).value for a, b in zip(v1, v2)]}
+
+    return [key], compute
+
+
 def tas_ma_base_V221203(c: CZSC, **kwargs) -> OrderedDict:
     """MA 多空和方向信号，加距离限制
 
@@ -995,6 +998,35 @@ def tas_double_ma_V221203(c: CZSC, **kwargs) -> OrderedDict:
     return create_single_signal(k1=k1, k2=k2, k3=k3, v1=v1, v2=v2)
 
 
+@vectorized(tas_double_ma_V221203)
+def _tas_double_ma_V221203_batch(freq, **kwargs):
+    """tas_double_ma_V221203 的批量实现，仅支持 SMA、EMA"""
+    di = int(kwargs.get("di", 1))
+    th = int(kwargs.get("th", 100))
+    ma_type = kwargs.get("ma_type", "SMA").upper()
+    timeperiod1 = int(kwargs.get("timeperiod1", 5))
+    timeperiod2 = int(kwargs.get("timeperiod2", 10))
+    if ma_type not in STREAM_MA or di < 1 or timeperiod1 >= timeperiod2:
+        return None
+
+    k1, k2, k3 = f"{freq}_D{di}T{th}#{ma_type}#{timeperiod1}#{timeperiod2}_JX辅助V221203".split("_")
+    key = Signal(k1=k1, k2=k2, k3=k3).key
+
+    def compute(fr):
+        mas = {}
+        for timeperiod in (timeperiod1, timeperiod2):
+            cache_key = f"{ma_type}#{timeperiod}"
+            ma = replay_stream_cache(fr, cache_key, lambda n=timeperiod: STREAM_MA[ma_type](n))
+            fr.cache[cache_key] = ma(0)
+            mas[timeperiod] = ma(di - 1)
+        ma1v, ma2v = mas[timeperiod1], mas[timeperiod2]
+        v1 = np.where(ma1v >= ma2v, "多头", "空头")
+        v2 = np.where(np.abs(ma1v - ma2v) / ma2v * 10000 >= th, "强势", "弱势")
+        return {key: [Signal(k1=k1, k2=k2, k3=k3, v1=a, v2=b).value for a, b in zip(v1, v2)]}
+
+    return [key], compute
+
+
 def tas_double_ma_V230511(c: CZSC, **kwargs):
     """双均线金叉死叉后的反向信号
 
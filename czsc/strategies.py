@@ -19,6 +19,7 @@ from abc import ABC, abstractmethod
 from loguru import logger
 from czsc.objects import RawBar, List, Operate, Signal, Factor, Event, Position
 from czsc.traders.base import CzscTrader
+from czsc.traders.position_sim import simulate_positions
 from czsc.traders.sig_parse import get_signals_freqs, get_signals_config
 from czsc.utils import x_round, freqs_sorted, BarGenerator, dill_dump, save_json, read_json
 from czsc.utils import check_freq_and_market
@@ -160,6 +161,25 @@ class CzscStrategyBase(ABC):
         return trader
 
     def backtest(self, bars: List[RawBar], **kwargs) -> CzscTrader:
+        """策略回测
+
+        :param bars: 基础周期K线
+        :param kwargs: 参数说明见 init_trader；另外支持
+
+            - vectorized: 是否先计算信号、再向量化模拟所有持仓，默认 False。持仓数量很多时速度更快，结果与逐根K线回测一致；
+                信号配置中存在依赖持仓状态的信号（没有 freq 参数，如 pos_ 开头的信号）时，自动使用逐根K线回测
+
+        :return: 完成策略回测后的 CzscTrader 对象
+        """
+        if kwargs.pop("vectorized", False) and all(x.get("freq") for x in self.signals_config):
+            bg, bars2 = self.init_bar_generator(bars, **kwargs)
+            cs = CzscTrader(bg=bg, signals_config=deepcopy(self.signals_config), **kwargs)
+            sigs = []
+            for bar in bars2:
+                cs.on_bar(bar)
+                sigs.append(dict(cs.s))
+            return self.dummy(sigs, vectorized=True)
+
         trader = self.init_trader(bars, **kwargs)
         return trader
 
@@ -167,8 +187,21 @@ class CzscStrategyBase(ABC):
         """使用信号缓存进行策略回测
 
         :param sigs: 信号缓存，一般指 generate_czsc_signals 函数计算的结果缓存
+        :param kwargs:
+
+            - vectorized: 是否使用向量化持仓模拟（czsc.traders.position_sim），默认 False；
+                结果与逐根K线回测一致，sigs 也可以直接传入 DataFrame
+            - sleep_time / sleep_step: 逐根K线回测时，每 sleep_step 根K线暂停 sleep_time 秒
+
         :return: 完成策略回测后的 CzscTrader 对象
         """
+        if kwargs.get("vectorized", False):
+            trader = CzscTrader(positions=simulate_positions(self.positions, sigs))  # type: ignore
+            last = sigs.iloc[-1] if isinstance(sigs, pd.DataFrame) else sigs[-1]
+            trader.symbol, trader.end_dt = last["symbol"], last["dt"]
+            trader.bid, trader.latest_price = last["id"], last["close"]
+            return trader
+
         sleep_time = kwargs.get("sleep_time", 0)
         sleep_step = kwargs.get("sleep_step", 1000)
 
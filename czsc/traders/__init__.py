@@ -13,14 +13,29 @@ from czsc.traders.performance import (
     combine_dates_and_pairs,
 )
 from czsc.traders.dummy import DummyBacktest
+from czsc.traders.sig_cache import SignalsCache, signals_config_hash
+from czsc.traders.checkpoint import save_checkpoint, load_checkpoint
+from czsc.traders.multi_symbols import generate_symbols_signals
+from czsc.traders.matcher import EventMatcher
+from czsc.traders.position_sim import simulate_positions, simulate_position
 from czsc.traders.sig_parse import SignalsParser, get_signals_config, get_signals_freqs
 from czsc.traders.weight_backtest import WeightBacktest, get_ensemble_weight, stoploss_by_direction
-from czsc.traders.rwc import (
-    RedisWeightsClient,
-    get_strategy_mates,
-    get_heartbeat_time,
-    clear_strategy,
-    get_strategy_weights,
-    get_strategy_latest,
-)
 from czsc.traders.optimize import OpensOptimize, ExitsOptimize
+
+# rwc 依赖 redis，在首次访问时才导入
+_rwc_names = {
+    "RedisWeightsClient",
+    "get_strategy_mates",
+    "get_heartbeat_time",
+    "clear_strategy",
+    "get_strategy_weights",
+    "get_strategy_latest",
+}
+
+
+def __getattr__(name):
+    if name in _rwc_names:
+        from czsc.traders import rwc
+
+        return getattr(rwc, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
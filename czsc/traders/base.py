@@ -19,7 +19,7 @@ from pyecharts.charts import Tab
 from pyecharts.components import Table
 from pyecharts.options import ComponentTitleOpts
 from czsc.analyze import CZSC
-from czsc.objects import Position, RawBar, Signal
+from czsc.objects import Position, RawBar, Signal, ParsedSignals
 from czsc.utils.bar_generator import BarGenerator
 from czsc.utils.cache import home_path
 from czsc.utils import sorted_freqs, import_by_name
@@ -39,6 +39,7 @@ class CzscSignals:
         self.cache = OrderedDict()
         self.kwargs = kwargs
         self.signals_config = kwargs.get("signals_config", [])
+        self.__compiled = None
 
         if bg:
             self.bg = bg
@@ -50,7 +51,7 @@ class CzscSignals:
 
             last_bar = self.kas[self.base_freq].bars_raw[-1]
             self.end_dt, self.bid, self.latest_price = last_bar.dt, last_bar.id, last_bar.close
-            self.s = OrderedDict()
+            self.s = ParsedSignals()
             self.s.update(self.get_signals_by_conf())
             self.s.update(last_bar.__dict__)
         else:
@@ -60,11 +61,17 @@ class CzscSignals:
             self.freqs = None
             self.kas = None
             self.end_dt, self.bid, self.latest_price = None, None, None
-            self.s = OrderedDict()
+            self.s = ParsedSignals()
 
     def __repr__(self):
         return "<{} for {}>".format(self.name, self.symbol)
 
+    def __setstate__(self, state):
+        # 兼容旧版本序列化的对象（如 dill 保存的实盘 trader）：没有预先解析的信号参数配置，首次使用时重新解析
+        self.__dict__.update(state)
+        if "_CzscSignals__compiled" not in state:
+            self.__compiled = None
+
     def get_signals_by_conf(self):
         """通过信号参数配置获取信号
 
@@ -90,18 +97,49 @@ class CzscSignals:
         if not self.signals_config:
             return s
 
-        for param in self.signals_config:
-            param = dict(param)
-            sig_name = param.pop('name')
-            sig_func = import_by_name(sig_name) if isinstance(sig_name, str) else sig_name
-
-            freq = param.pop('freq', None)
-            if freq in self.kas:    # 如果指定了 freq，那么就使用 CZSC 对象作为输入
-                s.update(sig_func(self.kas[freq], **param))
-            else:                   # 否则使用 CAT 作为输入
+        kas = self.kas
+        for sig_func, freq, param in self.compiled_signals_config:
+            if freq in kas:     # 如果指定了 freq，那么就使用 CZSC 对象作为输入
+                s.update(sig_func(kas[freq], **param))
+            else:               # 否则使用 CAT 作为输入
                 s.update(sig_func(self, **param))
         return s
 
+    @property
+    def compiled_signals_config(self):
+        """预先解析的信号参数配置，格式为 [(信号函数, freq, 其他参数), ...]
+
+        信号函数的导入、name/freq 的拆分只在 signals_config 首次使用（或被重新赋值）时执行一次，
+        之后每根K线的信号计算直接复用，避免逐根K线重复 import_by_name 和复制参数字典。
+        """
+        if self.__compiled is None or self.__compiled[0] is not self.signals_config:
+            compiled = []
+            for param in self.signals_config:
+                param = dict(param)
+                sig_name = param.pop('name')
+                sig_func = import_by_name(sig_name) if isinstance(sig_name, str) else sig_name
+                freq = param.pop('freq', None)
+                compiled.append((sig_func, freq, param))
+            self.__compiled = (self.signals_config, compiled)
+        return self.__compiled[1]
+
+    def checkpoint(self, with_holds: bool = True) -> dict:
+        """生成状态快照，用于保存后快速恢复，格式说明见 czsc.traders.checkpoint
+
+        :param with_holds: 是否保存持仓策略的持仓明细 holds，仅对 CzscTrader 有效
+        :return: 快照字典
+        """
+        from czsc.traders.checkpoint import checkpoint
+
+        return checkpoint(self, with_holds=with_holds)
+
+    @classmethod
+    def restore(cls, snapshot: dict):
+        """从 checkpoint 生成的快照恢复对象，快照来自 CzscTrader 时返回 CzscTrader 对象"""
+        from czsc.traders.checkpoint import restore
+
+        return restore(snapshot)
+
     def take_snapshot(self, file_html=None, width: str = "1400px", height: str = "580px"):
         """获取快照
 
@@ -171,7 +209,7 @@ class CzscSignals:
         2. 然后，函数遍历所有的K线freq和对应的K线数据，对每一个K线数据，函数调用self.kas[freq].update(b[-1])，更新对应的 CZSC 对象。
         3. 函数提取出K线的标的代码bar.symbol，并将其赋值给self.symbol。
         4. 函数提取出基础freq的最后一根K线last_bar，并从中提取出结束时间dt，K线IDid，以及收盘价close，并将它们分别赋值给self.end_dt，self.bid，和self.latest_price。
-        5. 函数创建一个空的有序字典s，并调用self.get_signals_by_conf()获取所有的信号，然后将这些信号更新到字典s中。
+        5. 函数创建一个空的信号字典 ParsedSignals s，并调用self.get_signals_by_conf()获取所有的信号，然后将这些信号更新到字典s中。
         6. 最后，函数将last_bar的所有属性更新到字典s中。
 
         :param bar: 基础周期已完成K线
@@ -184,11 +222,110 @@ class CzscSignals:
         self.symbol = bar.symbol
         last_bar = self.kas[self.base_freq].bars_raw[-1]
         self.end_dt, self.bid, self.latest_price = last_bar.dt, last_bar.id, last_bar.close
-        self.s = OrderedDict()
+        self.s = ParsedSignals()
         self.s.update(self.get_signals_by_conf())
         self.s.update(last_bar.__dict__)
 
 
+class FreqReplay:
+    """批量计算信号时，逐根基础周期K线回放过程中某个周期 CZSC 对象的状态序列
+
+    每根基础K线更新后记录一行：bars_raw 最后一根K线（可能未完成）的 id 和收盘价，以及 bars_raw 第一根K线的 id；
+    同时按 id 记录每根K线完成后的收盘价。向量化信号函数据此还原任意时刻信号函数看到的 bars_raw 收盘价序列。
+    """
+
+    def __init__(self, c: CZSC, bars: List[RawBar]):
+        """
+
+        :param c: 回放开始时的 CZSC 对象
+        :param bars: 回放开始时 BarGenerator 中该周期的K线序列
+        """
+        self.freq = c.freq.value
+        self.init_first_id = c.bars_raw[0].id
+        # 向量化信号函数在基础周期最后一根K线上写入的缓存，用于还原信号结果中的 cache 字段
+        self.cache = {}
+        # 向量化信号函数之间共享的中间计算结果，如相同参数的均线
+        self.memo = {}
+        self.__closes = {x.id: x.close for x in bars}
+        self.__rows = []
+
+    def record(self, c: CZSC):
+        """记录一根基础K线更新后的状态"""
+        last = c.bars_raw[-1]
+        self.__rows.append((last.id, c.bars_raw[0].id, last.close))
+        self.__closes[last.id] = last.close
+
+    def finish(self):
+        """回放结束，整理为数组"""
+        rows = np.array(self.__rows, dtype=np.float64).reshape(-1, 3)
+        self.last_id = rows[:, 0].astype(np.int64)
+        self.first_id = rows[:, 1].astype(np.int64)
+        self.close = rows[:, 2]
+
+        self.base_id = min(self.__closes)
+        self.final_close = np.full(max(self.__closes) - self.base_id + 1, np.nan)
+        for k, v in self.__closes.items():
+            self.final_close[k - self.base_id] = v
+
+    def __len__(self):
+        return len(self.last_id)
+
+    def seen_closes(self, w: int, rows=slice(None)) -> np.ndarray:
+        """每根基础K线更新后，bars_raw 最后 w 根K线的收盘价矩阵，形状为 (行数, w)，不足的部分为 nan
+
+        :param w: 窗口长度
+        :param rows: 需要的行
+        """
+        last_id, close = self.last_id[rows], self.close[rows]
+        ids = last_id[:, None] - np.arange(w - 1, -1, -1)[None, :] - self.base_id
+        res = self.final_close[np.clip(ids, 0, None)]
+        res[ids < 0] = np.nan
+        res[:, -1] = close
+        return res
+
+    def seen_window(self, row: int) -> np.ndarray:
+        """第 row 行更新后，bars_raw 全部K线的收盘价序列"""
+        n = self.last_id[row] - self.first_id[row] + 1
+        return self.seen_closes(int(n), rows=slice(row, row + 1))[0]
+
+
+class _BatchStub:
+    """批量模式下替代向量化信号函数参与逐K回放的占位函数，只输出信号名称，保证信号的顺序不变"""
+
+    def __init__(self, keys: List[str]):
+        self.keys = keys
+
+    def __call__(self, *args, **kwargs):
+        return OrderedDict((k, None) for k in self.keys)
+
+
+def init_bar_generator(bars: List[RawBar], signals_config: List[dict], sdt: Union[AnyStr, datetime] = "20170101",
+                       init_n: int = 500, bg_max_count: int = 5000):
+    """使用 sdt 之前的K线初始化 BarGenerator，generate_czsc_signals 和信号缓存共用
+
+    :param bars: 基础周期 K 线序列
+    :param signals_config: 信号函数配置，用于确定需要合成的K线周期
+    :param sdt: 信号计算开始时间
+    :param init_n: 用于 BarGenerator 初始化的基础周期K线数量，sdt 之前的K线不足 init_n 根时，使用前 init_n 根K线初始化
+    :param bg_max_count: BarGenerator 中每个周期最多保留的K线数量
+    :return: (bg, bars_right)，bars_right 为需要计算信号的K线
+    """
+    freqs = get_signals_freqs(signals_config)
+    freqs = [freq for freq in freqs if freq != bars[0].freq.value]
+    sdt = pd.to_datetime(sdt)                       # type: ignore
+    bars_left = [x for x in bars if x.dt < sdt]     # type: ignore
+    if len(bars_left) <= init_n:
+        bars_left = bars[:init_n]
+        bars_right = bars[init_n:]
+    else:
+        bars_right = [x for x in bars if x.dt >= sdt]   # type: ignore
+
+    bg = BarGenerator(base_freq=str(bars[0].freq.value), freqs=freqs, max_count=bg_max_count)
+    for bar in bars_left:
+        bg.update(bar)
+    return bg, bars_right
+
+
 def generate_czsc_signals(bars: List[RawBar], signals_config: List[dict],
                           sdt: Union[AnyStr, datetime] = "20170101", init_n: int = 500, df=False, **kwargs):
     """使用 CzscSignals 生成信号
@@ -214,18 +351,16 @@ def generate_czsc_signals(bars: List[RawBar], signals_config: List[dict],
     :param sdt: 信号计算开始时间
     :param init_n: 用于 BarGenerator 初始化的基础周期K线数量
     :param df: 是否返回 df 格式的信号计算结果，默认 False
+    :param kwargs:
+
+        - bg_max_count: BarGenerator 中每个周期最多保留的K线数量，默认 5000
+        - batch: 是否使用批量模式，默认 False。批量模式下，声明了向量化实现的信号函数（见 czsc.utils.sig.vectorized）
+          在回放结束后对整段历史一次性计算，只有其余依赖路径的信号函数逐根K线计算，结果与逐K计算完全一致
+
     :return: 信号计算结果
     """
-    freqs = get_signals_freqs(signals_config)
-    freqs = [freq for freq in freqs if freq != bars[0].freq.value]
-    sdt = pd.to_datetime(sdt)                       # type: ignore
-    bars_left = [x for x in bars if x.dt < sdt]     # type: ignore
-    if len(bars_left) <= init_n:
-        bars_left = bars[:init_n]
-        bars_right = bars[init_n:]
-    else:
-        bars_right = [x for x in bars if x.dt >= sdt]   # type: ignore
-
+    bg_max_count = kwargs.get("bg_max_count", 5000)
+    bg, bars_right = init_bar_generator(bars, signals_config, sdt, init_n, bg_max_count=bg_max_count)
     if len(bars_right) == 0:
         logger.warning("右侧K线为空，无法进行信号生成", category=RuntimeWarning)
         if df:
@@ -233,24 +368,69 @@ def generate_czsc_signals(bars: List[RawBar], signals_config: List[dict],
         else:
             return []
 
-    base_freq = str(bars[0].freq.value)
-    bg = BarGenerator(base_freq=base_freq, freqs=freqs, max_count=kwargs.get("bg_max_count", 5000))
-    for bar in bars_left:
-        bg.update(bar)
+    base_freq = bg.base_freq
+
+    plans = []
+    if kwargs.get("batch", False):
+        signals_config, plans = _split_batch_config(signals_config)
 
     _sigs = []
     cs = CzscSignals(bg, signals_config=signals_config, **kwargs)
     cs.cache.update({'gsc_kwargs': kwargs})
+    replays = {freq: FreqReplay(cs.kas[freq], bg.bars[freq]) for freq in {x[0] for x in plans}}
     for bar in tqdm(bars_right, desc=f'generate signals of {bg.symbol}'):
         cs.update_signals(bar)
         _sigs.append(dict(cs.s))
+        for freq, replay in replays.items():
+            replay.record(cs.kas[freq])
+
+    for replay in replays.values():
+        replay.finish()
+
+    results = OrderedDict()
+    for freq, compute in plans:
+        results.update(compute(replays[freq]))
+
+    if base_freq in replays and replays[base_freq].cache:
+        # 逐K计算时，向量化信号函数会在基础周期最后一根K线的 cache 中写入指标值
+        cache = replays[base_freq].cache
+        for i, row in enumerate(_sigs):
+            row['cache'] = {**(row['cache'] or {}), **{k: v[i] for k, v in cache.items()}}
 
     if df:
-        return pd.DataFrame(_sigs)
+        dfs = pd.DataFrame(_sigs)
+        for key, values in results.items():
+            dfs[key] = values
+        return dfs
     else:
+        for key, values in results.items():
+            for row, value in zip(_sigs, values):
+                row[key] = value
         return _sigs
 
 
+def _split_batch_config(signals_config: List[dict]):
+    """拆分信号配置：声明了向量化实现的信号函数，替换为逐K回放中的占位函数
+
+    :return: (替换后的信号配置, [(freq, compute), ...])
+    """
+    config, plans = [], []
+    for param in signals_config:
+        param = dict(param)
+        sig_name = param.pop('name')
+        sig_func = import_by_name(sig_name) if isinstance(sig_name, str) else sig_name
+        freq = param.pop('freq', None)
+        batch = getattr(sig_func, "batch", None)
+        plan = batch(freq, **param) if batch and freq else None
+        if plan is None:
+            config.append({'name': sig_func, 'freq': freq, **param})
+        else:
+            keys, compute = plan
+            config.append({'name': _BatchStub(keys), 'freq': freq})
+            plans.append((freq, compute))
+    return config, plans
+
+
 def check_signals_acc(bars: List[RawBar], signals_config: List[dict], delta_days: int = 5, **kwargs) -> None:
     """输入基础周期K线和想要验证的信号，输出信号识别结果的快照
 
@@ -403,7 +583,7 @@ class CzscTrader(CzscSignals):
 
         函数执行逻辑：
 
-        1. 函数首先接收一个参数sig，这是一个信号字典，赋值给self.s。
+        1. 函数首先接收一个参数sig，这是一个信号字典，转换为 ParsedSignals 后赋值给self.s，所有持仓共用信号值的解析结果。
         2. 函数从sig中提取出标的代码symbol，结束时间dt，K线ID id，以及收盘价close，
             并将它们分别赋值给self.symbol，self.end_dt，self.bid，和self.latest_price。
         4. 如果self.positions不为空，即存在持仓策略，函数遍历所有position，函数调用position.update(self.s)，更新该仓位的状态
@@ -411,7 +591,7 @@ class CzscTrader(CzscSignals):
         :param sig: 信号字典
         :return: None
         """
-        self.s = sig
+        self.s = sig if isinstance(sig, ParsedSignals) else ParsedSignals(sig)
         self.symbol, self.end_dt = self.s['symbol'], self.s['dt']
         self.bid, self.latest_price = self.s['id'], self.s['close']
         if self.positions:
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/18 02:20
+describe: CzscSignals / CzscTrader 的状态快照（checkpoint），只保存继续计算所需的状态，恢复后无需重新回放预热K线
+
+快照格式说明（CHECKPOINT_VERSION = 1）：
+
+1. 每个周期的 RawBar、NewBar、FX、BI 按对象去重后保存为列式数组，对象之间的引用保存为下标；
+2. BarGenerator 的K线、CZSC 的 bars_raw / bars_ubi / bi_list 保存为上述数组的下标；
+3. 未完成笔的分型维护器（UbiFxs）等可以由 bars_ubi 推导的状态不保存，恢复时重建；
+4. 信号函数配置只保存 signals_config，信号函数在首次计算时重新导入；
+5. 持仓策略保存 Position.dump() 以及仓位、操作记录等运行状态，持仓明细 holds 可选。
+"""
+import gc
+import pickle
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import List, Union
+from czsc import envs
+from czsc.enum import Mark, Direction, Freq
+from czsc.objects import RawBar, NewBar, FX, BI, Position, ParsedSignals
+from czsc.analyze import CZSC, UbiFxs
+from czsc.utils.bar_generator import BarGenerator
+from czsc.traders.base import CzscSignals, CzscTrader
+
+CHECKPOINT_VERSION = 1
+
+_PRICES = ["open", "close", "high", "low", "vol", "amount"]
+
+
+class _Registry:
+    """按对象身份去重的登记表，相同对象只保存一次，返回其下标"""
+
+    def __init__(self):
+        self.items = []
+        self.__index = {}
+
+    def add(self, obj) -> int:
+        i = self.__index.get(id(obj))
+        if i is None:
+            i = self.__index[id(obj)] = len(self.items)
+            self.items.append(obj)
+        return i
+
+    def add_many(self, objs) -> np.ndarray:
+        return np.array([self.add(x) for x in objs], dtype=np.int64)
+
+
+def _pack_dt(dts: list) -> dict:
+    idx = pd.DatetimeIndex(dts)
+    pytype = "timestamp" if dts and isinstance(dts[0], pd.Timestamp) else "datetime"
+    return {"ns": idx.asi8, "tz": str(idx.tz) if idx.tz is not None else None, "type": pytype}
+
+
+def _unpack_dt(d: dict) -> list:
+    idx = pd.DatetimeIndex(d["ns"].view("datetime64[ns]"))
+    if d["tz"]:
+        idx = idx.tz_localize("UTC").tz_convert(d["tz"])
+    return idx.tolist() if d["type"] == "timestamp" else idx.to_pydatetime().tolist()
+
+
+def _pack_ragged(groups: List[np.ndarray]) -> dict:
+    """变长下标序列保存为 (values, offsets)"""
+    lens = np.array([len(x) for x in groups], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lens)]).astype(np.int64)
+    values = np.concatenate(groups).astype(np.int64) if groups else np.zeros(0, dtype=np.int64)
+    return {"values": values, "offsets": offsets}
+
+
+def _unpack_ragged(d: dict, items: list) -> List[list]:
+    values, offsets = d["values"].tolist(), d["offsets"].tolist()
+    return [[items[j] for j in values[a:b]] for a, b in zip(offsets[:-1], offsets[1:])]
+
+
+def _pack_bars(bars: list, elements: _Registry = None) -> dict:
+    """RawBar / NewBar 列表保存为列式数组"""
+    n = len(bars)
+    res = {
+        "n": n,
+        "symbol": bars[0].symbol if n else None,
+        "freq": bars[0].freq.value if n else None,
+        "id": np.fromiter((x.id for x in bars), dtype=np.int64, count=n),
+        "dt": _pack_dt([x.dt for x in bars]),
+        "cache": {i: x.cache for i, x in enumerate(bars) if x.cache},
+    }
+    for col in _PRICES:
+        res[col] = np.fromiter((getattr(x, col) for x in bars), dtype=np.float64, count=n)
+    if elements is not None:
+        res["elements"] = _pack_ragged([elements.add_many(x.elements) for x in bars])
+    return res
+
+
+def _unpack_bars(d: dict, cls, elements: list = None) -> list:
+    n = d["n"]
+    if n == 0:
+        return []
+    symbol, freq = d["symbol"], Freq(d["freq"])
+    cols = [d[col].tolist() for col in _PRICES]
+    dts, ids = _unpack_dt(d["dt"]), d["id"].tolist()
+    if cls is RawBar:
+        bars = [RawBar(symbol, i, dt, freq, *v) for i, dt, *v in zip(ids, dts, *cols)]
+    else:
+        groups = _unpack_ragged(d["elements"], elements)
+        bars = [NewBar(symbol, i, dt, freq, *v, elements=e) for i, dt, *v, e in zip(ids, dts, *cols, groups)]
+    for i, cache in d["cache"].items():
+        bars[i].cache = cache
+    return bars
+
+
+def _pack_czsc(c: CZSC, bg_bars) -> dict:
+    """单个周期的 CZSC 对象及 BarGenerator 中对应周期的K线"""
+    raws, news, fxs = _Registry(), _Registry(), _Registry()
+
+    bi_list = c.bi_list
+    bi_fxs = [fxs.add_many(bi.fxs) for bi in bi_list]
+    bi_fx_ab = np.array([(fxs.add(bi.fx_a), fxs.add(bi.fx_b)) for bi in bi_list], dtype=np.int64).reshape(-1, 2)
+    bi_bars = [news.add_many(bi.bars) for bi in bi_list]
+    bars_ubi = news.add_many(c.bars_ubi)
+
+    # FX 的 elements 为 NewBar，NewBar 的 elements 为 RawBar，先登记完所有 NewBar 再打包
+    fx_items = fxs.items
+    fx_elements = [news.add_many(fx.elements) for fx in fx_items]
+    new_bars = _pack_bars(news.items, raws)
+
+    columnar = not isinstance(bg_bars, list)
+    res = {
+        "bars_raw": raws.add_many(c.bars_raw),
+        "bg_bars": bg_bars if columnar else raws.add_many(bg_bars),
+        "raw_bars": _pack_bars(raws.items),
+        "new_bars": new_bars,
+        "fx": {
+            "n": len(fx_items),
+            "symbol": c.symbol,
+            "dt": _pack_dt([fx.dt for fx in fx_items]),
+            "mark": [fx.mark.value for fx in fx_items],
+            "high": np.array([fx.high for fx in fx_items], dtype=np.float64),
+            "low": np.array([fx.low for fx in fx_items], dtype=np.float64),
+            "fx": np.array([fx.fx for fx in fx_items], dtype=np.float64),
+            "elements": _pack_ragged(fx_elements),
+            "cache": {i: fx.cache for i, fx in enumerate(fx_items) if fx.cache},
+        },
+        "bi": {
+            "fx_ab": bi_fx_ab,
+            "fxs": _pack_ragged(bi_fxs),
+            "bars": _pack_ragged(bi_bars),
+            "direction": [bi.direction.value for bi in bi_list],
+            "cache": {i: bi.cache for i, bi in enumerate(bi_list) if bi.cache},
+        },
+        "bars_ubi": bars_ubi,
+        "symbol": c.symbol,
+        "freq": c.freq.value,
+        "max_bi_num": c.max_bi_num,
+        "get_signals": c.get_signals,
+        "signals": c.signals,
+        "cache": c.cache,
+        "indicators": c.indicators,
+    }
+    return res
+
+
+def _unpack_czsc(d: dict):
+    """恢复单个周期的 CZSC 对象，返回 (CZSC, BarGenerator 中对应周期的K线)"""
+    raws = _unpack_bars(d["raw_bars"], RawBar)
+    news = _unpack_bars(d["new_bars"], NewBar, raws)
+
+    f = d["fx"]
+    fx_dts = _unpack_dt(f["dt"])
+    fx_elements = _unpack_ragged(f["elements"], news)
+    fxs = [FX(symbol=f["symbol"], dt=dt, mark=Mark(m), high=h, low=lo, fx=v, elements=e)
+           for dt, m, h, lo, v, e in zip(fx_dts, f["mark"], f["high"].tolist(), f["low"].tolist(),
+                                         f["fx"].tolist(), fx_elements)]
+    for i, cache in f["cache"].items():
+        fxs[i].cache = cache
+
+    b = d["bi"]
+    bi_fxs = _unpack_ragged(b["fxs"], fxs)
+    bi_bars = _unpack_ragged(b["bars"], news)
+    bi_list = [BI(symbol=d["symbol"], fx_a=fxs[ia], fx_b=fxs[ib], fxs=fx_, direction=Direction(v), bars=bars_)
+               for (ia, ib), fx_, v, bars_ in zip(b["fx_ab"].tolist(), bi_fxs, b["direction"], bi_bars)]
+    for i, cache in b["cache"].items():
+        bi_list[i].cache = cache
+
+    c = CZSC.__new__(CZSC)
+    c.verbose = envs.get_verbose()
+    c.max_bi_num = d["max_bi_num"]
+    c.bars_raw = [raws[i] for i in d["bars_raw"].tolist()]
+    c.bars_ubi = [news[i] for i in d["bars_ubi"].tolist()]
+    c.bi_list = bi_list
+    c.symbol = d["symbol"]
+    c.freq = Freq(d["freq"])
+    c.get_signals = d["get_signals"]
+    c.signals = d["signals"]
+    c.cache = d["cache"]
+    c.indicators = d["indicators"]
+    # 未完成笔的分型完全由 bars_ubi 决定，直接重建；成笔前的维护器状态只用于加速，不需要恢复
+    ubi_fxs = UbiFxs()
+    ubi_fxs.sync(c.bars_ubi)
+    c._CZSC__ubi_fxs = ubi_fxs
+    c._CZSC__ubi_fxs_stash = None
+    c._CZSC__first_bi = bi_list[0] if bi_list else None
+
+    bg_bars = d["bg_bars"]
+    if isinstance(bg_bars, np.ndarray):
+        bg_bars = [raws[i] for i in bg_bars.tolist()]
+    return c, bg_bars
+
+
+def _pack_position(pos: Position, with_holds: bool = True) -> dict:
+    return {
+        "dump": pos.dump(),
+        "pos": pos.pos,
+        "pos_changed": pos.pos_changed,
+        "operates": pos.operates,
+        "holds": pos.holds if with_holds else [],
+        "last_event": pos.last_event,
+        "last_lo_dt": pos.last_lo_dt,
+        "last_so_dt": pos.last_so_dt,
+        "end_dt": pos.end_dt,
+    }
+
+
+def _unpack_position(d: dict) -> Position:
+    pos = Position.load(d["dump"])
+    for key in ["pos", "pos_changed", "operates", "holds", "last_event", "last_lo_dt", "last_so_dt", "end_dt"]:
+        setattr(pos, key, d[key])
+    return pos
+
+
+def checkpoint(cs: CzscSignals, with_holds: bool = True) -> dict:
+    """生成 CzscSignals / CzscTrader 的状态快照
+
+    :param cs: CzscSignals 或 CzscTrader 对象，必须已经通过 BarGenerator 初始化
+    :param with_holds: 是否保存持仓策略的持仓明细 holds，默认 True；实盘只需要继续交易时可以设为 False，快照更小
+    :return: 快照字典，可以直接 pickle 保存，见 save_checkpoint
+    """
+    assert cs.bg is not None, "只能对通过 BarGenerator 初始化的对象生成快照"
+    bg = cs.bg
+    snapshot = {
+        "version": CHECKPOINT_VERSION,
+        "type": "CzscTrader" if isinstance(cs, CzscTrader) else "CzscSignals",
+        "name": cs.name,
+        "bg": {
+            "symbol": bg.symbol,
+            "end_dt": bg.end_dt,
+            "market": bg.market,
+            "base_freq": bg.base_freq,
+            "max_count": bg.max_count,
+            "freqs": bg.freqs,
+            "columnar": bg.columnar,
+        },
+        "kas": {freq: _pack_czsc(c, bg.bars[freq]) for freq, c in cs.kas.items()},
+        "freqs": cs.freqs,
+        "signals_config": cs.signals_config,
+        "kwargs": cs.kwargs,
+        "cache": cs.cache,
+        "end_dt": cs.end_dt,
+        "bid": cs.bid,
+        "latest_price": cs.latest_price,
+        # K线字段在恢复时由 base_freq 的最后一根K线补充
+        "s": OrderedDict((k, v) for k, v in cs.s.items() if k != "cache"),
+    }
+    if isinstance(cs, CzscTrader):
+        snapshot["positions"] = [_pack_position(p, with_holds) for p in cs.positions] if cs.positions else None
+        snapshot["ensemble_method"] = cs._CzscTrader__ensemble_method
+    return snapshot
+
+
+def restore(snapshot: dict) -> Union[CzscSignals, CzscTrader]:
+    """从快照恢复 CzscSignals / CzscTrader 对象
+
+    :param snapshot: checkpoint 函数返回的快照字典
+    :return: 恢复的对象，继续调用 update / update_signals 的结果与未中断时完全一致
+    """
+    version = snapshot.get("version")
+    if version != CHECKPOINT_VERSION:
+        raise ValueError(f"不支持的快照版本：{version}，当前版本为 {CHECKPOINT_VERSION}")
+
+    # 批量创建大量对象时，关闭垃圾回收可以避免反复触发分代回收
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        kas, bg_bars = {}, {}
+        for freq, d in snapshot["kas"].items():
+            kas[freq], bg_bars[freq] = _unpack_czsc(d)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    b = snapshot["bg"]
+    bg = BarGenerator(base_freq=b["base_freq"], freqs=b["freqs"], max_count=b["max_count"],
+                      market=b["market"], columnar=b["columnar"])
+    bg.symbol, bg.end_dt = b["symbol"], b["end_dt"]
+    bg.bars = bg_bars
+
+    if snapshot["type"] == "CzscTrader":
+        cs = CzscTrader.__new__(CzscTrader)
+        positions = snapshot["positions"]
+        cs.positions = [_unpack_position(p) for p in positions] if positions is not None else None
+        cs._CzscTrader__ensemble_method = snapshot["ensemble_method"]
+    else:
+        cs = CzscSignals.__new__(CzscSignals)
+
+    cs.name = snapshot["name"]
+    cs.cache = snapshot["cache"]
+    cs.kwargs = snapshot["kwargs"]
+    cs.signals_config = snapshot["signals_config"]
+    cs._CzscSignals__compiled = None
+    cs.bg = bg
+    cs.symbol = bg.symbol
+    cs.base_freq = bg.base_freq
+    cs.freqs = snapshot["freqs"]
+    cs.kas = kas
+    cs.end_dt, cs.bid, cs.latest_price = snapshot["end_dt"], snapshot["bid"], snapshot["latest_price"]
+    cs.s = ParsedSignals(snapshot["s"])
+    cs.s.update(kas[cs.base_freq].bars_raw[-1].__dict__)
+    return cs
+
+
+def save_checkpoint(cs: CzscSignals, file, with_holds: bool = True) -> None:
+    """保存状态快照到文件，参数说明见 checkpoint"""
+    with open(file, "wb") as f:
+        pickle.dump(checkpoint(cs, with_holds=with_holds), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_checkpoint(file) -> Union[CzscSignals, CzscTrader]:
+    """从文件恢复 CzscSignals / CzscTrader 对象，参数说明见 restore"""
+    with open(file, "rb") as f:
+        return restore(pickle.load(f))
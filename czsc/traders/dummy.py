@@ -12,7 +12,7 @@ from tqdm import tqdm
 from loguru import logger
 from concurrent.futures import ProcessPoolExecutor
 from czsc import fsa
-from czsc.traders.base import generate_czsc_signals
+from czsc.traders.sig_cache import SignalsCache
 
 
 class DummyBacktest:
@@ -20,7 +20,7 @@ class DummyBacktest:
         """策略回测（支持多进程执行）
 
         :param strategy: CZSC择时策略
-        :param signals_path: 信号文件存放路径
+        :param signals_path: 信号缓存存放路径，见 SignalsCache；已有缓存时只计算新增K线的信号
         :param results_path: 回测结果存放路径
         :param read_bars: 读入K线数据的函数
             函数签名为：read_bars(symbol, freq, sdt, edt, fq) -> List[RawBar]
@@ -63,18 +63,9 @@ class DummyBacktest:
 
         os.makedirs(symbol_path, exist_ok=True)
         try:
-            file_sigs = os.path.join(self.signals_path, f"{symbol}.sigs")
-            if not os.path.exists(file_sigs):
-                bars = self.read_bars(symbol, tactic.base_freq, self.bars_sdt, self.edt, fq='后复权')
-                sigs = generate_czsc_signals(bars, signals_config=tactic.signals_config, sdt=self.sdt, df=True)
-                sigs.drop(columns=['freq', 'cache'], inplace=True)
-                sigs.to_parquet(file_sigs)
-            else:
-                sigs = pd.read_parquet(file_sigs)
-                sigs = sigs[sigs['dt'] >= self.sdt]
-
-            sigs = sigs.to_dict('records')
-            trader = tactic.dummy(sigs)
+            cache = SignalsCache(self.signals_path, tactic.signals_config, tactic.base_freq)
+            sigs = cache.get(symbol, self.read_bars, self.sdt, self.edt, bars_sdt=self.bars_sdt)
+            trader = tactic.dummy(sigs, vectorized=True)
 
         except Exception as e:
             logger.exception(e)
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/17 21:10
+describe: 编译 Signal / Factor / Event 定义，在信号 DataFrame 上向量化匹配
+"""
+import numpy as np
+import pandas as pd
+from loguru import logger
+from typing import List, Union, Dict, Tuple
+from czsc.objects import Signal, Factor, Event
+
+
+class EventMatcher:
+    """Signal / Factor / Event 的向量化匹配器
+
+    与逐行调用 ``is_match`` 的结果完全一致，但计算方式不同：
+
+    1. 所有定义中用到的信号按 signal 字符串去重，同一个信号只计算一次；
+    2. 每个信号列先编码为类别（categorical），信号只在类别取值上逐个判断，再通过类别编码映射到所有行；
+    3. Factor / Event 的 signals_all、signals_any、signals_not 组合为布尔掩码的与、或、非运算；
+    4. Event 中因子的匹配按顺序取第一个满足的因子，与 Event.is_match 一致。
+
+    Example:
+    =======================
+    >>> matcher = EventMatcher(events)
+    >>> dfm = matcher.match(sigs)     # sigs 为 generate_czsc_signals 返回的 DataFrame
+    >>> dfm[event.name]               # 事件是否匹配
+    >>> dfm[f"{event.name}_F"]        # 匹配上的因子名称，未匹配为 None
+    """
+
+    def __init__(self, items: List[Union[Signal, Factor, Event, str, dict]]):
+        """
+
+        :param items: 需要匹配的定义列表，可以是 Signal / Factor / Event 对象，
+            也可以是信号字符串，或者 Event.dump() / Factor.dump() 格式的字典（包含 factors 的字典视为 Event）
+        """
+        self.items = [self._load(x) for x in items]
+        self.signals: Dict[str, Signal] = {}
+        for item in self.items:
+            for signal in self._item_signals(item):
+                self.signals.setdefault(signal.signal, signal)
+
+    @staticmethod
+    def _load(item):
+        if isinstance(item, (Signal, Factor, Event)):
+            return item
+        if isinstance(item, str):
+            return Signal(item)
+        if isinstance(item, dict):
+            return Event.load(item) if "factors" in item else Factor.load(item)
+        raise TypeError(f"不支持的匹配对象类型：{type(item)}")
+
+    @staticmethod
+    def _item_signals(item) -> List[Signal]:
+        if isinstance(item, Signal):
+            return [item]
+        signals = list(item.signals_all) + list(item.signals_any) + list(item.signals_not)
+        if isinstance(item, Event):
+            for factor in item.factors:
+                signals.extend(list(factor.signals_all) + list(factor.signals_any) + list(factor.signals_not))
+        return signals
+
+    @property
+    def unique_signals(self) -> List[str]:
+        """所有定义中用到的信号"""
+        return list(self.signals.keys())
+
+    @staticmethod
+    def _encode(col: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """将信号列编码为 (类别编码, 类别取值)，缺失值的编码为 -1"""
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            return col.cat.codes.to_numpy(), col.cat.categories.to_numpy(dtype=object)
+        codes, uniques = pd.factorize(col, use_na_sentinel=True)
+        return codes, np.asarray(uniques, dtype=object)
+
+    def _signal_masks(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """计算所有信号的匹配掩码
+
+        信号列不存在时抛出 KeyError；信号值为空的行视为不匹配（逐行调用 is_match 会抛出 ValueError），记录警告日志
+        """
+        keys = sorted({signal.key for signal in self.signals.values()})
+        missing = [key for key in keys if key not in df.columns]
+        if missing:
+            raise KeyError(f"{missing} 不在信号列表中")
+
+        # 每个信号列只编码一次，类别取值解析为 (v1, v2, v3, score)
+        encoded = {}
+        for key in keys:
+            codes, uniques = self._encode(df[key])
+            parsed = [v.split("_") if isinstance(v, str) and v else None for v in uniques]
+            empty = np.isin(codes, [-1] + [i for i, v in enumerate(parsed) if v is None])
+            if empty.any():
+                logger.warning(f"信号 {key} 有 {empty.sum()} 行取值为空，这些行按不匹配处理")
+            encoded[key] = (codes, parsed)
+
+        masks = {}
+        for name, signal in self.signals.items():
+            codes, parsed = encoded[signal.key]
+            # 最后一个位置对应缺失值（编码 -1），缺失值视为不匹配
+            lut = np.zeros(len(parsed) + 1, dtype=bool)
+            for i, v in enumerate(parsed):
+                if v is None:
+                    continue
+                v1, v2, v3, score = v
+                lut[i] = (int(score) >= signal.score
+                          and (signal.v1 == "任意" or v1 == signal.v1)
+                          and (signal.v2 == "任意" or v2 == signal.v2)
+                          and (signal.v3 == "任意" or v3 == signal.v3))
+            masks[name] = lut[codes]
+        return masks
+
+    @staticmethod
+    def _combine(masks, n, signals_all, signals_any, signals_not) -> np.ndarray:
+        """按 all / any / not 组合信号掩码"""
+        m = np.ones(n, dtype=bool)
+        for signal in signals_not:
+            m &= ~masks[signal.signal]
+        for signal in signals_all:
+            m &= masks[signal.signal]
+        if signals_any:
+            m_any = np.zeros(n, dtype=bool)
+            for signal in signals_any:
+                m_any |= masks[signal.signal]
+            m &= m_any
+        return m
+
+    def match(self, df: pd.DataFrame) -> pd.DataFrame:
+        """在信号 DataFrame 上匹配所有定义
+
+        :param df: 信号 DataFrame，每个信号 key 对应一列，列的取值为信号 value，如 "向上_其他_其他_0"
+        :return: 与 df 索引相同的 DataFrame，列如下：
+
+            - Signal：列名为 signal 字符串，bool 类型
+            - Factor：列名为 factor.name，bool 类型
+            - Event：列名为 event.name，bool 类型；以及 f"{event.name}_F" 列，为第一个满足的因子名称，未匹配为 None
+        """
+        n = len(df)
+        masks = self._signal_masks(df)
+        res = {}
+        for item in self.items:
+            if isinstance(item, Signal):
+                res[item.signal] = masks[item.signal]
+
+            elif isinstance(item, Factor):
+                res[item.name] = self._combine(masks, n, item.signals_all, item.signals_any, item.signals_not)
+
+            else:
+                # first 记录第一个满足的因子序号，倒序赋值使靠前的因子覆盖靠后的因子；len(factors) 表示未匹配
+                m_event = self._combine(masks, n, item.signals_all, item.signals_any, item.signals_not)
+                first = np.full(n, len(item.factors), dtype=np.int64)
+                for i in range(len(item.factors) - 1, -1, -1):
+                    f = item.factors[i]
+                    first[self._combine(masks, n, f.signals_all, f.signals_any, f.signals_not)] = i
+                first[~m_event] = len(item.factors)
+                names = np.array([f.name for f in item.factors] + [None], dtype=object)
+                res[item.name] = first < len(item.factors)
+                res[f"{item.name}_F"] = names[first]
+        return pd.DataFrame(res, index=df.index)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/17 18:40
+describe: 多标的信号批量生成，多进程执行，每个标的的信号直接写入同一个 Parquet 数据集
+"""
+import os
+import time
+import traceback
+import pandas as pd
+from tqdm import tqdm
+from pathlib import Path
+from loguru import logger
+from typing import Callable, List
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from czsc.traders.base import generate_czsc_signals
+
+
+def one_symbol_signals(symbol, read_bars: Callable, signals_config: List[dict], path, **kwargs) -> dict:
+    """生成单个标的的信号，并写入 path 目录下的 {symbol}.parquet 文件
+
+    信号文件由子进程直接写入磁盘，主进程只接收耗时统计，避免在进程间传递大量数据。
+
+    :param symbol: 标的代码
+    :param read_bars: K线数据读取函数，函数签名为：read_bars(symbol, freq, sdt, edt, fq) -> List[RawBar]
+    :param signals_config: 信号函数配置
+    :param path: 信号数据集保存路径
+    :param kwargs: 参数说明见 generate_symbols_signals
+    :return: 单个标的的执行情况，包括状态、信号行数、各阶段耗时和错误信息
+    """
+    file_sigs = Path(path) / f"{symbol}.parquet"
+    res = {"symbol": symbol, "status": "skipped", "rows": 0, "read_time": 0.0, "signal_time": 0.0,
+           "write_time": 0.0, "total_time": 0.0, "error": None}
+    if file_sigs.exists() and not kwargs.get("overwrite", False):
+        return res
+
+    start_time = time.time()
+    try:
+        bars = read_bars(symbol, kwargs["base_freq"], kwargs.get("bar_sdt", "20150101"),
+                         kwargs.get("edt", "20220101"), fq=kwargs.get("fq", "后复权"))
+        res["read_time"] = time.time() - start_time
+
+        t = time.time()
+        sigs = generate_czsc_signals(bars, signals_config, sdt=kwargs.get("sdt", "20170101"), df=True,
+                                     batch=kwargs.get("batch", False), bg_max_count=kwargs.get("bg_max_count", 5000))
+        sigs = sigs.drop(columns=["freq", "cache"], errors="ignore")
+        res["signal_time"] = time.time() - t
+
+        # 先写入以 . 开头的临时文件（数据集读取时会忽略），写完后再重命名，避免读到不完整的文件
+        t = time.time()
+        file_tmp = file_sigs.with_name(f".{file_sigs.name}.{os.getpid()}")
+        sigs.to_parquet(file_tmp, index=False)
+        os.replace(file_tmp, file_sigs)
+        res["write_time"] = time.time() - t
+        res.update({"status": "success", "rows": len(sigs)})
+
+    except Exception as e:
+        logger.error(f"{symbol} 信号生成失败：{e}")
+        res.update({"status": "failed", "error": traceback.format_exc()})
+
+    res["total_time"] = time.time() - start_time
+    return res
+
+
+def generate_symbols_signals(symbols: List[str], read_bars: Callable, signals_config: List[dict], path, **kwargs):
+    """多进程批量生成多个标的的信号
+
+    每个标的的信号保存为 path 目录下的 {symbol}.parquet 文件，整个目录可以作为一个 Parquet 数据集读取，如：
+    ``pd.read_parquet(path)`` 或 ``pyarrow.dataset.dataset(path)``；执行情况汇总保存在 path/_report.parquet 中。
+
+    已经存在信号文件的标的默认跳过，中断后重新执行即可续跑。
+
+    :param symbols: 标的代码列表
+    :param read_bars: K线数据读取函数，函数签名为：read_bars(symbol, freq, sdt, edt, fq) -> List[RawBar]；
+        多进程执行时，read_bars 必须是可以被 pickle 的模块级函数
+    :param signals_config: 信号函数配置
+    :param path: 信号数据集保存路径
+    :param kwargs:
+
+        - base_freq: 基础周期，必须
+        - bar_sdt: K线数据开始日期，默认 20150101
+        - sdt: 信号计算开始日期，默认 20170101
+        - edt: K线数据结束日期，默认 20220101
+        - fq: 复权方式，默认 后复权
+        - n_jobs: 进程数量，默认 1，即在当前进程中依次执行
+        - overwrite: 是否覆盖已经存在的信号文件，默认 False
+        - batch: 是否使用 generate_czsc_signals 的批量模式，默认 False
+        - bg_max_count: BarGenerator 中每个周期最多保留的K线数量，默认 5000
+
+    :return: 每个标的的执行情况，DataFrame 格式，包括状态（success/skipped/failed）、信号行数、
+        读取K线、计算信号、写入文件的耗时以及失败原因
+    """
+    assert kwargs.get("base_freq"), "必须指定 base_freq"
+    os.makedirs(path, exist_ok=True)
+    n_jobs = kwargs.get("n_jobs", 1)
+    symbols = sorted(set(symbols))
+    logger.info(f"开始生成信号，共 {len(symbols)} 个标的，使用 {n_jobs} 个进程；结果保存在 {path}")
+
+    rows = []
+    start_time = time.time()
+    if n_jobs <= 1:
+        for symbol in tqdm(symbols, desc="generate symbols signals"):
+            rows.append(one_symbol_signals(symbol, read_bars, signals_config, path, **kwargs))
+    else:
+        with ProcessPoolExecutor(n_jobs) as pool:
+            futures = {pool.submit(one_symbol_signals, symbol, read_bars, signals_config, path, **kwargs): symbol
+                       for symbol in symbols}
+            for future in tqdm(as_completed(futures), total=len(futures), desc="generate symbols signals"):
+                try:
+                    rows.append(future.result())
+                except Exception as e:
+                    # 子进程异常退出等无法在 one_symbol_signals 中捕获的错误
+                    rows.append({"symbol": futures[future], "status": "failed", "error": repr(e)})
+
+    report = pd.DataFrame(rows).sort_values("symbol", ignore_index=True)
+    report.to_parquet(Path(path) / "_report.parquet", index=False)
+
+    counts = report["status"].value_counts().to_dict()
+    logger.info(f"信号生成完成，耗时 {time.time() - start_time:.2f} 秒；执行情况：{counts}")
+    if counts.get("failed", 0):
+        logger.warning(f"信号生成失败的标的：{report.loc[report['status'] == 'failed', 'symbol'].tolist()}")
+    return report
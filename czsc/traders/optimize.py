@@ -9,6 +9,7 @@ import os
 import czsc
 import time
 import hashlib
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 from loguru import logger
@@ -17,7 +18,9 @@ from pathlib import Path
 from typing import Callable, Union, List, AnyStr
 from czsc.strategies import CzscStrategyBase
 from czsc.objects import Position, Event
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from czsc.traders.sig_cache import SignalsCache
 
 
 class CzscOpenOptimStrategy(CzscStrategyBase):
@@ -103,9 +106,43 @@ class CzscExitOptimStrategy(CzscStrategyBase):
         return pos_list
 
 
+def _save_symbol_results(symbol_path: Path, positions: List[Position]):
+    """保存单个标的所有候选持仓的回测结果
+
+    - pairs.parquet：所有持仓的交易对，用 策略标记 列区分持仓
+    - holds.parquet：宽表，dt、price、n1b 列之后每个持仓一列，值为持仓方向；最后写入，用于判断结果是否完整
+    """
+    pairs = [pd.DataFrame(pos.pairs) for pos in positions if pos.pairs]
+    pairs = pd.concat(pairs, ignore_index=True) if pairs else pd.DataFrame(columns=['策略标记'])
+    pairs.to_parquet(symbol_path / "pairs.parquet")
+
+    holds = positions[0].holds
+    dts = [x['dt'] for x in holds]
+    dfh = pd.DataFrame({'dt': dts, 'price': [x['price'] for x in holds]})
+    dfh['n1b'] = ((dfh['price'].shift(-1) / dfh['price'] - 1) * 10000).fillna(0)
+
+    poss = {}
+    for pos in positions:
+        if len(pos.holds) == len(dts) and pos.holds[-1]['dt'] == dts[-1]:
+            poss[pos.name] = np.fromiter((x['pos'] for x in pos.holds), dtype=np.int8, count=len(dts))
+        else:
+            dfp = pd.DataFrame(pos.holds).drop_duplicates('dt', keep='last').set_index('dt')['pos']
+            poss[pos.name] = dfp.reindex(dts).fillna(0).to_numpy(dtype=np.int8)
+    dfh = pd.concat([dfh, pd.DataFrame(poss)], axis=1)
+    dfh.to_parquet(symbol_path / "holds.parquet")
+
+
+def _legacy_result_files(path: Path, pattern: str = "*/*.holds") -> List[Path]:
+    """旧版本按持仓保存的结果文件（{pos_name}.pairs / {pos_name}.holds），新版本不再读取"""
+    return sorted(Path(path).glob(pattern))
+
+
 def one_symbol_optim(symbol, read_bars: Callable, path: str, **kwargs):
     """单个标的优化
 
+    所有候选持仓共用一份信号，信号只计算一次，然后向量化模拟全部候选持仓；
+    传入 signals_path 时，信号保存在 SignalsCache 中，重复优化或者K线更新后只计算新增部分。
+
     :param symbol: 标的代码
     :param read_bars: K线数据读取函数
     :param path: 优化结果保存路径
@@ -115,12 +152,16 @@ def one_symbol_optim(symbol, read_bars: Callable, path: str, **kwargs):
         - bar_edt: K线数据结束日期
         - sdt: 优化开始日期
         - optim_type: 优化类型，open 或 exit
+        - vectorized: 是否先计算信号、再向量化模拟所有候选持仓，默认 True
+        - signals_path: 信号缓存路径，默认为 None，不缓存信号；仅在 vectorized 为 True 时生效
 
     """
     symbol_path = Path(path) / symbol
-    if symbol_path.exists():
+    if (symbol_path / "holds.parquet").exists():
         logger.info(f"{symbol} dummy 结果已经存在")
         return
+    if _legacy_result_files(symbol_path, "*.holds"):
+        logger.warning(f"{symbol_path} 下是旧版本按持仓保存的结果文件，将重新优化并保存为 pairs.parquet、holds.parquet")
     symbol_path.mkdir(parents=True, exist_ok=True)
 
     bar_sdt = kwargs.get('bar_sdt', '20150101')
@@ -136,77 +177,134 @@ def one_symbol_optim(symbol, read_bars: Callable, path: str, **kwargs):
         assert optim_type == 'exit', "optim_type must be open or exit"
         tactic = CzscExitOptimStrategy(symbol=symbol, **kwargs)
 
+    vectorized = kwargs.get('vectorized', True)
+    signals_path = kwargs.get('signals_path', None)
     try:
-        bars = read_bars(symbol, tactic.base_freq, bar_sdt, bar_edt, fq='后复权', raw_bar=True)
-        if len(bars) < 100:
-            logger.warning(f"{symbol} K线数量不足，无法优化")
-            return None
+        if signals_path and vectorized and all(x.get('freq') for x in tactic.signals_config):
+            cache = SignalsCache(signals_path, tactic.signals_config, tactic.base_freq)
+            sigs = cache.get(symbol, partial(read_bars, raw_bar=True), sdt, bar_edt, bars_sdt=bar_sdt)
+            if len(sigs) < 100:
+                logger.warning(f"{symbol} 信号数量不足，无法优化")
+                return None
+            trader = tactic.dummy(sigs, vectorized=True)
+        else:
+            bars = read_bars(symbol, tactic.base_freq, bar_sdt, bar_edt, fq='后复权', raw_bar=True)
+            if len(bars) < 100:
+                logger.warning(f"{symbol} K线数量不足，无法优化")
+                return None
+
+            trader = tactic.backtest(bars, sdt=sdt, vectorized=vectorized)
 
-        trader = tactic.backtest(bars, sdt=sdt)
+        _save_symbol_results(symbol_path, trader.positions)     # type: ignore
     except Exception as e:
         logger.exception(f"{symbol} 优化失败，原因：{e}")
         return None
 
-    for pos in trader.positions:            # type: ignore
-        try:
-            file_pairs = os.path.join(symbol_path, f"{pos.name}.pairs")
-            file_holds = os.path.join(symbol_path, f"{pos.name}.holds")
+    logger.info(f"{symbol} - {optim_type} 优化完成，耗时 {time.time() - start_time:.2f} 秒")
+
 
-            pairs = pd.DataFrame(pos.pairs)
-            pairs.to_parquet(file_pairs)
+def _cross_section_sums(files: List[Path], pos_names: List[str]):
+    """按 dt 汇总多个标的的持仓收益
 
-            dfh = pd.DataFrame(pos.holds)
-            dfh['n1b'] = (dfh['price'].shift(-1) / dfh['price'] - 1) * 10000
-            dfh.fillna(0, inplace=True)
-            dfh['symbol'] = pos.symbol
-            dfh.to_parquet(file_holds)
+    :return: (S, N, M)，S 为每个持仓在 dt 上的 n1b * pos 之和，N 为非零持仓的标的数量，M 为 dt 上的标的数量
+    """
+    S, N, M = None, None, None
+    for file in files:
+        try:
+            dfh = pd.read_parquet(file).set_index('dt')
         except Exception as e:
-            logger.debug(f"{symbol} {pos.name} 保存失败，原因：{e}")
+            logger.debug(f"{file} 读取失败，原因：{e}")
+            continue
+
+        pos = dfh.reindex(columns=pos_names, fill_value=0).to_numpy(dtype=float)
+        s = pd.DataFrame(pos * dfh['n1b'].to_numpy()[:, None], index=dfh.index, columns=pos_names)
+        n = pd.DataFrame((pos != 0).astype(float), index=dfh.index, columns=pos_names)
+        m = pd.Series(1.0, index=dfh.index)
+        if S is None:
+            S, N, M = s, n, m
+        else:
+            S, N, M = S.add(s, fill_value=0), N.add(n, fill_value=0), M.add(m, fill_value=0)
+    return S, N, M
 
-    logger.info(f"{symbol} - {optim_type} 优化完成，耗时 {time.time() - start_time:.2f} 秒")
+
+def _pairs_stats(pos_name, pairs: pd.DataFrame):
+    try:
+        return dict(czsc.PairsPerformance(pairs).basic_info)
+    except Exception as e:
+        logger.exception(f"{pos_name} 分析失败，原因：{e}")
+        return None
 
 
-def one_position_stats(path, pos_name):
-    """分析单个 pos 的表现"""
+def positions_stats(path, pos_names: List[str], n_jobs=1) -> List[dict]:
+    """分析 path 下所有标的、所有候选持仓的表现
+
+    每个标的的结果文件只读取一次，按 dt 汇总全部持仓的截面收益；n_jobs 大于 1 时，按标的分组多进程汇总
+
+    :param path: one_symbol_optim 的结果保存路径
+    :param pos_names: 持仓策略名称列表
+    :param n_jobs: 进程数量
+    :return: 每个持仓的评价指标，没有交易的持仓不返回
+    """
     path = Path(path)
-    files_p = path.glob(f"**/{pos_name}.pairs")
-    files_h = path.glob(f"**/{pos_name}.holds")
+    pos_names = list(pos_names)
+    files_h = sorted(path.glob("*/holds.parquet"))
 
-    pos_pairs = []
-    for file_p in files_p:
-        try:
-            dfp = pd.read_parquet(file_p)
-            pos_pairs.append(dfp)
-        except Exception as e:
-            logger.debug(f"{file_p} 读取失败，原因：{e}")
+    legacy = {x.parent for x in _legacy_result_files(path)} - {x.parent for x in files_h}
+    if legacy:
+        logger.warning(f"{path} 下有 {len(legacy)} 个标的只有旧版本的结果文件（{{pos_name}}.pairs / {{pos_name}}.holds），"
+                       f"不参与统计，如 {sorted(legacy)[0]}；请删除这些标的目录后重新执行优化")
+    if not files_h:
+        return []
 
-    pos_holds = []
+    pos_pairs = []
     for file_h in files_h:
         try:
-            dfh = pd.read_parquet(file_h)
-            pos_holds.append(dfh)
+            pos_pairs.append(pd.read_parquet(file_h.parent / "pairs.parquet"))
         except Exception as e:
-            logger.debug(f"{file_h} 读取失败，原因：{e}")
-
+            logger.debug(f"{file_h.parent} 交易对读取失败，原因：{e}")
     pairs = pd.concat(pos_pairs, ignore_index=True)
-    holds = pd.concat(pos_holds, ignore_index=True)
-
-    if len(pairs) == 0 or len(holds) == 0:
-        return None
+    pairs = {k: v for k, v in pairs.groupby('策略标记') if k in set(pos_names)} if len(pairs) else {}
 
-    try:
-        pp = czsc.PairsPerformance(pairs)
-        stats = dict(pp.basic_info)
-        # 加入截面等权评价
-        cross = holds.groupby('dt').apply(lambda x: (x['n1b'] * x['pos']).sum() / (sum(x['pos'] != 0) + 1)).sum()
-        stats['截面等权收益'] = cross
-        cross1 = holds.groupby('dt').apply(lambda x: (x['n1b'] * x['pos']).mean()).sum()
-        stats['截面品种等权'] = cross1
+    if n_jobs <= 1:
+        S, N, M = _cross_section_sums(files_h, pos_names)
+        basic = {k: _pairs_stats(k, v) for k, v in pairs.items()}
+    else:
+        chunks = [files_h[i::n_jobs] for i in range(n_jobs) if files_h[i::n_jobs]]
+        with ProcessPoolExecutor(n_jobs) as pool:
+            futures = {k: pool.submit(_pairs_stats, k, v) for k, v in pairs.items()}
+            S, N, M = None, None, None
+            for s, n, m in pool.map(_cross_section_sums, chunks, [pos_names] * len(chunks)):
+                if s is None:
+                    continue
+                if S is None:
+                    S, N, M = s, n, m
+                else:
+                    S, N, M = S.add(s, fill_value=0), N.add(n, fill_value=0), M.add(m, fill_value=0)
+            basic = {k: f.result() for k, f in futures.items()}
+
+    if S is None:
+        return []
+
+    # 截面等权评价
+    cross = (S / (N + 1)).sum()
+    cross1 = S.div(M, axis=0).sum()
+
+    all_stats = []
+    for pos_name in pos_names:
+        stats = basic.get(pos_name)
+        if not stats:
+            continue
+        stats['截面等权收益'] = cross[pos_name]
+        stats['截面品种等权'] = cross1[pos_name]
         stats['pos_name'] = pos_name
-        return stats
-    except Exception as e:
-        logger.exception(f"{pos_name} 分析失败，原因：{e}")
-        return None
+        all_stats.append(stats)
+    return all_stats
+
+
+def one_position_stats(path, pos_name):
+    """分析单个 pos 的表现"""
+    res = positions_stats(path, [pos_name])
+    return res[0] if res else None
 
 
 class OpensOptimize:
@@ -225,6 +323,7 @@ class OpensOptimize:
             - signals_module_name: 信号模块名
             - bar_sdt: K线数据开始日期
             - bar_edt: K线数据结束日期
+            - signals_path: 信号缓存路径，默认为 results_path/signals
 
         """
         self.version = 'OpensOptimizeV230924'
@@ -239,18 +338,17 @@ class OpensOptimize:
         os.makedirs(results_path, exist_ok=True)
         self.poss_path = os.path.join(results_path, 'poss')
         os.makedirs(self.poss_path, exist_ok=True)
+        # 信号缓存按信号配置区分，放在 results_path 下供不同优化任务共用
+        self.signals_path = kwargs.pop('signals_path', os.path.join(kwargs['results_path'], 'signals'))
 
         self.results_path = results_path
         logger.add(f"{self.results_path}\\信号优化.log", encoding='utf-8', enqueue=True)
         logger.info(f"{self.task_name} | {self.candidate_signals} | 其他参数：{kwargs}")
 
     def _one_symbol_optim(self, symbol):
-        one_symbol_optim(symbol, self.read_bars, self.poss_path, optim_type='open',
+        one_symbol_optim(symbol, self.read_bars, self.poss_path, optim_type='open', signals_path=self.signals_path,
                          candidate_signals=self.candidate_signals, **self.kwargs)
 
-    def _one_pos_stats(self, pos_name):
-        return one_position_stats(self.poss_path, pos_name)
-
     def __symbols_optim(self, n_jobs=1):
         symbols = self.symbols
         if n_jobs <= 1:
@@ -263,22 +361,9 @@ class OpensOptimize:
 
     def _positions_stats(self, dumps_map, n_jobs=1):
         """统计所有 pos 的表现"""
-        if n_jobs <= 1:
-            all_stats = [self._one_pos_stats(pos_name) for pos_name in dumps_map.keys()]
-            for s, pos_name in zip(all_stats, dumps_map.keys()):
-                if not s:
-                    continue
-                s['pos_dump'] = dumps_map[pos_name]
-            return all_stats
-
-        all_stats = []
-        with ProcessPoolExecutor(n_jobs) as pool:
-            futures = [pool.submit(self._one_pos_stats, pos_name) for pos_name in dumps_map.keys()]
-            for future in as_completed(futures):
-                s = future.result()
-                if s:
-                    s['pos_dump'] = dumps_map[s['pos_name']]
-                    all_stats.append(s)
+        all_stats = positions_stats(self.poss_path, list(dumps_map.keys()), n_jobs=n_jobs)
+        for s in all_stats:
+            s['pos_dump'] = dumps_map[s['pos_name']]
         return all_stats
 
     def execute(self, n_jobs=1):
@@ -327,6 +412,7 @@ class ExitsOptimize:
             - results_path: 优化结果保存路径
             - files_position: 优化入场信号文件路径列表
             - signals_module_name: 信号模块名
+            - signals_path: 信号缓存路径，默认为 results_path/signals
 
         """
         self.version = 'ExitsOptimizeV230924'
@@ -341,18 +427,17 @@ class ExitsOptimize:
         os.makedirs(results_path, exist_ok=True)
         self.poss_path = os.path.join(results_path, 'poss')
         os.makedirs(self.poss_path, exist_ok=True)
+        # 信号缓存按信号配置区分，放在 results_path 下供不同优化任务共用
+        self.signals_path = kwargs.pop('signals_path', os.path.join(kwargs['results_path'], 'signals'))
 
         self.results_path = results_path
         logger.add(f"{self.results_path}\\信号优化.log", encoding='utf-8', enqueue=True)
         logger.info(f"{self.task_name} | {self.candidate_events} | 其他参数：{kwargs}")
 
     def _one_symbol_optim(self, symbol):
-        one_symbol_optim(symbol, self.read_bars, self.poss_path, optim_type='exit',
+        one_symbol_optim(symbol, self.read_bars, self.poss_path, optim_type='exit', signals_path=self.signals_path,
                          candidate_events=self.candidate_events, **self.kwargs)
 
-    def _one_pos_stats(self, pos_name):
-        return one_position_stats(self.poss_path, pos_name)
-
     def __symbols_optim(self, n_jobs=1):
         symbols = self.symbols
         if n_jobs <= 1:
@@ -365,22 +450,9 @@ class ExitsOptimize:
 
     def _positions_stats(self, dumps_map, n_jobs=1):
         """统计所有 pos 的表现"""
-        if n_jobs <= 1:
-            all_stats = [self._one_pos_stats(pos_name) for pos_name in dumps_map.keys()]
-            for s, pos_name in zip(all_stats, dumps_map.keys()):
-                if not s:
-                    continue
-                s['pos_dump'] = dumps_map[pos_name]
-            return all_stats
-
-        all_stats = []
-        with ProcessPoolExecutor(n_jobs) as pool:
-            futures = [pool.submit(self._one_pos_stats, pos_name) for pos_name in dumps_map.keys()]
-            for future in as_completed(futures):
-                s = future.result()
-                if s:
-                    s['pos_dump'] = dumps_map[s['pos_name']]
-                    all_stats.append(s)
+        all_stats = positions_stats(self.poss_path, list(dumps_map.keys()), n_jobs=n_jobs)
+        for s in all_stats:
+            s['pos_dump'] = dumps_map[s['pos_name']]
         return all_stats
 
     def execute(self, n_jobs=1):
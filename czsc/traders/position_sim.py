@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/17 23:20
+describe: 基于信号缓存的向量化持仓模拟，结果与逐根K线调用 Position.update 完全一致
+"""
+import numpy as np
+import pandas as pd
+from copy import deepcopy
+from loguru import logger
+from typing import List, Union
+from czsc.objects import Position, Operate
+from czsc.traders.matcher import EventMatcher
+
+_DAY_NS = 86400 * 10**9
+
+
+def _sigs_frame(sigs: Union[pd.DataFrame, List[dict]]) -> pd.DataFrame:
+    """将信号缓存转换为 DataFrame，并剔除时间没有递增的行（Position.update 会忽略这些信号）"""
+    df = sigs if isinstance(sigs, pd.DataFrame) else pd.DataFrame(sigs)
+    if df.empty:
+        return df
+
+    dt = pd.to_datetime(df["dt"]).to_numpy(dtype="datetime64[ns]").view(np.int64)
+    valid = np.ones(len(dt), dtype=bool)
+    valid[1:] = dt[1:] > np.maximum.accumulate(dt)[:-1]
+    if not valid.all():
+        logger.warning(f"信号缓存中有 {(~valid).sum()} 行的时间没有递增，已忽略")
+        df = df[valid]
+    return df.reset_index(drop=True)
+
+
+class _SigArrays:
+    """模拟过程中所有持仓共用的信号数组，numpy 数组用于区间查找，list 用于逐根K线处理"""
+
+    def __init__(self, df: pd.DataFrame, dfm: pd.DataFrame):
+        self.n = len(df)
+        self.dts = df["dt"].tolist()
+        self.symbols = df["symbol"].tolist()
+        self.dt_ns = pd.to_datetime(df["dt"]).to_numpy(dtype="datetime64[ns]").view(np.int64)
+        self.day = self.dt_ns // _DAY_NS
+        self.price = df["close"].to_numpy(dtype=np.float64)
+        self.bid = df["id"].to_numpy(dtype=np.int64)
+        self.dt_ns_l, self.day_l = self.dt_ns.tolist(), self.day.tolist()
+        self.price_l, self.bid_l = self.price.tolist(), self.bid.tolist()
+        self.prices, self.bids = df["close"].tolist(), df["id"].tolist()
+        self.dfm = dfm
+        self._events = {}
+
+    def event(self, name: str):
+        """事件的匹配掩码和匹配上的因子名称，多个持仓共用"""
+        if name not in self._events:
+            self._events[name] = (self.dfm[name].to_numpy(dtype=bool), self.dfm[f"{name}_F"].tolist())
+        return self._events[name]
+
+
+def _simulate(pos: Position, arr: _SigArrays) -> Position:
+    """单个持仓的模拟，逻辑与 Position.update 逐行一致
+
+    两个事件触发的K线之间，仓位只可能因为止损或超时而变化，因此只需要在这段区间内查找第一根触发止损或超时的K线；
+    事件触发的K线则按 Position.update 的逻辑逐根处理。
+    """
+    assert not pos.holds, f"{pos.name} 已经有持仓记录，只能对尚未回测的持仓策略进行模拟"
+    pos = deepcopy(pos)
+    n, events = arr.n, pos.events
+    n_events = len(events)
+
+    # 每根K线第一个满足的事件序号，n_events 表示没有事件满足
+    first = np.full(n, n_events, dtype=np.int64)
+    for i in range(n_events - 1, -1, -1):
+        first[arr.event(events[i].name)[0]] = i
+    event_rows = np.flatnonzero(first < n_events).tolist()
+    first = first.tolist()
+    factor_names = [arr.event(e.name)[1] for e in events]
+
+    price, bid, day = arr.price, arr.bid, arr.day
+    price_l, bid_l, day_l, dt_ns_l = arr.price_l, arr.bid_l, arr.day_l, arr.dt_ns_l
+    sl, timeout, interval, T0 = -pos.stop_loss / 10000, pos.timeout, pos.interval, pos.T0
+    desc_sl = {1: f"平多@{pos.stop_loss}BP止损", -1: f"平空@{pos.stop_loss}BP止损"}
+    desc_to = {1: f"平多@{pos.timeout}K超时", -1: f"平空@{pos.timeout}K超时"}
+    LO, LE, SO, SE = Operate.LO, Operate.LE, Operate.SO, Operate.SE
+
+    operates = pos.operates
+    holds_pos = np.zeros(n, dtype=np.int64)
+    last_event = dict(pos.last_event)
+    pos_changed = False
+
+    # p 当前仓位；lo / so 为最近一次开多、开空的K线序号；lp / lb 为最近一个开仓事件的价格和K线 id
+    p, lo, so, lp, lb = 0, None, None, None, None
+
+    def create_operate(k, _op, _op_desc, _pos):
+        operates.append({"symbol": arr.symbols[k], "dt": arr.dts[k], "bid": arr.bids[k], "price": arr.prices[k],
+                         "op": _op, "op_desc": _op_desc, "pos": _pos})
+
+    def check_exits(k, p, op, op_desc):
+        """多头、空头出场判断，对应 Position.update 中的出场逻辑，返回新的仓位"""
+        if p == 1 and (T0 or day_l[k] != day_l[lo]):
+            if op == LE:
+                p = 0
+                create_operate(k, LE, op_desc, p)
+            if price_l[k] / lp - 1 < sl:
+                p = 0
+                create_operate(k, LE, desc_sl[1], p)
+            if bid_l[k] - lb > timeout:
+                p = 0
+                create_operate(k, LE, desc_to[1], p)
+
+        elif p == -1 and (T0 or day_l[k] != day_l[so]):
+            if op == SE:
+                p = 0
+                create_operate(k, SE, op_desc, p)
+            if 1 - price_l[k] / lp < sl:
+                p = 0
+                create_operate(k, SE, desc_sl[-1], p)
+            if bid_l[k] - lb > timeout:
+                p = 0
+                create_operate(k, SE, desc_to[-1], p)
+        return p
+
+    def first_exit(a, b):
+        """在 [a, b) 区间内查找第一根触发止损或超时的K线，没有则返回 -1"""
+        open_day = day_l[lo] if p == 1 else day_l[so]
+        if b - a <= 16:
+            for k in range(a, b):
+                ret = price_l[k] / lp - 1 if p == 1 else 1 - price_l[k] / lp
+                if (ret < sl or bid_l[k] - lb > timeout) and (T0 or day_l[k] != open_day):
+                    return k
+            return -1
+
+        ret = price[a:b] / lp - 1 if p == 1 else 1 - price[a:b] / lp
+        hit = (ret < sl) | (bid[a:b] - lb > timeout)
+        if not T0:
+            hit &= day[a:b] != open_day
+        j = int(np.argmax(hit))
+        return a + j if hit[j] else -1
+
+    prev = 0
+    for e in event_rows + [n]:
+        # prev ~ e-1 之间没有事件触发，只判断止损和超时
+        if prev < e:
+            k = first_exit(prev, e) if p != 0 else -1
+            if k >= 0:
+                holds_pos[prev:k] = p
+                n_ops = len(operates)
+                p = check_exits(k, p, Operate.HO, "")
+                # 出场之后的K线没有产生操作，Position.update 在这些K线上 pos_changed 为 False
+                pos_changed = len(operates) > n_ops and k == e - 1
+                holds_pos[k:e] = p
+            else:
+                holds_pos[prev:e] = p
+                pos_changed = False
+        if e == n:
+            break
+
+        # 事件触发的K线，逻辑与 Position.update 一致
+        ei = first[e]
+        op = events[ei].operate
+        op_desc = f"{events[ei].name}@{factor_names[ei][e]}"
+        n_ops = len(operates)
+
+        if op == LO or op == SO:
+            last_event = {"dt": arr.dts[e], "bid": arr.bids[e], "price": arr.prices[e], "op": op, "op_desc": op_desc}
+            lp, lb = price_l[e], bid_l[e]
+
+        if op == LO:
+            if p != 1 and (lo is None or (dt_ns_l[e] - dt_ns_l[lo]) / 1e9 > interval):
+                p = 1
+                create_operate(e, LO, op_desc, p)
+                lo = e
+            elif p == -1 and (T0 or day_l[e] != day_l[so]):
+                p = 0
+                create_operate(e, SE, op_desc, p)
+
+        elif op == SO:
+            if p != -1 and (so is None or (dt_ns_l[e] - dt_ns_l[so]) / 1e9 > interval):
+                p = -1
+                create_operate(e, SO, op_desc, p)
+                so = e
+            elif p == 1 and (T0 or day_l[e] != day_l[lo]):
+                p = 0
+                create_operate(e, LE, op_desc, p)
+
+        if p != 0:
+            p = check_exits(e, p, op, op_desc)
+        holds_pos[e] = p
+        pos_changed = len(operates) > n_ops
+        prev = e + 1
+
+    pos.holds.extend({"dt": d, "pos": x, "price": c} for d, x, c in zip(arr.dts, holds_pos.tolist(), arr.prices))
+    pos.pos = p
+    pos.pos_changed = pos_changed
+    pos.last_event = last_event
+    pos.end_dt = arr.dts[-1] if n else pos.end_dt
+    pos.last_lo_dt = arr.dts[lo] if lo is not None else None
+    pos.last_so_dt = arr.dts[so] if so is not None else None
+    return pos
+
+
+def simulate_positions(positions: List[Position], sigs: Union[pd.DataFrame, List[dict]]) -> List[Position]:
+    """使用信号缓存对多个持仓策略进行向量化回测
+
+    所有持仓策略的事件编译为一个 EventMatcher，每个信号只计算一次匹配掩码；返回的 Position 对象中
+    operates、holds、pairs 等与逐根K线调用 Position.update 的结果完全一致。
+
+    :param positions: 持仓策略列表，不会被修改
+    :param sigs: 信号缓存，generate_czsc_signals 返回的 DataFrame 或者信号字典列表，至少包含
+        symbol、dt、id、close 列以及所有事件用到的信号列
+    :return: 完成回测的持仓策略列表（positions 的副本）
+    """
+    df = _sigs_frame(sigs)
+    if df.empty:
+        return [deepcopy(pos) for pos in positions]
+
+    events = {e.name: e for pos in positions for e in pos.events}
+    dfm = EventMatcher(list(events.values())).match(df)
+    arr = _SigArrays(df, dfm)
+    return [_simulate(pos, arr) for pos in positions]
+
+
+def simulate_position(position: Position, sigs: Union[pd.DataFrame, List[dict]]) -> Position:
+    """使用信号缓存对单个持仓策略进行向量化回测，参数说明见 simulate_positions"""
+    return simulate_positions([position], sigs)[0]
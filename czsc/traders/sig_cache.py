@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/18 01:10
+describe: 信号缓存，按 (symbol, signals_config, base_freq) 保存信号和 CzscSignals 状态，新增K线时只计算增量部分
+"""
+import os
+import json
+import pickle
+import hashlib
+import pandas as pd
+from pathlib import Path
+from datetime import datetime
+from loguru import logger
+from typing import Callable, List, Optional
+from czsc.objects import RawBar
+from czsc.utils.io import dill_dump, dill_load, read_json, save_json, save_pkl
+from czsc.traders.base import CzscSignals, init_bar_generator
+from czsc.traders.checkpoint import CHECKPOINT_VERSION, checkpoint, restore
+
+
+def signals_config_hash(signals_config: List[dict]) -> str:
+    """信号函数配置的哈希值，与配置中参数的顺序无关"""
+    text = json.dumps(signals_config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.md5(text.encode("utf-8")).hexdigest()[:16].upper()
+
+
+class SignalsCache:
+    """信号缓存
+
+    每个 (symbol, signals_config, base_freq) 对应一组缓存文件，保存在 path/{配置哈希}/ 目录下：
+
+    - {symbol}_{base_freq}.parquet：信号 DataFrame，不包含 freq、cache 列
+    - {symbol}_{base_freq}.state：信号计算到最后一根K线时的 CzscSignals 状态快照，见 czsc.traders.checkpoint
+    - {symbol}_{base_freq}.json：缓存的元数据，包括信号开始时间、最后一根K线时间和信号行数
+
+    再次获取信号时，从 CzscSignals 的最后一根K线之后读取新增的K线并逐根更新，将新增的信号追加到缓存中；
+    结果与一次性调用 generate_czsc_signals 计算完全一致。
+
+    Example:
+    =======================
+    >>> cache = SignalsCache(path, signals_config, base_freq="15分钟")
+    >>> sigs = cache.get("000001.SH", read_bars, sdt="20200101", edt="20231231")
+    """
+
+    def __init__(self, path, signals_config: List[dict], base_freq: str, **kwargs):
+        """
+
+        :param path: 缓存根目录
+        :param signals_config: 信号函数配置
+        :param base_freq: 基础周期
+        :param kwargs:
+
+            - init_n: 用于 BarGenerator 初始化的基础周期K线数量，默认 500
+            - bg_max_count: BarGenerator 中每个周期最多保留的K线数量，默认 5000
+        """
+        self.signals_config = signals_config
+        self.base_freq = base_freq
+        self.config_hash = signals_config_hash(signals_config)
+        self.path = Path(path) / self.config_hash
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.init_n = kwargs.get("init_n", 500)
+        self.bg_max_count = kwargs.get("bg_max_count", 5000)
+
+        file_config = self.path / "signals_config.json"
+        if not file_config.exists():
+            save_json(json.loads(json.dumps(signals_config, default=str)), str(file_config))
+
+    def __repr__(self):
+        return f"<SignalsCache {self.config_hash} {self.base_freq} @ {self.path}>"
+
+    def _files(self, symbol: str):
+        stem = f"{symbol}_{self.base_freq}"
+        return self.path / f"{stem}.parquet", self.path / f"{stem}.state", self.path / f"{stem}.json"
+
+    def _read_meta(self, symbol: str) -> Optional[dict]:
+        """读取缓存元数据，缓存文件不完整或者与元数据不一致时返回 None"""
+        file_sigs, file_state, file_meta = self._files(symbol)
+        if not (file_sigs.exists() and file_state.exists() and file_meta.exists()):
+            return None
+        meta = read_json(str(file_meta))
+        if meta.get("base_freq") != self.base_freq or meta.get("config_hash") != self.config_hash:
+            return None
+        if meta.get("state_version") != CHECKPOINT_VERSION:
+            return None
+        return meta
+
+    def load(self, symbol: str) -> pd.DataFrame:
+        """读取缓存中的全部信号，不存在时返回空 DataFrame"""
+        if self._read_meta(symbol) is None:
+            return pd.DataFrame()
+        return pd.read_parquet(self._files(symbol)[0])
+
+    def clear(self, symbol: Optional[str] = None):
+        """删除 symbol 的缓存，symbol 为 None 时删除当前配置的全部缓存"""
+        symbols = [symbol] if symbol else {x.name.rsplit("_", 1)[0] for x in self.path.glob(f"*_{self.base_freq}.json")}
+        for s in symbols:
+            for file in self._files(s):
+                if file.exists():
+                    os.remove(file)
+
+    @staticmethod
+    def _update(cs: CzscSignals, bars: List[RawBar]) -> pd.DataFrame:
+        """逐根K线更新信号，返回新增的信号"""
+        rows = []
+        for bar in bars:
+            cs.update_signals(bar)
+            rows.append(dict(cs.s))
+        return pd.DataFrame(rows).drop(columns=["freq", "cache"], errors="ignore")
+
+    def _save(self, symbol: str, cs: CzscSignals, sigs: pd.DataFrame, sdt):
+        """保存信号、状态和元数据；先写入临时文件再重命名，元数据最后写入，中断时不会留下不一致的缓存"""
+        file_sigs, file_state, file_meta = self._files(symbol)
+        suffix = f".{os.getpid()}.tmp"
+        sigs.to_parquet(f"{file_sigs}{suffix}", index=False)
+        snapshot = checkpoint(cs)
+        try:
+            # pickle 比 dill 快一个数量级；信号函数定义在 __main__ 等无法按名称导入的位置时，使用 dill 序列化
+            save_pkl(snapshot, f"{file_state}{suffix}")
+        except (pickle.PicklingError, AttributeError, TypeError):
+            dill_dump(snapshot, f"{file_state}{suffix}")
+        os.replace(f"{file_sigs}{suffix}", file_sigs)
+        os.replace(f"{file_state}{suffix}", file_state)
+
+        meta = {
+            "symbol": symbol,
+            "base_freq": self.base_freq,
+            "config_hash": self.config_hash,
+            "state_version": CHECKPOINT_VERSION,
+            "sdt": pd.to_datetime(sdt).strftime("%Y-%m-%d %H:%M:%S"),
+            "end_dt": pd.to_datetime(cs.end_dt).strftime("%Y-%m-%d %H:%M:%S"),
+            "rows": len(sigs),
+            "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        save_json(meta, f"{file_meta}{suffix}")
+        os.replace(f"{file_meta}{suffix}", file_meta)
+
+    def get(self, symbol: str, read_bars: Callable, sdt, edt, bars_sdt=None, fq="后复权") -> pd.DataFrame:
+        """获取 [sdt, edt] 区间的信号，缓存不存在时全量计算，缓存已存在时只计算 edt 之前新增的K线
+
+        :param symbol: 标的代码
+        :param read_bars: K线数据读取函数，函数签名为：read_bars(symbol, freq, sdt, edt, fq) -> List[RawBar]
+        :param sdt: 信号开始时间；早于缓存创建时的 sdt 时，重新全量计算
+        :param edt: 信号结束时间
+        :param bars_sdt: 全量计算时K线数据的开始时间，默认为 sdt 之前 3 年
+        :param fq: 复权方式
+        :return: 信号 DataFrame
+        """
+        sdt, edt = pd.to_datetime(sdt), pd.to_datetime(edt)
+        meta = self._read_meta(symbol)
+        file_sigs, file_state, _ = self._files(symbol)
+
+        if meta is not None and sdt >= pd.to_datetime(meta["sdt"]):
+            cs = restore(dill_load(file_state))
+            sigs = pd.read_parquet(file_sigs)
+            if len(sigs) != meta["rows"]:
+                logger.warning(f"{symbol} 信号缓存与元数据不一致，重新计算")
+                return self._rebuild(symbol, read_bars, sdt, edt, bars_sdt, fq)
+
+            if edt > cs.end_dt:
+                bars = [x for x in read_bars(symbol, self.base_freq, cs.end_dt, edt, fq=fq) if x.dt > cs.end_dt]
+                if bars:
+                    sigs = pd.concat([sigs, self._update(cs, bars)], ignore_index=True)
+                    self._save(symbol, cs, sigs, meta["sdt"])
+                    logger.info(f"{symbol} 信号缓存追加 {len(bars)} 根K线，最新时间 {cs.end_dt}")
+        else:
+            sigs = self._rebuild(symbol, read_bars, sdt, edt, bars_sdt, fq)
+
+        if sigs.empty:
+            return sigs
+        return sigs[(sigs["dt"] >= sdt) & (sigs["dt"] <= edt)].reset_index(drop=True)
+
+    def _rebuild(self, symbol, read_bars, sdt, edt, bars_sdt, fq) -> pd.DataFrame:
+        """全量计算信号并保存缓存"""
+        bars_sdt = bars_sdt or sdt - pd.Timedelta(days=365 * 3)
+        bars = read_bars(symbol, self.base_freq, bars_sdt, edt, fq=fq)
+        if not bars:
+            logger.warning(f"{symbol} 没有K线数据，无法计算信号")
+            return pd.DataFrame()
+
+        bg, bars_right = init_bar_generator(bars, self.signals_config, sdt, self.init_n, self.bg_max_count)
+        if not bars_right:
+            logger.warning(f"{symbol} 右侧K线为空，无法进行信号生成")
+            return pd.DataFrame()
+
+        cs = CzscSignals(bg, signals_config=self.signals_config, bg_max_count=self.bg_max_count)
+        cs.cache.update({"gsc_kwargs": {"bg_max_count": self.bg_max_count}})
+        sigs = self._update(cs, bars_right)
+        self._save(symbol, cs, sigs, sdt)
+        logger.info(f"{symbol} 信号缓存创建完成，共 {len(sigs)} 行，最新时间 {cs.end_dt}")
+        return sigs
@@ -5,6 +5,7 @@ email: zeng_bin8888@163.com
 create_dt: 2023/08/02 22:20
 describe: 按持仓权重回测
 """
+import pickle
 import numpy as np
 import pandas as pd
 import plotly.express as px
@@ -13,8 +14,6 @@ from loguru import logger
 from pathlib import Path
 from deprecated import deprecated
 from typing import Union, AnyStr, Callable
-from multiprocessing import cpu_count
-from concurrent.futures import ProcessPoolExecutor
 
 import czsc
 from czsc.traders.base import CzscTrader
@@ -147,6 +146,277 @@ def stoploss_by_direction(dfw, stoploss=0.03, **kwargs):
     return dfw1
 
 
+def _symbol_edges(symbol: np.ndarray):
+    """symbol 已排序时，返回每行是否为该品种的第一行、最后一行"""
+    first = np.ones(len(symbol), dtype=bool)
+    first[1:] = symbol[1:] != symbol[:-1]
+    last = np.ones(len(symbol), dtype=bool)
+    last[:-1] = first[1:]
+    return first, last
+
+
+def _weight_dailys(dfw: pd.DataFrame, fee_rate: float, carried=None) -> pd.DataFrame:
+    """一次性计算所有品种的每日收益，结果与逐个品种调用 WeightBacktest.get_symbol_daily 一致
+
+    :param dfw: 按 symbol、dt 排序的持仓权重数据，columns = ['dt', 'symbol', 'weight', 'price']
+    :param fee_rate: 单边交易成本
+    :param carried: bool 数组，标记从上一次回测带过来的品种最后一行，dfw 中需要有这些行的 cost、long_cost、short_cost 列；
+        这些行的换手和成本已经计算过，只补充 n1b 相关的收益，收益中扣除的是原来的成本
+    :return: pd.DataFrame，columns 同 WeightBacktest.get_symbol_daily
+    """
+    first, last = _symbol_edges(dfw["symbol"].to_numpy())
+    price = dfw["price"].to_numpy(dtype=float)
+    weight = dfw["weight"].to_numpy(dtype=float)
+
+    # 品种内的 shift(-1) 与 shift(1)：每个品种的最后一行没有 n1b，第一行没有 turnover
+    n1b = np.full(len(price), np.nan)
+    n1b[:-1] = price[1:] / price[:-1] - 1
+    n1b[last] = np.nan
+
+    def __turnover(w):
+        t = np.full(len(w), np.nan)
+        t[1:] = np.abs(w[:-1] - w[1:])
+        t[first] = np.nan
+        return t
+
+    long_weight = np.where(weight > 0, weight, 0)
+    short_weight = np.where(weight < 0, weight, 0)
+    turnover = __turnover(weight)
+    long_turnover = __turnover(long_weight)
+    short_turnover = __turnover(short_weight)
+
+    edge = weight * n1b
+    long_edge = long_weight * n1b
+    short_edge = short_weight * n1b
+    cost = turnover * fee_rate
+    long_cost = long_turnover * fee_rate
+    short_cost = short_turnover * fee_rate
+
+    if carried is not None:
+        for t in [turnover, long_turnover, short_turnover]:
+            t[carried] = 0
+        carried_cost = {}
+        for k, c in [("cost", cost), ("long_cost", long_cost), ("short_cost", short_cost)]:
+            carried_cost[k] = c.copy()
+            carried_cost[k][carried] = dfw[k].to_numpy(dtype=float)[carried]
+            c[carried] = 0
+    else:
+        carried_cost = {"cost": cost, "long_cost": long_cost, "short_cost": short_cost}
+
+    dfs = pd.DataFrame(
+        {
+            "symbol": dfw["symbol"].to_numpy(),
+            "date": dfw["dt"].dt.normalize().to_numpy(),
+            "edge": edge,
+            "return": edge - carried_cost["cost"],
+            "cost": cost,
+            "n1b": n1b,
+            "turnover": turnover,
+            "long_edge": long_edge,
+            "long_cost": long_cost,
+            "long_return": long_edge - carried_cost["long_cost"],
+            "long_turnover": long_turnover,
+            "short_edge": short_edge,
+            "short_cost": short_cost,
+            "short_return": short_edge - carried_cost["short_cost"],
+            "short_turnover": short_turnover,
+        }
+    )
+    daily = dfs.groupby(["symbol", "date"], sort=True).sum().reset_index()
+    daily["date"] = daily["date"].dt.date
+    cols = ["date", "symbol"] + [x for x in dfs.columns if x not in ["date", "symbol"]]
+    return daily[cols]
+
+
+def _weight_pairs(dfw: pd.DataFrame, digits: int, with_opens=False):
+    """一次性计算所有品种的开平交易记录，结果与逐个品种调用 WeightBacktest.get_symbol_pairs 一致
+
+    持仓量按 10 ** -digits 拆分为单位仓位，后开先平；同一方向上第 k 层的单位仓位在持仓量升到 k 时开仓、
+    降到 k 以下时平仓，因此按 (品种, 方向, 层) 分组后，第 i 次开仓与第 i 次平仓就是一个交易对。
+
+    :param dfw: 按 symbol、dt 排序的持仓权重数据，columns = ['dt', 'symbol', 'weight', 'price']；
+        可选 volume、bar_id 列，存在时直接使用，不再由 weight 和行号计算
+    :param digits: 权重列保留小数位数
+    :param with_opens: 是否同时返回未平仓的单位仓位
+    :return: pd.DataFrame，开平交易记录；with_opens 为 True 时返回 (开平交易记录, 未平仓记录)，
+        未平仓记录每行对应一个开仓的行，columns = ['symbol', 'dt', 'price', 'bar_id', 'volume']，
+        volume 为该行开仓后仍未平仓的累计持仓量，按行顺序排列
+    """
+    symbol = dfw["symbol"].to_numpy()
+    if "volume" in dfw.columns:
+        volume = dfw["volume"].to_numpy(dtype=np.int64)
+    else:
+        volume = (dfw["weight"] * pow(10, digits)).astype(int).to_numpy()
+    n = len(volume)
+    first, _ = _symbol_edges(symbol)
+    group = np.cumsum(first) - 1
+    if "bar_id" in dfw.columns:
+        bar_id = dfw["bar_id"].to_numpy(dtype=np.int64)
+    else:
+        bar_id = np.arange(n) - np.flatnonzero(first)[group] + 1
+    prev = np.zeros(n, dtype=np.int64)
+    prev[1:] = volume[:-1]
+    prev[first] = 0
+
+    def __expand(rows, lows, counts):
+        """rows 中的每一行展开 counts 个单位仓位，层数从 lows + 1 开始"""
+        rows = np.repeat(rows, counts)
+        offsets = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        return rows, np.repeat(lows, counts) + offsets + 1
+
+    o_rows, c_rows, levels, sides = [], [], [], []
+    u_rows, u_levels, u_sides = [], [], []
+    for side, (cur, pre) in enumerate([(np.maximum(volume, 0), np.maximum(prev, 0)),
+                                       (np.maximum(-volume, 0), np.maximum(-prev, 0))]):
+        diff = cur - pre
+        ro = np.flatnonzero(diff > 0)
+        rc = np.flatnonzero(diff < 0)
+        ro, lo = __expand(ro, pre[ro], diff[ro])
+        rc, lc = __expand(rc, cur[rc], -diff[rc])
+        if len(ro) == 0:
+            continue
+
+        # 行号递增即品种递增，按 (品种, 层, 行号) 排序后，平仓在同一 (品种, 层) 中的序号就是对应开仓的序号
+        n_level = int(lo.max()) + 1
+        ko = group[ro].astype(np.int64) * n_level + lo
+        kc = group[rc].astype(np.int64) * n_level + lc
+        io = np.lexsort((ro, ko))
+        ic = np.lexsort((rc, kc))
+        ko, ro, lo = ko[io], ro[io], lo[io]
+        kc, rc, lc = kc[ic], rc[ic], lc[ic]
+
+        if with_opens:
+            # 同一 (品种, 层) 中，序号不小于平仓次数的开仓没有对应的平仓
+            rank_o = np.arange(len(ko)) - np.searchsorted(ko, ko, side="left")
+            unmatched = rank_o >= np.searchsorted(kc, ko, side="right") - np.searchsorted(kc, ko, side="left")
+            u_rows.append(ro[unmatched])
+            u_levels.append(lo[unmatched])
+            u_sides.append(np.full(int(unmatched.sum()), side))
+
+        if len(rc) == 0:
+            continue
+        rank = np.arange(len(kc)) - np.searchsorted(kc, kc, side="left")
+        o_rows.append(ro[np.searchsorted(ko, kc, side="left") + rank])
+        c_rows.append(rc)
+        levels.append(lc)
+        sides.append(np.full(len(rc), side))
+
+    dfp = _pairs_frame(dfw, symbol, bar_id, o_rows, c_rows, levels, sides)
+    if not with_opens:
+        return dfp
+
+    # 一行只会在一个方向上开仓，同一行取最高的未平仓层作为该行开仓后的累计持仓量
+    u_rows = np.concatenate(u_rows) if u_rows else np.array([], dtype=np.int64)
+    u_levels = np.concatenate(u_levels) if u_levels else np.array([], dtype=np.int64)
+    u_sides = np.concatenate(u_sides) if u_sides else np.array([], dtype=np.int64)
+    idx = np.lexsort((u_levels, u_rows))
+    u_rows, u_levels, u_sides = u_rows[idx], u_levels[idx], u_sides[idx]
+    top = np.ones(len(u_rows), dtype=bool)
+    top[:-1] = u_rows[1:] != u_rows[:-1]
+    rows = u_rows[top]
+    opens = pd.DataFrame(
+        {
+            "symbol": symbol[rows],
+            "dt": dfw["dt"].to_numpy()[rows],
+            "price": dfw["price"].to_numpy(dtype=float)[rows],
+            "bar_id": bar_id[rows],
+            "volume": np.where(u_sides[top] == 0, u_levels[top], -u_levels[top]).astype(np.int64),
+        }
+    )
+    return dfp, opens
+
+
+def _pairs_frame(dfw, symbol, bar_id, o_rows, c_rows, levels, sides) -> pd.DataFrame:
+    """由匹配好的开平仓行号构造开平交易记录"""
+    cols = ["标的代码", "交易方向", "开仓时间", "平仓时间", "开仓价格", "平仓价格", "持仓K线数", "事件序列", "持仓天数", "盈亏比例"]
+    if not c_rows:
+        return pd.DataFrame(columns=cols)
+
+    o_rows, c_rows = np.concatenate(o_rows), np.concatenate(c_rows)
+    levels, sides = np.concatenate(levels), np.concatenate(sides)
+
+    # 与逐笔撮合的顺序一致：按平仓行号排序，同一行内先平高层的仓位
+    idx = np.lexsort((-levels, c_rows))
+    o_rows, c_rows, sides = o_rows[idx], c_rows[idx], sides[idx]
+
+    dt = dfw["dt"].to_numpy()
+    price = dfw["price"].to_numpy(dtype=float)
+    po, pc = price[o_rows], price[c_rows]
+    is_long = sides == 0
+    p_ret = np.where(is_long, (pc - po) / po, (po - pc) / po) * 10000
+    dfp = pd.DataFrame(
+        {
+            "标的代码": symbol[c_rows],
+            "交易方向": np.where(is_long, "多头", "空头"),
+            "开仓时间": dt[o_rows],
+            "平仓时间": dt[c_rows],
+            "开仓价格": po,
+            "平仓价格": pc,
+            "持仓K线数": bar_id[c_rows] - bar_id[o_rows] + 1,
+            "事件序列": np.where(is_long, "开多 -> 平多", "开空 -> 平空"),
+        }
+    )
+    dfp["持仓天数"] = (dfp["平仓时间"] - dfp["开仓时间"]).dt.days
+    dfp["盈亏比例"] = np.round(p_ret, 2)
+    return dfp
+
+
+def _last_rows(dfw: pd.DataFrame, fee_rate: float) -> pd.DataFrame:
+    """按 symbol、dt 排序的持仓权重中每个品种的最后一行
+
+    bar_id 为该行在品种内的序号（从 1 开始）；cost、long_cost、short_cost 为该行的交易成本，品种只有一行时为空值
+    """
+    first, last = _symbol_edges(dfw["symbol"].to_numpy())
+    dfl = dfw.loc[last, ["symbol", "dt", "weight", "price"]].reset_index(drop=True)
+    if "bar_id" in dfw.columns:
+        dfl["bar_id"] = dfw.loc[last, "bar_id"].to_numpy(dtype=np.int64)
+    else:
+        dfl["bar_id"] = np.diff(np.append(np.flatnonzero(first), len(dfw)))
+
+    weight = dfw["weight"].to_numpy(dtype=float)
+    idx = np.flatnonzero(last)
+    prev = np.where(first[idx], np.nan, weight[np.maximum(idx - 1, 0)])
+    w = weight[idx]
+    dfl["cost"] = np.abs(prev - w) * fee_rate
+    dfl["long_cost"] = np.abs(np.where(prev > 0, prev, np.where(np.isnan(prev), np.nan, 0)) - np.maximum(w, 0)) * fee_rate
+    dfl["short_cost"] = np.abs(np.where(prev < 0, prev, np.where(np.isnan(prev), np.nan, 0)) - np.minimum(w, 0)) * fee_rate
+    return dfl
+
+
+def _format_dfw(dfw: pd.DataFrame, digits: int) -> pd.DataFrame:
+    """统一 dt、weight 列的类型，并检查空值；直接修改传入的 dfw"""
+    dfw["dt"] = pd.to_datetime(dfw["dt"])
+    if dfw.isnull().sum().sum() > 0:
+        raise ValueError("dfw 中存在空值, 请先处理")
+    dfw["weight"] = dfw["weight"].astype("float").round(digits)
+    return dfw
+
+
+def _pairs_brief(dfp: pd.DataFrame) -> dict:
+    """开平交易记录的可累加汇总，多个分块的结果直接相加"""
+    rets = dfp["盈亏比例"]
+    return {
+        "交易次数": len(dfp),
+        "累计收益": float(rets.sum()),
+        "盈利次数": int((rets >= 0).sum()),
+        "持仓天数": float(dfp["持仓天数"].sum()),
+        "持仓K线数": float(dfp["持仓K线数"].sum()),
+    }
+
+
+def _brief_stats(brief: dict) -> dict:
+    """由 _pairs_brief 的累加结果计算 WeightBacktest 绩效评价中的交易对指标，口径同 evaluate_pairs"""
+    n = brief["交易次数"]
+    if n == 0:
+        return {"单笔收益": 0, "持仓K线数": 0, "交易胜率": 0, "持仓天数": 0}
+    return {
+        "单笔收益": round(round(brief["累计收益"], 2) / n, 2),
+        "交易胜率": round(brief["盈利次数"] / n, 4),
+        "持仓天数": round(brief["持仓天数"] / n, 2),
+        "持仓K线数": round(brief["持仓K线数"] / n, 2),
+    }
+
+
 class WeightBacktest:
     """持仓权重回测
 
@@ -161,9 +431,14 @@ class WeightBacktest:
     #### 20241205
 
     1. 新增 weight_type 参数，用于指定输入的持仓权重类别，ts 表示 time series，时序策略；。
+
+    #### 20261017
+
+    1. 所有品种一次性向量化回测；dfw 支持传入 Parquet 数据集路径，按品种分块流式回测。
+    2. 新增 append 方法，追加新的持仓权重并增量更新回测结果；新增 save / load 方法，保存、恢复回测状态。
     """
 
-    version = "20241205"
+    version = "20261017"
 
     def __init__(self, dfw, digits=2, weight_type="ts", **kwargs) -> None:
         """持仓权重回测
@@ -206,22 +481,29 @@ class WeightBacktest:
         :param kwargs:
 
             - fee_rate: float，单边交易成本，包括手续费与冲击成本, 默认为 0.0002
-            - n_jobs: int, 并行计算的进程数，默认为 min(cpu_count() // 2, len(self.symbols))
+            - n_jobs: int, 兼容保留的参数，所有品种一次性向量化计算，不再使用多进程
+            - chunk_size: int, 流式回测时每次读取的品种数量，默认为 100
+
+        dfw 也可以是 Parquet 数据集的路径（单个文件或目录，目录支持按 symbol 的 hive 分区），
+        此时不会一次性读入全部数据，而是按品种分块流式回测，见 backtest_stream。
 
         """
         self.kwargs = kwargs
-        self.dfw = dfw.copy()
-        self.dfw["dt"] = pd.to_datetime(self.dfw["dt"])
-        if self.dfw.isnull().sum().sum() > 0:
-            raise ValueError("dfw 中存在空值, 请先处理")
-
         self.digits = digits
         self.weight_type = weight_type.lower()
         self.fee_rate = kwargs.get("fee_rate", 0.0002)
-        self.dfw["weight"] = self.dfw["weight"].astype("float").round(digits)
-        self.symbols = list(self.dfw["symbol"].unique().tolist())
         self._dailys = None
         self.yearly_days = kwargs.pop("yearly_days", 252)
+
+        if isinstance(dfw, (str, Path)):
+            self.path = str(dfw)
+            self.dfw = None
+            self.results = self.backtest_stream(chunk_size=kwargs.pop("chunk_size", 100))
+            return
+
+        self.path = None
+        self.dfw = _format_dfw(dfw.copy(), digits)
+        self.symbols = list(self.dfw["symbol"].unique().tolist())
         self.results = self.backtest(n_jobs=kwargs.pop("n_jobs", 1))
 
     @property
@@ -374,7 +656,7 @@ class WeightBacktest:
                 2019-01-08  DLi9001   -0.0004743    -0.0016243    0.00115
                 ==========  ========  ============  ============  =======
         """
-        dfs = self.dfw[self.dfw["symbol"] == symbol].copy()
+        dfs = self._symbol_dfw(symbol)
         dfs["n1b"] = dfs["price"].shift(-1) / dfs["price"] - 1
         dfs["edge"] = dfs["weight"] * dfs["n1b"]
         dfs["turnover"] = abs(dfs["weight"].shift(1) - dfs["weight"])
@@ -466,7 +748,7 @@ class WeightBacktest:
         11. 将pairs列表转换为DataFrame，并返回包含交易标的的开平仓交易记录的DataFrame。
 
         """
-        dfs = self.dfw[self.dfw["symbol"] == symbol].copy()
+        dfs = self._symbol_dfw(symbol)
         dfs["volume"] = (dfs["weight"] * pow(10, self.digits)).astype(int)
         dfs["bar_id"] = list(range(1, len(dfs) + 1))
 
@@ -561,36 +843,210 @@ class WeightBacktest:
 
         函数计算逻辑：
 
-        1. 获取数据：遍历所有合约，调用get_symbol_daily方法获取每个合约的日收益，调用get_symbol_pairs方法获取每个合约的交易流水。
+        1. 获取数据：将持仓权重按 symbol、dt 排序一次，在所有合约上一次性计算每日收益和交易流水，
+            结果与逐个合约调用 get_symbol_daily、get_symbol_pairs 一致。
 
         2. 数据处理：将每个合约的日收益合并为一个DataFrame，使用pd.pivot_table方法将数据重塑为以日期为索引、合约为列、
-            收益率为值的表格，并将缺失值填充为0。计算所有合约收益率的平均值，并将该列添加到DataFrame中。将结果存储在res字典中，
-            键为合约名，值为包含日行情数据和交易对数据的字典。
+            收益率为值的表格，并将缺失值填充为0。计算所有合约收益率的平均值，并将该列添加到DataFrame中。
 
         3. 绩效评价：计算回测结果的开始日期和结束日期，调用daily_performance方法评估总收益率的绩效指标。将每个合约的交易对数据
             合并为一个DataFrame，调用evaluate_pairs方法评估交易对的绩效指标。将结果存储在stats字典中，并更新到绩效评价的字典中。
 
-        4. 返回结果：将合约的等权日收益数据和绩效评价结果存储在res字典中，并将该字典作为函数的返回结果。
+        4. 返回结果：res字典中，键为合约名，值为包含日行情数据和交易对数据的字典；另外包含合约的等权日收益数据和绩效评价结果。
+
+        :param n_jobs: 兼容保留的参数；所有合约一次性向量化计算，不再使用多进程
         """
-        n_jobs = min(n_jobs, cpu_count())
-        logger.info(f"n_jobs={n_jobs}，将使用 {n_jobs} 个进程进行回测")
+        dfw = self.dfw.sort_values(["symbol", "dt"], kind="mergesort", ignore_index=True)
+        dailys = _weight_dailys(dfw, self.fee_rate)
+        dfp, self._opens = _weight_pairs(dfw, self.digits, with_opens=True)
+        self._lasts = _last_rows(dfw, self.fee_rate)
+        self._brief = _pairs_brief(dfp)
+        self._counts = {
+            "rows": len(dfw),
+            "long": int((dfw["weight"] > 0).sum()),
+            "short": int((dfw["weight"] < 0).sum()),
+        }
 
-        symbols = self.symbols
         res = {}
-        if n_jobs <= 1:
-            for symbol in tqdm(sorted(symbols), desc="WBT进度", leave=False):
-                res[symbol] = self.process_symbol(symbol)[1]
-        else:
-            with ProcessPoolExecutor(n_jobs) as pool:
-                for symbol, res_symbol in tqdm(
-                    pool.map(self.process_symbol, sorted(symbols)), desc="WBT进度", total=len(symbols), leave=False
-                ):
-                    res[symbol] = res_symbol
+        pairs_map = dict(tuple(dfp.groupby("标的代码", sort=False)))
+        for symbol, daily in dailys.groupby("symbol", sort=True):
+            pairs = pairs_map.get(symbol, pd.DataFrame(columns=dfp.columns)).reset_index(drop=True)
+            res[symbol] = {"daily": daily.reset_index(drop=True), "pairs": pairs}
+
+        return self._summary(res, dailys, evaluate_pairs(dfp))
 
-        self._dailys = pd.concat([v["daily"] for k, v in res.items() if k in symbols], ignore_index=True)
+    def _dataset(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        # 显式指定 symbol 为字符串，避免 symbol=000001 这类分区目录被推断为整数
+        partitioning = ds.partitioning(pa.schema([("symbol", pa.string())]), flavor="hive")
+        return ds.dataset(self.path, format="parquet", partitioning=partitioning)
+
+    def _read_symbols(self, symbols) -> pd.DataFrame:
+        """从 Parquet 数据集中读取部分品种的持仓权重"""
+        import pyarrow.dataset as ds
+
+        table = self._dataset().to_table(
+            columns=["dt", "symbol", "weight", "price"], filter=ds.field("symbol").isin(list(symbols))
+        )
+        dfw = table.to_pandas()
+        dfw["symbol"] = dfw["symbol"].astype(str)
+        return _format_dfw(dfw, self.digits)
 
-        dret = pd.concat([v["daily"] for k, v in res.items() if k in symbols], ignore_index=True)
-        dret = pd.pivot_table(dret, index="date", columns="symbol", values="return").fillna(0)
+    def _symbol_dfw(self, symbol) -> pd.DataFrame:
+        """获取单个品种的持仓权重"""
+        if self.dfw is not None:
+            return self.dfw[self.dfw["symbol"] == symbol].copy()
+        if self.path is None:
+            raise ValueError("没有原始持仓权重数据，load 恢复的回测对象不支持逐个品种重新计算")
+        return self._read_symbols([symbol]).sort_values("dt", kind="mergesort", ignore_index=True)
+
+    def backtest_stream(self, chunk_size=100):
+        """流式回测 Parquet 数据集中所有合约的收益率
+
+        先只读取 symbol 列得到全部合约，然后每次读取 chunk_size 个合约的持仓权重，计算每日收益和交易流水；
+        每日收益保留下来，交易流水只累加汇总指标，内存中最多同时存在一个分块的持仓权重和交易流水。
+        数据集按 symbol 做 hive 分区，或者文件内按 symbol 排序时，分块读取只需要扫描对应的文件或 row group。
+
+        结果与 backtest 一致，区别是 res 中每个合约只有 daily，不保存 pairs。
+
+        :param chunk_size: 每次读取的合约数量
+        """
+        import pyarrow.compute as pc
+
+        symbols = set()
+        for batch in self._dataset().to_batches(columns=["symbol"]):
+            symbols.update(pc.unique(batch.column(0)).to_pylist())
+        self.symbols = sorted(symbols)
+
+        res, dailys, opens, lasts = {}, [], [], []
+        self._brief = {"交易次数": 0, "累计收益": 0, "盈利次数": 0, "持仓天数": 0, "持仓K线数": 0}
+        self._counts = {"rows": 0, "long": 0, "short": 0}
+        for i in tqdm(range(0, len(self.symbols), chunk_size), desc="WBT进度", leave=False):
+            dfw = self._read_symbols(self.symbols[i : i + chunk_size])
+            dfw.sort_values(["symbol", "dt"], kind="mergesort", ignore_index=True, inplace=True)
+
+            daily = _weight_dailys(dfw, self.fee_rate)
+            for symbol, dfd in daily.groupby("symbol", sort=True):
+                res[symbol] = {"daily": dfd.reset_index(drop=True)}
+            dailys.append(daily)
+
+            dfp, dfo = _weight_pairs(dfw, self.digits, with_opens=True)
+            self._update_state(dfw, dfp)
+            opens.append(dfo)
+            lasts.append(_last_rows(dfw, self.fee_rate))
+            del dfw, dfp
+
+        self._opens = pd.concat(opens, ignore_index=True)
+        self._lasts = pd.concat(lasts, ignore_index=True)
+        dailys = pd.concat(dailys, ignore_index=True)
+        return self._summary(res, dailys, _brief_stats(self._brief))
+
+    def _update_state(self, dfw, dfp):
+        """累加交易流水汇总与多空持仓K线数量"""
+        for k, v in _pairs_brief(dfp).items():
+            self._brief[k] += v
+        self._counts["rows"] += len(dfw)
+        self._counts["long"] += int((dfw["weight"] > 0).sum())
+        self._counts["short"] += int((dfw["weight"] < 0).sum())
+
+    def append(self, dfw: pd.DataFrame):
+        """追加新的持仓权重，增量更新回测结果
+
+        只计算新增的持仓权重：每个品种原来的最后一行补上 n1b，原来的未平仓单位仓位在新数据上继续撮合，
+        交易流水只累加汇总指标；之后由每日收益重新计算绩效评价。结果与在完整数据上重新回测一致。
+
+        :param dfw: 新增的持仓权重，columns = ['dt', 'symbol', 'weight', 'price']；
+            已有品种的 dt 必须晚于该品种已有的最后一个 dt，允许出现新的品种
+        """
+        dfw = _format_dfw(dfw[["dt", "symbol", "weight", "price"]].copy(), self.digits)
+        dfw.sort_values(["symbol", "dt"], kind="mergesort", ignore_index=True, inplace=True)
+
+        lasts = self._lasts.set_index("symbol")
+        first_dt = dfw.groupby("symbol", sort=False)["dt"].min()
+        exists = first_dt.index.intersection(lasts.index)
+        if (first_dt[exists] <= lasts.loc[exists, "dt"]).any():
+            raise ValueError("追加的持仓权重必须晚于已有数据")
+
+        symbols = dfw["symbol"].unique().tolist()
+        first, _ = _symbol_edges(dfw["symbol"].to_numpy())
+        group = np.cumsum(first) - 1
+        offset = dfw["symbol"].map(lasts["bar_id"]).fillna(0).to_numpy(dtype=np.int64)
+        dfw["bar_id"] = np.arange(len(dfw)) - np.flatnonzero(first)[group] + 1 + offset
+        dfw["volume"] = (dfw["weight"] * pow(10, self.digits)).astype(int)
+
+        # 每日收益：带上原来的最后一行，补充它的 n1b；该行的换手已经计算过
+        carry = self._lasts[self._lasts["symbol"].isin(symbols)]
+        ext = pd.concat([carry, dfw], ignore_index=True).sort_values("symbol", kind="mergesort")
+        carried = ext.index.to_numpy() < len(carry)
+        ext = ext.reset_index(drop=True)
+        delta = _weight_dailys(ext, self.fee_rate, carried=carried)
+        dfl = _last_rows(ext, self.fee_rate)
+
+        # 交易流水：原来的未平仓单位仓位放在新数据前面，继续撮合
+        carry = self._opens[self._opens["symbol"].isin(symbols)]
+        ext = pd.concat([carry, dfw.drop(columns=["weight"])], ignore_index=True)
+        ext = ext.sort_values("symbol", kind="mergesort", ignore_index=True)
+        dfp, dfo = _weight_pairs(ext, self.digits, with_opens=True)
+
+        self._opens = pd.concat([self._opens[~self._opens["symbol"].isin(symbols)], dfo], ignore_index=True)
+        self._opens = self._opens.sort_values("symbol", kind="mergesort", ignore_index=True)
+        self._lasts = pd.concat([self._lasts[~self._lasts["symbol"].isin(symbols)], dfl], ignore_index=True)
+        self._lasts = self._lasts.sort_values("symbol", kind="mergesort", ignore_index=True)
+        self._update_state(dfw, dfp)
+
+        # 同一品种同一天的收益累加到原来的记录上
+        dailys = pd.concat([self._dailys, delta], ignore_index=True)
+        dup = dailys.duplicated(["symbol", "date"], keep=False)
+        if dup.any():
+            merged = dailys[dup].groupby(["symbol", "date"], sort=False).sum().reset_index()
+            dailys = pd.concat([dailys[~dup], merged[dailys.columns]], ignore_index=True)
+        dailys = dailys.sort_values(["symbol", "date"], kind="mergesort", ignore_index=True)
+
+        self.symbols += [x for x in symbols if x not in set(self.symbols)]
+        res = {k: v for k, v in self.results.items() if k in set(self.symbols)}
+        pairs_map = dict(tuple(dfp.groupby("标的代码", sort=False)))
+        for symbol, dfd in dailys[dailys["symbol"].isin(symbols)].groupby("symbol", sort=False):
+            res_symbol = {"daily": dfd.reset_index(drop=True)}
+            if self.path is None:
+                pairs = [res.get(symbol, {}).get("pairs"), pairs_map.get(symbol)]
+                pairs = [x for x in pairs if x is not None and len(x) > 0]
+                res_symbol["pairs"] = pd.concat(pairs, ignore_index=True) if pairs else pd.DataFrame(columns=dfp.columns)
+            res[symbol] = res_symbol
+
+        if self.dfw is not None:
+            self.dfw = pd.concat([self.dfw, dfw[["dt", "symbol", "weight", "price"]]], ignore_index=True)
+        self.results = self._summary(res, dailys, _brief_stats(self._brief))
+
+    def save(self, file):
+        """保存回测状态到文件，之后可以用 load 恢复并继续 append；不保存原始持仓权重"""
+        state = {k: v for k, v in self.__dict__.items() if k != "dfw"}
+        with open(file, "wb") as f:
+            pickle.dump({"version": self.version, "state": state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, file) -> "WeightBacktest":
+        """从文件恢复 save 保存的回测状态"""
+        with open(file, "rb") as f:
+            data = pickle.load(f)
+        if data.get("version") != cls.version:
+            raise ValueError(f"回测状态版本 {data.get('version')} 与当前版本 {cls.version} 不一致，请重新回测")
+
+        wb = cls.__new__(cls)
+        wb.__dict__.update(data["state"])
+        wb.dfw = None
+        return wb
+
+    def _summary(self, res, dailys, pairs_stats):
+        """汇总所有合约的每日收益，计算绩效评价
+
+        :param res: 合约名 -> 合约回测结果
+        :param dailys: 所有合约的每日收益，columns 同 get_symbol_daily
+        :param pairs_stats: 交易对评价指标
+        """
+        self._dailys = dailys
+        dret = pd.pivot_table(dailys, index="date", columns="symbol", values="return").fillna(0)
 
         if self.weight_type == "ts":
             # 时序策略每日收益为各品种收益的等权
@@ -607,14 +1063,10 @@ class WeightBacktest:
 
         stats = {"开始日期": dret["date"].min().strftime("%Y%m%d"), "结束日期": dret["date"].max().strftime("%Y%m%d")}
         stats.update(daily_performance(dret["total"], yearly_days=self.yearly_days))
-        dfp = pd.concat([v["pairs"] for k, v in res.items() if k in symbols], ignore_index=True)
-        pairs_stats = evaluate_pairs(dfp)
         pairs_stats = {k: v for k, v in pairs_stats.items() if k in ["单笔收益", "持仓K线数", "交易胜率", "持仓天数"]}
         stats.update(pairs_stats)
-
-        dfw = self.dfw.copy()
-        long_rate = dfw[dfw["weight"] > 0].shape[0] / dfw.shape[0]
-        short_rate = dfw[dfw["weight"] < 0].shape[0] / dfw.shape[0]
+        long_rate = self._counts["long"] / self._counts["rows"]
+        short_rate = self._counts["short"] / self._counts["rows"]
         stats.update({"多头占比": round(long_rate, 4), "空头占比": round(short_rate, 4)})
 
         alpha = self.alpha.copy()
@@ -623,7 +1075,7 @@ class WeightBacktest:
         stats["与基准相关性"] = round(alpha["策略"].corr(alpha["基准"]), 4)
         alpha_short = alpha[alpha["基准"] < 0].copy()
         stats["与基准空头相关性"] = round(alpha_short["策略"].corr(alpha_short["基准"]), 4)
-        stats["品种数量"] = len(symbols)
+        stats["品种数量"] = len(self.symbols)
 
         res["绩效评价"] = stats
         return res
@@ -13,8 +13,9 @@ from . import echarts_plot
 
 from .echarts_plot import kline_pro, trading_view_kline
 from .corr import nmi_matrix, single_linear, cross_sectional_ic
-from .bar_generator import BarGenerator, freq_end_time, resample_bars, format_standard_kline
+from .bar_generator import BarGenerator, freq_end_time, freq_end_times, resample_bars, format_standard_kline, df_to_bars, bars_to_df
 from .bar_generator import is_trading_time, get_intraday_times, check_freq_and_market
+from .bar_store import ColumnarBars
 from .io import dill_dump, dill_load, read_json, save_json
 from .sig import check_gap_info, is_bis_down, is_bis_up, get_sub_elements, is_symmetry_zs
 from .sig import same_dir_counts, fast_slow_cross, count_last_same, create_single_signal
@@ -5,20 +5,67 @@ email: zeng_bin8888@163.com
 create_dt: 2021/11/14 12:39
 describe: 从任意周期K线开始合成更高周期K线的工具类
 """
+import gc
+import numpy as np
 import pandas as pd
+from operator import attrgetter
+from itertools import repeat
 from datetime import datetime, timedelta, date
 from typing import List, Union, AnyStr, Optional
 from czsc.objects import RawBar, Freq
+from czsc.utils.bar_store import ColumnarBars
 from pathlib import Path
 from loguru import logger
 
 
+def _hm_minutes(hms) -> np.ndarray:
+    """将 HH:MM 字符串序列转换为一天中的分钟数"""
+    return np.array([int(x[:2]) * 60 + int(x[3:5]) for x in hms], dtype=np.int32)
+
+
 mss = pd.read_feather(Path(__file__).parent / "minutes_split.feather")
-freq_market_times, freq_edt_map = {}, {}
+# freq_edt_minutes：一天中的分钟数 -> 周期结束时间的分钟数，不在交易时间内的分钟为 -1
+freq_market_times, freq_edt_map, freq_edt_minutes = {}, {}, {}
 for _m, dfg in mss.groupby("market"):
+    _times = _hm_minutes(dfg["time"])
     for _f in [x for x in mss.columns if x.endswith("分钟")]:
         freq_market_times[f"{_f}_{_m}"] = list(dfg[_f].unique())
         freq_edt_map[f"{_f}_{_m}"] = {k: v for k, v in dfg[["time", _f]].values}
+        freq_edt_minutes[f"{_f}_{_m}"] = np.full(1440, -1, dtype=np.int32)
+        freq_edt_minutes[f"{_f}_{_m}"][_times] = _hm_minutes(dfg[_f])
+
+_ONE_MINUTE = timedelta(minutes=1)
+# 分钟周期：(freq, market) -> 按一天中的分钟数索引的 timedelta 列表，dt 加上对应的 timedelta 就是周期结束时间
+_freq_edt_deltas = {}
+# 日线及以上周期：(freq, date) -> 周期结束日期
+_freq_end_date_cache = {}
+
+
+def _get_edt_deltas(freq: Freq, market: str) -> List[Optional[timedelta]]:
+    """获取分钟周期结束时间的增量表，不在交易时间内的分钟为 None；首次使用时由 freq_edt_minutes 生成"""
+    deltas = _freq_edt_deltas.get((freq, market))
+    if deltas is None:
+        deltas = []
+        for minute, end in enumerate(freq_edt_minutes[f"{freq.value}_{market}"].tolist()):
+            if end < 0:
+                deltas.append(None)
+                continue
+            delta = timedelta(minutes=end - minute)
+            if end == 0 and freq != Freq.F1 and minute != 0:
+                delta += timedelta(days=1)
+            deltas.append(delta)
+        _freq_edt_deltas[(freq, market)] = deltas
+    return deltas
+
+
+def _cached_end_date(dt, freq: Freq):
+    """freq_end_date 的缓存版本，按日期缓存"""
+    d = dt.date()
+    edt = _freq_end_date_cache.get((freq, d))
+    if edt is None:
+        edt = freq_end_date(d, freq)
+        _freq_end_date_cache[(freq, d)] = edt
+    return edt
 
 
 def is_trading_time(dt: datetime = datetime.now(), market="A股"):
@@ -43,7 +90,7 @@ def get_intraday_times(freq="1分钟", market="A股"):
 def format_standard_kline(df: pd.DataFrame, freq: str):
     """格式化标准K线数据为 CZSC 标准数据结构 RawBar 列表
 
-    :param df: 标准K线数据，DataFrame结构
+    :param df: 标准K线数据，DataFrame结构；K线编号 id 取 df 的 index，即使 df 中有 id 列也不使用
 
         ===================  =========  ======  =======  ======  =====  ===========  ===========
         dt                   symbol       open    close    high    low          vol       amount
@@ -55,23 +102,91 @@ def format_standard_kline(df: pd.DataFrame, freq: str):
     :param freq: K线级别
     :return: list of RawBar
     """
-    # from czsc.objects import RawBar, Freq
-    bars = []
-    for i, row in df.iterrows():
-        bar = RawBar(
-            id=i,
-            symbol=row["symbol"],
-            dt=row["dt"],
-            open=row["open"],
-            close=row["close"],
-            high=row["high"],
-            low=row["low"],
-            vol=row["vol"],
-            amount=row["amount"],
-            freq=Freq(freq),
-        )
-        bars.append(bar)
-    return bars
+    return df_to_bars(df, freq, id_col=None)
+
+
+def df_to_bars(df: pd.DataFrame, freq: Union[Freq, AnyStr], symbol: Optional[str] = None, lazy: bool = False,
+               pydatetime: bool = False, id_start: Optional[int] = None,
+               id_col: Optional[str] = "id") -> Union[List[RawBar], ColumnarBars]:
+    """将K线 DataFrame 批量转换为 RawBar 序列
+
+    按列一次性取出数据，dt 列只做一次时间转换，不逐行 iterrows / pd.to_datetime。
+
+    :param df: K线数据，包含 dt, open, close, high, low, vol, amount 列，可选 symbol, id 列
+    :param freq: K线周期
+    :param symbol: 标的代码，默认使用 df 中的 symbol 列
+    :param lazy: 是否返回 ColumnarBars，默认 False；为 True 时不创建 RawBar 对象，下标访问、迭代时才按需生成
+    :param pydatetime: 是否将 dt 转换为 datetime.datetime，默认 False，保留 pd.Timestamp
+    :param id_start: K线编号的起始值；默认使用 df 中的 id_col 列，没有该列时使用 df 的整数 index，否则从 0 开始编号
+    :param id_col: K线编号所在的列名，默认 "id"；为 None 时忽略 df 中的编号列，与 format_standard_kline 一致使用 index
+    :return: RawBar 列表，或 ColumnarBars
+    """
+    freq = freq if isinstance(freq, Freq) else Freq(freq)
+    if df is None or len(df) == 0:
+        return ColumnarBars(symbol=symbol, freq=freq) if lazy else []
+
+    n = len(df)
+    if id_start is not None:
+        ids = np.arange(id_start, id_start + n, dtype=np.int64)
+    elif id_col is not None and id_col in df.columns:
+        ids = df[id_col].to_numpy(dtype=np.int64)
+    elif pd.api.types.is_integer_dtype(df.index):
+        ids = df.index.to_numpy(dtype=np.int64)
+    else:
+        ids = np.arange(n, dtype=np.int64)
+    dt = pd.to_datetime(df["dt"])
+    values = [df[col].to_numpy(dtype=np.float64) for col in ["open", "close", "high", "low", "vol", "amount"]]
+
+    if lazy:
+        symbol = symbol if symbol is not None else df["symbol"].iloc[0]
+        return ColumnarBars.from_columns(ids, dt.to_numpy(dtype="datetime64[ns]"), *values, symbol=symbol, freq=freq)
+
+    symbols = [symbol] * n if symbol is not None else df["symbol"].tolist()
+    # 批量创建大量对象时，关闭垃圾回收可以避免反复触发分代回收，百万行时耗时约减少 70%
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        if pydatetime and dt.dt.tz is None:
+            dts = dt.to_numpy(dtype="datetime64[us]").tolist()
+        elif pydatetime:
+            dts = [x.to_pydatetime() for x in dt]
+        else:
+            dts = dt.tolist()
+        # 按 RawBar 的字段顺序传入位置参数：symbol, id, dt, freq, open, close, high, low, vol, amount
+        return list(map(RawBar, symbols, ids.tolist(), dts, repeat(freq), *[x.tolist() for x in values]))
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def bars_to_df(bars: Union[List[RawBar], ColumnarBars]) -> pd.DataFrame:
+    """将 RawBar 序列批量转换为 DataFrame，列为 symbol, id, dt, freq, open, close, high, low, vol, amount
+
+    :param bars: RawBar 列表，或 ColumnarBars
+    :return: DataFrame
+    """
+    if isinstance(bars, ColumnarBars):
+        df = bars.to_df()
+        return df[["symbol", "id", "dt", "freq", "open", "close", "high", "low", "vol", "amount"]]
+    if not bars:
+        return pd.DataFrame()
+
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        data = {
+            "symbol": [x.symbol for x in bars],
+            "id": np.array([x.id for x in bars], dtype=np.int64),
+            "dt": pd.DatetimeIndex([x.dt for x in bars]),
+            "freq": [x.freq.value for x in bars],
+        }
+        for col in ["open", "close", "high", "low", "vol", "amount"]:
+            data[col] = np.array(list(map(attrgetter(col), bars)), dtype=np.float64)
+        df = pd.DataFrame(data)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return df
 
 
 def check_freq_and_market(time_seq: List[AnyStr], freq: Optional[AnyStr] = None):
@@ -167,23 +282,112 @@ def freq_end_time(dt: datetime, freq: Union[Freq, AnyStr], market="A股") -> dat
     if not isinstance(freq, Freq):
         freq = Freq(freq)
     if dt.second > 0 or dt.microsecond > 0:
-        dt = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        dt = dt.replace(second=0, microsecond=0) + _ONE_MINUTE
 
-    hm = dt.strftime("%H:%M")
-    key = f"{freq.value}_{market}"
     if freq.value.endswith("分钟"):
-        h, m = map(int, freq_edt_map[key][hm].split(":"))
-        edt = dt.replace(hour=h, minute=m)
-
-        if h == m == 0 and freq != Freq.F1 and hm != "00:00":
-            edt += timedelta(days=1)
-
-        return edt
+        delta = _get_edt_deltas(freq, market)[dt.hour * 60 + dt.minute]
+        if delta is None:
+            raise KeyError(dt.strftime("%H:%M"))
+        return dt + delta
 
     # if not ("15:00" > hm > "09:00") and market == "期货":
     #     dt = next_trading_date(dt, n=1)
 
-    return freq_end_date(dt.date(), freq)
+    return _cached_end_date(dt, freq)
+
+
+def _split_dts(dts):
+    """将时间序列拆分为 (日期, 一天中的分钟数)，秒和微秒不为 0 时向上取整到下一分钟，与 freq_end_time 一致"""
+    dts = pd.DatetimeIndex(dts).ceil("min").to_numpy(dtype="datetime64[ns]")
+    days = dts.astype("datetime64[D]")
+    minutes = ((dts - days) // np.timedelta64(1, "m")).astype(np.int32)
+    return days, minutes
+
+
+def _freq_end_times(days, minutes, freq: Freq, market) -> np.ndarray:
+    """由 _split_dts 的结果计算周期结束时间"""
+    if freq.value.endswith("分钟"):
+        end = freq_edt_minutes[f"{freq.value}_{market}"][minutes]
+        if (end < 0).any():
+            m = int(minutes[np.argmax(end < 0)])
+            raise KeyError(f"{m // 60:02d}:{m % 60:02d}")
+        edt = days + end.astype("timedelta64[m]")
+        if freq != Freq.F1:
+            edt = np.where((end == 0) & (minutes != 0), edt + np.timedelta64(1, "D"), edt)
+        return edt.astype("datetime64[ns]")
+
+    if freq == Freq.D:
+        edt = days
+    elif freq == Freq.W:
+        # 1970-01-01 是星期四，(天数 + 3) % 7 为星期几（星期一为 0）
+        edt = days + (4 - (days.astype(np.int64) + 3) % 7).astype("timedelta64[D]")
+    elif freq == Freq.M:
+        edt = (days.astype("datetime64[M]") + 1).astype("datetime64[D]") - 1
+    elif freq == Freq.S:
+        months = days.astype("datetime64[M]").astype(np.int64)
+        edt = (months - months % 3 + 3).astype("datetime64[M]").astype("datetime64[D]") - 1
+    elif freq == Freq.Y:
+        edt = (days.astype("datetime64[Y]") + 1).astype("datetime64[D]") - 1
+    else:
+        logger.warning(f"error: {freq}")
+        edt = days
+    return edt.astype("datetime64[ns]")
+
+
+def freq_end_times(dts, freq: Union[Freq, AnyStr], market="A股") -> np.ndarray:
+    """freq_end_time 的向量化版本，一次计算一组时间对应的K线周期结束时间
+
+    分钟周期按 freq_edt_minutes 查表，日线及以上周期用 NumPy 的日期运算，不逐个时间做字符串转换
+
+    :param dts: 时间序列，pd.Series、pd.DatetimeIndex 或 datetime64 数组
+    :param freq: K线周期
+    :param market: str, A股 或 期货 或 默认
+    :return: np.ndarray，dtype 为 datetime64[ns]
+    """
+    assert market in ["A股", "期货", "默认"], "market 参数必须为 A股 或 期货 或 默认"
+    if not isinstance(freq, Freq):
+        freq = Freq(freq)
+    days, minutes = _split_dts(dts)
+    return _freq_end_times(days, minutes, freq, market)
+
+
+def _resample_df(df: pd.DataFrame, edt: np.ndarray) -> pd.DataFrame:
+    """按周期结束时间 edt 聚合K线，edt 与 df 的行一一对应"""
+    if df[["open", "close"]].isnull().any().any():
+        # 存在空值时 first / last 需要跳过空值，使用 groupby 聚合
+        dfk1 = df.assign(freq_edt=edt).groupby("freq_edt").agg({
+            "symbol": "first", "open": "first", "close": "last", "high": "max", "low": "min",
+            "vol": "sum", "amount": "sum",
+        })
+        dfk1 = dfk1.reset_index().rename(columns={"freq_edt": "dt"})
+        return dfk1[["symbol", "dt", "open", "close", "high", "low", "vol", "amount"]]
+
+    order = None
+    if len(edt) > 1 and (edt[1:] < edt[:-1]).any():
+        order = np.argsort(edt, kind="stable")
+        edt = edt[order]
+
+    def __values(col):
+        values = df[col].to_numpy()
+        return values if order is None else values[order]
+
+    is_start = np.r_[True, edt[1:] != edt[:-1]]
+    starts = np.flatnonzero(is_start)
+    ends = np.r_[starts[1:], len(edt)] - 1
+    # vol、amount 按区间编号用 groupby 求和：与旧版本一致，保留整数 dtype，浮点数使用补偿求和
+    codes = np.cumsum(is_start) - 1
+    sums = pd.DataFrame({"vol": __values("vol"), "amount": __values("amount")}).groupby(codes, sort=False).sum()
+    data = {
+        "symbol": __values("symbol")[starts],
+        "dt": edt[starts],
+        "open": __values("open")[starts],
+        "close": __values("close")[ends],
+        "high": np.fmax.reduceat(__values("high"), starts),
+        "low": np.fmin.reduceat(__values("low"), starts),
+        "vol": sums["vol"].to_numpy(),
+        "amount": sums["amount"].to_numpy(),
+    }
+    return pd.DataFrame(data)
 
 
 def resample_bars(df: pd.DataFrame, target_freq: Union[Freq, AnyStr], raw_bars=True, **kwargs):
@@ -192,8 +396,8 @@ def resample_bars(df: pd.DataFrame, target_freq: Union[Freq, AnyStr], raw_bars=T
     函数计算逻辑：
 
     1. 确定目标周期`target_freq`的类型和市场类型。
-    2. 添加一个新列`freq_edt`，表示每个数据点对应的目标周期的结束时间。
-    3. 根据`freq_edt`对数据进行分组，并对每组数据进行聚合，得到目标周期的K线数据。
+    2. 用 freq_end_times 向量化计算每个数据点对应的目标周期的结束时间。
+    3. 按结束时间切分连续的区间，价格用 NumPy 的 reduceat 聚合，成交量和成交额按区间编号 groupby 求和，得到目标周期的K线数据。
     4. 重置索引，并选择需要的列。
     5. 根据`raw_bars`参数，决定返回的数据类型：如果为True，转换为`RawBar`对象；如果为False，直接返回DataFrame。
     6. 如果`drop_unfinished`参数为True，删除最后一根未完成的K线。
@@ -211,73 +415,89 @@ def resample_bars(df: pd.DataFrame, target_freq: Union[Freq, AnyStr], raw_bars=T
         2   455375200  1.483385e+12
         3   363393800  1.185303e+12
         4   402854600  1.315272e+12
-    :param target_freq: 目标周期
+    :param target_freq: 目标周期；也可以传入多个目标周期的列表，如 ['5分钟', '15分钟', '30分钟', '60分钟', '日线']，
+        此时时间拆分和市场判断只做一次，返回 {周期: 转换后的K线序列} 字典
     :param raw_bars: 是否将转换后的K线序列转换为RawBar对象
     :param kwargs:
 
         - base_freq: 基础周期，如果不指定，则根据df中的dt列自动推断
         - drop_unfinished: 是否删除最后一根未完成的K线
 
-    :return: 转换后的K线序列
+    :return: 转换后的K线序列；target_freq 为列表时返回字典，key 为周期名称，如 '5分钟'
     """
-    if not isinstance(target_freq, Freq):
-        target_freq = Freq(target_freq)
+    multi = isinstance(target_freq, (list, tuple))
+    freqs = [x if isinstance(x, Freq) else Freq(x) for x in (target_freq if multi else [target_freq])]
 
     base_freq = kwargs.get("base_freq", None)
-    if target_freq.value.endswith("分钟"):
-        uni_times = sorted(df["dt"].tail(2000).apply(lambda x: x.strftime("%H:%M")).unique().tolist())
+    dts = pd.to_datetime(df["dt"])
+    if any(x.value.endswith("分钟") for x in freqs):
+        uni_times = sorted(dts.tail(2000).dt.strftime("%H:%M").unique().tolist())
         _, market = check_freq_and_market(uni_times, freq=base_freq)
     else:
         market = "默认"
 
-    df["freq_edt"] = df["dt"].apply(lambda x: freq_end_time(x, target_freq, market))
-    dfk1 = df.groupby("freq_edt").agg(
-        {
-            "symbol": "first",
-            "dt": "last",
-            "open": "first",
-            "close": "last",
-            "high": "max",
-            "low": "min",
-            "vol": "sum",
-            "amount": "sum",
-            "freq_edt": "last",
-        }
-    )
-    dfk1.reset_index(drop=True, inplace=True)
-    dfk1["dt"] = dfk1["freq_edt"]
-    dfk1 = dfk1[["symbol", "dt", "open", "close", "high", "low", "vol", "amount"]]
-
-    if raw_bars:
-        _bars = []
-        for i, row in enumerate(dfk1.to_dict("records"), 1):
-            row.update({"id": i, "freq": target_freq})
-            _bars.append(RawBar(**row))
-
-        if kwargs.get("drop_unfinished", True):
-            # 清除最后一根未完成的K线
-            if df["dt"].iloc[-1] < _bars[-1].dt:
-                _bars.pop()
-        return _bars
-    else:
-        return dfk1
+    days, minutes = _split_dts(dts)
+    last_dt = dts.iloc[-1]
+    results = {}
+    for freq in freqs:
+        edt = _freq_end_times(days, minutes, freq, market if freq.value.endswith("分钟") else "默认")
+        dfk1 = _resample_df(df, edt)
+
+        if raw_bars:
+            _bars = df_to_bars(dfk1, freq, id_start=1)
+            if kwargs.get("drop_unfinished", True):
+                # 清除最后一根未完成的K线
+                if last_dt < _bars[-1].dt:
+                    _bars.pop()
+            results[freq.value] = _bars
+        else:
+            results[freq.value] = dfk1
+
+    return results if multi else results[freqs[0].value]
 
 
 class BarGenerator:
 
     version = "V231008"
 
-    def __init__(self, base_freq: str, freqs: List[str], max_count: int = 5000, market="默认"):
+    def __init__(self, base_freq: str, freqs: List[str], max_count: int = 5000, market="默认", columnar=False):
+        """
+
+        :param base_freq: 基础周期
+        :param freqs: 需要合成的周期列表
+        :param max_count: 每个周期最多保留的K线数量；列表存储时每根K线更新后长度严格不超过 max_count，
+            超出时从头部删除（每次 O(max_count) 的内存移动），需要摊还 O(1) 的删除请使用 columnar=True
+        :param market: 交易市场，可选值：A股、期货、默认
+        :param columnar: 是否使用列式存储，为 True 时各周期K线保存在 ColumnarBars 中，
+            合成K线时只写 NumPy 数组，不再为每根基础K线创建 RawBar 对象
+        """
         self.symbol = None
         self.end_dt = None
         self.market = market
         self.base_freq = base_freq
         self.max_count = max_count
         self.freqs = freqs
+        self.columnar = columnar
         self.bars = {v: [] for v in self.freqs}
         self.bars.update({base_freq: []})
+        if columnar:
+            self.bars = {k: ColumnarBars(freq=k, max_count=max_count) for k in self.bars}
         self.freq_map = {f.value: f for _, f in Freq.__members__.items()}
         self.__validate_freqs()
+        # 各周期的结束时间增量表，日线及以上周期为 None，使用按日期缓存的结束日期
+        assert market in ["A股", "期货", "默认"], "market 参数必须为 A股 或 期货 或 默认"
+        self._init_edt_deltas()
+
+    def _init_edt_deltas(self):
+        self._edt_deltas = {
+            k: _get_edt_deltas(self.freq_map[k], self.market) if k.endswith("分钟") else None for k in self.bars
+        }
+
+    def __setstate__(self, state):
+        # 兼容没有 _edt_deltas 属性的旧版本序列化对象
+        self.__dict__.update(state)
+        if "_edt_deltas" not in state:
+            self._init_edt_deltas()
 
     def __validate_freqs(self):
         from czsc.utils import sorted_freqs
@@ -306,12 +526,31 @@ class BarGenerator:
         """
         assert freq in self.bars.keys()
         assert not self.bars[freq], f"self.bars['{freq}'] 不为空，不允许执行初始化"
+        if self.columnar and not isinstance(bars, ColumnarBars):
+            bars = ColumnarBars.from_bars(bars, max_count=self.max_count)
+        elif not self.columnar:
+            # 超出 max_count 时会原地删除，这里复制一份，避免修改调用方的列表
+            bars = list(bars)
         self.bars[freq] = bars
         self.symbol = bars[-1].symbol
 
     def __repr__(self):
         return f"<BarGenerator for {self.symbol} @ {self.end_dt}>"
 
+    def _freq_end_time(self, dt: datetime, freq: Freq) -> datetime:
+        """计算 dt 对应的 freq 周期结束时间，结果与 freq_end_time(dt, freq, self.market) 一致"""
+        if dt.second > 0 or dt.microsecond > 0:
+            dt = dt.replace(second=0, microsecond=0) + _ONE_MINUTE
+
+        deltas = self._edt_deltas[freq.value]
+        if deltas is None:
+            return _cached_end_date(dt, freq)
+
+        delta = deltas[dt.hour * 60 + dt.minute]
+        if delta is None:
+            raise KeyError(dt.strftime("%H:%M"))
+        return dt + delta
+
     def _update_freq(self, bar: RawBar, freq: Freq) -> None:
         """更新指定周期K线
 
@@ -328,7 +567,13 @@ class BarGenerator:
         :param bar: 基础周期已完成K线
         :param freq: 目标周期
         """
-        freq_edt = freq_end_time(bar.dt, freq, self.market)
+        freq_edt = self._freq_end_time(bar.dt, freq)
+
+        if self.columnar:
+            bars = self.bars[freq.value]
+            bars.symbol = bar.symbol
+            bars.merge(freq_edt, bar.open, bar.close, bar.high, bar.low, bar.vol, bar.amount)
+            return
 
         if not self.bars[freq.value]:
             bar_ = RawBar(
@@ -400,7 +645,8 @@ class BarGenerator:
         self.symbol = bar.symbol
         self.end_dt = bar.dt
 
-        if self.bars[base_freq] and self.bars[base_freq][-1].dt == bar.dt:
+        bars = self.bars[base_freq]
+        if bars and (bars.last_dt if self.columnar else bars[-1].dt) == bar.dt:
             logger.warning(
                 f"BarGenerator.update: 输入重复K线，基准周期为{base_freq}; \n\n输入K线为{bar};\n\n 上一根K线为{self.bars[base_freq][-1]}"
             )
@@ -409,7 +655,12 @@ class BarGenerator:
         for freq in self.bars.keys():
             self._update_freq(bar, self.freq_map[freq])
 
-        # 限制存在内存中的K限制数量
-        for f, b in self.bars.items():
+        # 限制存在内存中的K限制数量；列式存储在追加时已经完成了数量控制
+        if self.columnar:
+            return
+        for b in self.bars.values():
             if len(b) > self.max_count:
-                self.bars[f] = b[-self.max_count :]
+                # 列表存储有意保持严格的 max_count 长度：信号函数直接按下标和切片访问 bars，不能预留冗余的K线。
+                # 原地删除超出的K线，仍是 O(max_count) 的内存移动，但不再每根K线复制一次整个列表；
+                # 摊还 O(1) 的批量压缩由 ColumnarBars（columnar=True）提供
+                del b[: len(b) - self.max_count]
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/17 10:20
+describe: 列式存储的K线序列，用预分配的 NumPy 环形缓冲区替代 RawBar 对象列表
+"""
+import numpy as np
+import pandas as pd
+from typing import List, Union, AnyStr, Iterable
+from czsc.objects import RawBar, Freq
+
+
+class ColumnarBars:
+    """列式存储的单标的、单周期K线序列
+
+    数据按列保存在预分配的 NumPy 数组中（id/dt 为 int64，open/close/high/low/vol/amount 为 float64），
+    每根K线约占 64 字节，远小于一个 RawBar 对象；追加K线只写数组，不创建 Python 对象。
+
+    1. 缓冲区容量按需倍增，最大为 2 * max_count；
+    2. 超过 max_count 的历史K线通过移动起始指针丢弃，缓冲区写满时再一次性压缩到头部，均摊 O(1)；
+    3. 通过 open/close/high/low/vol/amount/dt/id 属性获取列视图（不复制数据）；
+    4. 下标访问、迭代时才按需生成 RawBar，与 List[RawBar] 的读取方式兼容。
+    """
+
+    def __init__(self, symbol: str = None, freq: Union[Freq, AnyStr] = None, max_count: int = 5000, capacity: int = 256):
+        """
+
+        :param symbol: 标的代码
+        :param freq: K线周期
+        :param max_count: 最多保留的K线数量
+        :param capacity: 初始缓冲区容量
+        """
+        self.symbol = symbol
+        self.freq = Freq(freq) if freq and not isinstance(freq, Freq) else freq
+        self.max_count = max_count
+        capacity = max(min(capacity, 2 * max_count), 1)
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._dts = np.empty(capacity, dtype=np.int64)
+        self._values = np.empty((6, capacity), dtype=np.float64)  # open, close, high, low, vol, amount
+        self._start = 0
+        self._end = 0
+
+    @classmethod
+    def from_bars(cls, bars: Iterable[RawBar], max_count: int = 5000):
+        """从 RawBar 序列创建"""
+        bars = list(bars)
+        res = cls(max_count=max_count, capacity=min(len(bars), max_count) or 256)
+        res.extend(bars)
+        return res
+
+    @classmethod
+    def from_columns(cls, id, dt, open, close, high, low, vol, amount, symbol=None, freq=None, max_count: int = None):
+        """从按列保存的数组创建，不创建 RawBar 对象
+
+        :param dt: datetime64 数组，或可以被 pd.to_datetime 转换的序列
+        :param max_count: 最多保留的K线数量，默认为数组长度
+        """
+        n = len(id)
+        res = cls(symbol=symbol, freq=freq, max_count=max(max_count or n, 1), capacity=max(n, 1))
+        n = min(n, res.max_count)
+        res._ids[:n] = np.asarray(id, dtype=np.int64)[-n:]
+        res._dts[:n] = pd.to_datetime(np.asarray(dt)[-n:]).to_numpy(dtype="datetime64[ns]").view(np.int64)
+        for i, col in enumerate([open, close, high, low, vol, amount]):
+            res._values[i, :n] = np.asarray(col, dtype=np.float64)[-n:]
+        res._end = n
+        return res
+
+    def __repr__(self):
+        return f"<ColumnarBars for {self.symbol} @ {self.freq} ~ {len(self)}>"
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __iter__(self):
+        for i in range(self._start, self._end):
+            yield self._make_bar(i)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._make_bar(i) for i in range(self._start, self._end)[item]]
+
+        n = len(self)
+        if item < 0:
+            item += n
+        if not 0 <= item < n:
+            raise IndexError("ColumnarBars index out of range")
+        return self._make_bar(self._start + item)
+
+    def _make_bar(self, i: int) -> RawBar:
+        o, c, h, low, v, a = self._values[:, i].tolist()
+        return RawBar(symbol=self.symbol, id=int(self._ids[i]), dt=pd.Timestamp(int(self._dts[i])), freq=self.freq,
+                      open=o, close=c, high=h, low=low, vol=v, amount=a)
+
+    def _reserve(self):
+        """保证缓冲区尾部至少还有一个空位"""
+        capacity = len(self._ids)
+        if self._end < capacity:
+            return
+
+        s, e = self._start, self._end
+        n = e - s
+        if n > capacity // 2:
+            capacity = max(min(capacity * 2, 2 * self.max_count), n + 1)
+            ids, dts = np.empty(capacity, dtype=np.int64), np.empty(capacity, dtype=np.int64)
+            values = np.empty((6, capacity), dtype=np.float64)
+            ids[:n], dts[:n], values[:, :n] = self._ids[s:e], self._dts[s:e], self._values[:, s:e]
+            self._ids, self._dts, self._values = ids, dts, values
+        else:
+            self._ids[:n] = self._ids[s:e]
+            self._dts[:n] = self._dts[s:e]
+            self._values[:, :n] = self._values[:, s:e]
+        self._start, self._end = 0, n
+
+    def append(self, dt, open: float, close: float, high: float, low: float, vol: float, amount: float, id: int = None):
+        """追加一根K线
+
+        :param dt: K线时间
+        :param id: K线编号，默认为上一根K线编号加 1
+        """
+        if id is None:
+            id = int(self._ids[self._end - 1]) + 1 if len(self) else 0
+        self._reserve()
+        i = self._end
+        self._ids[i] = id
+        self._dts[i] = pd.Timestamp(dt).value
+        self._values[:, i] = (open, close, high, low, vol, amount)
+        self._end += 1
+        if self._end - self._start > self.max_count:
+            self._start = self._end - self.max_count
+
+    def append_bar(self, bar: RawBar):
+        """追加一根 RawBar"""
+        if self.symbol is None:
+            self.symbol, self.freq = bar.symbol, bar.freq
+        self.append(bar.dt, bar.open, bar.close, bar.high, bar.low, bar.vol, bar.amount, id=bar.id)
+
+    def extend(self, bars: Iterable[RawBar]):
+        """批量追加 RawBar"""
+        for bar in bars:
+            self.append_bar(bar)
+
+    def merge(self, dt, open: float, close: float, high: float, low: float, vol: float, amount: float):
+        """合成K线：dt 与最后一根K线相同则合并到最后一根，否则追加新K线
+
+        :return: True 表示合并到了最后一根K线，False 表示追加了新K线
+        """
+        value = pd.Timestamp(dt).value
+        i = self._end - 1
+        if len(self) and self._dts[i] == value:
+            values = self._values
+            values[1, i] = close
+            if high > values[2, i]:
+                values[2, i] = high
+            if low < values[3, i]:
+                values[3, i] = low
+            values[4, i] += vol
+            values[5, i] += amount
+            return True
+
+        self.append(dt, open, close, high, low, vol, amount)
+        return False
+
+    @property
+    def last_dt(self):
+        """最后一根K线的时间"""
+        return pd.Timestamp(int(self._dts[self._end - 1])) if len(self) else None
+
+    @property
+    def id(self) -> np.ndarray:
+        return self._ids[self._start : self._end]
+
+    @property
+    def dt(self) -> np.ndarray:
+        return self._dts[self._start : self._end].view("datetime64[ns]")
+
+    @property
+    def open(self) -> np.ndarray:
+        return self._values[0, self._start : self._end]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._values[1, self._start : self._end]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self._values[2, self._start : self._end]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self._values[3, self._start : self._end]
+
+    @property
+    def vol(self) -> np.ndarray:
+        return self._values[4, self._start : self._end]
+
+    @property
+    def amount(self) -> np.ndarray:
+        return self._values[5, self._start : self._end]
+
+    def to_bars(self) -> List[RawBar]:
+        """转换为 RawBar 列表"""
+        return self[:]
+
+    def to_df(self) -> pd.DataFrame:
+        """转换为 DataFrame，列名与 RawBar 的属性一致"""
+        df = pd.DataFrame(
+            {
+                "symbol": self.symbol,
+                "id": self.id.copy(),
+                "dt": self.dt.copy(),
+                "open": self.open.copy(),
+                "close": self.close.copy(),
+                "high": self.high.copy(),
+                "low": self.low.copy(),
+                "vol": self.vol.copy(),
+                "amount": self.amount.copy(),
+            }
+        )
+        df["freq"] = self.freq.value if self.freq else None
+        return df
@@ -13,6 +13,24 @@ from czsc.enum import Direction
 from czsc.objects import BI, RawBar, ZS, Signal
 
 
+def vectorized(sig_func):
+    """将被装饰的函数注册为信号函数 sig_func 的向量化批量实现
+
+    批量实现的输入为 freq 和信号函数参数，返回 None 表示当前参数不支持批量计算（回退到逐K回放）；
+    否则返回 (keys, compute)，keys 为信号函数会输出的信号名称列表，compute 输入
+    czsc.traders.base.FreqReplay 对象，返回 {信号名称: 每根基础K线对应的信号取值数组}。
+
+    :param sig_func: 信号函数
+    :return: 装饰器
+    """
+
+    def decorator(batch_func):
+        sig_func.batch = batch_func
+        return batch_func
+
+    return decorator
+
+
 def create_single_signal(**kwargs) -> OrderedDict:
     """创建单个信号"""
     s = OrderedDict()
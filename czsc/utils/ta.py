@@ -14,6 +14,7 @@ python 3.10 以上版本，可以用 pip install ta-lib-everywhere 安装 ta-lib
 """
 import numpy as np
 import pandas as pd
+from collections import deque
 
 
 def SMA(close: np.array, timeperiod=5):
@@ -868,3 +869,186 @@ def sigmoid(x):
 def log_return(x):
     """对数收益率"""
     return np.log(x / x.shift(1))
+
+
+class StreamIndicator:
+    """增量计算的指标基类
+
+    K线序列的最后一根K线在完成前会被反复更新，因此指标分为两种推进方式：
+
+    1. push(x)：输入一根已完成K线的收盘价，推进指标状态，返回这根K线的指标值；
+    2. peek(x)：输入最后一根未完成K线的当前收盘价，返回指标值，不改变指标状态。
+
+    对同一个 x，push 和 peek 返回的指标值相同，单次调用的复杂度都是 O(1)。
+    """
+
+    def push(self, x: float):
+        raise NotImplementedError
+
+    def peek(self, x: float):
+        raise NotImplementedError
+
+
+class _RollingSum:
+    """最近 n 根已完成K线的滑动求和，定期重新求和，避免浮点误差累积"""
+
+    def __init__(self, n: int, power: int = 1):
+        self.n = n
+        self.power = power
+        self.window = deque()
+        self.total = 0.0
+        self.count = 0
+
+    def push(self, x: float):
+        x = x**self.power
+        self.window.append(x)
+        self.total += x
+        if len(self.window) > self.n:
+            self.total -= self.window.popleft()
+
+        self.count += 1
+        if self.count % max(self.n, 64) == 0:
+            self.total = sum(self.window)
+
+
+class StreamSMA(StreamIndicator):
+    """增量计算的简单移动平均，与 talib.SMA 一致：前 timeperiod - 1 根K线的值为 nan"""
+
+    def __init__(self, timeperiod: int = 5):
+        self.timeperiod = timeperiod
+        self.rs = _RollingSum(timeperiod - 1)
+
+    def peek(self, x: float):
+        if len(self.rs.window) < self.timeperiod - 1:
+            return np.nan
+        return (self.rs.total + x) / self.timeperiod
+
+    def push(self, x: float):
+        value = self.peek(x)
+        self.rs.push(x)
+        return value
+
+
+class StreamEMA(StreamIndicator):
+    """增量计算的指数移动平均，与 talib.EMA 一致：以前 timeperiod 根K线的简单平均作为初始值"""
+
+    def __init__(self, timeperiod: int = 5):
+        self.timeperiod = timeperiod
+        self.k = 2.0 / (timeperiod + 1)
+        self.prev = None
+        self.head = []
+
+    def peek(self, x: float):
+        if self.prev is not None:
+            return (x - self.prev) * self.k + self.prev
+        if len(self.head) == self.timeperiod - 1:
+            return (sum(self.head) + x) / self.timeperiod
+        return np.nan
+
+    def push(self, x: float):
+        value = self.peek(x)
+        if self.prev is not None or len(self.head) == self.timeperiod - 1:
+            self.prev, self.head = value, []
+        else:
+            self.head.append(x)
+        return value
+
+
+class StreamMACD(StreamIndicator):
+    """增量计算的 MACD，与 talib.MACD 一致：快慢 EMA 在第 slowperiod 根K线对齐，
+    前 slowperiod + signalperiod - 2 根K线的值为 nan
+
+    指标值为 (dif, dea, macd)，其中 macd = dif - dea
+    """
+
+    def __init__(self, fastperiod: int = 12, slowperiod: int = 26, signalperiod: int = 9):
+        self.periods = (fastperiod, slowperiod, signalperiod)
+        self.fast, self.slow, self.signal = StreamEMA(fastperiod), StreamEMA(slowperiod), StreamEMA(signalperiod)
+        self.count = 0
+
+    def _next(self, x: float, method: str):
+        fastperiod, slowperiod, signalperiod = self.periods
+        if self.count >= slowperiod - fastperiod:
+            fast = getattr(self.fast, method)(x)
+        slow = getattr(self.slow, method)(x)
+        if self.count < slowperiod - 1:
+            return np.nan, np.nan, np.nan
+
+        dif = fast - slow
+        dea = getattr(self.signal, method)(dif)
+        if self.count < slowperiod + signalperiod - 2:
+            return np.nan, np.nan, np.nan
+        return dif, dea, dif - dea
+
+    def peek(self, x: float):
+        return self._next(x, "peek")
+
+    def push(self, x: float):
+        value = self._next(x, "push")
+        self.count += 1
+        return value
+
+
+class StreamBOLL(StreamIndicator):
+    """增量计算的布林线中线和标准差，与 talib.BBANDS(matype=0) 一致：前 timeperiod - 1 根K线的值为 nan
+
+    指标值为 (中线, 标准差)，上下轨为 中线 ± 标准差倍数 * 标准差
+    """
+
+    def __init__(self, timeperiod: int = 20):
+        self.timeperiod = timeperiod
+        self.rs1 = _RollingSum(timeperiod - 1)
+        self.rs2 = _RollingSum(timeperiod - 1, power=2)
+
+    def peek(self, x: float):
+        n = self.timeperiod
+        if len(self.rs1.window) < n - 1:
+            return np.nan, np.nan
+        mean = (self.rs1.total + x) / n
+        var = (self.rs2.total + x * x) / n - mean * mean
+        return mean, np.sqrt(var) if var > 1e-8 else 0.0
+
+    def push(self, x: float):
+        value = self.peek(x)
+        self.rs1.push(x)
+        self.rs2.push(x)
+        return value
+
+
+class IndicatorEngine:
+    """挂在 CZSC 对象上的增量指标引擎
+
+    按 key 保存增量指标对象，每次调用 update 时，只用 bars 中新增的已完成K线推进指标状态，
+    再用最后一根K线的当前收盘价计算指标值；相同参数的指标在所有信号函数之间共享。
+    """
+
+    def __init__(self):
+        self.__items = {}
+
+    def __contains__(self, key):
+        return key in self.__items
+
+    def update(self, bars: list, key: str, factory):
+        """将指标推进到 bars 的最后一根K线
+
+        :param bars: K线序列，要求 id 连续递增，最后一根K线可以是未完成K线
+        :param key: 指标的唯一标识
+        :param factory: 创建 StreamIndicator 对象的函数，首次调用或无法增量推进时使用
+        :return: [(K线, 指标值), ...]，需要更新指标值的K线
+        """
+        last = bars[-1]
+        item = self.__items.get(key)
+        if item is not None:
+            indicator, last_id = item
+            i = len(bars) - 1 - (last.id - last_id)
+            if 0 <= i < len(bars) and bars[i].id == last_id:
+                res = [(bar, indicator.push(bar.close)) for bar in bars[i:-1]]
+                res.append((last, indicator.peek(last.close)))
+                item[1] = last.id
+                return res
+
+        indicator = factory()
+        res = [(bar, indicator.push(bar.close)) for bar in bars[:-1]]
+        res.append((last, indicator.peek(last.close)))
+        self.__items[key] = [indicator, last.id]
+        return res
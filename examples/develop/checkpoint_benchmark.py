@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/18 02:50
+describe: CzscTrader 重启恢复基准测试：重新回放预热K线、dill 序列化整个对象、状态快照 checkpoint 三种方式对比
+
+运行方式：python examples/develop/checkpoint_benchmark.py
+"""
+import sys
+
+sys.path.insert(0, ".")
+import os
+import time
+import dill
+import tempfile
+from loguru import logger
+from czsc import mock
+from czsc.objects import Event, Position
+from czsc.utils import format_standard_kline
+from czsc.traders.base import CzscTrader, init_bar_generator
+from czsc.traders.checkpoint import save_checkpoint, load_checkpoint
+
+logger.remove()
+
+signals_config = [
+    {"name": "czsc.signals.tas_ma_base_V221101", "freq": "日线", "di": 1, "ma_type": "SMA", "timeperiod": 5},
+    {"name": "czsc.signals.tas_macd_base_V221028", "freq": "60分钟", "di": 1},
+    {"name": "czsc.signals.cxt_bi_status_V230101", "freq": "30分钟"},
+    {"name": "czsc.signals.bar_single_V230506", "freq": "15分钟", "di": 1},
+]
+
+
+def make_trader(bars):
+    opens = [
+        Event.load({"operate": "开多", "factors": [
+            {"name": "多", "signals_all": ["日线_D1SMA#5_分类V221101_多头_任意_任意_0"]}]}),
+        Event.load({"operate": "开空", "factors": [
+            {"name": "空", "signals_all": ["日线_D1SMA#5_分类V221101_空头_任意_任意_0"]}]}),
+    ]
+    positions = [Position(symbol="000001", opens=opens, name="P1", timeout=50, stop_loss=100)]
+    bg, bars_right = init_bar_generator(bars, signals_config, sdt="20190101")
+    trader = CzscTrader(bg, positions=positions, signals_config=signals_config)
+    for bar in bars_right:
+        trader.update(bar)
+    return trader
+
+
+def main():
+    df = mock.generate_symbol_kines("000001", "15分钟", sdt="20180101", edt="20230101", seed=42)
+    bars = format_standard_kline(df, freq="15分钟")
+
+    t0 = time.time()
+    trader = make_trader(bars)
+    t_replay = time.time() - t0
+
+    with tempfile.TemporaryDirectory() as path:
+        file_dill = os.path.join(path, "trader.dill")
+        t0 = time.time()
+        with open(file_dill, "wb") as f:
+            dill.dump(trader, f)
+        t_dill_dump = time.time() - t0
+        t0 = time.time()
+        with open(file_dill, "rb") as f:
+            dill.load(f)
+        t_dill_load = time.time() - t0
+
+        res = []
+        for with_holds in [True, False]:
+            file_ckpt = os.path.join(path, f"trader_{with_holds}.ckpt")
+            t0 = time.time()
+            save_checkpoint(trader, file_ckpt, with_holds=with_holds)
+            t_save = time.time() - t0
+            t0 = time.time()
+            restored = load_checkpoint(file_ckpt)
+            t_load = time.time() - t0
+            assert dict(restored.s) == dict(trader.s)
+            res.append((with_holds, t_save, t_load, os.path.getsize(file_ckpt)))
+        size_dill = os.path.getsize(file_dill)
+
+    print(f"K线数量：{len(bars)}")
+    print(f"重新回放预热K线：{t_replay:.2f} 秒")
+    print(f"dill 整个对象：保存 {t_dill_dump:.2f} 秒，恢复 {t_dill_load:.2f} 秒，文件 {size_dill / 1e6:.1f} MB")
+    for with_holds, t_save, t_load, size in res:
+        print(f"checkpoint(with_holds={with_holds})：保存 {t_save:.2f} 秒，恢复 {t_load:.2f} 秒，文件 {size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
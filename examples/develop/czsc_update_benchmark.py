@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/17 14:30
+describe: CZSC.update / BarGenerator.update 单根K线耗时随 max_bi_num、max_count 变化的基准测试
+
+运行方式：python examples/develop/czsc_update_benchmark.py
+
+单根K线的耗时应当基本不随 max_bi_num、max_count 增长；旧实现每根K线都会复制 bi_list、
+线性扫描并复制 bars_raw、复制超出数量限制的 BarGenerator.bars，耗时与保留的历史长度成正比。
+"""
+import sys
+
+sys.path.insert(0, ".")
+import time
+from czsc import mock
+from czsc.analyze import CZSC
+from czsc.utils.bar_generator import BarGenerator, format_standard_kline
+
+
+def per_update_us(func, bars, warmup: int):
+    """返回 warmup 之后每根K线的平均耗时（微秒）"""
+    for bar in bars[:warmup]:
+        func(bar)
+    start = time.perf_counter()
+    for bar in bars[warmup:]:
+        func(bar)
+    return (time.perf_counter() - start) / (len(bars) - warmup) * 1e6
+
+
+def main():
+    df = mock.generate_symbol_kines("000001", "1分钟", sdt="20230101", edt="20240101", seed=42)
+    bars = format_standard_kline(df, freq="1分钟")
+    print(f"K线数量：{len(bars)}")
+
+    print("\nCZSC.update 单根K线耗时 vs max_bi_num")
+    for max_bi_num in [50, 200, 1000, 5000]:
+        c = CZSC(bars[:10], max_bi_num=max_bi_num)
+        us = per_update_us(c.update, bars[10:], warmup=len(bars) // 2)
+        print(f"max_bi_num={max_bi_num:>5}  bars_raw={len(c.bars_raw):>6}  {us:8.2f} us/bar")
+
+    print("\nBarGenerator.update 单根K线耗时 vs max_count")
+    for columnar in [False, True]:
+        for max_count in [1000, 5000, 20000, 100000]:
+            bg = BarGenerator("1分钟", freqs=["5分钟", "15分钟", "30分钟", "60分钟"], max_count=max_count, columnar=columnar)
+            us = per_update_us(bg.update, bars, warmup=min(max_count + 1000, len(bars) // 2))
+            print(f"columnar={columnar!s:>5}  max_count={max_count:>6}  {us:8.2f} us/bar")
+
+
+if __name__ == "__main__":
+    main()
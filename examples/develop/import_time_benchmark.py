@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/18 00:30
+describe: import czsc 耗时基准测试，以及首次访问按需导入的子模块的耗时
+
+每次测量都在新的 Python 进程中执行，避免模块缓存的影响；详细的导入耗时可以用
+python -X importtime -c "import czsc" 查看。
+
+运行方式：python examples/develop/import_time_benchmark.py
+"""
+import os
+import sys
+import subprocess
+import statistics
+
+sys.path.insert(0, ".")
+
+# 依赖较重、不应在 import czsc 时导入的第三方库
+HEAVY_MODULES = ["streamlit", "lightweight_charts", "redis", "clickhouse_connect", "IPython"]
+
+CODE = """
+import sys, time, warnings
+warnings.simplefilter("ignore")
+t0 = time.perf_counter()
+import czsc
+t1 = time.perf_counter()
+{stmt}
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1, ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def measure(stmt: str = "pass", repeat: int = 5):
+    """在新进程中执行 import czsc 和 stmt，返回 (import czsc 耗时中位数, stmt 耗时中位数, 已导入的重依赖)"""
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    code = CODE.format(stmt=stmt, heavy=HEAVY_MODULES)
+    t_import, t_stmt, loaded = [], [], ""
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+        a, b, *rest = out.stdout.split()
+        t_import.append(float(a))
+        t_stmt.append(float(b))
+        loaded = rest[0] if rest else ""
+    return statistics.median(t_import), statistics.median(t_stmt), loaded
+
+
+def main():
+    cases = [
+        ("import czsc", "pass"),
+        ("czsc.CZSC", "czsc.CZSC"),
+        ("czsc.mock", "czsc.mock"),
+        ("czsc.sensors", "czsc.sensors"),
+        ("czsc.signals", "czsc.signals"),
+        ("czsc.fsa", "czsc.fsa"),
+        ("czsc.rwc", "czsc.rwc"),
+        ("czsc.svc", "czsc.svc"),
+        ("czsc.show_daily_return", "czsc.show_daily_return"),
+    ]
+    print(f"{'访问':<26}{'import czsc':>14}{'首次访问':>12}  已导入的重依赖")
+    for name, stmt in cases:
+        t_import, t_stmt, loaded = measure(stmt)
+        print(f"{name:<26}{t_import * 1000:>12.0f}ms{t_stmt * 1000:>10.0f}ms  {loaded or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/17 21:10
+describe: DataFrame 与 RawBar 序列互相转换的基准测试（100 万行）
+
+运行方式：python examples/develop/kline_convert_benchmark.py
+"""
+import sys
+
+sys.path.insert(0, ".")
+import time
+import numpy as np
+import pandas as pd
+from czsc.objects import RawBar, Freq
+from czsc.utils.bar_generator import df_to_bars, bars_to_df
+
+
+def make_df(n: int) -> pd.DataFrame:
+    close = 100 + np.cumsum(np.random.RandomState(42).randn(n)) * 0.01
+    return pd.DataFrame({
+        "symbol": "000001.SH",
+        "dt": pd.date_range("2010-01-01 09:31", periods=n, freq="min"),
+        "open": close, "close": close, "high": close + 0.01, "low": close - 0.01,
+        "vol": 1000.0, "amount": close * 1000,
+    })
+
+
+def legacy_df_to_bars(df: pd.DataFrame, freq: str):
+    """旧实现：iterrows + 逐行 pd.to_datetime"""
+    return [
+        RawBar(symbol=row["symbol"], id=int(i), dt=pd.to_datetime(row["dt"]).to_pydatetime(), freq=Freq(freq),
+               open=float(row["open"]), close=float(row["close"]), high=float(row["high"]), low=float(row["low"]),
+               vol=float(row["vol"]), amount=float(row["amount"]))
+        for i, row in df.iterrows()
+    ]
+
+
+def legacy_bars_to_df(bars):
+    """旧实现：逐根K线构造字典"""
+    data = [{"symbol": x.symbol, "id": x.id, "dt": x.dt, "freq": x.freq.value, "open": x.open, "close": x.close,
+             "high": x.high, "low": x.low, "vol": x.vol, "amount": x.amount} for x in bars]
+    df = pd.DataFrame(data)
+    df["dt"] = pd.to_datetime(df["dt"])
+    return df
+
+
+def timeit(name, func, *args, **kwargs):
+    start = time.perf_counter()
+    res = func(*args, **kwargs)
+    print(f"{name:<36} {time.perf_counter() - start:8.3f} s")
+    return res
+
+
+def main(n: int = 1_000_000):
+    df = make_df(n)
+    print(f"行数：{n}")
+    timeit("legacy df -> bars (前 10 万行)", legacy_df_to_bars, df.iloc[:100_000], "1分钟")
+    bars = timeit("df_to_bars", df_to_bars, df, "1分钟")
+    timeit("df_to_bars(pydatetime=True)", df_to_bars, df, "1分钟", pydatetime=True)
+    cb = timeit("df_to_bars(lazy=True)", df_to_bars, df, "1分钟", lazy=True)
+    timeit("legacy bars -> df", legacy_bars_to_df, bars)
+    timeit("bars_to_df", bars_to_df, bars)
+    timeit("bars_to_df(ColumnarBars)", bars_to_df, cb)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/18 03:40
+describe: 出场优化基准测试：逐个标的逐根K线回放所有候选持仓 与 ExitsOptimize（信号缓存 + 向量化模拟 + 单次汇总）的耗时对比
+
+运行方式：python examples/develop/optimize_benchmark.py
+"""
+import sys
+
+sys.path.insert(0, ".")
+import os
+import time
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+from loguru import logger
+from czsc import mock
+from czsc.objects import Event, Position
+from czsc.utils import format_standard_kline, save_json
+from czsc.traders.optimize import ExitsOptimize, CzscExitOptimStrategy
+
+logger.remove()
+
+symbols = [f"S{i:03d}" for i in range(6)]
+_cache = {}
+
+
+def read_bars(symbol, freq, sdt, edt, fq="后复权", raw_bar=True):
+    if symbol not in _cache:
+        seed = int(symbol[1:])
+        df = mock.generate_symbol_kines(symbol, "15分钟", sdt="20190101", edt="20210701", seed=seed)
+        _cache[symbol] = format_standard_kline(df, freq="15分钟")
+    sdt, edt = pd.to_datetime(sdt), pd.to_datetime(edt)
+    return [x for x in _cache[symbol] if sdt <= x.dt <= edt]
+
+
+def make_betas(path):
+    files = []
+    for op, value in [("开多", "多头"), ("开空", "空头")]:
+        event = Event.load({"operate": op, "factors": [
+            {"name": value, "signals_all": [f"日线_D1SMA#5_分类V221101_{value}_向上_任意_0"]}]})
+        pos = Position(symbol="symbol", opens=[event], name=f"SMA5{value}", timeout=100, stop_loss=300, interval=3600)
+        pos_ = pos.dump()
+        pos_.pop("symbol")
+        pos_["md5"] = hashlib.md5(str(pos_).encode()).hexdigest()
+        file = os.path.join(path, f"{pos.name}.json")
+        save_json(pos_, file)
+        files.append(file)
+    return files
+
+
+def make_candidates():
+    events = []
+    for op in ["平多", "平空"]:
+        for layer in range(1, 6):
+            events.append({"operate": op, "factors": [
+                {"name": f"第{layer}层", "signals_all": [f"60分钟_D1单K趋势N5_BS辅助V230506_第{layer}层_任意_任意_0"]}]})
+        for value in ["多头_向上", "多头_向下", "空头_向上", "空头_向下"]:
+            events.append({"operate": op, "factors": [
+                {"name": value, "signals_all": [f"60分钟_D1MACD12#26#9#MACD_BS辅助V221028_{value}_任意_0"]}]})
+    return events
+
+
+def main():
+    with tempfile.TemporaryDirectory() as path:
+        kwargs = dict(symbols=symbols, files_position=make_betas(path), candidate_events=make_candidates(),
+                      results_path=path, signals_module_name="czsc.signals",
+                      bar_sdt="20190101", bar_edt="20210701", sdt="20200101")
+
+        # 逐个标的逐根K线回放所有候选持仓
+        tactic = CzscExitOptimStrategy(symbol="symbol", **kwargs)
+        n_pos = len(tactic.positions)
+        t0 = time.time()
+        for symbol in symbols:
+            bars = read_bars(symbol, tactic.base_freq, kwargs["bar_sdt"], kwargs["bar_edt"])
+            tactic.backtest(bars, sdt=kwargs["sdt"], vectorized=False)
+        t_replay = time.time() - t0
+
+        t0 = time.time()
+        eop = ExitsOptimize(read_bars, task_name="冷启动", **kwargs)
+        eop.execute(n_jobs=1)
+        t_cold = time.time() - t0
+
+        # 第二个任务使用相同的信号配置，信号直接从缓存读取
+        t0 = time.time()
+        eop2 = ExitsOptimize(read_bars, task_name="信号缓存", **kwargs)
+        eop2.execute(n_jobs=1)
+        t_warm = time.time() - t0
+
+        df1 = pd.read_excel([os.path.join(eop.results_path, x) for x in os.listdir(eop.results_path) if x.endswith(".xlsx")][0])
+        df2 = pd.read_excel([os.path.join(eop2.results_path, x) for x in os.listdir(eop2.results_path) if x.endswith(".xlsx")][0])
+        assert np.allclose(df1["截面等权收益"], df2["截面等权收益"])
+
+    print(f"标的数量：{len(symbols)}，候选持仓数量：{n_pos}")
+    print(f"逐根K线回放：{t_replay:.2f} 秒（不含结果保存和汇总）")
+    print(f"ExitsOptimize 冷启动：{t_cold:.2f} 秒；信号缓存命中：{t_warm:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/17 23:50
+describe: 信号缓存回测基准测试：逐根K线 CzscTrader.on_sig 与向量化持仓模拟 simulate_positions（200 个候选持仓）
+
+运行方式：python examples/develop/position_sim_benchmark.py
+"""
+import sys
+
+sys.path.insert(0, ".")
+import time
+import itertools
+from copy import deepcopy
+from czsc import mock
+from czsc.objects import Event, Position
+from czsc.utils import format_standard_kline
+from czsc.traders.base import CzscTrader, generate_czsc_signals
+from czsc.traders.position_sim import simulate_positions
+
+
+def make_positions():
+    """模拟入场优化：基础开仓事件 + 不同的过滤信号、止损、超时参数"""
+    filters = [[], ["5分钟_D1T10_状态_阳线_任意_任意_0"], ["15分钟_D1_表里关系V230101_向上_任意_任意_0"],
+               ["5分钟_D1T10_状态_阳线_长实体_任意_0"], ["15分钟_D1_表里关系V230101_向上_延伸_任意_0"]]
+    positions = []
+    grid = itertools.product(filters, [0, 3600], [30, 50, 100, 300, 1000], [10, 20, 50, 100])
+    for i, (flt, interval, stop_loss, timeout) in enumerate(grid):
+        opens = [
+            Event.load({"operate": "开多", "factors": [
+                {"name": "多", "signals_all": ["5分钟_D1SMA#5_分类V221101_多头_向上_任意_0"] + flt}]}),
+            Event.load({"operate": "开空", "factors": [
+                {"name": "空", "signals_all": ["5分钟_D1SMA#5_分类V221101_空头_向下_任意_0"]}]}),
+        ]
+        positions.append(Position(symbol="000001", opens=opens, interval=interval, stop_loss=stop_loss,
+                                  timeout=timeout, T0=False, name=f"P{i}"))
+    return positions
+
+
+def main():
+    df = mock.generate_symbol_kines("000001", "5分钟", sdt="20220101", edt="20230101", seed=42)
+    bars = format_standard_kline(df, freq="5分钟")
+    signals_config = [
+        {'name': 'czsc.signals.tas_ma_base_V221101', 'freq': '5分钟', 'di': 1, 'ma_type': 'SMA', 'timeperiod': 5},
+        {'name': 'czsc.signals.bar_single_V230214', 'freq': '5分钟', 'di': 1},
+        {'name': 'czsc.signals.cxt_bi_status_V230101', 'freq': '15分钟'},
+    ]
+    sigs = generate_czsc_signals(bars, signals_config, sdt='20220201', df=True)
+    positions = make_positions()
+
+    t = time.perf_counter()
+    trader = CzscTrader(positions=deepcopy(positions))
+    for s in sigs.to_dict('records'):
+        trader.on_sig(s)
+    t_loop = time.perf_counter() - t
+
+    t = time.perf_counter()
+    sim = simulate_positions(positions, sigs)
+    t_sim = time.perf_counter() - t
+
+    assert all(a.operates == b.operates and a.holds == b.holds for a, b in zip(trader.positions, sim))
+    print(f"{len(positions)} 个持仓，{len(sigs)} 根K线：")
+    print(f"    逐根K线 on_sig：{t_loop:.2f}s")
+    print(f"    simulate_positions：{t_sim:.2f}s，加速 {t_loop / t_sim:.1f} 倍")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/17 22:40
+describe: 持有 60 个 Position 的 CzscTrader 逐K更新基准测试：原始 Signal.is_match 与预解析信号视图 ParsedSignals
+
+运行方式：python examples/develop/position_update_benchmark.py
+"""
+import sys
+
+sys.path.insert(0, ".")
+import time
+import numpy as np
+import pandas as pd
+from copy import deepcopy
+from czsc.objects import Signal, Event, Position
+from czsc.traders.base import CzscTrader
+
+N_BARS = 5000
+N_POSITIONS = 60
+KEYS = [f"15分钟_D1参数{i}_测试V240101" for i in range(40)]
+VALUES = ["看多_强_任意_0", "看多_弱_任意_0", "看空_强_任意_0", "看空_弱_任意_0", "其他_其他_任意_0"]
+
+
+def legacy_is_match(self, s: dict) -> bool:
+    """改造前的 Signal.is_match 实现，作为对照"""
+    key = self.key
+    v = s.get(key, None)
+    if not v:
+        raise ValueError(f"{key} 不在信号列表中")
+
+    v1, v2, v3, score = v.split("_")
+    if int(score) >= self.score:
+        if v1 == self.v1 or self.v1 == "任意":
+            if v2 == self.v2 or self.v2 == "任意":
+                if v3 == self.v3 or self.v3 == "任意":
+                    return True
+    return False
+
+
+def make_sigs(n: int):
+    rs = np.random.RandomState(42)
+    dts = pd.date_range("2020-01-01", periods=n, freq="15min")
+    close = 100 + np.cumsum(rs.randn(n)) * 0.1
+    values = np.array(VALUES, dtype=object)[rs.randint(0, len(VALUES), (n, len(KEYS)))]
+    sigs = []
+    for i in range(n):
+        s = {"symbol": "000001", "dt": dts[i].to_pydatetime(), "id": i, "close": close[i], "vol": 1}
+        s.update(zip(KEYS, values[i]))
+        sigs.append(s)
+    return sigs
+
+
+def make_positions(n: int):
+    rs = np.random.RandomState(0)
+    positions = []
+    for i in range(n):
+        k = rs.choice(KEYS, 6, replace=False)
+        opens = [Event.load({"operate": op, "signals_not": [f"{k[0]}_其他_其他_任意_0"], "factors": [
+            {"name": f"F{j}", "signals_all": [f"{k[j + 1]}_{d}_强_任意_0", f"{k[j + 2]}_{d}_任意_任意_0"]}
+            for j in range(3)]}) for op, d in [("开多", "看多"), ("开空", "看空")]]
+        exits = [Event.load({"operate": op, "factors": [{"signals_all": [f"{k[5]}_{d}_强_任意_0"]}]})
+                 for op, d in [("平多", "看空"), ("平空", "看多")]]
+        positions.append(Position(symbol="000001", opens=opens, exits=exits, name=f"P{i}", interval=3600))
+    return positions
+
+
+def run(sigs, positions):
+    trader = CzscTrader(positions=deepcopy(positions))
+    t = time.perf_counter()
+    for sig in sigs:
+        trader.on_sig(sig)
+    return (time.perf_counter() - t) / len(sigs) * 1e6, [p.pos for p in trader.positions]
+
+
+def main():
+    sigs = make_sigs(N_BARS)
+    positions = make_positions(N_POSITIONS)
+    new_is_match = Signal.is_match
+
+    Signal.is_match = legacy_is_match
+    t_legacy, pos_legacy = run(sigs, positions)
+    Signal.is_match = new_is_match
+    t_new, pos_new = run(sigs, positions)
+    assert pos_legacy == pos_new
+
+    print(f"{N_POSITIONS} 个持仓，{N_BARS} 根K线，每根K线平均耗时：")
+    print(f"    原始 is_match：{t_legacy:.0f} us")
+    print(f"    ParsedSignals：{t_new:.0f} us，加速 {t_legacy / t_new:.1f} 倍")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/18 01:40
+describe: 信号缓存基准测试：新增一天K线时，全量重新计算信号 与 SignalsCache 增量追加 的耗时对比
+
+运行方式：python examples/develop/signals_cache_benchmark.py
+"""
+import sys
+
+sys.path.insert(0, ".")
+import time
+import tempfile
+import pandas as pd
+from loguru import logger
+from czsc import mock
+from czsc.utils import format_standard_kline
+from czsc.traders.base import generate_czsc_signals
+from czsc.traders.sig_cache import SignalsCache
+
+logger.remove()
+
+signals_config = [
+    {"name": "czsc.signals.tas_ma_base_V221101", "freq": "日线", "di": 1, "ma_type": "SMA", "timeperiod": 5},
+    {"name": "czsc.signals.tas_macd_base_V221028", "freq": "60分钟", "di": 1},
+    {"name": "czsc.signals.cxt_bi_status_V230101", "freq": "30分钟"},
+    {"name": "czsc.signals.bar_single_V230506", "freq": "15分钟", "di": 1},
+]
+
+
+def main():
+    df = mock.generate_symbol_kines("000001", "15分钟", sdt="20180101", edt="20230101", seed=42)
+    bars = format_standard_kline(df, freq="15分钟")
+    last_day = bars[-1].dt.date()
+    yesterday = max(x.dt for x in bars if x.dt.date() < last_day)
+
+    def read_bars_until(edt):
+        def read_bars(symbol, freq, sdt, edt_, fq):
+            return [x for x in bars if pd.to_datetime(sdt) <= x.dt <= min(pd.to_datetime(edt_), edt)]
+        return read_bars
+
+    t0 = time.time()
+    full = generate_czsc_signals(bars, signals_config, sdt="20190101", df=True)
+    t_full = time.time() - t0
+
+    with tempfile.TemporaryDirectory() as path:
+        cache = SignalsCache(path, signals_config, base_freq="15分钟")
+        cache.get("000001", read_bars_until(yesterday), sdt="20190101", edt="20230102", bars_sdt="20180101")
+
+        t0 = time.time()
+        sigs = cache.get("000001", read_bars_until(bars[-1].dt), sdt="20190101", edt="20230102")
+        t_incr = time.time() - t0
+
+    assert len(sigs) == len(full)
+    n_new = sum(1 for x in bars if x.dt > yesterday)
+    print(f"K线数量：{len(bars)}，信号行数：{len(full)}，新增K线：{n_new}")
+    print(f"全量重新计算：{t_full:.2f} 秒；信号缓存增量追加：{t_incr:.2f} 秒；加速比：{t_full / t_incr:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,9 @@
 
 优化点：
 1. --max-requests-per-minute / --concurrency 速率限制
-2. 令牌桶算法控制请求频率
-3. Token 支持：--token > 环境变量 TUSHARE_TOKEN / CZSC_TOKEN > 脚本默认
+2. 令牌桶算法控制请求频率；接口提示限频时所有并发线程一起退避
+3. 按股票拉取时接口请求并发执行，解析与 Parquet 写入在 --save-workers 个线程上执行，checkpoint 按股票顺序推进
+4. Token 支持：--token > 环境变量 TUSHARE_TOKEN / CZSC_TOKEN > 脚本默认
 
 无参数执行时，默认拉取「当天」或「当日最近交易日」的全市场日线（单日 pro.daily(trade_date=...)），
 便于定时任务或前端一键拉取当日数据。
@@ -94,11 +95,14 @@ class RateLimiter:
         self.lock = threading.RLock()
         
         # 请求历史记录（用于监控和调试）
-        self.request_history = deque(maxlen=100)
+        self.request_history = deque(maxlen=max_requests_per_minute)
         
         # 并发控制
         self.semaphore = threading.Semaphore(concurrency)
         self.active_requests = 0
+
+        # 接口返回限频后暂停发放令牌的截止时间，所有并发线程一起退避
+        self.paused_until = 0.0
         
         logger.info(f"速率限制器初始化: {max_requests_per_minute} 请求/分钟, 并发度: {concurrency}")
     
@@ -116,26 +120,34 @@ class RateLimiter:
         with self.lock:
             self.active_requests -= 1
     
+    def pause(self, seconds: float) -> None:
+        """暂停发放令牌 seconds 秒（接口提示「请求过于频繁」时调用，避免其它线程继续撞限频）"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.time() + seconds)
+
     def _wait_for_token(self) -> None:
         """等待直到有可用令牌"""
         while True:
             with self.lock:
-                # 补充令牌
                 now = time.time()
-                time_passed = now - self.last_refill_time
-                new_tokens = int(time_passed / self.token_interval)
-                
-                if new_tokens > 0:
-                    self.tokens = min(self.max_requests_per_minute, 
-                                     self.tokens + new_tokens)
-                    self.last_refill_time = now
-                
-                # 如果有可用令牌，立即返回
-                if self.tokens > 0:
-                    return
-            
-            # 计算需要等待的时间
-            wait_time = self.token_interval - (now - self.last_refill_time)
+                if now < self.paused_until:
+                    wait_time = self.paused_until - now
+                else:
+                    # 补充令牌
+                    time_passed = now - self.last_refill_time
+                    new_tokens = int(time_passed / self.token_interval)
+                    
+                    if new_tokens > 0:
+                        self.tokens = min(self.max_requests_per_minute, 
+                                         self.tokens + new_tokens)
+                        self.last_refill_time = now
+                    
+                    # 如果有可用令牌，立即返回
+                    if self.tokens > 0:
+                        return
+
+                    # 计算需要等待的时间
+                    wait_time = self.token_interval - (now - self.last_refill_time)
             if wait_time > 0:
                 time.sleep(min(wait_time, 0.1))  # 小步休眠避免CPU占用
     
@@ -228,8 +240,15 @@ def _list_daily_year_files(base_dir: Path) -> List[Path]:
 
 
 def _get_latest_timestamp(stock_code: str) -> Optional[pd.Timestamp]:
-    """获取某股票日线本地最新交易日（用于增量）"""
+    """获取某股票日线本地最新交易日（用于增量），读取分区清单，不再打开年度 parquet"""
+    from backend.data.partition_manifest import latest_timestamp
+
     base_dir = project_root / ".stock_data" / "raw" / "daily" / "by_stock" / f"stock_code={stock_code}"
+    try:
+        return latest_timestamp(base_dir)
+    except Exception as e:
+        logger.warning(f"读取分区清单失败，回退到读取 parquet: {base_dir} - {e}")
+
     files = _list_daily_year_files(base_dir)
     if not files:
         return None
@@ -568,7 +587,7 @@ def fetch_by_trade_date(
             if "请求过于频繁" in err_str:
                 wait_sec = _parse_rate_limit_seconds(err_str)
                 logger.warning(f"日线请求过于频繁，{wait_sec} 秒后重试（第 {attempt + 1}/{max_retries} 次）")
-                time.sleep(wait_sec)
+                _backoff(rate_limiter, wait_sec)
                 continue
             raise
         finally:
@@ -604,6 +623,14 @@ def fetch_by_trade_date(
     return ok_cnt, failed_list
 
 
+def _backoff(rate_limiter: Optional[RateLimiter], seconds: int) -> None:
+    """限频退避：有速率限制器时暂停全部线程的令牌发放，否则仅当前线程休眠"""
+    if rate_limiter:
+        rate_limiter.pause(seconds)
+    else:
+        time.sleep(seconds)
+
+
 def _parse_rate_limit_seconds(err_msg: str, default: int = 25) -> int:
     """从「请求过于频繁…24秒后可用」类错误信息中解析等待秒数，解析不到则返回 default。"""
     s = str(err_msg)
@@ -613,7 +640,7 @@ def _parse_rate_limit_seconds(err_msg: str, default: int = 25) -> int:
     return default
 
 
-def fetch_one_stock(
+def request_one_stock(
     pro,
     ts_code: str,
     incremental: bool,
@@ -624,10 +651,10 @@ def fetch_one_stock(
     with_daily_basic: bool = True,
     token: str = "",
     http_url: str = "",
-) -> bool:
+) -> Optional[Tuple[pd.DataFrame, Optional[pd.DataFrame]]]:
     """
-    采集单只股票日线数据并保存到 raw/daily/by_stock（使用 pro.daily）。
-    默认会拉取 daily_basic 并将 turnover_rate/pe/pb/total_mv 等字段合并到日线后保存。
+    请求单只股票日线数据（pro.daily）及每日指标（pro.daily_basic），只做接口调用。
+    返回 (daily 原始数据, daily_basic 原始数据)；本地已是最新无需请求时返回 None。
     """
     stock_code = ts_code.strip().upper()
     fallback_edt = datetime.now().strftime("%Y%m%d")
@@ -642,48 +669,83 @@ def fetch_one_stock(
     # 若起始日大于结束日，说明本地最后交易日已等于或晚于目标最后交易日，无需请求
     if start_date > end_date:
         logger.info(f"{stock_code} 本地已是最新（无需拉取），跳过")
-        return True
+        return None
 
     logger.info(f"采集 {stock_code} 日线数据(daily): start={start_date}, end={end_date}, incremental={incremental}")
 
-    df = None
+    raw = None
     for attempt in range(max_retries):
         if rate_limiter:
             rate_limiter.acquire()
         try:
-            df = pro.daily(ts_code=stock_code, start_date=start_date, end_date=end_date)
-            df = _standardize_daily_df(df, ts_code=stock_code)
+            raw = pro.daily(ts_code=stock_code, start_date=start_date, end_date=end_date)
             break
         except Exception as e:
             err_str = str(e)
             if "请求过于频繁" in err_str:
                 wait_sec = _parse_rate_limit_seconds(err_str)
                 logger.warning(f"{stock_code} 请求过于频繁，{wait_sec} 秒后重试（第 {attempt + 1}/{max_retries} 次）")
-                time.sleep(wait_sec)
+                _backoff(rate_limiter, wait_sec)
                 continue
             raise
         finally:
             if rate_limiter:
                 rate_limiter.release()
+    else:
+        raise RuntimeError(f"{stock_code} 在 {max_retries} 次重试后仍因限频未获取到数据")
 
-    if df is None:
-        logger.error(f"{stock_code} 在 {max_retries} 次重试后仍因限频未获取到数据，跳过")
-        return False
-    if len(df) == 0:
-        logger.warning(f"{stock_code} 返回空数据")
-        return True
-
-    if with_daily_basic and token and http_url is not None:
-        basic_df = _fetch_daily_basic_for_stock(
+    basic = None
+    if raw is not None and len(raw) > 0 and with_daily_basic and token and http_url is not None:
+        basic = _fetch_daily_basic_for_stock(
             pro, stock_code, start_date, end_date, token, http_url, rate_limiter
         )
-        df = _merge_daily_basic(df, basic_df)
+    return raw, basic
 
+
+def save_one_stock(ts_code: str, payload: Tuple[pd.DataFrame, Optional[pd.DataFrame]], incremental: bool) -> bool:
+    """解析 request_one_stock 返回的原始数据，合并每日指标后保存到 raw/daily/by_stock"""
+    stock_code = ts_code.strip().upper()
+    raw, basic = payload
+    df = _standardize_daily_df(raw, ts_code=stock_code)
+    if df is None or len(df) == 0:
+        logger.warning(f"{stock_code} 返回空数据")
+        return True
+
+    df = _merge_daily_basic(df, basic)
     ok = _save_daily_df(df, stock_code=stock_code, incremental=incremental)
     logger.info(f"{stock_code} 保存结果: {ok}, 行数: {len(df)}")
     return ok
 
 
+def fetch_one_stock(
+    pro,
+    ts_code: str,
+    incremental: bool,
+    sdt: Optional[str],
+    edt: Optional[str],
+    rate_limiter: Optional[RateLimiter] = None,
+    max_retries: int = 5,
+    with_daily_basic: bool = True,
+    token: str = "",
+    http_url: str = "",
+) -> bool:
+    """
+    采集单只股票日线数据并保存到 raw/daily/by_stock（使用 pro.daily）。
+    默认会拉取 daily_basic 并将 turnover_rate/pe/pb/total_mv 等字段合并到日线后保存。
+    """
+    try:
+        payload = request_one_stock(
+            pro, ts_code, incremental, sdt, edt, rate_limiter, max_retries=max_retries,
+            with_daily_basic=with_daily_basic, token=token, http_url=http_url,
+        )
+    except RuntimeError as e:
+        logger.error(f"{e}，跳过")
+        return False
+    if payload is None:
+        return True
+    return save_one_stock(ts_code, payload, incremental=incremental)
+
+
 def _read_missing_list(file_path: Path) -> List[str]:
     """从缺失股票列表文件读取股票代码"""
     try:
@@ -864,6 +926,8 @@ def _parse_args():
                        help="每分钟最大请求数（默认400，根据API限制调整）")
     parser.add_argument("--concurrency", type=int, default=1,
                        help="并发请求数（默认1，建议根据网络情况和服务器承受能力调整）")
+    parser.add_argument("--save-workers", type=int, default=2,
+                       help="解析与 Parquet 写入线程数（默认2）")
     parser.add_argument(
         "--with-daily-basic",
         dest="with_daily_basic",
@@ -903,47 +967,30 @@ def _run_batch(
     http_url: str = "",
     failed_out: Optional[List[str]] = None,
 ) -> None:
-    """批量执行采集（带速率限制）。failed_out 非空时，拉取失败的 ts_code 会追加到该列表。"""
-    ok_cnt = 0
-    start_time = time.time()
-    with_daily_basic = getattr(args, "with_daily_basic", True)
+    """
+    批量执行采集（带速率限制）。failed_out 非空时，拉取失败的 ts_code 会追加到该列表。
 
-    for i, ts_code in enumerate(stocks, 1):
-        try:
-            ok = fetch_one_stock(
-                pro, ts_code, args.incremental,
-                args.start_date, args.end_date, rate_limiter,
-                with_daily_basic=with_daily_basic, token=token, http_url=http_url,
-            )
-            if ok:
-                ok_cnt += 1
-                if ckpt_path:
-                    _write_checkpoint(ckpt_path, ts_code)
-            else:
-                if failed_out is not None:
-                    failed_out.append(ts_code)
-        except Exception as e:
-            logger.error(f"处理失败: {ts_code} - {e}")
-            if failed_out is not None:
-                failed_out.append(ts_code)
-        
-        # 显示进度和速率状态
-        if i % 10 == 0 or i == len(stocks):
-            status = rate_limiter.get_status()
-            elapsed = time.time() - start_time
-            rate_per_minute = i / elapsed * 60 if elapsed > 0 else 0
-            
-            logger.info(f"进度: {i}/{len(stocks)} ({i/len(stocks)*100:.1f}%), "
-                       f"成功: {ok_cnt}, "
-                       f"速率: {rate_per_minute:.1f} 股票/分钟, "
-                       f"请求: {status['recent_requests_per_minute']:.1f} 请求/分钟")
-        
-        # 原有的休眠（可选保留，但现在主要用速率限制器）
-        if args.sleep and args.sleep > 0:
-            time.sleep(args.sleep)
-    
-    total_time = time.time() - start_time
-    logger.info(f"完成：成功 {ok_cnt}/{len(stocks)}，总耗时 {total_time:.1f} 秒")
+    接口请求在 --concurrency 个线程上并发执行（共享 rate_limiter 令牌桶），
+    解析与 Parquet 写入在 --save-workers 个线程上执行；checkpoint 按股票顺序推进。
+    """
+    from backend.data.fetch_pipeline import FetchPipeline
+
+    with_daily_basic = getattr(args, "with_daily_basic", True)
+    pipeline = FetchPipeline(
+        fetch=lambda ts_code: request_one_stock(
+            pro, ts_code, args.incremental, args.start_date, args.end_date, rate_limiter,
+            with_daily_basic=with_daily_basic, token=token, http_url=http_url,
+        ),
+        save=lambda ts_code, payload: save_one_stock(ts_code, payload, incremental=args.incremental),
+        fetch_workers=args.concurrency,
+        save_workers=args.save_workers,
+        checkpoint=(lambda ts_code: _write_checkpoint(ckpt_path, ts_code)) if ckpt_path else None,
+        rate_limiter=rate_limiter,
+        sleep=args.sleep,
+    )
+    _, failed = pipeline.run(stocks)
+    if failed_out is not None:
+        failed_out.extend(ts_code for ts_code, _ in failed)
 
 
 if __name__ == "__main__":
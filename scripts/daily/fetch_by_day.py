@@ -221,8 +221,15 @@ def _list_daily_year_files(base_dir: Path) -> List[Path]:
 
 
 def _get_latest_timestamp(stock_code: str) -> Optional[pd.Timestamp]:
-    """获取某股票日线本地最新交易日（用于增量）"""
+    """获取某股票日线本地最新交易日（用于增量），读取分区清单，不再打开年度 parquet"""
+    from backend.data.partition_manifest import latest_timestamp
+
     base_dir = project_root / ".stock_data" / "raw" / "daily" / "by_stock" / f"stock_code={stock_code}"
+    try:
+        return latest_timestamp(base_dir)
+    except Exception as e:
+        logger.warning(f"读取分区清单失败，回退到读取 parquet: {base_dir} - {e}")
+
     files = _list_daily_year_files(base_dir)
     if not files:
         return None
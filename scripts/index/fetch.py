@@ -159,8 +159,15 @@ def _list_index_daily_parquet(base_dir: Path) -> List[Path]:
 
 
 def _get_latest_date_index(index_code: str, base_path: Path) -> Optional[pd.Timestamp]:
-    """获取某指数日线本地最新交易日。"""
+    """获取某指数日线本地最新交易日，读取分区清单，不再打开年度 parquet。"""
+    from backend.data.partition_manifest import latest_timestamp
+
     base_dir = base_path / "raw" / "daily" / "by_index" / f"index_code={index_code}"
+    try:
+        return latest_timestamp(base_dir)
+    except Exception as e:
+        logger.warning(f"读取分区清单失败，回退到读取 parquet: {base_dir} - {e}")
+
     files = _list_index_daily_parquet(base_dir)
     if not files:
         return None
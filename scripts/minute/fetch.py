@@ -6,8 +6,13 @@
 - 运行时不指定 --stocks 时从数据库 stock_basic 表获取股票列表。
 - 对每只股票取本地最后日期与 trade_cal 最后交易日，仅当需要补数时才拉取；结束时生成拉取失败股票列表（CSV + txt）。
 
+- 接口请求在 --concurrency 个线程上并发执行（共享令牌桶限速），解析与 Parquet 写入在 --save-workers 个线程上执行；
+  --checkpoint 按股票顺序推进，乱序完成时不会越过尚未处理完的股票。
+- 日常增量（未指定 --start-date）只把新数据写成月度增量片段，本地最新时间从分区清单 _manifest.json 读取；
+  每月片段达到 20 个时自动合并，也可用 --compact 在拉取结束后合并。
+
 加速建议（在接口不报限流的前提下）：
-  --max-requests-per-minute 450 --concurrency 6
+  --max-requests-per-minute 450 --concurrency 6 --save-workers 2
 
 示例：
   python scripts/minute/fetch.py
@@ -69,7 +74,7 @@ class RateLimiter:
         self.lock = threading.RLock()
         
         # 请求历史记录（用于监控和调试）
-        self.request_history = deque(maxlen=100)
+        self.request_history = deque(maxlen=max_requests_per_minute)
         
         # 并发控制
         self.semaphore = threading.Semaphore(concurrency)
@@ -195,32 +200,25 @@ def _apply_resume(stocks: List[str], resume_after: Optional[str]) -> List[str]:
     return stocks[idx + 1 :]
 
 
-def _list_month_files(base_dir: Path) -> List[Path]:
-    """列出某股票目录下的所有月度 parquet 文件"""
-    if not base_dir.exists():
-        return []
-    return sorted(base_dir.glob("year=*/**/*.parquet"))
+_storage = None
+
+
+def _get_storage():
+    """进程内共享的 RawDataStorage（避免每只股票重复初始化）"""
+    global _storage
+    if _storage is None:
+        from backend.data.raw_data_storage import RawDataStorage
+        _storage = RawDataStorage()
+    return _storage
 
 
 def _get_latest_timestamp(stock_code: str, period: int = PERIOD_1MIN,
                           minute_subdir: str = MINUTE_SUBDIR_1MIN) -> Optional[pd.Timestamp]:
-    """获取某股票 1 分钟本地最新时间戳（用于增量）。"""
-    base_dir = project_root / ".stock_data" / "raw" / minute_subdir / f"stock_code={stock_code}"
-    files = _list_month_files(base_dir)
-    if not files:
-        return None
-    latest_file = files[-1]
+    """获取某股票 1 分钟本地最新时间戳（用于增量），读取分区清单，不再打开月度 parquet。"""
     try:
-        df = pd.read_parquet(latest_file)
-        if df is None or len(df) == 0:
-            return None
-        if "period" in df.columns:
-            df = df[df["period"] == period]
-        if "timestamp" not in df.columns or len(df) == 0:
-            return None
-        return pd.to_datetime(df["timestamp"]).max()
+        return _get_storage().get_minute_latest_timestamp(stock_code, minute_subdir=minute_subdir)
     except Exception as e:
-        logger.warning(f"读取最新时间戳失败: {latest_file} - {e}")
+        logger.warning(f"读取最新时间戳失败: {stock_code} - {e}")
         return None
 
 
@@ -308,35 +306,38 @@ def _iter_month_chunks(start_dt: str, end_dt: str, months: int = CHUNK_MONTHS) -
     return chunks
 
 
-def _fetch_stk_mins_chunked(pro, ts_code: str, start_dt: str, end_dt: str, 
-                           rate_limiter: Optional[RateLimiter] = None) -> Optional[pd.DataFrame]:
-    """按两个月分片调用 stk_mins，合并去重后返回标准化 DataFrame"""
+def _request_stk_mins_chunked(pro, ts_code: str, start_dt: str, end_dt: str,
+                              rate_limiter: Optional[RateLimiter] = None) -> List[pd.DataFrame]:
+    """按月分片调用 stk_mins，只做接口请求，返回各分片的原始 DataFrame"""
     chunks = _iter_month_chunks(start_dt, end_dt, months=CHUNK_MONTHS)
     logger.info(f"{ts_code} 将按 {CHUNK_MONTHS} 个月分片请求，共 {len(chunks)} 段")
 
-    dfs = []
+    raws = []
     for i, (s1, e1) in enumerate(chunks, 1):
         if rate_limiter:
             rate_limiter.acquire()
         
         try:
             logger.info(f"{ts_code} 请求分片 {i}/{len(chunks)}: {s1} ~ {e1}")
-            df1 = pro.stk_mins(ts_code=ts_code, freq=FREQ_1MIN, start_date=s1, end_date=e1)
-            df1 = _standardize_stk_mins_df(df1, ts_code=ts_code)
-            if df1 is not None and len(df1) > 0:
-                dfs.append(df1)
+            raws.append(pro.stk_mins(ts_code=ts_code, freq=FREQ_1MIN, start_date=s1, end_date=e1))
         finally:
             if rate_limiter:
                 rate_limiter.release()
-        
-        # 显示速率状态
-        if rate_limiter and i % 5 == 0:
-            status = rate_limiter.get_status()
-            logger.info(f"速率状态: {status['recent_requests_per_minute']:.1f} 请求/分钟, "
-                       f"可用令牌: {status['tokens_available']}/{status['max_tokens']}")
+    return raws
+
+
+def _merge_stk_mins_chunks(raws: List[pd.DataFrame], ts_code: str) -> Optional[pd.DataFrame]:
+    """标准化各分片数据，合并去重后返回"""
+    dfs = []
+    for df1 in raws:
+        df1 = _standardize_stk_mins_df(df1, ts_code=ts_code)
+        if df1 is not None and len(df1) > 0:
+            dfs.append(df1)
 
     if not dfs:
         return None
+    if len(dfs) == 1:
+        return dfs[0]
     df_all = pd.concat(dfs, ignore_index=True)
     # 去重：以 timestamp 为主键（同一股票同一周期）
     df_all = df_all.drop_duplicates(subset=["timestamp", "stock_code", "period"], keep="last")
@@ -344,6 +345,13 @@ def _fetch_stk_mins_chunked(pro, ts_code: str, start_dt: str, end_dt: str,
     return df_all
 
 
+def _fetch_stk_mins_chunked(pro, ts_code: str, start_dt: str, end_dt: str, 
+                           rate_limiter: Optional[RateLimiter] = None) -> Optional[pd.DataFrame]:
+    """按月分片调用 stk_mins，合并去重后返回标准化 DataFrame"""
+    raws = _request_stk_mins_chunked(pro, ts_code, start_dt, end_dt, rate_limiter)
+    return _merge_stk_mins_chunks(raws, ts_code=ts_code)
+
+
 def _calc_fetch_range(
     stock_code: str,
     incremental: bool,
@@ -467,10 +475,11 @@ def _select_and_validate(df: pd.DataFrame) -> pd.DataFrame:
     return df[required].sort_values("timestamp").reset_index(drop=True)
 
 
-def _save_minute_df(df: pd.DataFrame, stock_code: str, incremental: bool) -> bool:
-    """按年月分组保存 1 分钟数据到 RawDataStorage（minute_by_stock）。"""
-    from backend.data.raw_data_storage import RawDataStorage
+def _save_minute_df(df: pd.DataFrame, stock_code: str, incremental: bool, append: bool = False) -> bool:
+    """按年月分组保存 1 分钟数据到 RawDataStorage（minute_by_stock）。
 
+    append=True 时只把晚于本地最新时间的数据写成增量片段，不重写月度文件。
+    """
     if df is None or len(df) == 0:
         return True
     df = df.copy()
@@ -478,22 +487,27 @@ def _save_minute_df(df: pd.DataFrame, stock_code: str, incremental: bool) -> boo
     df["year"] = df["timestamp"].dt.year
     df["month"] = df["timestamp"].dt.month
 
-    storage = RawDataStorage()
+    storage = _get_storage()
     ok_any = False
     for (y, m), g in df.groupby(["year", "month"]):
         g2 = g.drop(columns=["year", "month"])
-        ok = storage.save_minute_data_by_stock(
-            g2, stock_code=stock_code, year=int(y), month=int(m),
-            incremental=incremental, minute_subdir=MINUTE_SUBDIR_1MIN
-        )
+        if append:
+            ok = storage.append_minute_data_by_stock(
+                g2, stock_code=stock_code, year=int(y), month=int(m), minute_subdir=MINUTE_SUBDIR_1MIN
+            )
+        else:
+            ok = storage.save_minute_data_by_stock(
+                g2, stock_code=stock_code, year=int(y), month=int(m),
+                incremental=incremental, minute_subdir=MINUTE_SUBDIR_1MIN
+            )
         ok_any = ok_any or ok
     return ok_any
 
 
-def fetch_one_stock(pro, ts_code: str, incremental: bool,
-                    sdt: Optional[str], edt: Optional[str],
-                    rate_limiter: Optional[RateLimiter] = None) -> bool:
-    """采集单只股票 1 分钟数据并保存（使用 stk_mins）"""
+def request_one_stock(pro, ts_code: str, incremental: bool,
+                      sdt: Optional[str], edt: Optional[str],
+                      rate_limiter: Optional[RateLimiter] = None) -> Optional[List[pd.DataFrame]]:
+    """请求单只股票 1 分钟数据（使用 stk_mins），只做接口调用；无需请求时返回 None"""
     stock_code = ts_code.upper()
 
     # 兼容两类入参
@@ -513,31 +527,44 @@ def fetch_one_stock(pro, ts_code: str, incremental: bool,
 
     if start_dt and end_dt and start_dt > end_dt:
         logger.info(f"{stock_code} 本地已有当日 15:00 后数据，跳过当日请求")
-        return True
+        return None
+
+    span_days = (_parse_dt(end_dt) - _parse_dt(start_dt)).days if start_dt and end_dt else 0
+    if span_days >= 70:
+        return _request_stk_mins_chunked(pro, stock_code, start_dt, end_dt, rate_limiter)
 
     if rate_limiter:
         rate_limiter.acquire()
-
     try:
-        span_days = (_parse_dt(end_dt) - _parse_dt(start_dt)).days if start_dt and end_dt else 0
-        if span_days >= 70:
-            df = _fetch_stk_mins_chunked(pro, stock_code, start_dt, end_dt, rate_limiter)
-        else:
-            df = pro.stk_mins(ts_code=stock_code, freq=FREQ_1MIN, start_date=start_dt, end_date=end_dt)
-            df = _standardize_stk_mins_df(df, ts_code=stock_code)
+        return [pro.stk_mins(ts_code=stock_code, freq=FREQ_1MIN, start_date=start_dt, end_date=end_dt)]
     finally:
         if rate_limiter:
             rate_limiter.release()
 
+
+def save_one_stock(ts_code: str, raws: List[pd.DataFrame], incremental: bool, append: bool = False) -> bool:
+    """解析 request_one_stock 返回的原始数据并保存；append 见 _save_minute_df"""
+    stock_code = ts_code.upper()
+    df = _merge_stk_mins_chunks(raws, ts_code=stock_code)
     if df is None or len(df) == 0:
         logger.warning(f"{stock_code} 返回空数据")
         return True
 
-    ok = _save_minute_df(df, stock_code=stock_code, incremental=incremental)
+    ok = _save_minute_df(df, stock_code=stock_code, incremental=incremental, append=append)
     logger.info(f"{stock_code} 保存结果: {ok}, 行数: {len(df)}")
     return ok
 
 
+def fetch_one_stock(pro, ts_code: str, incremental: bool,
+                    sdt: Optional[str], edt: Optional[str],
+                    rate_limiter: Optional[RateLimiter] = None) -> bool:
+    """采集单只股票 1 分钟数据并保存（使用 stk_mins）"""
+    raws = request_one_stock(pro, ts_code, incremental, sdt, edt, rate_limiter)
+    if raws is None:
+        return True
+    return save_one_stock(ts_code, raws, incremental=incremental)
+
+
 def _load_stock_list_from_db() -> Tuple[List[str], bool]:
     """从 MySQL stock_basic 表读取股票代码列表。返回 (codes, True)；失败或空返回 ([], False)。"""
     try:
@@ -719,7 +746,11 @@ def _parse_args():
     parser.add_argument("--max-requests-per-minute", type=int, default=600,
                        help="每分钟最大请求数（默认450，限流时可调低）")
     parser.add_argument("--concurrency", type=int, default=4,
-                       help="并发请求数（默认6，网络 I/O 时可并发多路请求以加速）")
+                       help="并发请求数（默认4，网络 I/O 时可并发多路请求以加速）")
+    parser.add_argument("--save-workers", type=int, default=2,
+                       help="解析与 Parquet 写入线程数（默认2）")
+    parser.add_argument("--compact", action="store_true",
+                       help="拉取结束后将本次处理股票的增量片段合并进月度文件（默认每月片段达到 20 个时自动合并）")
     
     return parser.parse_args()
 
@@ -734,44 +765,36 @@ def _run_batch(pro, stocks: List[str], args, ckpt_path: Optional[Path],
                rate_limiter: RateLimiter,
                failed_out: Optional[List[Tuple[str, str]]] = None,
                last_trade_date: Optional[str] = None) -> None:
-    """批量执行采集；失败时写入 failed_out 列表 (symbol, reason)。"""
-    if failed_out is None:
-        failed_out = []
-    ok_cnt = 0
-    start_time = time.time()
-    edt = last_trade_date or args.end_date or datetime.now().strftime("%Y%m%d")
-
-    for i, ts_code in enumerate(stocks, 1):
-        try:
-            ok = fetch_one_stock(
-                pro, ts_code, args.incremental,
-                args.start_date, args.end_date or last_trade_date, rate_limiter
-            )
-            if ok:
-                ok_cnt += 1
-                if ckpt_path:
-                    _write_checkpoint(ckpt_path, ts_code)
-            else:
-                failed_out.append((ts_code, "fetch_or_save_failed"))
-        except Exception as e:
-            logger.error(f"处理失败: {ts_code} - {e}")
-            failed_out.append((ts_code, str(e)[:200]))
-        
-        if i % 10 == 0 or i == len(stocks):
-            status = rate_limiter.get_status()
-            elapsed = time.time() - start_time
-            rate_per_minute = i / elapsed * 60 if elapsed > 0 else 0
+    """批量执行采集；失败时写入 failed_out 列表 (symbol, reason)。
 
-            logger.info(f"进度: {i}/{len(stocks)} ({i/len(stocks)*100:.1f}%), "
-                       f"成功: {ok_cnt}, "
-                       f"速率: {rate_per_minute:.1f} 股票/分钟, "
-                       f"请求: {status['recent_requests_per_minute']:.1f} 请求/分钟")
+    接口请求在 --concurrency 个线程上并发执行（共享 rate_limiter 令牌桶），
+    解析与 Parquet 写入在 --save-workers 个线程上执行；checkpoint 按股票顺序推进。
+    """
+    from backend.data.fetch_pipeline import FetchPipeline
 
-        if args.sleep and args.sleep > 0:
-            time.sleep(args.sleep)
+    if failed_out is None:
+        failed_out = []
+    edt = args.end_date or last_trade_date
+    # 日常增量只追加增量片段；指定 --start-date 补历史时走合并重写
+    append = args.incremental and not args.start_date
+
+    pipeline = FetchPipeline(
+        fetch=lambda ts_code: request_one_stock(
+            pro, ts_code, args.incremental, args.start_date, edt, rate_limiter
+        ),
+        save=lambda ts_code, raws: save_one_stock(ts_code, raws, incremental=args.incremental, append=append),
+        fetch_workers=args.concurrency,
+        save_workers=args.save_workers,
+        checkpoint=(lambda ts_code: _write_checkpoint(ckpt_path, ts_code)) if ckpt_path else None,
+        rate_limiter=rate_limiter,
+        sleep=args.sleep,
+    )
+    _, failed = pipeline.run(stocks)
+    failed_out.extend(failed)
 
-    total_time = time.time() - start_time
-    logger.info(f"完成：成功 {ok_cnt}/{len(stocks)}，失败 {len(failed_out)}，总耗时 {total_time:.1f} 秒")
+    if args.compact:
+        n = _get_storage().compact_minute_data(stocks, minute_subdir=MINUTE_SUBDIR_1MIN)
+        logger.info(f"已合并 {n} 个月度分区的增量片段")
 
 
 if __name__ == "__main__":
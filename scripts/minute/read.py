@@ -104,9 +104,17 @@ def load_local_minute_df(
     :param base_path: 数据根目录，默认 project_root/.stock_data
     :return: (start_ts, end_ts, df)。若未传日期则 start/end 为本地实际范围；df 为过滤后的 DataFrame
     """
+    from backend.data.partition_manifest import manifest_files
+
     base = base_path or project_root / ".stock_data"
     base_dir = base / "raw" / "minute_by_stock" / f"stock_code={stock_code}"
-    files = _list_month_files(base_dir)
+    start_dt = _parse_date(start_date)
+    end_dt = _parse_date(end_date)
+
+    # 有完整分区清单时只读取与日期范围有交集的文件，否则回退到 glob 全部文件
+    files = manifest_files(base_dir, start_dt, end_dt)
+    if files is None:
+        files = _list_month_files(base_dir)
     if not files:
         logger.warning(f"未找到本地数据: {base_dir}")
         return None, None, None
@@ -129,8 +137,6 @@ def load_local_minute_df(
     if "timestamp" in df_all.columns:
         df_all = df_all.sort_values("timestamp").reset_index(drop=True)
 
-    start_dt = _parse_date(start_date)
-    end_dt = _parse_date(end_date)
     if start_dt is not None:
         df_all = df_all[df_all["timestamp"] >= start_dt]
     if end_dt is not None:
@@ -60,10 +60,17 @@ def _get_dt_range_from_parquet(symbol: str, base_path: Path) -> Tuple[Optional[d
     """从 parquet 文件获取某股票分钟数据的起止时间"""
     import pandas as pd
 
+    from backend.data.partition_manifest import load_manifest
+
     stock_dir = base_path / f"stock_code={symbol}"
     if not stock_dir.exists():
         return None, None
 
+    # 有完整分区清单时直接读取起止时间，不再打开 parquet 文件
+    manifest = load_manifest(stock_dir)
+    if manifest is not None:
+        return manifest.time_range()
+
     # 扫描所有 parquet 文件
     files = sorted(stock_dir.glob("year=*/**/*.parquet"))
     if not files:
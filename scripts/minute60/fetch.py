@@ -207,8 +207,15 @@ def _list_month_files(base_dir: Path) -> List[Path]:
 
 
 def _get_latest_timestamp(stock_code: str) -> Optional[pd.Timestamp]:
-    """获取某股票 60 分钟数据的本地最新时间戳（用于增量）。"""
+    """获取某股票 60 分钟数据的本地最新时间戳（用于增量），读取分区清单，不再打开月度 parquet。"""
+    from backend.data.partition_manifest import latest_timestamp
+
     base_dir = project_root / ".stock_data" / "raw" / MINUTE_60_SUBDIR / f"stock_code={stock_code}"
+    try:
+        return latest_timestamp(base_dir)
+    except Exception as e:
+        logger.warning(f"读取分区清单失败，回退到读取 parquet: {base_dir} - {e}")
+
     files = _list_month_files(base_dir)
     if not files:
         return None
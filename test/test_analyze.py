@@ -3,7 +3,8 @@ import os
 import zipfile
 from tqdm import tqdm
 import pandas as pd
-from czsc.analyze import CZSC, RawBar, NewBar, remove_include, FX, check_fx, Direction, kline_pro
+from czsc.analyze import CZSC, RawBar, NewBar, BI, remove_include, FX, check_fx, check_fxs, check_bi, Direction, kline_pro
+from czsc.enum import Mark
 from czsc.enum import Freq
 from collections import OrderedDict
 
@@ -90,3 +91,128 @@ def test_czsc_update():
     file_html = "x.html"
     chart.render(file_html)
     os.remove(file_html)
+
+
+class LegacyCZSC(CZSC):
+    """全量重算 check_fxs / check_bi 的笔识别实现，作为增量实现的对照基准"""
+
+    def _CZSC__update_bi(self):
+        bars_ubi = self.bars_ubi
+        if len(bars_ubi) < 3:
+            return
+
+        if not self.bi_list:
+            fxs = check_fxs(bars_ubi)
+            if not fxs:
+                return
+
+            fx_a = fxs[0]
+            fxs_a = [x for x in fxs if x.mark == fx_a.mark]
+            for fx in fxs_a:
+                if (fx_a.mark == Mark.D and fx.low <= fx_a.low) \
+                        or (fx_a.mark == Mark.G and fx.high >= fx_a.high):
+                    fx_a = fx
+            bars_ubi = [x for x in bars_ubi if x.dt >= fx_a.elements[0].dt]
+
+            bi, bars_ubi_ = check_bi(bars_ubi)
+            if isinstance(bi, BI):
+                self.bi_list.append(bi)
+            self.bars_ubi = bars_ubi_
+            return
+
+        bi, bars_ubi_ = check_bi(bars_ubi)
+        self.bars_ubi = bars_ubi_
+        if isinstance(bi, BI):
+            self.bi_list.append(bi)
+
+        last_bi = self.bi_list[-1]
+        bars_ubi = self.bars_ubi
+        if (last_bi.direction == Direction.Up and bars_ubi[-1].high > last_bi.high) \
+                or (last_bi.direction == Direction.Down and bars_ubi[-1].low < last_bi.low):
+            self.bars_ubi = last_bi.bars[:-2] + [x for x in bars_ubi if x.dt >= last_bi.bars[-2].dt]
+            self.bi_list.pop(-1)
+
+    @property
+    def ubi_fxs(self):
+        return check_fxs(self.bars_ubi) if self.bars_ubi else []
+
+
+def _bi_snapshot(c):
+    """提取笔识别结果中用于比较的关键字段"""
+    bis = [(bi.fx_a.dt, bi.fx_b.dt, bi.fx_a.fx, bi.fx_b.fx, bi.direction,
+            [x.dt for x in bi.bars], [x.dt for x in bi.fxs]) for bi in c.bi_list]
+    ubi = [(x.dt, x.high, x.low) for x in c.bars_ubi]
+    fxs = [(x.dt, x.mark, x.fx) for x in c.ubi_fxs]
+    return bis, ubi, fxs
+
+
+def _assert_same_bi(bars, max_bi_num=100000, step=1):
+    c1 = CZSC(bars[:1], max_bi_num=max_bi_num)
+    c2 = LegacyCZSC(bars[:1], max_bi_num=max_bi_num)
+    for i, bar in enumerate(bars[1:], 1):
+        c1.update(bar)
+        c2.update(bar)
+        if i % step == 0 or i == len(bars) - 1:
+            assert _bi_snapshot(c1) == _bi_snapshot(c2), f"笔识别结果不一致：{bar.dt}"
+    return c1
+
+
+def test_incremental_bi_daily():
+    """增量笔识别与全量重算的结果逐根K线一致"""
+    bars = read_daily()
+    c = _assert_same_bi(bars)
+    assert len(c.bi_list) > 100
+
+
+def test_incremental_bi_minute():
+    """分钟K线上增量笔识别与全量重算一致，同时覆盖同一时间K线的更新"""
+    bars = read_1min()[:30000]
+    c = _assert_same_bi(bars, step=50)
+    assert len(c.bi_list) > 100
+
+    # 同一根K线多次更新（实盘中最后一根K线不断变化）
+    c1 = CZSC(bars[:2000])
+    c2 = LegacyCZSC(bars[:2000])
+    for bar in bars[2000:5000]:
+        for k in (0.5, 0.8, 1.0):
+            tmp = RawBar(symbol=bar.symbol, id=bar.id, dt=bar.dt, freq=bar.freq, open=bar.open,
+                         close=bar.close, high=bar.open + (bar.high - bar.open) * k,
+                         low=bar.open - (bar.open - bar.low) * k, vol=bar.vol * k, amount=bar.amount * k)
+            c1.update(tmp)
+            c2.update(tmp)
+        assert _bi_snapshot(c1) == _bi_snapshot(c2), f"笔识别结果不一致：{bar.dt}"
+
+
+def test_czsc_retention():
+    """bi_list 与 bars_raw 的数量控制：保留最近 max_bi_num 笔，bars_raw 从第一笔的起点开始"""
+    bars = read_daily()
+    c = CZSC(bars[:10], max_bi_num=10)
+    for bar in bars[10:]:
+        c.update(bar)
+        assert len(c.bi_list) <= 10
+        if c.bi_list:
+            sdt = c.bi_list[0].fx_a.elements[0].dt
+            assert c.bars_raw[0].dt == min(x.dt for x in bars if x.dt >= sdt)
+        assert c.bars_raw[-1].dt == bar.dt
+
+
+def test_czsc_unpickle_legacy():
+    """旧版本序列化的 CZSC 对象（没有增量分型状态和指标引擎）反序列化后可以继续更新，结果与连续更新一致"""
+    import pickle
+    from czsc.signals.tas import update_ma_cache
+
+    bars = read_daily()
+    c1 = CZSC(bars[:2000])
+    c2 = pickle.loads(pickle.dumps(c1))
+    for key in ["_CZSC__ubi_fxs", "_CZSC__ubi_fxs_stash", "_CZSC__first_bi", "indicators"]:
+        del c2.__dict__[key]
+    c2 = pickle.loads(pickle.dumps(c2))
+
+    # 两个对象各自写入K线缓存，不能共用同一组 RawBar
+    for bar1, bar2 in zip(bars[2000:], pickle.loads(pickle.dumps(bars[2000:]))):
+        c1.update(bar1)
+        c2.update(bar2)
+        assert update_ma_cache(c1, ma_type="SMA", timeperiod=5) == update_ma_cache(c2, ma_type="SMA", timeperiod=5)
+    assert _bi_snapshot(c1) == _bi_snapshot(c2)
+    assert [x.dt for x in c1.bars_raw] == [x.dt for x in c2.bars_raw]
+    assert [x.cache for x in c1.bars_raw[-100:]] == [x.cache for x in c2.bars_raw[-100:]]
@@ -4,6 +4,7 @@ import pandas as pd
 from tqdm import tqdm
 from czsc.objects import Freq
 from czsc.utils.bar_generator import BarGenerator, freq_end_time, resample_bars, check_freq_and_market, freq_market_times
+from czsc.utils.bar_generator import freq_end_times, freq_edt_map
 from test.test_analyze import read_1min, read_daily
 
 cur_path = os.path.split(os.path.realpath(__file__))[0]
@@ -276,6 +277,73 @@ def test_freq_end_time():
     assert freq_end_time(pd.to_datetime("2021-11-11 09:43"), Freq.W) == pd.to_datetime("2021-11-12")
 
     assert freq_end_time(pd.to_datetime("2021-03-05"), Freq.M) == pd.to_datetime("2021-03-31")
+    assert freq_end_time(pd.to_datetime("2021-11-11 09:43:20"), Freq.F5) == pd.to_datetime("2021-11-11 09:45")
+    assert freq_end_time(pd.to_datetime("2021-11-11 23:50"), Freq.F30, "期货") == pd.to_datetime("2021-11-12 00:00")
+
+    # BarGenerator 内部使用预先生成的增量表，结果与 freq_end_time 一致
+    for key, edt_map in freq_edt_map.items():
+        freq, market = key.split("_")
+        bg = BarGenerator(base_freq="1分钟", freqs=[freq] if freq != "1分钟" else [], market=market)
+        for hm in edt_map:
+            dt = pd.to_datetime(f"2021-11-11 {hm}")
+            assert bg._freq_end_time(dt, Freq(freq)) == freq_end_time(dt, Freq(freq), market)
+
+
+def test_freq_end_times():
+    """向量化的 freq_end_times 与逐个计算的 freq_end_time 一致"""
+    for key, edt_map in freq_edt_map.items():
+        freq, market = key.split("_")
+        dts = [pd.to_datetime(f"2021-11-11 {hm}") for hm in edt_map] + [pd.to_datetime("2021-11-11 09:42:30")]
+        dts = pd.Series(dts)
+        dts = dts[dts.dt.strftime("%H:%M").isin(list(edt_map))]
+        expected = [freq_end_time(x, freq, market) for x in dts]
+        assert (freq_end_times(dts, freq, market) == pd.DatetimeIndex(expected).to_numpy()).all(), key
+
+    dts = pd.Series(pd.date_range("2019-12-25", "2021-01-05", freq="7h13min"))
+    for freq in [Freq.D, Freq.W, Freq.M, Freq.S, Freq.Y]:
+        expected = [freq_end_time(x, freq) for x in dts]
+        assert (freq_end_times(dts, freq) == pd.DatetimeIndex(expected).to_numpy()).all(), freq
+
+
+def test_resample_bars_multi():
+    df = pd.DataFrame(kline)
+    freqs = ["5分钟", "15分钟", "30分钟", "60分钟", "日线"]
+    res = resample_bars(df, freqs, raw_bars=False)
+    assert list(res.keys()) == freqs
+    for freq in freqs:
+        pd.testing.assert_frame_equal(res[freq], resample_bars(df, freq, raw_bars=False))
+
+    bars = resample_bars(df, [Freq.F30, Freq.D], raw_bars=True)
+    assert len(bars["30分钟"]) == 7991 and len(bars["日线"]) == 1000
+    assert bars["30分钟"][0].id == 1 and bars["30分钟"][0].freq == Freq.F30
+
+
+def _legacy_resample_df(df, freq):
+    """旧版本 resample_bars(raw_bars=False) 的实现：逐行计算周期结束时间，按 freq_edt 分组聚合"""
+    freq = Freq(freq)
+    if freq.value.endswith("分钟"):
+        uni_times = sorted(df["dt"].tail(2000).apply(lambda x: x.strftime("%H:%M")).unique().tolist())
+        _, market = check_freq_and_market(uni_times)
+    else:
+        market = "默认"
+    df = df.copy()
+    df["freq_edt"] = df["dt"].apply(lambda x: freq_end_time(x, freq, market))
+    dfk1 = df.groupby("freq_edt").agg({"symbol": "first", "dt": "last", "open": "first", "close": "last",
+                                       "high": "max", "low": "min", "vol": "sum", "amount": "sum", "freq_edt": "last"})
+    dfk1.reset_index(drop=True, inplace=True)
+    dfk1["dt"] = dfk1["freq_edt"]
+    return dfk1[["symbol", "dt", "open", "close", "high", "low", "vol", "amount"]]
+
+
+def test_resample_bars_legacy():
+    """向量化的 resample_bars 与旧版本按 freq_edt 分组聚合的结果完全一致，包括 dtype 和浮点求和的精度"""
+    from czsc import mock
+
+    df = mock.generate_symbol_kines("000001", "1分钟", sdt="20230101", edt="20230401", seed=7)
+    freqs = ["5分钟", "15分钟", "30分钟", "60分钟", "日线", "周线"]
+    res = resample_bars(df, freqs, raw_bars=False)
+    for freq in freqs:
+        pd.testing.assert_frame_equal(res[freq], _legacy_resample_df(df, freq), obj=freq)
 
 
 def test_resample_bars():
@@ -367,3 +435,92 @@ def test_get_intraday_times():
     assert get_intraday_times(freq='120分钟', market='期货') == ['11:00', '15:00', '23:00', '01:00', '02:30']
     x = ['02:00', '04:00', '06:00', '08:00', '10:00', '12:00', '14:00', '16:00', '18:00', '20:00', '22:00', '00:00']
     assert get_intraday_times(freq='120分钟', market='默认') == x
+
+
+def test_bg_list_max_count():
+    """列表存储每次更新后长度严格等于 max_count，超出的K线在原列表上删除"""
+    bg = BarGenerator(base_freq='1分钟', freqs=['5分钟'], max_count=100)
+    lists = {k: v for k, v in bg.bars.items()}
+    for i, bar in enumerate(kline[:1000]):
+        bg.update(bar)
+        assert len(bg.bars['1分钟']) == min(i + 1, 100)
+        assert len(bg.bars['5分钟']) <= 100
+    assert all(bg.bars[k] is v for k, v in lists.items())
+    assert [x.dt for x in bg.bars['1分钟']] == [x.dt for x in kline[900:1000]]
+
+
+def test_columnar_bar_generator():
+    """列式存储的 BarGenerator 与 RawBar 列表版本合成结果一致"""
+    from czsc.utils.bar_store import ColumnarBars
+
+    freqs = ['5分钟', '15分钟', '30分钟', '60分钟', '日线']
+    bg1 = BarGenerator(base_freq='1分钟', freqs=freqs, max_count=1000)
+    bg2 = BarGenerator(base_freq='1分钟', freqs=freqs, max_count=1000, columnar=True)
+    for bar in kline[:20000]:
+        bg1.update(bar)
+        bg2.update(bar)
+
+    for freq in bg1.bars.keys():
+        b1, b2 = bg1.bars[freq], bg2.bars[freq]
+        assert isinstance(b2, ColumnarBars)
+        assert len(b1) == len(b2) <= 1000
+        for x, y in zip(b1, b2):
+            assert x.dt == y.dt and x.id == y.id
+            assert (x.open, x.close, x.high, x.low) == (y.open, y.close, y.high, y.low)
+            assert abs(x.vol - y.vol) < 1e-6 and abs(x.amount - y.amount) <= 1e-6 * abs(x.amount)
+        assert b2[-1].dt == b2.last_dt == b1[-1].dt
+        assert list(b2.close) == [x.close for x in b1]
+
+    # 重复K线不更新
+    bg2.update(kline[19999])
+    assert bg2.bars['1分钟'].last_dt == kline[19999].dt
+
+
+def test_columnar_bars_ring_buffer():
+    from czsc.utils.bar_store import ColumnarBars
+
+    bars = read_daily()
+    cb = ColumnarBars.from_bars(bars[:10], max_count=100)
+    assert len(cb) == 10 and cb[0].dt == bars[0].dt and cb[-1].id == bars[9].id
+    cb.extend(bars[10:1000])
+    assert len(cb) == 100
+    assert cb[0].dt == bars[900].dt and cb[-1].dt == bars[999].dt
+    assert [x.dt for x in cb[-3:]] == [x.dt for x in bars[997:1000]]
+    assert len(cb._ids) <= 200
+
+    df = cb.to_df()
+    assert len(df) == 100 and df['close'].tolist() == [x.close for x in bars[900:1000]]
+
+
+def test_df_bars_convert():
+    from datetime import datetime
+    from czsc import mock
+    from czsc.objects import RawBar
+    from czsc.utils.bar_generator import df_to_bars, bars_to_df
+
+    df = mock.generate_symbol_kines("000001", "30分钟", sdt="20230101", edt="20230301", seed=42)
+    bars = df_to_bars(df, "30分钟")
+    legacy = [RawBar(id=i, symbol=row["symbol"], dt=row["dt"], open=row["open"], close=row["close"], high=row["high"],
+                     low=row["low"], vol=row["vol"], amount=row["amount"], freq=Freq.F30) for i, row in df.iterrows()]
+    assert bars == legacy and isinstance(bars[0].dt, pd.Timestamp)
+
+    bars = df_to_bars(df, Freq.F30, symbol="x", pydatetime=True, id_start=1)
+    assert bars[0].id == 1 and bars[-1].id == len(df) and bars[0].symbol == "x"
+    assert type(bars[0].dt) is datetime and bars[-1].dt == df["dt"].iloc[-1]
+
+    lazy = df_to_bars(df, "30分钟", lazy=True)
+    assert len(lazy) == len(df) and lazy[-1] == legacy[-1]
+
+    dfb = bars_to_df(legacy)
+    assert dfb.columns.tolist() == ["symbol", "id", "dt", "freq", "open", "close", "high", "low", "vol", "amount"]
+    assert dfb["freq"].iloc[0] == "30分钟" and dfb["id"].tolist() == list(range(len(df)))
+    pd.testing.assert_frame_equal(dfb, bars_to_df(lazy))
+    assert df_to_bars(dfb, "30分钟") == legacy
+    assert df_to_bars(df.iloc[:0], "30分钟") == [] and bars_to_df([]).empty
+
+    # format_standard_kline 与旧版本一致，K线编号取 index，不使用 id 列；df_to_bars 默认使用 id 列
+    from czsc.utils.bar_generator import format_standard_kline
+    dfi = df.iloc[10:20].assign(id=range(100, 110))
+    assert [x.id for x in format_standard_kline(dfi, "30分钟")] == list(range(10, 20))
+    assert [x.id for x in df_to_bars(dfi, "30分钟", id_col=None)] == list(range(10, 20))
+    assert [x.id for x in df_to_bars(dfi, "30分钟")] == list(range(100, 110))
@@ -2,7 +2,7 @@
 import numpy as np
 from collections import OrderedDict
 from czsc.utils import x_round
-from czsc.objects import Signal, Factor, Event, Freq, Operate
+from czsc.objects import Signal, Factor, Event, Freq, Operate, ParsedSignals
 from czsc.objects import cal_break_even_point
 
 
@@ -300,3 +300,100 @@ def test_event():
         }
     )
     assert len(event.get_signals_config()) == 3
+
+
+def test_parsed_signals():
+    import pickle
+    from copy import deepcopy
+
+    s = {"15分钟_倒0笔_方向": "向上_其他_其他_0", "15分钟_倒0笔_长度": "大于5_其他_其他_10", "dt": 1}
+    ps = ParsedSignals(s)
+    assert ps == s and ps.parsed("15分钟_倒0笔_方向") == ("向上", "其他", "其他", 0)
+
+    signals = [
+        Signal("15分钟_倒0笔_方向_向上_任意_任意_0"),
+        Signal("15分钟_倒0笔_方向_向下_任意_任意_0"),
+        Signal("15分钟_倒0笔_长度_大于5_其他_任意_10"),
+        Signal("15分钟_倒0笔_长度_大于5_其他_任意_20"),
+    ]
+    assert [x.is_match(ps) for x in signals] == [x.is_match(s) for x in signals] == [True, False, True, False]
+
+    # 修改信号值后，解析结果和匹配结果同步更新
+    ps["15分钟_倒0笔_方向"] = "向下_其他_其他_0"
+    assert not signals[0].is_match(ps) and signals[1].is_match(ps)
+
+    for x in [deepcopy(ps), pickle.loads(pickle.dumps(ps))]:
+        assert x == ps and signals[1].is_match(x)
+
+    try:
+        Signal("15分钟_倒1笔_方向_向上_任意_任意_0").is_match(ps)
+        assert False
+    except ValueError:
+        pass
+
+    event = Event(operate=Operate.LO, factors=[Factor(signals_all=[signals[1], signals[2]])])
+    assert event.is_match(ps) == event.is_match(dict(ps)) and event.is_match(ps)[0]
+
+
+def test_parsed_signals_mutators():
+    """所有修改信号字典的方法都会清除已有的解析结果和匹配结果"""
+    key = "15分钟_倒0笔_方向"
+    up, down = Signal(f"{key}_向上_任意_任意_0"), Signal(f"{key}_向下_任意_任意_0")
+
+    def make():
+        ps = ParsedSignals({key: "向上_其他_其他_0", "dt": 1})
+        assert up.is_match(ps) and not down.is_match(ps)
+        return ps
+
+    def not_matched(ps):
+        try:
+            up.is_match(ps)
+            return False
+        except ValueError:
+            return True
+
+    mutators = {
+        "setitem": lambda ps: ps.__setitem__(key, "向下_其他_其他_0"),
+        "update": lambda ps: ps.update({key: "向下_其他_其他_0"}),
+        "ior": lambda ps: ps.__ior__({key: "向下_其他_其他_0"}),
+        "setdefault": lambda ps: (ps.pop(key), ps.setdefault(key, "向下_其他_其他_0")),
+    }
+    for name, func in mutators.items():
+        ps = make()
+        func(ps)
+        assert down.is_match(ps) and not up.is_match(ps), name
+
+    removers = {
+        "delitem": lambda ps: ps.__delitem__(key),
+        "pop": lambda ps: ps.pop(key),
+        "popitem": lambda ps: ps.popitem(last=False),
+        "clear": lambda ps: ps.clear(),
+    }
+    for name, func in removers.items():
+        ps = make()
+        func(ps)
+        assert key not in ps and not_matched(ps), name
+
+    # setdefault 不修改已有的信号值
+    ps = make()
+    assert ps.setdefault(key, "向下_其他_其他_0") == "向上_其他_其他_0" and up.is_match(ps)
+    assert ps.pop("not_exist", None) is None and up.is_match(ps)
+
+
+def test_signal_unpickle_legacy():
+    """旧版本序列化的 Signal 没有匹配模板，反序列化后重新计算，匹配结果不变"""
+    import pickle
+
+    s = {"15分钟_倒0笔_方向": "向上_其他_其他_0", "15分钟_倒0笔_长度": "大于5_其他_其他_10"}
+    event = Event(operate=Operate.LO, factors=[Factor(signals_all=[Signal("15分钟_倒0笔_方向_向上_任意_任意_0")],
+                                                      signals_not=[Signal("15分钟_倒0笔_长度_大于5_其他_任意_20")])])
+    legacy = pickle.loads(pickle.dumps(event))
+    for signal in legacy.factors[0].signals_all + legacy.factors[0].signals_not:
+        for key in ["_key", "_signal", "_pattern"]:
+            del signal.__dict__[key]
+
+    restored = pickle.loads(pickle.dumps(legacy))
+    signal = restored.factors[0].signals_all[0]
+    assert signal == event.factors[0].signals_all[0] and signal._pattern == ("向上", None, None)
+    assert restored.is_match(s) == restored.is_match(ParsedSignals(s)) == event.is_match(s)
+    assert restored.is_match(s)[0]
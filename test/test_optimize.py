@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/17 22:30
+describe: 择时策略开平仓优化单元测试
+"""
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+import czsc
+from loguru import logger
+from czsc import mock
+from czsc.objects import Event, Position
+from czsc.utils import format_standard_kline, save_json
+from czsc.traders.optimize import (
+    OpensOptimize, ExitsOptimize, CzscOpenOptimStrategy, CzscExitOptimStrategy, positions_stats
+)
+
+symbols = ["S001", "S002", "S003"]
+kwargs = dict(signals_module_name="czsc.signals", bar_sdt="20200101", bar_edt="20201001", sdt="20200401")
+_cache = {}
+
+
+def read_bars(symbol, freq, sdt, edt, fq="后复权", raw_bar=True):
+    if symbol not in _cache:
+        df = mock.generate_symbol_kines(symbol, "30分钟", sdt="20200101", edt="20201001", seed=int(symbol[1:]))
+        _cache[symbol] = format_standard_kline(df, freq="30分钟")
+    sdt, edt = pd.to_datetime(sdt), pd.to_datetime(edt)
+    return [x for x in _cache[symbol] if sdt <= x.dt <= edt]
+
+
+def _make_betas(path):
+    files = []
+    for op, value in [("开多", "多头"), ("开空", "空头")]:
+        event = Event.load({"operate": op, "factors": [
+            {"name": value, "signals_all": [f"日线_D1SMA#5_分类V221101_{value}_任意_任意_0"]}]})
+        pos = Position(symbol="symbol", opens=[event], name=f"SMA5{value}", timeout=50, stop_loss=300, interval=3600)
+        pos_ = pos.dump()
+        pos_.pop("symbol")
+        pos_["md5"] = hashlib.md5(str(pos_).encode()).hexdigest()
+        file = os.path.join(path, f"{pos.name}.json")
+        save_json(pos_, file)
+        files.append(file)
+    return files
+
+
+def _legacy_stats(make_tactic, pos_names):
+    """旧版本的统计方式：每个标的逐根K线回测，每个持仓单独汇总截面收益"""
+    pairs, holds = {}, {}
+    for symbol in symbols:
+        tactic = make_tactic(symbol)
+        bars = read_bars(symbol, tactic.base_freq, kwargs["bar_sdt"], kwargs["bar_edt"])
+        trader = tactic.backtest(bars, sdt=kwargs["sdt"])
+        for pos in trader.positions:
+            dfh = pd.DataFrame(pos.holds)
+            dfh["n1b"] = (dfh["price"].shift(-1) / dfh["price"] - 1) * 10000
+            dfh.fillna(0, inplace=True)
+            pairs.setdefault(pos.name, []).append(pd.DataFrame(pos.pairs))
+            holds.setdefault(pos.name, []).append(dfh)
+
+    res = {}
+    for name in pos_names:
+        dfp = pd.concat(pairs[name], ignore_index=True)
+        dfh = pd.concat(holds[name], ignore_index=True)
+        if len(dfp) == 0:
+            continue
+        grouped = dfh.groupby("dt")[["n1b", "pos"]]
+        cross = grouped.apply(lambda x: (x["n1b"] * x["pos"]).sum() / (sum(x["pos"] != 0) + 1)).sum()
+        cross1 = grouped.apply(lambda x: (x["n1b"] * x["pos"]).mean()).sum()
+        res[name] = dict(czsc.PairsPerformance(dfp).basic_info, 截面等权收益=cross, 截面品种等权=cross1)
+    return res
+
+
+def _check_stats(optim, make_tactic):
+    pos_names = [x.name for x in make_tactic("symbol").positions]
+    stats = {x["pos_name"]: x for x in positions_stats(optim.poss_path, pos_names)}
+    expected = _legacy_stats(make_tactic, pos_names)
+    assert len(expected) > 3 and stats.keys() == expected.keys()
+    for name, v in expected.items():
+        for key, value in v.items():
+            if isinstance(value, (int, float)):
+                assert np.isclose(stats[name][key], value), (name, key)
+            else:
+                assert stats[name][key] == value, (name, key)
+
+
+def test_exits_optimize(tmp_path):
+    """出场优化的截面统计与旧版本逐个持仓统计的结果一致"""
+    candidate_events = [
+        {"operate": op, "factors": [{"name": v, "signals_all": [f"60分钟_D1SMA#5_分类V221101_{v}_任意_任意_0"]}]}
+        for op in ["平多", "平空"] for v in ["多头", "空头"]
+    ]
+    params = dict(symbols=symbols, files_position=_make_betas(tmp_path), results_path=str(tmp_path), **kwargs)
+    eop = ExitsOptimize(read_bars, candidate_events=candidate_events, **params)
+    eop.execute(n_jobs=1)
+    assert sorted(os.listdir(os.path.join(eop.poss_path, "S001"))) == ["holds.parquet", "pairs.parquet"]
+
+    _check_stats(eop, lambda s: CzscExitOptimStrategy(symbol=s, candidate_events=candidate_events, **params))
+
+
+def test_opens_optimize(tmp_path):
+    """入场优化的截面统计与旧版本逐个持仓统计的结果一致，旧版本结果文件会被检测并记录日志"""
+    candidate_signals = ["60分钟_D1SMA#5_分类V221101_多头_任意_任意_0", "60分钟_D1SMA#5_分类V221101_空头_任意_任意_0"]
+    params = dict(symbols=symbols, files_position=_make_betas(tmp_path), results_path=str(tmp_path), **kwargs)
+    oop = OpensOptimize(read_bars, candidate_signals=candidate_signals, **params)
+    oop.execute(n_jobs=1)
+
+    _check_stats(oop, lambda s: CzscOpenOptimStrategy(symbol=s, candidate_signals=candidate_signals, **params))
+
+    # 只有旧版本结果文件的标的目录：不参与统计，记录警告
+    legacy_dir = tmp_path / "legacy" / "S001"
+    legacy_dir.mkdir(parents=True)
+    pd.DataFrame({"dt": [], "pos": []}).to_parquet(legacy_dir / "SMA5多头.holds")
+    messages = []
+    sink = logger.add(messages.append, level="WARNING")
+    try:
+        assert positions_stats(tmp_path / "legacy", ["SMA5多头"]) == []
+    finally:
+        logger.remove(sink)
+    assert any("旧版本" in str(m) for m in messages)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/17 21:00
+describe: czsc.connectors.research 本地分钟数据读取单元测试
+"""
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def research(tmp_path, monkeypatch):
+    monkeypatch.setenv("czsc_research_cache", str(tmp_path))
+    from czsc.connectors import research
+
+    monkeypatch.setattr(research, "cache_path", str(tmp_path))
+    return research
+
+
+def _minute_df(symbol, days):
+    dts = [pd.date_range(f"{d} 09:31", periods=30, freq="1min") for d in days]
+    ts = pd.DatetimeIndex(sorted(x for d in dts for x in d))
+    return pd.DataFrame({
+        "stock_code": symbol, "timestamp": ts, "open": 10.0, "close": 10.0 + pd.RangeIndex(len(ts)) / 100,
+        "high": 11.0, "low": 9.0, "volume": 100.0, "amount": 1000.0, "period": 1,
+    })
+
+
+def _write_minute_tree(root, symbol="000001.SZ"):
+    """跨年的 minute_by_stock 目录：月度文件、增量片段、字符串类型的 timestamp 列"""
+    stock_dir = root / "minute_by_stock" / f"stock_code={symbol}"
+    parts = {
+        "year=2023/{s}_2023-11.parquet": _minute_df(symbol, ["2023-11-20", "2023-11-21"]),
+        "year=2023/{s}_2023-12.parquet": _minute_df(symbol, ["2023-12-14", "2023-12-15", "2023-12-28"]),
+        "year=2024/{s}_2024-01.parquet": _minute_df(symbol, ["2024-01-03", "2024-01-04"]),
+        "year=2024/{s}_2024-01_d0001.parquet": _minute_df(symbol, ["2024-01-05"]),
+        "year=2024/{s}_2024-03.parquet": _minute_df(symbol, ["2024-03-04", "2024-03-11"]),
+        "year=2024/{s}_2024-04.parquet": _minute_df(symbol, ["2024-04-01"]),
+    }
+    df_str = parts["year=2024/{s}_2024-03.parquet"]
+    df_str["timestamp"] = df_str["timestamp"].astype(str)
+    for key, df in parts.items():
+        fp = stock_dir / key.format(s=symbol)
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(fp, index=False)
+    return stock_dir, pd.concat(parts.values(), ignore_index=True)
+
+
+def test_prune_minute_files(research, tmp_path):
+    """按年份目录和文件名中的月份裁剪，增量片段与月度文件一起保留"""
+    stock_dir, _ = _write_minute_tree(tmp_path)
+    files = research._prune_minute_files(stock_dir, pd.Timestamp("2023-12-15"), pd.Timestamp("2024-03-10"))
+    assert [fp.name for fp in files] == [
+        "000001.SZ_2023-12.parquet", "000001.SZ_2024-01.parquet",
+        "000001.SZ_2024-01_d0001.parquet", "000001.SZ_2024-03.parquet",
+    ]
+
+
+def test_get_raw_bars_minute(research, tmp_path):
+    """跨年读取，字符串 timestamp 回退到读取后过滤，并行与串行读取结果一致"""
+    _, df = _write_minute_tree(tmp_path)
+    sdt, edt = "2023-12-15 10:00", "2024-03-04 09:45"
+    ts = pd.to_datetime(df["timestamp"])
+    expected = sorted(ts[(ts >= sdt) & (ts <= edt)])
+
+    bars = research.get_raw_bars_minute("000001.SZ", "1分钟", sdt, edt)
+    assert [x.dt for x in bars] == expected
+    assert pd.Timestamp("2024-01-05 09:31") in {x.dt for x in bars}
+    assert pd.Timestamp("2024-03-04 09:31") in {x.dt for x in bars}
+
+    bars1 = research.get_raw_bars_minute("000001.SZ", "1分钟", sdt, edt, max_workers=1)
+    assert [(x.dt, x.close) for x in bars1] == [(x.dt, x.close) for x in bars]
+    assert research.get_raw_bars_minute("000002.SZ", "1分钟", sdt, edt) == []
+
+
+def test_read_minute_file_invalid(research, tmp_path):
+    """损坏的文件记录日志后跳过，不影响其他文件"""
+    stock_dir, _ = _write_minute_tree(tmp_path)
+    bad = stock_dir / "year=2024" / "000001.SZ_2024-02.parquet"
+    bad.write_bytes(b"not a parquet file")
+    assert research._read_minute_file(bad, pd.Timestamp("2024-02-01"), pd.Timestamp("2024-02-28")) is None
+
+    bars = research.get_raw_bars_minute("000001.SZ", "1分钟", "2024-01-01", "2024-03-31")
+    assert len(bars) == 30 * 5
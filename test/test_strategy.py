@@ -32,6 +32,13 @@ def test_czsc_strategy_example2():
     trader3 = strategy.dummy(sigs, sleep_time=0.1)
     assert len(trader3.positions) == 2
 
+    # 向量化持仓模拟与逐根K线回测的结果完全一致
+    trader4 = strategy.dummy(pd.DataFrame(sigs), vectorized=True)
+    trader5 = strategy.backtest(bars, init_n=2000, sdt="20170101", vectorized=True)
+    for pos1, pos2, pos4, pos5 in zip(trader1.positions, trader2.positions, trader4.positions, trader5.positions):
+        assert pos2.operates == pos4.operates and pos2.holds == pos4.holds
+        assert pos1.operates == pos5.operates and pos1.holds == pos5.holds and pos1.pairs == pos5.pairs
+
     for i in [0, 1]:
         pos1 = trader1.positions[i]
         assert trader1.positions[i].evaluate()['日胜率'] == trader2.positions[i].evaluate()['日胜率']
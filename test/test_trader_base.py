@@ -5,6 +5,7 @@ email: zeng_bin8888@163.com
 create_dt: 2021/11/7 21:07
 """
 import os
+import pytest
 import pandas as pd
 from copy import deepcopy
 from czsc.utils.cache import home_path
@@ -287,3 +288,199 @@ def test_czsc_trader():
     assert len(ct1.positions[0].pairs) == len(ct2.positions[0].pairs)
     assert len(ct1.positions[1].pairs) == len(ct2.positions[1].pairs)
     assert len(ct1.positions[2].pairs) == len(ct2.positions[2].pairs)
+
+
+def test_simulate_positions():
+    """向量化持仓模拟与逐根K线调用 Position.update 的结果完全一致"""
+    import itertools
+    from czsc import mock
+    from czsc.utils import format_standard_kline
+    from czsc.traders.base import generate_czsc_signals
+    from czsc.traders.position_sim import simulate_positions, simulate_position
+
+    df = mock.generate_symbol_kines("000001", "5分钟", sdt="20230101", edt="20230401", seed=7)
+    bars = format_standard_kline(df, freq="5分钟")
+    signals_config = [
+        {'name': 'czsc.signals.tas_ma_base_V221101', 'freq': '5分钟', 'di': 1, 'ma_type': 'SMA', 'timeperiod': 5},
+        {'name': 'czsc.signals.bar_single_V230214', 'freq': '5分钟', 'di': 1},
+        {'name': 'czsc.signals.cxt_bi_status_V230101', 'freq': '15分钟'},
+    ]
+    sigs = generate_czsc_signals(bars, signals_config, sdt='20230201', df=True)
+
+    opens = [
+        Event.load({"operate": "开多", "factors": [
+            {"name": "多", "signals_all": ["5分钟_D1SMA#5_分类V221101_多头_向上_任意_0"],
+             "signals_any": ["5分钟_D1T10_状态_阳线_任意_任意_0", "15分钟_D1_表里关系V230101_向上_任意_任意_0"]}]}),
+        Event.load({"operate": "开空", "factors": [
+            {"name": "空", "signals_all": ["5分钟_D1SMA#5_分类V221101_空头_向下_任意_0"],
+             "signals_not": ["5分钟_D1T10_状态_阳线_任意_任意_0"]}]}),
+    ]
+    exits = [
+        Event.load({"operate": "平多", "factors": [{"signals_all": ["15分钟_D1_表里关系V230101_向下_底分_任意_0"]}]}),
+        Event.load({"operate": "平空", "factors": [{"signals_all": ["15分钟_D1_表里关系V230101_向上_顶分_任意_0"]}]}),
+    ]
+    positions = []
+    grid = itertools.product([True, False], [0, 3600 * 4], [30, 1000], [20, 1000], [True, False])
+    for i, (T0, interval, stop_loss, timeout, with_exits) in enumerate(grid):
+        positions.append(Position(symbol="000001", opens=opens, exits=exits if with_exits else [], T0=T0,
+                                  interval=interval, stop_loss=stop_loss, timeout=timeout, name=f"P{i}"))
+
+    trader = CzscTrader(positions=deepcopy(positions))
+    for s in sigs.to_dict('records'):
+        trader.on_sig(s)
+
+    sim = simulate_positions(positions, sigs)
+    assert all(not x.holds for x in positions)
+    for pos1, pos2 in zip(trader.positions, sim):
+        assert pos1.operates == pos2.operates and pos1.holds == pos2.holds and pos1.pairs == pos2.pairs
+        for attr in ['pos', 'pos_changed', 'last_event', 'last_lo_dt', 'last_so_dt', 'end_dt']:
+            assert getattr(pos1, attr) == getattr(pos2, attr)
+    assert len({len(x.operates) for x in sim}) > 5
+
+    pos = simulate_position(positions[0], sigs.to_dict('records'))
+    assert pos.operates == sim[0].operates
+
+    # 止损、超时出场之后还有若干根没有事件的K线，pos_changed 与逐根K线更新一致
+    records, dts = sigs.to_dict('records'), pd.to_datetime(sigs['dt'])
+    checked = 0
+    for position in positions[1::2]:
+        pos, changed = deepcopy(position), []
+        for s in records:
+            pos.update(s)
+            changed.append(pos.pos_changed)
+        exits_dt = [x['dt'] for x in pos.operates if x['op_desc'].endswith(('止损', '超时'))]
+        for dt in exits_dt[:5]:
+            k = int((dts == pd.Timestamp(dt)).to_numpy().argmax())
+            for m in [k + 1, k + 2, k + 4]:
+                assert simulate_position(position, sigs.iloc[:m]).pos_changed == changed[m - 1]
+                checked += 1
+    assert checked > 30
+
+
+def test_signals_cache(tmp_path):
+    """信号缓存增量追加新K线后，与一次性计算的信号完全一致"""
+    from czsc import mock
+    from czsc.utils import format_standard_kline
+    from czsc.traders.base import generate_czsc_signals
+    from czsc.traders.sig_cache import SignalsCache
+
+    df = mock.generate_symbol_kines("000001", "15分钟", sdt="20230101", edt="20230601", seed=3)
+    bars = format_standard_kline(df, freq="15分钟")
+    signals_config = [
+        {'name': 'czsc.signals.tas_ma_base_V221101', 'freq': '日线', 'di': 1, 'ma_type': 'SMA', 'timeperiod': 5},
+        {'name': 'czsc.signals.cxt_bi_status_V230101', 'freq': '30分钟'},
+    ]
+    full = generate_czsc_signals(bars, signals_config, sdt="20230301", df=True).drop(columns=['freq', 'cache'])
+
+    def read_bars_until(edt):
+        def read_bars(symbol, freq, sdt, edt_, fq):
+            return [x for x in bars if pd.to_datetime(sdt) <= x.dt <= min(pd.to_datetime(edt_), pd.to_datetime(edt))]
+        return read_bars
+
+    cache = SignalsCache(tmp_path, signals_config, base_freq="15分钟")
+    sigs1 = cache.get("000001", read_bars_until("20230415"), sdt="20230301", edt="20230701", bars_sdt="20230101")
+    assert sigs1['dt'].max() < pd.Timestamp("20230416")
+
+    sigs2 = cache.get("000001", read_bars_until("20230701"), sdt="20230301", edt="20230701")
+    pd.testing.assert_frame_equal(sigs2, full, check_dtype=False)
+    assert len(cache.load("000001")) == len(full)
+
+    # 缓存已覆盖 edt 时不再读取K线
+    sigs3 = cache.get("000001", None, sdt="20230401", edt="20230501")
+    assert sigs3['dt'].min() >= pd.Timestamp("20230401") and sigs3['dt'].max() <= pd.Timestamp("20230501")
+
+    cache.clear("000001")
+    assert cache.load("000001").empty
+
+
+def test_checkpoint_restore(tmp_path):
+    """从快照恢复后继续更新，信号、笔和持仓状态与未中断时完全一致"""
+    from czsc import mock
+    from czsc.utils import format_standard_kline
+    from czsc.traders.base import init_bar_generator
+    from czsc.traders.checkpoint import save_checkpoint, load_checkpoint
+
+    df = mock.generate_symbol_kines("000001", "15分钟", sdt="20230101", edt="20230801", seed=5)
+    bars = format_standard_kline(df, freq="15分钟")
+    signals_config = [
+        {'name': 'czsc.signals.tas_ma_base_V221101', 'freq': '日线', 'di': 1, 'ma_type': 'SMA', 'timeperiod': 5},
+        {'name': 'czsc.signals.tas_macd_base_V221028', 'freq': '60分钟', 'di': 1},
+        {'name': 'czsc.signals.cxt_bi_status_V230101', 'freq': '30分钟'},
+    ]
+    opens = [
+        Event.load({"operate": "开多", "factors": [
+            {"name": "多", "signals_all": ["日线_D1SMA#5_分类V221101_多头_任意_任意_0"]}]}),
+        Event.load({"operate": "开空", "factors": [
+            {"name": "空", "signals_all": ["日线_D1SMA#5_分类V221101_空头_任意_任意_0"]}]}),
+    ]
+    positions = [Position(symbol="000001", opens=opens, name="P1", timeout=50, stop_loss=100)]
+    bg, bars_right = init_bar_generator(bars, signals_config, sdt="20230301", bg_max_count=1000)
+    trader = CzscTrader(bg, positions=positions, signals_config=signals_config)
+    n = len(bars_right) // 2
+    for bar in bars_right[:n]:
+        trader.update(bar)
+
+    file = tmp_path / "trader.ckpt"
+    save_checkpoint(trader, file)
+    restored = load_checkpoint(file)
+    assert isinstance(restored, CzscTrader) and dict(restored.s) == dict(trader.s)
+
+    for bar in bars_right[n:]:
+        trader.update(bar)
+        restored.update(bar)
+        assert dict(restored.s) == dict(trader.s)
+
+    for freq, c in trader.kas.items():
+        c2 = restored.kas[freq]
+        assert [(x.sdt, x.edt, x.high, x.low) for x in c.bi_list] == [(x.sdt, x.edt, x.high, x.low) for x in c2.bi_list]
+        assert [x.dt for x in c.bars_raw] == [x.dt for x in c2.bars_raw]
+    pos1, pos2 = trader.positions[0], restored.positions[0]
+    assert pos1.operates == pos2.operates and pos1.holds == pos2.holds and pos1.pos == pos2.pos
+
+    snapshot = trader.checkpoint(with_holds=False)
+    assert CzscSignals.restore(snapshot).positions[0].holds == []
+    snapshot['version'] = -1
+    with pytest.raises(ValueError):
+        CzscSignals.restore(snapshot)
+
+
+def test_trader_unpickle_legacy():
+    """旧版本序列化的 CzscTrader（缺少新增的内部状态）反序列化后可以继续更新，结果与连续更新一致"""
+    import pickle
+    from czsc import mock
+    from czsc.utils import format_standard_kline
+    from czsc.traders.base import init_bar_generator
+
+    df = mock.generate_symbol_kines("000001", "15分钟", sdt="20230101", edt="20230801", seed=5)
+    bars = format_standard_kline(df, freq="15分钟")
+    signals_config = [
+        {'name': 'czsc.signals.tas_ma_base_V221101', 'freq': '日线', 'di': 1, 'ma_type': 'SMA', 'timeperiod': 5},
+        {'name': 'czsc.signals.cxt_bi_status_V230101', 'freq': '30分钟'},
+    ]
+    opens = [Event.load({"operate": "开多", "factors": [
+        {"name": "多", "signals_all": ["日线_D1SMA#5_分类V221101_多头_任意_任意_0"]}]})]
+    positions = [Position(symbol="000001", opens=opens, name="P1", timeout=50, stop_loss=100)]
+    bg, bars_right = init_bar_generator(bars, signals_config, sdt="20230301", bg_max_count=1000)
+    trader = CzscTrader(bg, positions=positions, signals_config=signals_config)
+    n = len(bars_right) // 2
+    for bar in bars_right[:n]:
+        trader.update(bar)
+
+    legacy = pickle.loads(pickle.dumps(trader))
+    del legacy.__dict__["_CzscSignals__compiled"]
+    for c in legacy.kas.values():
+        for key in ["_CZSC__ubi_fxs", "_CZSC__ubi_fxs_stash", "_CZSC__first_bi", "indicators"]:
+            del c.__dict__[key]
+    for event in legacy.positions[0].opens:
+        for signal in [x for f in event.factors for x in f.signals_all + f.signals_any + f.signals_not]:
+            for key in ["_key", "_signal", "_pattern"]:
+                del signal.__dict__[key]
+    restored = pickle.loads(pickle.dumps(legacy))
+
+    # 两个 trader 各自写入K线缓存，不能共用同一组 RawBar
+    for bar1, bar2 in zip(bars_right[n:], pickle.loads(pickle.dumps(bars_right[n:]))):
+        trader.update(bar1)
+        restored.update(bar2)
+        assert dict(restored.s) == dict(trader.s)
+    pos1, pos2 = trader.positions[0], restored.positions[0]
+    assert pos1.operates == pos2.operates and pos1.pos == pos2.pos
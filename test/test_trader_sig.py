@@ -6,6 +6,9 @@ create_dt: 2023/3/29 15:28
 describe: 测试
 """
 import czsc
+import pandas as pd
+import pytest
+from loguru import logger
 from czsc.traders.sig_parse import SignalsParser
 from test.test_analyze import read_daily
 
@@ -33,3 +36,141 @@ def test_signals_parser():
     assert isinstance(conf, list)
     keys = sp.config_to_keys(conf)
     assert isinstance(keys, list) and len(keys) == 2
+
+
+def test_compiled_signals_config(monkeypatch):
+    """信号配置只在首次使用时解析一次，逐根K线更新时复用"""
+    from czsc.traders import base
+
+    calls = []
+    raw_import = base.import_by_name
+    monkeypatch.setattr(base, "import_by_name", lambda name: calls.append(name) or raw_import(name))
+
+    bars = read_daily()
+    signals_config = [
+        {'name': 'czsc.signals.tas_ma_base_V221101', 'freq': '日线', 'di': 1, 'ma_type': 'SMA', 'timeperiod': 5},
+        {'name': 'czsc.signals.cxt_bi_status_V230101', 'freq': '日线'},
+    ]
+    sigs = czsc.generate_czsc_signals(bars, signals_config=signals_config, sdt='20150101', df=True)
+    assert len(sigs) > 100 and '日线_D1SMA#5_分类V221101' in sigs.columns
+    assert len(calls) == 2
+    assert signals_config[0]['freq'] == '日线' and signals_config[0]['name'] == 'czsc.signals.tas_ma_base_V221101'
+
+    cs = czsc.CzscSignals(signals_config=[])
+    cs.signals_config = signals_config[1:]
+    assert [x[1] for x in cs.compiled_signals_config] == ['日线'] and len(calls) == 3
+
+
+def test_generate_signals_batch():
+    """批量模式与逐K计算的结果完全一致"""
+    from czsc import mock
+    from czsc.signals.tas import tas_ma_base_V221101
+
+    signals_config = [
+        {'name': 'czsc.signals.tas_ma_base_V221101', 'freq': '5分钟', 'di': 2, 'ma_type': 'SMA', 'timeperiod': 10},
+        {'name': 'czsc.signals.tas_ma_base_V221101', 'freq': '30分钟', 'di': 1, 'ma_type': 'SMA', 'timeperiod': 5},
+        {'name': 'czsc.signals.tas_ma_base_V221101', 'freq': '日线', 'di': 5, 'ma_type': 'EMA', 'timeperiod': 5},
+        {'name': 'czsc.signals.tas_ma_base_V221101', 'freq': '日线', 'di': 1, 'ma_type': 'WMA', 'timeperiod': 5},
+        {'name': 'czsc.signals.tas_double_ma_V221203', 'freq': '60分钟', 'di': 1, 'timeperiod1': 5, 'timeperiod2': 20},
+        {'name': 'czsc.signals.bar_single_V230214', 'freq': '15分钟', 'di': 1},
+    ]
+    assert tas_ma_base_V221101.batch('日线', di=1, ma_type='WMA') is None
+
+    df = mock.generate_symbol_kines("000001", "5分钟", sdt="20230101", edt="20230401", seed=42)
+    bars1 = czsc.format_standard_kline(df, freq="5分钟")
+    bars2 = czsc.format_standard_kline(df, freq="5分钟")
+    sigs1 = czsc.generate_czsc_signals(bars1, signals_config=signals_config, sdt='20230201', df=True)
+    sigs2 = czsc.generate_czsc_signals(bars2, signals_config=signals_config, sdt='20230201', df=True, batch=True)
+    pd.testing.assert_frame_equal(sigs1, sigs2)
+
+    sigs3 = czsc.generate_czsc_signals(bars2, signals_config=signals_config, sdt='20230201', batch=True)
+    assert pd.DataFrame(sigs3).drop(columns=['cache']).equals(sigs1.drop(columns=['cache']))
+
+
+def _read_mock_bars(symbol, freq, sdt, edt, fq=None):
+    if symbol == "BAD":
+        raise ValueError("no data")
+    df = czsc.mock.generate_symbol_kines(symbol, freq, sdt=pd.to_datetime(sdt).strftime("%Y%m%d"),
+                                         edt=pd.to_datetime(edt).strftime("%Y%m%d"))
+    return czsc.format_standard_kline(df, freq=freq)
+
+
+def test_generate_symbols_signals(tmp_path):
+    signals_config = [
+        {'name': 'czsc.signals.tas_ma_base_V221101', 'freq': '日线', 'di': 1, 'ma_type': 'SMA', 'timeperiod': 5},
+    ]
+    kwargs = dict(base_freq='日线', bar_sdt='20190101', sdt='20200101', edt='20210101')
+    report = czsc.generate_symbols_signals(['000001', '000002', 'BAD'], _read_mock_bars, signals_config,
+                                           tmp_path, n_jobs=2, **kwargs)
+    assert report.set_index('symbol')['status'].to_dict() == {'000001': 'success', '000002': 'success', 'BAD': 'failed'}
+    assert 'no data' in report.set_index('symbol').loc['BAD', 'error']
+
+    dfs = pd.read_parquet(tmp_path)
+    assert set(dfs['symbol']) == {'000001', '000002'} and '日线_D1SMA#5_分类V221101' in dfs.columns
+    assert len(dfs) == report['rows'].sum()
+
+    sigs = czsc.generate_czsc_signals(_read_mock_bars('000001', '日线', '20190101', '20210101'), signals_config,
+                                      sdt='20200101', df=True)
+    assert dfs[dfs['symbol'] == '000001']['日线_D1SMA#5_分类V221101'].tolist() == sigs['日线_D1SMA#5_分类V221101'].tolist()
+
+    # 已经生成的标的跳过，只重跑失败的标的
+    report = czsc.generate_symbols_signals(['000001', '000002', 'BAD'], _read_mock_bars, signals_config, tmp_path, **kwargs)
+    assert report['status'].tolist() == ['skipped', 'skipped', 'failed']
+
+
+def test_event_matcher():
+    """向量化匹配与逐行调用 is_match 的结果完全一致"""
+    from czsc.objects import Event, Signal
+
+    bars = read_daily()
+    signals_config = [
+        {'name': 'czsc.signals.tas_ma_base_V221101', 'freq': '日线', 'di': 1, 'ma_type': 'SMA', 'timeperiod': 5},
+        {'name': 'czsc.signals.cxt_bi_status_V230101', 'freq': '日线'},
+        {'name': 'czsc.signals.bar_single_V230214', 'freq': '日线', 'di': 1},
+    ]
+    sigs = czsc.generate_czsc_signals(bars, signals_config=signals_config, sdt='20150101', df=True)
+
+    event = Event.load({
+        "operate": "开多",
+        "signals_not": ["日线_D1T10_状态_阴线_长实体_任意_0"],
+        "factors": [
+            {"name": "向上笔", "signals_all": ["日线_D1SMA#5_分类V221101_多头_任意_任意_0"],
+             "signals_any": ["日线_D1_表里关系V230101_向上_延伸_任意_0", "日线_D1_表里关系V230101_向上_顶分_任意_0"]},
+            {"name": "阳线", "signals_all": ["日线_D1T10_状态_阳线_任意_任意_0"],
+             "signals_not": ["日线_D1SMA#5_分类V221101_空头_向下_任意_0"]},
+        ],
+    })
+    factor = event.factors[0]
+    signal = Signal("日线_D1T10_状态_阳线_长实体_任意_0")
+    matcher = czsc.EventMatcher([event, factor, signal])
+    assert len(matcher.unique_signals) == 7
+
+    dfm = matcher.match(sigs)
+    expected = sigs.apply(event.is_match, axis=1, result_type="expand")
+    assert dfm[event.name].sum() > 0 and dfm[f"{event.name}_F"].nunique() == 2
+    assert (dfm[event.name] == expected[0]).all()
+    assert (dfm[f"{event.name}_F"].fillna("") == expected[1].fillna("")).all()
+    assert (dfm[factor.name] == sigs.apply(factor.is_match, axis=1)).all()
+    assert (dfm[signal.signal] == sigs.apply(signal.is_match, axis=1)).all()
+
+    # 类别编码的信号列
+    cat_cols = [x for x in sigs.columns if x.startswith("日线_")]
+    dfm2 = matcher.match(sigs.astype({x: "category" for x in cat_cols}))
+    pd.testing.assert_frame_equal(dfm, dfm2)
+
+    # 缺少信号列时抛出 KeyError；信号值为空的行按不匹配处理，并记录警告
+    with pytest.raises(KeyError):
+        matcher.match(sigs.drop(columns=[signal.key]))
+
+    sigs3 = sigs.copy()
+    sigs3.loc[sigs3.index[:10], signal.key] = None
+    sigs3.loc[sigs3.index[10:15], signal.key] = ""
+    messages = []
+    sink = logger.add(messages.append, level="WARNING")
+    try:
+        dfm3 = matcher.match(sigs3)
+    finally:
+        logger.remove(sink)
+    assert len(messages) == 1 and "15 行取值为空" in str(messages[0])
+    assert not dfm3[signal.signal].iloc[:15].any()
+    assert (dfm3[signal.signal].iloc[15:] == dfm[signal.signal].iloc[15:]).all()
@@ -89,3 +89,41 @@ def test_timeout_decorator_timeout():
         return "Completed"
 
     assert slow_function() is None
+
+
+def test_stream_indicators():
+    """增量指标与 talib 一致，peek 与 push 的结果相同"""
+    import talib
+    from dataclasses import replace
+    from czsc.utils.ta import StreamSMA, StreamEMA, StreamMACD, StreamBOLL, IndicatorEngine
+    from czsc.objects import RawBar, Freq
+
+    x = np.cumsum(np.random.RandomState(0).randn(2000)) + 100
+
+    def run(indicator):
+        res = []
+        for v in x:
+            value = indicator.peek(v)
+            assert np.allclose(value, indicator.push(v), equal_nan=True)
+            res.append(value)
+        return np.array(res)
+
+    for n in [1, 5, 20]:
+        assert np.allclose(run(StreamSMA(n)), talib.SMA(x, n), equal_nan=True)
+        assert np.allclose(run(StreamEMA(n)), talib.EMA(x, n), equal_nan=True)
+    assert np.allclose(run(StreamMACD(12, 26, 9)).T, talib.MACD(x, 12, 26, 9), equal_nan=True)
+    u, m, lower = talib.BBANDS(x, 20, 2, 2, 0)
+    boll = run(StreamBOLL(20))
+    assert np.allclose(boll[:, 0], m, equal_nan=True) and np.allclose(boll[:, 0] + 2 * boll[:, 1], u, equal_nan=True)
+
+    # 最后一根K线反复更新、一次新增多根K线时，与全量计算一致
+    bars = [RawBar(symbol="x", id=i, dt=pd.Timestamp("2020-01-01") + pd.Timedelta(days=i), freq=Freq.D,
+                   open=v, close=v, high=v, low=v, vol=1, amount=1) for i, v in enumerate(x)]
+    engine = IndicatorEngine()
+    assert len(engine.update(bars[:100], "SMA#5", lambda: StreamSMA(5))) == 100
+    engine.update(bars[:99] + [replace(bars[99], close=1.0)], "SMA#5", lambda: StreamSMA(5))
+    res = engine.update(bars[:100], "SMA#5", lambda: StreamSMA(5))
+    assert len(res) == 1 and np.isclose(res[0][1], talib.SMA(x[:100], 5)[-1])
+    res = engine.update(bars[:103], "SMA#5", lambda: StreamSMA(5))
+    assert [b.id for b, _ in res] == [99, 100, 101, 102]
+    assert np.allclose([v for _, v in res], talib.SMA(x[:103], 5)[-4:])
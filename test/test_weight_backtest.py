@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+author: zengbin93
+email: zeng_bin8888@163.com
+create_dt: 2026/10/17 10:20
+describe: 测试持仓权重回测
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from czsc.traders.weight_backtest import WeightBacktest
+
+
+def _mock_weights():
+    rng = np.random.default_rng(42)
+    dts = pd.date_range("2023-01-03 09:30", periods=600, freq="30min")
+    rows = []
+    for symbol in ["B001", "A001", "C001"]:
+        price = 100 * np.cumprod(1 + rng.normal(0, 0.005, len(dts)))
+        weight = rng.choice([-1, -0.5, -0.29, 0, 0.25, 0.5, 0.73, 1], len(dts))
+        # 部分K线保持上一根的权重，覆盖持仓不变的情况
+        keep = rng.random(len(dts)) < 0.5
+        weight = pd.Series(np.where(keep, np.nan, weight)).ffill().fillna(0).to_numpy()
+        rows.append(pd.DataFrame({"dt": dts, "symbol": symbol, "weight": weight, "price": price}))
+    return pd.concat(rows, ignore_index=True)
+
+
+def test_weight_backtest_columnar():
+    """一次性计算所有品种的结果，与逐个品种计算的结果一致"""
+    dfw = _mock_weights()
+    wb = WeightBacktest(dfw.sample(frac=1, random_state=0), digits=2, fee_rate=0.0002)
+    assert sorted(wb.results.keys() - {"品种等权日收益", "绩效评价"}) == ["A001", "B001", "C001"]
+
+    for symbol in ["A001", "B001", "C001"]:
+        wb.dfw = dfw[dfw["symbol"] == symbol].copy()
+        wb.dfw["weight"] = wb.dfw["weight"].round(2)
+        daily = wb.get_symbol_daily(symbol).reset_index(drop=True)
+        pairs = wb.get_symbol_pairs(symbol)
+        pd.testing.assert_frame_equal(daily, wb.results[symbol]["daily"], check_dtype=False)
+        pd.testing.assert_frame_equal(pairs, wb.results[symbol]["pairs"], check_dtype=False)
+        assert len(pairs) > 100
+
+    dailys = wb.dailys
+    assert list(dailys.columns[:2]) == ["date", "symbol"]
+    assert dailys["symbol"].is_monotonic_increasing
+    assert wb.stats["品种数量"] == 3
+
+
+def test_weight_backtest_stream(tmp_path):
+    """按品种分块流式回测 Parquet 数据集，与一次性读入内存的结果一致"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    dfw = _mock_weights()
+    wb = WeightBacktest(dfw, digits=2, fee_rate=0.0002)
+
+    path = tmp_path / "weights"
+    pq.write_to_dataset(pa.Table.from_pandas(dfw, preserve_index=False), path, partition_cols=["symbol"])
+    wbs = WeightBacktest(path, digits=2, fee_rate=0.0002, chunk_size=2)
+
+    assert wbs.symbols == ["A001", "B001", "C001"]
+    pd.testing.assert_frame_equal(wb.dailys, wbs.dailys, check_dtype=False)
+    pd.testing.assert_frame_equal(wb.results["品种等权日收益"], wbs.results["品种等权日收益"])
+    assert wb.stats == wbs.stats
+    pd.testing.assert_frame_equal(wb.get_symbol_pairs("B001"), wbs.get_symbol_pairs("B001"))
+
+    # 数字形式的股票代码作为分区目录时，仍然按字符串读取
+    dfw["symbol"] = dfw["symbol"].map({"A001": "000001", "B001": "600000", "C001": "300001"})
+    path = tmp_path / "weights_code"
+    pq.write_to_dataset(pa.Table.from_pandas(dfw, preserve_index=False), path, partition_cols=["symbol"])
+    wbs = WeightBacktest(path, digits=2, fee_rate=0.0002, chunk_size=2)
+    assert wbs.symbols == ["000001", "300001", "600000"]
+    assert sorted(wbs.results.keys() - {"品种等权日收益", "绩效评价"}) == ["000001", "300001", "600000"]
+    assert wb.stats == wbs.stats
+
+
+def test_weight_backtest_append(tmp_path):
+    """分多次追加持仓权重，与在完整数据上回测的结果一致"""
+    dfw = _mock_weights()
+    dfw = dfw[~((dfw["symbol"] == "C001") & (dfw["dt"] < "2023-01-10"))]
+    wb = WeightBacktest(dfw, digits=2, fee_rate=0.0002)
+
+    # 第一段不包含 C001；第二段在日内切分
+    dts = sorted(dfw["dt"].unique())
+    dfw1 = dfw[dfw["dt"] < "2023-01-08"]
+    dfw2 = dfw[(dfw["dt"] >= "2023-01-08") & (dfw["dt"] < dts[400])]
+    dfw3 = dfw[dfw["dt"] >= dts[400]]
+
+    wbi = WeightBacktest(dfw1, digits=2, fee_rate=0.0002)
+    wbi.append(dfw2)
+    file = tmp_path / "wb.pkl"
+    wbi.save(file)
+    wbi = WeightBacktest.load(file)
+    wbi.append(dfw3)
+
+    assert sorted(wbi.symbols) == ["A001", "B001", "C001"]
+    cols = [x for x in wb.dailys.columns if x not in ["date", "symbol"]]
+    assert (wb.dailys[["date", "symbol"]] == wbi.dailys[["date", "symbol"]]).all().all()
+    assert np.allclose(wb.dailys[cols].to_numpy(), wbi.dailys[cols].to_numpy())
+    for symbol in ["A001", "B001", "C001"]:
+        pd.testing.assert_frame_equal(wb.results[symbol]["pairs"], wbi.results[symbol]["pairs"], check_dtype=False)
+
+    for k, v in wb.stats.items():
+        if isinstance(v, str):
+            assert v == wbi.stats[k]
+        else:
+            assert abs(v - wbi.stats[k]) < 1e-3, k
+
+    with pytest.raises(ValueError):
+        wbi.append(dfw3)